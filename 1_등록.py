@@ -1,11 +1,9 @@
 import streamlit as st
 import pandas as pd
-import qrcode
 import base64
 import hashlib
 from io import BytesIO
 from datetime import datetime, timedelta, timezone
-from PIL import Image, ImageOps
 import streamlit.components.v1 as components
 
 from container_ocr import (
@@ -13,10 +11,15 @@ from container_ocr import (
     OcrError,
     OCR_SPACE_DEMO_KEY,
 )
+from metrics import track_operation, tracked
 from utils import (
-    load_data_from_gsheet,
+    sync_container_list,
+    follow_change_feed,
+    mark_dialog_open,
     add_row_to_gsheet,
     update_row_in_gsheet,
+    RowConflict,
+    apply_row_conflict,
     backup_data_to_new_sheet,
     delete_from_backup_sheets,
     BACKUP_PREFIX,
@@ -31,19 +34,25 @@ from utils import (
     find_same_day_duplicate,
     DEFAULT_PRINTER_IP,
     load_config,
-    button_marker
+    button_marker,
+    rerun_fragment,
+    maybe_run_retention,
+    warm_up_connection
 )
 
 if "printer_ip" not in st.session_state:
     st.session_state["printer_ip"] = load_config().get("printer_ip", DEFAULT_PRINTER_IP)
 
 st.set_page_config(page_title="등록 페이지", layout="wide", initial_sidebar_state="expanded")
+warm_up_connection()  # 새 프로세스면 인증·시트 목록·현재 데이터를 백그라운드로 미리 준비
 
 def get_korea_now():
     return datetime.now(timezone(timedelta(hours=9)))
 
 @st.cache_data
 def generate_qrcode(data: str) -> bytes:
+    import qrcode  # 미리보기를 고를 때만 필요 — 페이지 첫 로딩에서 import 비용을 뺀다
+
     img = qrcode.make(data)
     fp = BytesIO()
     img.save(fp, format="PNG")
@@ -62,7 +71,8 @@ def run_container_ocr(image_bytes: bytes):
     if key not in cache:
         api_key = st.secrets.get("ocrspace_api_key", OCR_SPACE_DEMO_KEY)
         try:
-            cache[key] = ("ok", recognize_container_numbers(image_bytes, api_key))
+            with track_operation("OCR"):
+                cache[key] = ("ok", recognize_container_numbers(image_bytes, api_key))
         except OcrError as e:
             cache[key] = ("error", str(e))
     return key, cache[key]
@@ -105,14 +115,14 @@ def clear_form_inputs():
     st.session_state["form_destination"] = dests[0] if dests else ""
     st.session_state["form_feet"] = "40"
 
+@tracked("선적완료")
 def complete_and_backup_container(container_no, record_undo=True):
     """컨테이너를 선적완료 처리해 일별/월별 백업으로 옮기고 메인 시트·세션에서 제거한다.
     (선적완료 = 자동 백업+제거. 데이터 백업 버튼을 대체한다.)
     record_undo=True면 '방금 선적완료 되돌리기'용 스냅샷을 저장한다.
 
     반환: (성공여부, 실패 시 오류 메시지 / 성공 시 백업에서 덮어쓴 번호 목록)"""
-    idx = next((i for i, c in enumerate(st.session_state.container_list)
-                if c.get('컨테이너 번호') == container_no), None)
+    idx = st.session_state.container_list.position_of(container_no)
     if idx is None:
         return False, "컨테이너를 찾을 수 없습니다."
     original = st.session_state.container_list[idx].copy()  # 선적중 원본(되돌리기용)
@@ -136,6 +146,7 @@ def complete_and_backup_container(container_no, record_undo=True):
     log_change(f"선적완료 자동 백업: {container_no} (위치 {item.get('위치')})")
     return True, res
 
+@tracked("되돌리기")
 def undo_last_completed():
     """방금 선적완료한 컨테이너를 백업에서 빼내 다시 선적중 상태로 되돌린다."""
     snap = st.session_state.get('last_completed')
@@ -144,14 +155,11 @@ def undo_last_completed():
     original = snap['item']
     cno = original.get('컨테이너 번호')
     pos = str(original.get('위치') or '').strip()
-    if any(c.get('컨테이너 번호') == cno for c in st.session_state.container_list):
+    if st.session_state.container_list.find(cno) is not None:
         st.session_state.pop('last_completed', None)
         return False, "이미 목록에 있어 되돌릴 수 없습니다."
     # 원래 위치가 다른 선적중 컨테이너에 점유됐으면 막는다.
-    occupied = {
-        str(c.get('위치') or '').strip()
-        for c in st.session_state.container_list if c.get('상태') == '선적중'
-    }
+    occupied = st.session_state.container_list.occupied_slots()
     note = None
     restore = original.copy()
     restore['상태'] = '선적중'
@@ -172,6 +180,7 @@ def undo_last_completed():
     log_change(f"선적완료 되돌리기: {cno} (위치 {restore.get('위치') or '없음'})")
     return True, note
 
+@tracked("등록")
 def register_new_container(new_container):
     """신규 컨테이너를 시트에 추가하고 세션 목록에 반영한다."""
     with st.spinner('데이터를 저장하는 중...'):
@@ -191,8 +200,8 @@ def edit_container_dialog(container_no):
     """현황 표의 ✏️ 칸을 체크했을 때 뜨는 수정 팝업.
     위치/출고처/피트수/씰번호를 바로 수정한다.
     (선적완료는 표의 '선적완료' 체크로 처리하므로 상태는 다루지 않는다.)"""
-    idx = next((i for i, c in enumerate(st.session_state.container_list)
-                if c.get('컨테이너 번호') == container_no), None)
+    mark_dialog_open()
+    idx = st.session_state.container_list.position_of(container_no)
     if idx is None:
         st.error("컨테이너를 찾을 수 없습니다. 새로고침 후 다시 시도해주세요.")
         return
@@ -227,24 +236,25 @@ def edit_container_dialog(container_no):
     button_marker("primary")
     if st.button("💾 저장", use_container_width=True):
         # 다른 선적중 컨테이너가 이미 점유한 위치로는 옮길 수 없다.
-        occupied = {
-            str(c.get('위치') or '').strip()
-            for c in st.session_state.container_list
-            if c.get('상태') == '선적중' and c.get('컨테이너 번호') != container_no
-        }
+        occupied = st.session_state.container_list.occupied_slots(exclude=container_no)
         if new_pos != RESTORE_SLOT and new_pos in occupied:  # 복원 슬롯은 여러 개 허용
             st.error(f"위치 {new_pos}은(는) 이미 사용 중입니다. 다른 위치를 선택하세요.")
         else:
             updated = data.copy()
             updated.update({'출고처': new_dest, '피트수': new_feet,
                             '씰 번호': str(new_seal), '위치': new_pos})
-            with st.spinner('수정사항을 저장하는 중...'):
-                ok, msg = update_row_in_gsheet(updated)
+            with track_operation("수정"), st.spinner('수정사항을 저장하는 중...'):
+                ok, msg = update_row_in_gsheet(updated, base=data)
             if ok:
                 st.session_state.container_list[idx] = updated
                 # 수정 완료 안내는 현황 표(되돌리기 버튼) 아래에 표시한다.
                 st.session_state["table_action_msg"] = ("success", f"'{container_no}' 정보가 수정되었습니다.")
                 st.rerun()
+            elif isinstance(msg, RowConflict):
+                # 다른 기기가 먼저 고쳤다: 목록 전체를 다시 읽지 않고 그 행만 바꾼 뒤 다시 보여 준다
+                apply_row_conflict(st.session_state.container_list, idx, msg)
+                st.session_state["table_action_msg"] = ("warning", str(msg))
+                st.rerun()
             else:
                 st.error(f"수정 실패: {msg}")
 
@@ -253,6 +263,7 @@ def edit_container_dialog(container_no):
 def confirm_slot_takeover():
     """등록하려는 위치에 이미 선적중 컨테이너가 있을 때, 기존 것을 선적완료(백업)
     처리하고 새로 등록할지 확인한다."""
+    mark_dialog_open()
     new_c = st.session_state.get("pending_new_container")
     occ_no = st.session_state.get("pending_slot_occupant")
     if not new_c:
@@ -265,8 +276,7 @@ def confirm_slot_takeover():
         button_marker("primary")
         if st.button("선적완료 후 등록", use_container_width=True):
             # 기존(점유) 컨테이너 출고처가 미정이면 선적완료(백업)할 수 없으므로 차단한다.
-            occupant = next((c for c in st.session_state.container_list
-                             if c.get('컨테이너 번호') == occ_no), None)
+            occupant = st.session_state.container_list.find(occ_no)
             if occupant and str(occupant.get('출고처') or '').strip() == UNDECIDED:
                 st.error(
                     f"기존 컨테이너 '{occ_no}'의 출고처가 '{UNDECIDED}'입니다.\n"
@@ -295,12 +305,15 @@ def ocr_dialog():
     (위젯 키 충돌을 피하려고 값은 ocr_apply_no에 담아 다음 런에서 반영한다)
     모바일 브라우저는 파일 선택 시 '카메라 촬영'도 함께 제공하므로
     별도 카메라 탭 없이 업로더 하나로 촬영·업로드를 모두 처리한다."""
+    mark_dialog_open()
     ocr_img = st.file_uploader("사진을 촬영하거나 선택하세요 (번호가 크고 정면으로 보이게)",
                                type=["jpg", "jpeg", "png"], key="ocr_upload")
     if ocr_img is not None:
         # 휴대폰 사진은 EXIF에 회전 정보만 담고 실제 픽셀은 눕혀 저장되는 경우가 많아
         # exif_transpose로 보정한 뒤 인식된 번호 아래에 미리보기로 보여준다
         # (인식은 원본 바이트로 그대로 수행).
+        from PIL import Image, ImageOps
+
         preview_img = ImageOps.exif_transpose(Image.open(BytesIO(ocr_img.getvalue())))
         with st.spinner("사진에서 컨테이너 번호를 인식하는 중..."):
             cache_key, (ocr_status, ocr_payload) = run_container_ocr(ocr_img.getvalue())
@@ -342,6 +355,7 @@ def ocr_dialog():
 @st.dialog("⚠️ 출고처 미정")
 def undecided_block_dialog(container_no):
     """출고처가 미정인 컨테이너의 선적완료(백업)를 막고 안내하는 팝업."""
+    mark_dialog_open()
     st.warning(
         f"**{container_no}** 의 출고처가 '{UNDECIDED}'입니다.\n\n"
         f"출고처를 먼저 지정해야 선적완료(백업)할 수 있습니다.\n"
@@ -401,170 +415,23 @@ apply_sidebar_style('''
 ''')
 
 if 'container_list' not in st.session_state:
-    st.session_state.container_list = load_data_from_gsheet()
+    with track_operation("페이지 로드: 등록"):
+        sync_container_list()
+# 다른 기기의 등록·수정·선적완료를 몇 초마다 받아 반영한다(시트 읽기 없음)
+follow_change_feed()
 
-render_app_title()
-
-st.markdown("#### 📋 컨테이너 현황")
-with st.container(border=True):
-    printer_ip = st.session_state.get("printer_ip", "")
-
-    # --- 위치(1~9) 슬롯 매핑: 위치가 지정된 선적중 컨테이너만 슬롯에 표시 ---
-    # 위치가 '복원'인 컨테이너(관리 페이지에서 개별 복원한 것)는 복원 전용 슬롯에 표시한다.
-    # 그 외 위치값이 없는 레거시 컨테이너는 관리(수정) 페이지에서만 다룬다.
-    slot_map = {}
-    restore_slot_containers = []  # 복원 슬롯은 여러 개가 동시에 들어올 수 있다
-    for c in st.session_state.container_list:
-        if c.get('상태') != '선적중':
-            continue
-        pos = str(c.get('위치') or '').strip()
-        if pos in POSITIONS and pos not in slot_map:
-            slot_map[pos] = c
-        elif pos == RESTORE_SLOT:
-            restore_slot_containers.append(c)
-
-    def _fmt_dt(v):
-        t = pd.to_datetime(v, errors='coerce')
-        return t.strftime('%Y-%m-%d %H:%M') if pd.notna(t) else ''
-
-    def _seal_str(v):
-        return '' if v is None or (isinstance(v, float) and pd.isna(v)) else str(v)
-
-    def _txt(v):
-        return str(v) if v is not None and pd.notna(v) else ''
-
-    def _slot_row(pos, c):
-        if not c:
-            return {
-                '출력선택': False, '위치': pos, '컨테이너 번호': '', '출고처': '',
-                '피트수': '', '씰 번호': '', '등록일시': '', '선적완료': False, '수정': False,
-            }
-        dest_val = _txt(c.get('출고처'))
-        return {
-            '출력선택': False, '위치': pos,
-            '컨테이너 번호': _txt(c.get('컨테이너 번호')),
-            # 출고처가 미정이면 셀에서도 눈에 띄게 경고 표시
-            '출고처': (f"⚠️ {UNDECIDED}" if dest_val == UNDECIDED else dest_val),
-            '피트수': _txt(c.get('피트수')),
-            '씰 번호': _seal_str(c.get('씰 번호')),
-            '등록일시': _fmt_dt(c.get('등록일시')),
-            '선적완료': False, '수정': False,
-        }
-
-    table_rows = [_slot_row(pos, slot_map.get(pos)) for pos in POSITIONS]
-    # 복원 전용 슬롯: 관리 페이지에서 개별 복원한 컨테이너가 있을 때만 행이 나타난다
-    table_rows.extend(_slot_row(RESTORE_SLOT, c) for c in restore_slot_containers)
-
-    display_df = pd.DataFrame(table_rows)
-    column_order = ['출력선택', '위치', '컨테이너 번호', '출고처', '피트수', '씰 번호', '등록일시', '선적완료', '수정']
-
-    # data_editor는 체크 상태를 '행 번호'에 묶어 위젯 키에 보관한다. 이 표는 컨테이너가
-    # 없어도 위치 슬롯 행을 항상 그리므로 행 수가 변하지 않고, 슬롯 내용만 바뀐다.
-    # 그래서 키를 그대로 두면 이전 컨테이너에 한 체크가 그 자리에 새로 온 컨테이너에
-    # 그대로 적용된다(선적완료 → 등록하자마자 백업, 출력선택 → 엉뚱한 라벨 인쇄).
-    # 슬롯↔컨테이너 구성이 달라지면 키를 회전해 이전 체크를 버린다.
-    table_sig = tuple((r['위치'], r['컨테이너 번호']) for r in table_rows)
-    if st.session_state.get('table_sig') != table_sig:
-        st.session_state['table_sig'] = table_sig
-        st.session_state['editor_rev'] = st.session_state.get('editor_rev', 0) + 1
-
-    # ✏️ 체크 후 팝업을 닫으면 체크가 남아 재오픈되는 것을 막기 위해 키를 바꿔 초기화
-    editor_key = f"merged_editor_{st.session_state.get('editor_rev', 0)}"
-    edited_df = st.data_editor(
-        display_df,
-        column_order=column_order,
-        use_container_width=True,
-        hide_index=True,
-        height=(len(table_rows) + 1) * 35 + 3,  # 모든 슬롯 행(1~9 + 복원)이 스크롤 없이 보이도록 (헤더 1 + 행 수)
-        key=editor_key,
-        column_config={
-            "출력선택": st.column_config.CheckboxColumn("🖨️", default=False, width=50, help="해당 위치의 컨테이너를 출력 대상으로 선택합니다."),
-            # TextColumn에 alignment 공개 인자가 없어, 반환 dict에 직접 'center'를 주입해 가운데 정렬한다.
-            "위치": {**st.column_config.TextColumn("위치", width=35, disabled=True), "alignment": "center"},
-            "수정": st.column_config.CheckboxColumn("✏️", width="small", help="체크하면 해당 컨테이너 수정 팝업이 열립니다."),
-            "선적완료": st.column_config.CheckboxColumn("선적완료", width="small", help="체크하면 해당 컨테이너를 자동 백업하고 목록에서 제거합니다."),
-            "컨테이너 번호": {**st.column_config.TextColumn(disabled=True), "alignment": "center"},
-            "출고처": st.column_config.TextColumn(disabled=True, width=70),
-            "피트수": {**st.column_config.TextColumn(disabled=True), "alignment": "center"},
-            "씰 번호": {**st.column_config.TextColumn(disabled=True), "alignment": "center"},
-            "등록일시": st.column_config.TextColumn(disabled=True),
-        }
-    )
+# 오래된 일별 백업 정리: 프로세스당 하루 한 번 백그라운드에서 (관리 페이지 버튼과 같은 함수)
+maybe_run_retention()
 
-    # ✏️ 수정 체크 감지 (컨테이너가 있는 슬롯만) → 키를 회전해 표를 초기화한 뒤 팝업을 연다.
-    newly_checked = [
-        row['컨테이너 번호'] for _, row in edited_df.iterrows()
-        if row.get('수정') and row.get('컨테이너 번호')
-    ]
-    if newly_checked:
-        st.session_state['editor_rev'] = st.session_state.get('editor_rev', 0) + 1
-        st.session_state['pending_edit'] = newly_checked[0]
-        st.rerun()
-
-    # 초기화된 표가 그려진 다음 런에서 팝업을 연다.
-    if st.session_state.get('pending_edit'):
-        edit_container_dialog(st.session_state.pop('pending_edit'))
-
-    # 선적완료 체크 → 자동 백업 + 메인 시트/목록에서 제거 (데이터 백업 버튼 대체)
-    to_complete = [
-        row['컨테이너 번호'] for _, row in edited_df.iterrows()
-        if row.get('선적완료') and row.get('컨테이너 번호')
-    ]
-    if to_complete:
-        cno = to_complete[0]
-        # 처리했으면 성공·실패·차단 어느 쪽이든 체크를 비운다.
-        # (실패해서 표 내용이 그대로면 위 table_sig 회전이 걸리지 않으므로 여기서 처리한다)
-        st.session_state['editor_rev'] = st.session_state.get('editor_rev', 0) + 1
-        target = next((c for c in st.session_state.container_list if c.get('컨테이너 번호') == cno), None)
-        if target and str(target.get('출고처') or '').strip() == UNDECIDED:
-            # 출고처 미정이면 백업 차단 → 팝업으로 안내
-            st.session_state['undecided_block'] = cno
-        else:
-            ok, res = complete_and_backup_container(cno)
-            if ok:
-                # 같은 번호가 이미 백업에 있었으면 조용히 바뀌지 않도록 안내한다(로그에도 남는다).
-                note = " (기존 백업 기록을 덮어썼습니다)" if res else ""
-                st.session_state["table_action_msg"] = ("success", f"'{cno}' 선적완료 — 백업 후 목록에서 제거했습니다.{note}")
-            else:
-                st.session_state["table_action_msg"] = ("error", f"선적완료 처리 실패: {res}")
-        st.rerun()
-
-    # 출고처 미정으로 선적완료가 차단된 경우 팝업 안내
-    if st.session_state.get('undecided_block'):
-        undecided_block_dialog(st.session_state.pop('undecided_block'))
-
-    # 출력 대상: 컨테이너가 있는 슬롯 중 출력선택된 것
-    selected_cnos = [
-        row['컨테이너 번호'] for _, row in edited_df.iterrows()
-        if row['출력선택'] and row.get('컨테이너 번호')
-    ]
-
-    # 현황 표 관련 안내(수정 완료/선적완료/되돌리기 등)는 되돌리기 버튼 바로 위에 표시한다.
-    _tbl_msg = st.session_state.pop("table_action_msg", None)
-    if _tbl_msg:
-        getattr(st, _tbl_msg[0])(_tbl_msg[1])
-
-    # 방금 선적완료한 컨테이너 되돌리기 (백업에서 다시 선적중으로 복원)
-    last_snap = st.session_state.get('last_completed')
-    undo_label = (f"↩️ 방금 선적완료 되돌리기 ({last_snap['item'].get('컨테이너 번호')})"
-                  if last_snap else "↩️ 되돌리기 (최근 선적완료 없음)")
-    if st.button(undo_label, use_container_width=True, disabled=not last_snap, key="undo_complete_btn"):
-        _undo_cno = last_snap['item'].get('컨테이너 번호')
-        ok, note = undo_last_completed()
-        if ok:
-            if note:
-                st.session_state["table_action_msg"] = ("warning", note)
-            else:
-                st.session_state["table_action_msg"] = ("success", f"'{_undo_cno}' 선적완료를 되돌렸습니다.")
-        else:
-            st.session_state["table_action_msg"] = ("error", f"되돌리기 실패: {note}")
-        st.rerun()
+render_app_title()
 
-    # 미리보기 옵션은 선적중 컨테이너만
-    shippable_cnos = [
-        c.get('컨테이너 번호', '') for c in st.session_state.container_list
-        if c.get('상태') == '선적중' and c.get('컨테이너 번호')
-    ]
+# 현황 표·출력 패널과 등록 폼은 각각 조각(st.fragment)으로 나눈다. 표의 체크박스, 미리보기
+# 선택, 폼 입력은 자기 조각만 다시 실행하므로 사이드바 스타일/CSS 주입, 다른 조각,
+# 출고처 조회가 다시 돌지 않고 브라우저로 보내는 델타도 그 조각 분량으로 줄어든다.
+# 다른 조각에 보이는 내용이 바뀌는 동작(등록 성공, 위치 충돌 확인, 팝업 저장)만 전체 rerun을 한다.
+@st.fragment
+def label_preview(shippable_cnos):
+    """라벨 미리보기(QR). 선택을 바꿔도 이 부분만 다시 그린다."""
     cno_options = ["미리보기"] + shippable_cnos
     preview_sel = st.selectbox("미리보기", cno_options, label_visibility="collapsed")
     preview_cno = None if preview_sel == "미리보기" else preview_sel
@@ -580,88 +447,263 @@ with st.container(border=True):
         """, unsafe_allow_html=True)
         st.markdown("<div style='margin-top:12px;'></div>", unsafe_allow_html=True)
 
-    btn_label = f"🖨️ {len(selected_cnos)}개 출력 (각 2장)" if selected_cnos else "🖨️ 출력"
-    if selected_cnos:
-        button_marker("primary")
-    if st.button(btn_label, use_container_width=True, key="print_barcode_btn", disabled=not selected_cnos):
-        if not printer_ip:
-            st.warning("프린터 IP를 먼저 설정 페이지에서 입력해주세요.")
-        else:
-            for i, cno in enumerate(selected_cnos):
-                zpl_code = make_zpl(cno, copies=2)
-                send_zpl_to_printer(printer_ip, zpl_code, result_key=f"p{i}")
 
-st.divider()
+@st.fragment
+def slot_table_panel():
+    """위치 슬롯 현황 표와 출력 패널."""
+    with st.container(border=True):
+        printer_ip = st.session_state.get("printer_ip", "")
+
+        # --- 위치(1~9) 슬롯 매핑: 위치가 지정된 선적중 컨테이너만 슬롯에 표시 ---
+        # 위치가 '복원'인 컨테이너(관리 페이지에서 개별 복원한 것)는 복원 전용 슬롯에 표시한다.
+        # 그 외 위치값이 없는 레거시 컨테이너는 관리(수정) 페이지에서만 다룬다.
+        # (목록을 훑지 않고 container_list의 위치 색인에서 바로 꺼낸다)
+        slot_map = {}
+        for pos in POSITIONS:
+            occupants = st.session_state.container_list.slot_occupants(pos)
+            if occupants:
+                slot_map[pos] = occupants[0]
+        # 복원 슬롯은 여러 개가 동시에 들어올 수 있다
+        restore_slot_containers = st.session_state.container_list.slot_occupants(RESTORE_SLOT)
+
+        def _fmt_dt(v):
+            t = pd.to_datetime(v, errors='coerce')
+            return t.strftime('%Y-%m-%d %H:%M') if pd.notna(t) else ''
+
+        def _seal_str(v):
+            return '' if v is None or (isinstance(v, float) and pd.isna(v)) else str(v)
+
+        def _txt(v):
+            return str(v) if v is not None and pd.notna(v) else ''
+
+        def _slot_row(pos, c):
+            if not c:
+                return {
+                    '출력선택': False, '위치': pos, '컨테이너 번호': '', '출고처': '',
+                    '피트수': '', '씰 번호': '', '등록일시': '', '선적완료': False, '수정': False,
+                }
+            dest_val = _txt(c.get('출고처'))
+            return {
+                '출력선택': False, '위치': pos,
+                '컨테이너 번호': _txt(c.get('컨테이너 번호')),
+                # 출고처가 미정이면 셀에서도 눈에 띄게 경고 표시
+                '출고처': (f"⚠️ {UNDECIDED}" if dest_val == UNDECIDED else dest_val),
+                '피트수': _txt(c.get('피트수')),
+                '씰 번호': _seal_str(c.get('씰 번호')),
+                '등록일시': _fmt_dt(c.get('등록일시')),
+                '선적완료': False, '수정': False,
+            }
 
-st.markdown("#### 📝 신규 컨테이너 등록")
-with st.container(border=True):
-    st.markdown('<div class="reg-section-mk" style="display:none"></div>', unsafe_allow_html=True)
-    destinations = get_destinations()
-    # '미정'(출고처 미지정)을 항상 선택할 수 있도록 옵션 앞에 추가
-    dest_options = destinations if UNDECIDED in destinations else [UNDECIDED] + destinations
-    # 설정에서 삭제되어 세션에 남은 출고처가 현재 옵션에 없으면 첫 실제 출고처로 보정
-    if dest_options and st.session_state.get("form_destination") not in dest_options:
-        st.session_state["form_destination"] = destinations[0] if destinations else UNDECIDED
-    st.session_state.setdefault("form_position", "1")
-    st.session_state.setdefault("form_seal_no", "")
-
-    with st.container(key="cno_row"):
-        col_no, col_ocr = st.columns([4, 1], vertical_alignment="bottom")
-        with col_no:
-            container_no = st.text_input("1. 컨테이너 번호", placeholder="예: ABCU1234560", key="form_container_no")
-        with col_ocr:
-            if st.button("📷 OCR", key="ocr_open_btn",
-                         help="사진을 찍거나 올려서 컨테이너 번호를 자동 인식합니다."):
-                ocr_dialog()
-    position = st.radio("2. 위치", options=POSITIONS, horizontal=True, key="form_position")
-    destination = st.radio("3. 출고처", options=dest_options, horizontal=True, key="form_destination")
-    feet = st.radio("4. 피트수", options=['40', '20'], horizontal=True, key="form_feet")
-    seal_no = st.text_input("5. 씰 번호 (선택)", key="form_seal_no")
-
-    button_marker("success")
-    submitted = st.button("➕ 등록", use_container_width=True, key="register_btn")
-    if submitted:
+        table_rows = [_slot_row(pos, slot_map.get(pos)) for pos in POSITIONS]
+        # 복원 전용 슬롯: 관리 페이지에서 개별 복원한 컨테이너가 있을 때만 행이 나타난다
+        table_rows.extend(_slot_row(RESTORE_SLOT, c) for c in restore_slot_containers)
+
+        display_df = pd.DataFrame(table_rows)
+        column_order = ['출력선택', '위치', '컨테이너 번호', '출고처', '피트수', '씰 번호', '등록일시', '선적완료', '수정']
+
+        # data_editor는 체크 상태를 '행 번호'에 묶어 위젯 키에 보관한다. 이 표는 컨테이너가
+        # 없어도 위치 슬롯 행을 항상 그리므로 행 수가 변하지 않고, 슬롯 내용만 바뀐다.
+        # 그래서 키를 그대로 두면 이전 컨테이너에 한 체크가 그 자리에 새로 온 컨테이너에
+        # 그대로 적용된다(선적완료 → 등록하자마자 백업, 출력선택 → 엉뚱한 라벨 인쇄).
+        # 슬롯↔컨테이너 구성이 달라지면 키를 회전해 이전 체크를 버린다.
+        table_sig = tuple((r['위치'], r['컨테이너 번호']) for r in table_rows)
+        if st.session_state.get('table_sig') != table_sig:
+            st.session_state['table_sig'] = table_sig
+            st.session_state['editor_rev'] = st.session_state.get('editor_rev', 0) + 1
+
+        # ✏️ 체크 후 팝업을 닫으면 체크가 남아 재오픈되는 것을 막기 위해 키를 바꿔 초기화
+        editor_key = f"merged_editor_{st.session_state.get('editor_rev', 0)}"
+        edited_df = st.data_editor(
+            display_df,
+            column_order=column_order,
+            use_container_width=True,
+            hide_index=True,
+            height=(len(table_rows) + 1) * 35 + 3,  # 모든 슬롯 행(1~9 + 복원)이 스크롤 없이 보이도록 (헤더 1 + 행 수)
+            key=editor_key,
+            column_config={
+                "출력선택": st.column_config.CheckboxColumn("🖨️", default=False, width=50, help="해당 위치의 컨테이너를 출력 대상으로 선택합니다."),
+                # TextColumn에 alignment 공개 인자가 없어, 반환 dict에 직접 'center'를 주입해 가운데 정렬한다.
+                "위치": {**st.column_config.TextColumn("위치", width=35, disabled=True), "alignment": "center"},
+                "수정": st.column_config.CheckboxColumn("✏️", width="small", help="체크하면 해당 컨테이너 수정 팝업이 열립니다."),
+                "선적완료": st.column_config.CheckboxColumn("선적완료", width="small", help="체크하면 해당 컨테이너를 자동 백업하고 목록에서 제거합니다."),
+                "컨테이너 번호": {**st.column_config.TextColumn(disabled=True), "alignment": "center"},
+                "출고처": st.column_config.TextColumn(disabled=True, width=70),
+                "피트수": {**st.column_config.TextColumn(disabled=True), "alignment": "center"},
+                "씰 번호": {**st.column_config.TextColumn(disabled=True), "alignment": "center"},
+                "등록일시": st.column_config.TextColumn(disabled=True),
+            }
+        )
+
+        # ✏️ 수정 체크 감지 (컨테이너가 있는 슬롯만) → 키를 회전해 표를 초기화한 뒤 팝업을 연다.
+        newly_checked = [
+            row['컨테이너 번호'] for _, row in edited_df.iterrows()
+            if row.get('수정') and row.get('컨테이너 번호')
+        ]
+        if newly_checked:
+            st.session_state['editor_rev'] = st.session_state.get('editor_rev', 0) + 1
+            st.session_state['pending_edit'] = newly_checked[0]
+            rerun_fragment()
+
+        # 초기화된 표가 그려진 다음 런에서 팝업을 연다.
+        if st.session_state.get('pending_edit'):
+            edit_container_dialog(st.session_state.pop('pending_edit'))
+
+        # 선적완료 체크 → 자동 백업 + 메인 시트/목록에서 제거 (데이터 백업 버튼 대체)
+        to_complete = [
+            row['컨테이너 번호'] for _, row in edited_df.iterrows()
+            if row.get('선적완료') and row.get('컨테이너 번호')
+        ]
+        if to_complete:
+            cno = to_complete[0]
+            # 처리했으면 성공·실패·차단 어느 쪽이든 체크를 비운다.
+            # (실패해서 표 내용이 그대로면 위 table_sig 회전이 걸리지 않으므로 여기서 처리한다)
+            st.session_state['editor_rev'] = st.session_state.get('editor_rev', 0) + 1
+            target = st.session_state.container_list.find(cno)
+            if target and str(target.get('출고처') or '').strip() == UNDECIDED:
+                # 출고처 미정이면 백업 차단 → 팝업으로 안내
+                st.session_state['undecided_block'] = cno
+            else:
+                ok, res = complete_and_backup_container(cno)
+                if ok:
+                    # 같은 번호가 이미 백업에 있었으면 조용히 바뀌지 않도록 안내한다(로그에도 남는다).
+                    note = " (기존 백업 기록을 덮어썼습니다)" if res else ""
+                    st.session_state["table_action_msg"] = ("success", f"'{cno}' 선적완료 — 백업 후 목록에서 제거했습니다.{note}")
+                else:
+                    st.session_state["table_action_msg"] = ("error", f"선적완료 처리 실패: {res}")
+            rerun_fragment()
+
+        # 출고처 미정으로 선적완료가 차단된 경우 팝업 안내
+        if st.session_state.get('undecided_block'):
+            undecided_block_dialog(st.session_state.pop('undecided_block'))
+
+        # 출력 대상: 컨테이너가 있는 슬롯 중 출력선택된 것
+        selected_cnos = [
+            row['컨테이너 번호'] for _, row in edited_df.iterrows()
+            if row['출력선택'] and row.get('컨테이너 번호')
+        ]
+
+        # 현황 표 관련 안내(수정 완료/선적완료/되돌리기 등)는 되돌리기 버튼 바로 위에 표시한다.
+        _tbl_msg = st.session_state.pop("table_action_msg", None)
+        if _tbl_msg:
+            getattr(st, _tbl_msg[0])(_tbl_msg[1])
+
+        # 방금 선적완료한 컨테이너 되돌리기 (백업에서 다시 선적중으로 복원)
+        last_snap = st.session_state.get('last_completed')
+        undo_label = (f"↩️ 방금 선적완료 되돌리기 ({last_snap['item'].get('컨테이너 번호')})"
+                      if last_snap else "↩️ 되돌리기 (최근 선적완료 없음)")
+        if st.button(undo_label, use_container_width=True, disabled=not last_snap, key="undo_complete_btn"):
+            _undo_cno = last_snap['item'].get('컨테이너 번호')
+            ok, note = undo_last_completed()
+            if ok:
+                if note:
+                    st.session_state["table_action_msg"] = ("warning", note)
+                else:
+                    st.session_state["table_action_msg"] = ("success", f"'{_undo_cno}' 선적완료를 되돌렸습니다.")
+            else:
+                st.session_state["table_action_msg"] = ("error", f"되돌리기 실패: {note}")
+            rerun_fragment()
+
+        # 미리보기 옵션은 선적중 컨테이너만
+        shippable_cnos = [
+            c.get('컨테이너 번호', '') for c in st.session_state.container_list
+            if c.get('상태') == '선적중' and c.get('컨테이너 번호')
+        ]
+        label_preview(shippable_cnos)
+
+        btn_label = f"🖨️ {len(selected_cnos)}개 출력 (각 2장)" if selected_cnos else "🖨️ 출력"
+        if selected_cnos:
+            button_marker("primary")
+        if st.button(btn_label, use_container_width=True, key="print_barcode_btn", disabled=not selected_cnos):
+            if not printer_ip:
+                st.warning("프린터 IP를 먼저 설정 페이지에서 입력해주세요.")
+            else:
+                for i, cno in enumerate(selected_cnos):
+                    zpl_code = make_zpl(cno, copies=2)
+                    send_zpl_to_printer(printer_ip, zpl_code, result_key=f"p{i}")
+
+
+st.markdown("#### 📋 컨테이너 현황")
+slot_table_panel()
+
+
+@st.fragment
+def registration_form():
+    """신규 등록 폼. 입력·OCR은 이 조각 안에서 처리하고, 등록되면 표를 위해 전체 rerun한다."""
+    with st.container(border=True):
+        st.markdown('<div class="reg-section-mk" style="display:none"></div>', unsafe_allow_html=True)
+        destinations = get_destinations()
+        # '미정'(출고처 미지정)을 항상 선택할 수 있도록 옵션 앞에 추가
+        dest_options = destinations if UNDECIDED in destinations else [UNDECIDED] + destinations
+        # 설정에서 삭제되어 세션에 남은 출고처가 현재 옵션에 없으면 첫 실제 출고처로 보정
+        if dest_options and st.session_state.get("form_destination") not in dest_options:
+            st.session_state["form_destination"] = destinations[0] if destinations else UNDECIDED
+        st.session_state.setdefault("form_position", "1")
+        st.session_state.setdefault("form_seal_no", "")
+
+        with st.container(key="cno_row"):
+            col_no, col_ocr = st.columns([4, 1], vertical_alignment="bottom")
+            with col_no:
+                container_no = st.text_input("1. 컨테이너 번호", placeholder="예: ABCU1234560", key="form_container_no")
+            with col_ocr:
+                if st.button("📷 OCR", key="ocr_open_btn",
+                             help="사진을 찍거나 올려서 컨테이너 번호를 자동 인식합니다."):
+                    ocr_dialog()
+        position = st.radio("2. 위치", options=POSITIONS, horizontal=True, key="form_position")
+        destination = st.radio("3. 출고처", options=dest_options, horizontal=True, key="form_destination")
+        feet = st.radio("4. 피트수", options=['40', '20'], horizontal=True, key="form_feet")
+        seal_no = st.text_input("5. 씰 번호 (선택)", key="form_seal_no")
+
+        button_marker("success")
+        submitted = st.button("➕ 등록", use_container_width=True, key="register_btn")
+        if submitted:
+            st.session_state["form_success_message"] = ""
+            st.session_state["form_error_message"] = ""
+
+            # 빈 값 / 형식 / 4번째 자리 U / 체크디지트를 한 번에 검사하고 사유별 메시지를 띄운다.
+            cno_error = container_no_error(container_no)
+            # 중복은 '오늘 등록된 것'만 막는다 (번호는 재사용되므로 과거 등록분은 허용).
+            dup = None if cno_error else find_same_day_duplicate(
+                st.session_state.container_list, container_no, get_korea_now().date())
+            if cno_error:
+                st.session_state["form_error_message"] = cno_error
+            elif dup:
+                dup_pos = str(dup.get('위치') or '').strip()
+                where = f" (위치 {dup_pos})" if dup_pos else ""
+                st.session_state["form_error_message"] = (
+                    f"오늘 이미 등록된 컨테이너 번호입니다: {container_no}{where}"
+                )
+            else:
+                naive_datetime = get_korea_now().replace(tzinfo=None)
+                new_container = {
+                    '컨테이너 번호': container_no, '출고처': destination, '피트수': feet,
+                    '씰 번호': seal_no, '상태': '선적중',
+                    '등록일시': pd.to_datetime(naive_datetime),
+                    '완료일시': None, '위치': str(position),
+                }
+
+                # 같은 위치에 이미 컨테이너가 있으면(표에 표시된 슬롯 기준) 확인 다이얼로그를 띄운다.
+                occupants = st.session_state.container_list.slot_occupants(position)
+                occupant = occupants[0] if occupants else None
+                if occupant:
+                    st.session_state["pending_new_container"] = new_container
+                    st.session_state["pending_slot_occupant"] = occupant.get('컨테이너 번호')
+                    st.rerun()
+                else:
+                    register_new_container(new_container)  # 내부에서 rerun
+
+    # 등록 결과 안내도 조각 안에서 그려야 폼만 다시 실행될 때 보인다.
+    if st.session_state.get("form_success_message"):
+        st.success(st.session_state.get("form_success_message"))
         st.session_state["form_success_message"] = ""
+    if st.session_state.get("form_error_message"):
+        st.error(st.session_state.get("form_error_message"))
         st.session_state["form_error_message"] = ""
 
-        # 빈 값 / 형식 / 4번째 자리 U / 체크디지트를 한 번에 검사하고 사유별 메시지를 띄운다.
-        cno_error = container_no_error(container_no)
-        # 중복은 '오늘 등록된 것'만 막는다 (번호는 재사용되므로 과거 등록분은 허용).
-        dup = None if cno_error else find_same_day_duplicate(
-            st.session_state.container_list, container_no, get_korea_now().date())
-        if cno_error:
-            st.session_state["form_error_message"] = cno_error
-        elif dup:
-            dup_pos = str(dup.get('위치') or '').strip()
-            where = f" (위치 {dup_pos})" if dup_pos else ""
-            st.session_state["form_error_message"] = (
-                f"오늘 이미 등록된 컨테이너 번호입니다: {container_no}{where}"
-            )
-        else:
-            naive_datetime = get_korea_now().replace(tzinfo=None)
-            new_container = {
-                '컨테이너 번호': container_no, '출고처': destination, '피트수': feet,
-                '씰 번호': seal_no, '상태': '선적중',
-                '등록일시': pd.to_datetime(naive_datetime),
-                '완료일시': None, '위치': str(position),
-            }
 
-            # 같은 위치에 이미 컨테이너가 있으면(표에 표시된 슬롯 기준) 확인 다이얼로그를 띄운다.
-            occupant = slot_map.get(str(position))
-            if occupant:
-                st.session_state["pending_new_container"] = new_container
-                st.session_state["pending_slot_occupant"] = occupant.get('컨테이너 번호')
-                st.rerun()
-            else:
-                register_new_container(new_container)  # 내부에서 rerun
+st.divider()
+st.markdown("#### 📝 신규 컨테이너 등록")
+registration_form()
 
 # 위치 충돌 확인 대기 중이면 다이얼로그를 연다.
 if st.session_state.get("pending_new_container"):
     confirm_slot_takeover()
-
-if st.session_state.get("form_success_message"):
-    st.success(st.session_state.get("form_success_message"))
-    st.session_state["form_success_message"] = ""
-if st.session_state.get("form_error_message"):
-    st.error(st.session_state.get("form_error_message"))
-    st.session_state["form_error_message"] = ""
\ No newline at end of file
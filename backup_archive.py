@@ -0,0 +1,85 @@
+"""선적완료(백업) 데이터의 로컬 컬럼형 아카이브 (Parquet, 월 단위 파티션).
+
+Google Sheets의 '백업_' 시트는 읽기마다 API 쿼터를 쓰고 시트 하나의 크기도
+제한돼 있어, 여러 달·여러 해를 훑는 분석에는 맞지 않는다. 월별 백업이 바뀔
+때마다 utils가 그 달 전체를 이 아카이브에 다시 써 두고, 통계/조회는 여기서
+필요한 열과 조건(predicate pushdown)만 메모리 매핑으로 읽는다.
+
+- 배치: <root>/month=YYYY-MM/data.parquet (hive 파티션, 모든 값은 시트와 같은 문자열)
+- 원본은 언제나 Sheets다. Streamlit Cloud는 재부팅 때 로컬 파일이 사라지므로
+  이 아카이브는 다시 만들 수 있는 캐시로 취급한다(없는 달은 시트에서 채운다).
+- pyarrow는 import 비용이 커서(약 0.15초) 실제로 쓸 때만 불러온다.
+
+이 모듈은 streamlit에 의존하지 않는다(단위 테스트 용이).
+"""
+import os
+import re
+
+DEFAULT_ARCHIVE_DIR = os.environ.get(
+    "BACKUP_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".archive"),
+)
+PARTITION_KEY = "month"
+_MONTH_DIR = re.compile(rf"^{PARTITION_KEY}=(\d{{4}}-\d{{2}})$")
+
+
+def _partition_path(month_str: str, root: str) -> str:
+    return os.path.join(root, f"{PARTITION_KEY}={month_str}", "data.parquet")
+
+
+def write_month(month_str: str, frame, root: str = None) -> str:
+    """한 달치 백업 전체(DataFrame)로 해당 월 파티션을 통째로 교체한다.
+
+    같은 달을 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 임시 파일에 쓴 뒤
+    os.replace로 바꿔 끼운다. 반환: 기록한 파일 경로.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    root = root or DEFAULT_ARCHIVE_DIR
+    path = _partition_path(month_str, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 시트 값과 똑같이 문자열로 저장한다(빈 칸은 ''). 분석 쪽에서 필요할 때 형변환한다.
+    table = pa.Table.from_pandas(frame.fillna("").astype(str), preserve_index=False)
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+    return path
+
+
+def archived_months(root: str = None) -> list:
+    """아카이브에 들어 있는 월(YYYY-MM) 목록을 오름차순으로 반환한다."""
+    root = root or DEFAULT_ARCHIVE_DIR
+    if not os.path.isdir(root):
+        return []
+    months = []
+    for name in os.listdir(root):
+        m = _MONTH_DIR.match(name)
+        if m and os.path.exists(_partition_path(m.group(1), root)):
+            months.append(m.group(1))
+    return sorted(months)
+
+
+def read_archive(months=None, columns=None, filters=None, root: str = None):
+    """아카이브를 DataFrame으로 읽는다. 파티션에 없는 달은 조용히 빠진다.
+
+    months : 읽을 월 목록(None이면 전부). 해당 파티션 디렉터리만 연다.
+    columns: 읽을 열 목록(None이면 전부). 컬럼형이라 필요 없는 열은 디스크에서 읽지 않는다.
+    filters: pyarrow 필터 식 (예: [('상태', '=', '선적완료')]) — 행 그룹 단위로 걸러진다.
+    결과에는 파티션 열 'month'가 붙는다.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    root = root or DEFAULT_ARCHIVE_DIR
+    available = archived_months(root)
+    targets = [m for m in available if months is None or m in set(months)]
+    if not targets:
+        return pd.DataFrame(columns=list(columns or []) + [PARTITION_KEY])
+    tables = []
+    for month_str in targets:
+        table = pq.read_table(_partition_path(month_str, root), columns=columns,
+                              filters=filters, memory_map=True)
+        tables.append(table.append_column(PARTITION_KEY, pa.array([month_str] * table.num_rows, pa.string())))
+    return pa.concat_tables(tables, promote_options="default").to_pandas()
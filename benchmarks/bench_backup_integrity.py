@@ -0,0 +1,120 @@
+"""백업 무결성 점검 벤치마크 (가짜 Sheets 백엔드, 1년 치 합성 백업).
+
+일별 시트 365장(하루 --rows행) + 월별 시트 12장을 만들고, 월별 시트에 일부러 어긋남을
+넣는다(--drift 비율만큼 출고처 변경·행 삭제, 일별 시트 몇 장에 중복 행). 그런 뒤
+  읽기 : 시트마다 get_all_values (예전 방식) vs load_all_backup_values (BACKUP_SCAN_BATCH장씩 batch)
+  점검 : scan_backup_integrity (행 해시 비교·중복·체크디지트)
+  계획 : backup_repair_plan
+의 소요와 Sheets 읽기 수를 보고, 넣은 어긋남을 모두 찾았는지 확인한다.
+--latency로 요청당 왕복 지연(ms)을 준다. 쿼터(분당 60회)는 걸지 않고 호출 수만 센다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_backup_integrity.py
+    python benchmarks/bench_backup_integrity.py --rows 120 --latency 300 --drift 0.02
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import streamlit as st
+
+import utils
+from bench_workflows import container_row
+from fake_gspread import FakeSpreadsheet, SheetsQuota
+
+
+def build_year(rows_per_day, drift, latency_ms, start=date(2025, 7, 1), seed=0):
+    """1년 치 일별·월별 백업과 넣은 어긋남 수 {'불일치', '월별 누락', '중복'}를 만든다."""
+    rng = random.Random(seed)
+    spreadsheet = FakeSpreadsheet(quota=SheetsQuota(latency=latency_ms / 1000,
+                                                    reads_per_minute=None, writes_per_minute=None))
+    injected = {"불일치": 0, "월별 누락": 0, "중복": 0}
+    months = {}
+    serial = 0
+    for offset in range(365):
+        day = (start + timedelta(days=offset)).isoformat()
+        rows = [container_row(serial + i, day, status="선적완료") for i in range(rows_per_day)]
+        serial += rows_per_day
+        months.setdefault(day[:7], []).extend(rows)
+        if offset % 30 == 0:  # 같은 시트에 두 번 백업된 행
+            rows = rows + [rows[0]]
+            injected["중복"] += 1
+        spreadsheet.create(f"{utils.BACKUP_PREFIX}{day}", [utils.SHEET_HEADERS] + rows)
+    for month, rows in months.items():
+        kept = []
+        for row in rows:
+            roll = rng.random()
+            if roll < drift / 2:
+                injected["월별 누락"] += 1
+                continue
+            if roll < drift:
+                row = row[:1] + ["중국" if row[1] != "중국" else "베트남"] + row[2:]
+                injected["불일치"] += 1
+            kept.append(row)
+        spreadsheet.create(f"{utils.BACKUP_PREFIX}{month}", [utils.SHEET_HEADERS] + kept)
+    return spreadsheet, injected
+
+
+def fresh(spreadsheet):
+    st.cache_resource.clear()
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    utils.connect_to_gsheet = lambda: spreadsheet
+    utils.invalidate_sheet_caches()
+    utils.get_worksheets_map(spreadsheet)
+    spreadsheet.quota.reset()
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=60, help="일별 시트 하나의 행 수")
+    parser.add_argument("--drift", type=float, default=0.01, help="월별 시트에 넣을 어긋남 비율")
+    parser.add_argument("--latency", type=float, default=150, help="요청당 왕복 지연(ms)")
+    args = parser.parse_args()
+
+    spreadsheet, injected = build_year(args.rows, args.drift, args.latency)
+    sheets = len(utils.filter_backup_sheets(spreadsheet.titles(), "daily")) + \
+        len(utils.filter_backup_sheets(spreadsheet.titles(), "monthly"))
+    total_rows = sum(len(spreadsheet.sheet(t).dump()) - 1 for t in spreadsheet.titles())
+    print(f"백업 시트 {sheets}장 · {total_rows:,}행 · 요청당 지연 {args.latency:.0f} ms")
+
+    fresh(spreadsheet)
+    titles = [t for t in spreadsheet.titles() if t.startswith(utils.BACKUP_PREFIX)]
+    per_sheet_s, _ = timed(lambda: {t: spreadsheet.sheet(t).get_all_values() for t in titles})
+    per_sheet_reads = spreadsheet.quota.reads
+
+    fresh(spreadsheet)
+    load_s, values = timed(lambda: utils.load_all_backup_values(spreadsheet))
+    batch_reads = spreadsheet.quota.reads
+    scan_s, issues = timed(lambda: utils.scan_backup_integrity(values, date(2026, 6, 30)))
+    plan_s, plan = timed(lambda: utils.backup_repair_plan(values))
+
+    print(f"  읽기 · 시트마다   {per_sheet_s:8.2f} s  읽기 {per_sheet_reads}회")
+    print(f"  읽기 · batch      {load_s:8.2f} s  읽기 {batch_reads}회 (worksheets 포함)")
+    print(f"  점검              {scan_s * 1000:8.0f} ms")
+    print(f"  복구 계획         {plan_s * 1000:8.0f} ms  다시 쓸 시트 {len(plan)}장")
+    print(f"  합계 (batch 읽기) {load_s + scan_s + plan_s:8.2f} s")
+    counts = issues['유형'].astype(str).value_counts()
+    for kind, expected in injected.items():
+        found = int(counts.get(kind, 0))
+        print(f"  {kind:<6} 넣음 {expected:5d}  찾음 {found:5d}" + ("" if found == expected else "  ← 다름"))
+    others = {k: int(v) for k, v in counts.items() if k not in injected}
+    if others:
+        print(f"  그 밖: {others}")
+
+
+if __name__ == "__main__":
+    main()
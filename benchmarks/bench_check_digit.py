@@ -0,0 +1,109 @@
+"""ISO 6346 체크디지트 일괄 계산 마이크로벤치마크.
+
+같은 번호 목록(기본 100만 개, 절반은 체크디지트가 틀림)을 네 방식으로 검증한다.
+  이전 방식   : 글자마다 dict 조회 + 2 ** i를 곱하던 예전 compute_check_digit로 한 건씩
+  한 건씩     : [is_valid_check_digit(no) for no in 번호들]  (자리별 곱셈표)
+  일괄·파이썬 : check_digit_matches(번호들, use_numpy=False) (NumPy가 없을 때)
+  일괄·NumPy  : check_digit_matches(번호들, use_numpy=True)  (uint8 배열 + 가중치 벡터)
+체크디지트 계산(compute_check_digits)도 같은 식으로 재고, 방식별 결과가 같은지 확인한다.
+작은 묶음에서는 배열을 만드는 비용 때문에 NumPy가 오히려 느리다 — --small로 그 경계를
+보고 iso6346.NUMPY_MIN_BATCH를 정한다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_check_digit.py                  # 100만 개
+    python benchmarks/bench_check_digit.py --count 100000 --repeat 5
+    python benchmarks/bench_check_digit.py --small           # 묶음 크기별(8~1024) 비교
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import iso6346
+from iso6346 import check_digit_matches, compute_check_digit, compute_check_digits, is_valid_check_digit
+
+_LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def legacy_check_digit(cno10):
+    """예전 compute_check_digit (비교 기준)."""
+    total = 0
+    for i, ch in enumerate(cno10):
+        val = iso6346._LETTER_VALUES[ch] if ch.isalpha() else int(ch)
+        total += val * (2 ** i)
+    return total % 11 % 10
+
+
+def legacy_is_valid(container_no):
+    if not re.fullmatch(r"[A-Z]{4}\d{7}", container_no or ""):
+        return False
+    return legacy_check_digit(container_no[:10]) == int(container_no[10])
+
+
+def make_numbers(count, seed=0):
+    """(앞 10자리 목록, 11자리 번호 목록). 번호의 절반은 체크디지트를 일부러 틀리게 붙인다."""
+    rng = random.Random(seed)
+    prefixes = ["".join(rng.choices(_LETTERS, k=3)) + "U" + f"{rng.randrange(1_000_000):06d}" for _ in range(count)]
+    numbers = [p + str((compute_check_digit(p) + (i % 2)) % 10) for i, p in enumerate(prefixes)]
+    return prefixes, numbers
+
+
+def best_of(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), result
+
+
+def run_full(count, repeat):
+    prefixes, numbers = make_numbers(count)
+    print(f"번호 {count:,}개 (best of {repeat})")
+    for title, legacy, single, batch, data in (
+        ("검증 (check_digit_matches)", legacy_is_valid, is_valid_check_digit, check_digit_matches, numbers),
+        ("계산 (compute_check_digits)", legacy_check_digit, compute_check_digit, compute_check_digits, prefixes),
+    ):
+        rows = [
+            ("이전 방식", best_of(lambda: [legacy(x) for x in data], repeat)),
+            ("한 건씩", best_of(lambda: [single(x) for x in data], repeat)),
+            ("일괄·파이썬", best_of(lambda: batch(data, use_numpy=False), repeat)),
+            ("일괄·NumPy", best_of(lambda: batch(data, use_numpy=True), repeat)),
+        ]
+        base_seconds, expected = rows[0][1]
+        assert all(list(result) == expected for _, (_, result) in rows), "방식별 결과가 다르다"
+        print(f"  {title}")
+        for name, (seconds, _) in rows:
+            print(f"    {name:<10} {seconds * 1000:9.1f} ms  {seconds / count * 1e9:7.0f} ns/개"
+                  f"  ×{base_seconds / seconds:6.1f}")
+
+
+def run_small(repeat):
+    print(f"묶음 크기별 검증 시간 (µs, best of {repeat}, 현재 NUMPY_MIN_BATCH={iso6346.NUMPY_MIN_BATCH})")
+    print(f"  {'개수':>6} {'파이썬':>10} {'NumPy':>10}")
+    for size in (8, 16, 32, 64, 128, 256, 1024):
+        _, numbers = make_numbers(size, seed=size)
+        loops = max(1, 20_000 // size)
+        py, _ = best_of(lambda: [check_digit_matches(numbers, use_numpy=False) for _ in range(loops)], repeat)
+        vec, _ = best_of(lambda: [check_digit_matches(numbers, use_numpy=True) for _ in range(loops)], repeat)
+        print(f"  {size:>6} {py / loops * 1e6:10.1f} {vec / loops * 1e6:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--small", action="store_true", help="작은 묶음에서 파이썬/NumPy 경계 보기")
+    args = parser.parse_args()
+    if args.small:
+        run_small(args.repeat)
+    else:
+        run_full(args.count, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""교대 근무 중 여러 휴대폰이 동시에 앱을 쓰는 상황의 부하 시뮬레이터 (가짜 Sheets 백엔드).
+
+세션 N개를 각각 Streamlit AppTest 세션으로 띄운다. session_state는 세션마다 따로,
+캐시·시트 카탈로그·스냅샷은 프로세스 공유라 실제 서버와 같다. 세션마다 생각 시간을
+두고 무작위 작업을 반복하며, 작업 뒤에는 페이지가 다시 실행되듯 현재 데이터를 다시
+읽는다(그 화면이 다음 작업의 기준이 된다).
+  페이지 로드 : 새로고침(현재 데이터 읽기)
+  수정        : 화면에 보이는 '인기' 컨테이너의 씰 번호를 카운터로 써서 +1
+  등록        : 새 컨테이너 1개
+  선적완료    : 화면에 보이는 컨테이너 1개를 백업한 뒤 현재 데이터에서 삭제
+보고:
+  처리량, 작업별 소요 p50/p95/p99와 회당 Sheets 읽기/쓰기
+  Sheets 분당 호출 수(429로 거절된 시도 포함, 평균과 60초 창 최대)와 쿼터, 429 거절 수
+  충돌: 잃어버린 수정(성공한 수정 수 - 인기 컨테이너 카운터 합)과 조건부 수정이 거절한 낡은 수정,
+        같은 컨테이너의 중복 선적완료(백업 덮어쓰기), 다른 행을 덮어써 생긴 중복 번호
+
+캐시·배치 변경을 동시 사용 상황에서 확인하는 용도다. --latency로 요청당 왕복 지연을,
+--unlimited로 쿼터 없이(429 없이) 돌릴 수 있다. --no-base는 수정을 조건 없이(base 없이)
+써서 조건부 수정이 없을 때 잃어버리는 수정과 비교한다. --json으로 결과를 저장한다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_load.py
+    python benchmarks/bench_load.py --sessions 8 --duration 120 --think 3 --json benchmarks/results/load.json
+"""
+import argparse
+import collections
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import backup_archive
+import metrics
+import utils
+from bench_workflows import GRID_HEADROOM, container_no, container_row, git_revision
+from fake_gspread import FakeSpreadsheet, SheetsQuota
+
+# 작업 선택 비율 (현장 관찰: 화면 확인이 가장 많고, 수정·선적완료가 그다음)
+MIX = {"페이지 로드": 4, "수정": 3, "등록": 1, "선적완료": 2}
+HOT = 5  # 여러 세션이 함께 고치는 '인기' 컨테이너 수
+
+
+def session_script():
+    """AppTest가 세션마다 실행하는 스크립트: 받은 작업 하나를 실행하고 다시 읽은 화면을 남긴다."""
+    import time
+
+    import streamlit as st
+
+    import metrics
+    import utils
+
+    name, action = st.session_state.pop("action")
+    started = time.perf_counter()
+    with metrics.track_operation(name):
+        st.session_state["result"] = action(st.session_state.get("view"))
+        st.session_state["view"] = utils.load_data_from_gsheet()
+    st.session_state["ms"] = (time.perf_counter() - started) * 1000
+
+
+def build_spreadsheet(rows, quota):
+    """현재 데이터 rows행(앞쪽 HOT개는 씰 번호 0의 인기 컨테이너)과 빈 로그."""
+    spreadsheet = FakeSpreadsheet(quota=quota)
+    day = datetime.now(utils.KST).date().isoformat()
+    slots = [str(p) for p in range(1, 10)]
+    main = [container_row(i, day, pos=slots[i] if i < len(slots) else "") for i in range(rows)]
+    for row in main[:HOT]:
+        row[utils.SHEET_HEADERS.index('씰 번호')] = "0"
+    spreadsheet.create(utils.MAIN_SHEET_NAME, [utils.SHEET_HEADERS] + main)
+    spreadsheet.create(utils.LOG_SHEET_NAME, [])
+    for title in spreadsheet.titles():
+        spreadsheet.sheet(title).row_count += GRID_HEADROOM
+    return spreadsheet
+
+
+class Session(threading.Thread):
+    """휴대폰 한 대: 생각 시간 → 작업 → 화면 다시 읽기를 deadline까지 반복한다."""
+
+    def __init__(self, index, deadline, think, seed, hot_nos, tally, conditional=True):
+        super().__init__(name=f"session-{index}", daemon=True)
+        self.index = index
+        self.deadline = deadline
+        self.think = think
+        self.rng = random.Random(seed + index)
+        self.hot_nos = hot_nos
+        self.tally = tally
+        self.conditional = conditional
+        self.seq = 0
+
+    # --- 작업: 화면(view)을 받아 (ok, 결과)를 돌려준다 ---
+    def edit(self, view):
+        target = view.find(self.rng.choice(self.hot_nos)) if view else None
+        if target is None:
+            return None, "화면에 없음"
+        item = target.copy()
+        item['씰 번호'] = str(int(item.get('씰 번호') or 0) + 1)
+        return utils.update_row_in_gsheet(item, base=target if self.conditional else None)
+
+    def register(self, view):
+        self.seq += 1
+        no = container_no(10 ** 6 + self.index * 10 ** 4 + self.seq)
+        item = dict(zip(utils.SHEET_HEADERS, container_row(0, datetime.now(utils.KST).date().isoformat())))
+        item.update({'컨테이너 번호': no, '위치': utils.RESTORE_SLOT})
+        return utils.add_row_to_gsheet(item)
+
+    def complete(self, view):
+        candidates = [c for c in (view or []) if c['컨테이너 번호'] not in self.hot_nos]
+        if not candidates:
+            return None, "화면에 없음"
+        item = self.rng.choice(candidates).copy()
+        item.update({'상태': '선적완료', '완료일시': datetime.now()})
+        ok, overwritten = utils.backup_data_to_new_sheet([item])
+        if not ok:
+            return ok, overwritten
+        if overwritten:
+            self.tally.bump("중복 선적완료")
+        return utils.delete_rows_by_container_nos([item['컨테이너 번호']])
+
+    def page_load(self, view):
+        return True, "성공"
+
+    def run(self):
+        actions = {"페이지 로드": self.page_load, "수정": self.edit, "등록": self.register, "선적완료": self.complete}
+        at = AppTest.from_function(session_script, default_timeout=300)
+        at.session_state["action"] = ("페이지 로드", self.page_load)
+        at.run()
+        while True:
+            time.sleep(min(self.rng.expovariate(1 / self.think), self.think * 4))
+            if time.monotonic() >= self.deadline:
+                return
+            name = self.rng.choices(list(MIX), weights=list(MIX.values()))[0]
+            at.session_state["action"] = (name, actions[name])
+            at.session_state["result"] = None  # 지난 실행의 결과를 이번 결과로 세지 않도록
+            at.run()
+            if at.exception:
+                self.tally.record(name, False, at.exception[0].message, 0.0)
+                continue
+            if at.session_state["result"] is None:  # 이번 실행이 작업까지 가지 못함
+                self.tally.record(name, False, "작업 결과 없음", 0.0)
+                continue
+            ok, detail = at.session_state["result"]
+            if ok is None:  # 고칠 대상이 화면에 없어 건너뜀
+                continue
+            self.tally.record(name, ok, detail, at.session_state["ms"])
+
+
+class Tally(collections.Counter):
+    """세션 스레드들이 함께 쓰는 결과 집계 (카운터 + 작업별 소요 표본)."""
+
+    def __init__(self):
+        super().__init__()
+        self.samples = collections.defaultdict(list)
+        self.failures = collections.Counter()
+        self.lock = threading.Lock()
+
+    def record(self, name, ok, detail, ms):
+        with self.lock:
+            if isinstance(detail, utils.RowConflict):  # 조건부 수정이 낡은 화면을 거절함(잃어버린 수정 방지)
+                self["충돌 거절"] += 1
+                return
+            self[f"{name} 성공" if ok else f"{name} 실패"] += 1
+            if ok:
+                self.samples[name].append(ms)
+            else:
+                self.failures["429" if "429" in str(detail) else str(detail)[:60]] += 1
+
+    def bump(self, key):
+        with self.lock:
+            self[key] += 1
+
+
+def watch_quota(stop, peak):
+    """진단 페이지와 같은 방식(metrics.calls_in_window)으로 60초 창 호출 수의 최댓값을 잰다."""
+    while not stop.wait(0.5):
+        window = metrics.calls_in_window(60)
+        for kind in ("sheets_read", "sheets_write"):
+            peak[kind] = max(peak[kind], window[kind])
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+
+def simulate(args):
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    metrics.reset()
+    limit = None if args.unlimited else metrics.SHEETS_QUOTA_PER_MINUTE
+    quota = SheetsQuota(latency=args.latency / 1000, reads_per_minute=limit, writes_per_minute=limit)
+    spreadsheet = build_spreadsheet(args.rows, quota)
+    utils.instrument_sheets_client(spreadsheet.client)
+    utils.connect_to_gsheet = lambda: spreadsheet
+    hot_nos = [container_no(i) for i in range(HOT)]
+
+    tally = Tally()
+    peak = {"sheets_read": 0, "sheets_write": 0}
+    stop = threading.Event()
+    watcher = threading.Thread(target=watch_quota, args=(stop, peak), daemon=True)
+    watcher.start()
+    started = time.monotonic()
+    sessions = [Session(i, started + args.duration, args.think, args.seed, hot_nos, tally, not args.no_base)
+                for i in range(args.sessions)]
+    for s in sessions:
+        s.start()
+    for s in sessions:
+        s.join()
+    elapsed = time.monotonic() - started
+    stop.set()
+    watcher.join()
+    # 429로 거절된 요청도 앱이 보내려 한 호출이므로 시도 기준(metrics)으로 센다
+    attempted = metrics.calls_in_window(elapsed + 1)
+    rejected = sum(quota.rejected.values())
+
+    # 충돌 확인: 최종 시트의 인기 컨테이너 카운터와 중복 번호
+    values = spreadsheet.sheet(utils.MAIN_SHEET_NAME).dump()[1:]
+    seal_idx = utils.SHEET_HEADERS.index('씰 번호')
+    counters = collections.defaultdict(int)
+    for row in values:
+        if row[0] in hot_nos:
+            counters[row[0]] = max(counters[row[0]], int(row[seal_idx] or 0))
+    duplicates = sum(n - 1 for n in collections.Counter(row[0] for row in values).values() if n > 1)
+
+    per_op = {r["op"]: r for r in metrics.summarize()}
+    operations = []
+    for name in MIX:
+        ms = tally.samples.get(name, [])
+        summary = per_op.get(name, {})
+        operations.append({
+            "op": name, "ok": tally[f"{name} 성공"], "failed": tally[f"{name} 실패"],
+            "p50_ms": round(percentile(ms, 0.5), 1), "p95_ms": round(percentile(ms, 0.95), 1),
+            "p99_ms": round(percentile(ms, 0.99), 1),
+            "reads_avg": round(summary.get("sheets_read_avg", 0.0), 2),
+            "writes_avg": round(summary.get("sheets_write_avg", 0.0), 2),
+        })
+    done = sum(op["ok"] for op in operations)
+    return {
+        "elapsed_s": round(elapsed, 1),
+        "throughput_per_min": round(done / elapsed * 60, 1),
+        "operations": operations,
+        "sheets": {
+            "reads": attempted["sheets_read"], "writes": attempted["sheets_write"], "rejected_429": rejected,
+            "reads_per_min": round(attempted["sheets_read"] / elapsed * 60, 1),
+            "writes_per_min": round(attempted["sheets_write"] / elapsed * 60, 1),
+            "peak_reads_60s": peak["sheets_read"], "peak_writes_60s": peak["sheets_write"],
+            "quota_per_min": metrics.SHEETS_QUOTA_PER_MINUTE,
+        },
+        "conflicts": {
+            "lost_updates": tally["수정 성공"] - sum(counters.values()),
+            "rejected_stale_edits": tally["충돌 거절"],
+            "duplicate_completions": tally["중복 선적완료"],
+            "duplicate_rows": duplicates,
+        },
+        "failures": dict(tally.failures.most_common(10)),
+    }
+
+
+def print_report(args, report):
+    print(f"부하 시뮬레이션: 세션 {args.sessions}개 × {report['elapsed_s']}초, 생각 시간 평균 {args.think:g}초, "
+          f"Sheets 지연 {args.latency:g} ms, 현재 데이터 {args.rows}행"
+          + (" (쿼터 없음)" if args.unlimited else "") + (" (base 없는 수정)" if args.no_base else ""))
+    print(f"  처리량: 분당 {report['throughput_per_min']}건")
+    print(f"  {'작업':<10} {'성공':>5} {'실패':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'회당 읽기':>8} {'회당 쓰기':>8}")
+    for op in report["operations"]:
+        print(f"  {op['op']:<10} {op['ok']:5} {op['failed']:5} {op['p50_ms']:8.0f} {op['p95_ms']:8.0f}"
+              f" {op['p99_ms']:8.0f} {op['reads_avg']:10.2f} {op['writes_avg']:10.2f}")
+    s = report["sheets"]
+    quota = s["quota_per_min"]
+    print(f"  Sheets 호출(429 포함 시도): 읽기 {s['reads']}회 = 분당 {s['reads_per_min']} (60초 창 최대 {s['peak_reads_60s']}), "
+          f"쓰기 {s['writes']}회 = 분당 {s['writes_per_min']} (60초 창 최대 {s['peak_writes_60s']}), 쿼터 {quota}/분"
+          + ("  ⚠️" if max(s["peak_reads_60s"], s["peak_writes_60s"]) > quota else ""))
+    print(f"  429 거절: {s['rejected_429']}회")
+    c = report["conflicts"]
+    print(f"  충돌: 잃어버린 수정 {c['lost_updates']}건 (낡은 화면이라 거절한 수정 {c['rejected_stale_edits']}건), "
+          f"중복 선적완료 {c['duplicate_completions']}건, "
+          f"다른 행 덮어쓰기(중복 번호) {c['duplicate_rows']}건")
+    if report["failures"]:
+        print("  실패 사유: " + ", ".join(f"{reason} ×{n}" for reason, n in report["failures"].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=6, help="동시에 쓰는 휴대폰(세션) 수")
+    parser.add_argument("--duration", type=float, default=60.0, help="시뮬레이션 시간(초)")
+    parser.add_argument("--think", type=float, default=5.0, help="작업 사이 평균 생각 시간(초)")
+    parser.add_argument("--latency", type=float, default=150.0, help="Sheets 요청당 지연(ms)")
+    parser.add_argument("--rows", type=int, default=200, help="현재 데이터 행 수")
+    parser.add_argument("--unlimited", action="store_true", help="분당 쿼터(429) 없이 돌린다")
+    parser.add_argument("--no-base", action="store_true", help="수정을 base 없이 써서 잃어버린 수정과 비교한다")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # streamlit bare 모드 경고와 작업별 metrics 로그는 끈다
+    with tempfile.TemporaryDirectory() as archive_dir:
+        backup_archive.DEFAULT_ARCHIVE_DIR = archive_dir  # 로컬 Parquet 아카이브는 임시 폴더에
+        report = simulate(args)
+    print_report(args, report)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        meta = {
+            "created": datetime.now(utils.KST).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            **{k: v for k, v in vars(args).items() if k != "json"},
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "report": report}, f, ensure_ascii=False, indent=2)
+        print(f"저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""OCR 정확도·속도 회귀 코퍼스 러너.
+
+코퍼스 폴더의 사례(JSON 하나 = 사진 하나)를 인식 전략별로 돌려
+  정밀도 : 화면에 보여 준 번호(체크디지트 통과 상위 3개) 중 정답 비율
+  재현율 : 정답 번호가 화면에 나온 사진 비율
+  1순위  : 첫 번호가 정답인 사진 비율
+  호출/장, ms/장
+을 잰다. 추출기(_extract_split)나 단계 스케줄러를 빠르게 바꿀 때 정확도를 조용히
+잃지 않았는지 확인하는 용도다.
+
+사례 형식 (기본 코퍼스: tests/ocr_corpus/*.json):
+  {"expected": ["CSQU3054383"], "note": "설명", "image": "사진 경로(선택, JSON 기준 상대경로)",
+   "responses": {"0/top": <OCR.space 응답 JSON>, "270/top": ..., "0/top/enhance": ...}}
+responses 키는 시도(container_ocr.attempt_key)이고, 녹화되지 않은 시도는 빈 텍스트로 본다.
+저장소의 예시 코퍼스는 현장 사진에서 흔한 경우를 본떠 만든 합성 응답이다. 실제 사진으로
+늘리려면 --record로 사진마다 9개 시도의 OCR.space 응답을 녹화한다(사진당 API 9회).
+정답은 파일 이름 앞부분('MSCU1234566_문짝.jpg')에서 읽고, 없으면 JSON의 expected를 채운다.
+
+전략:
+  단일 호출    : 첫 시도(0/top) 응답 하나만 추출 (extract_container_numbers)
+  단계 스케줄러: recognize_container_numbers (앱과 같음: 단계별 3방향, 검증 후보가 나오면 중단)
+  전체 시도    : 9개 시도를 모두 합쳐 추출 (재현율 상한)
+--engine tesseract면 녹화 응답 대신 사례의 사진을 로컬 tesseract(pytesseract)로 인식한다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_ocr_corpus.py
+    python benchmarks/bench_ocr_corpus.py --ocr-latency 900 --json benchmarks/results/ocr.json
+    python benchmarks/bench_ocr_corpus.py --compare benchmarks/results/ocr.json
+    python benchmarks/bench_ocr_corpus.py --record 사진폴더 --api-key KEY --corpus 코퍼스폴더
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import container_ocr
+from container_ocr import (
+    OCR_STAGES,
+    OcrError,
+    _extract_split,
+    _select_candidates,
+    attempt_key,
+    attempt_variant,
+)
+
+DEFAULT_CORPUS = os.path.join(ROOT, "tests", "ocr_corpus")
+SHOWN = 3  # 등록 페이지가 보여 주는 검증 통과 후보 수
+REGRESSION = 0.2  # --compare에서 ms/장이 이만큼(20%) 늘면 표시
+_NO_PATTERN = re.compile(r"^([A-Z]{4}\d{7})")
+
+
+# --- 엔진: engine(attempt, variant) -> 텍스트 (recognize_container_numbers의 engine 인자) ---
+class ReplayEngine:
+    """녹화된 OCR.space 응답을 시도별로 돌려준다. latency_ms만큼 호출마다 기다린다."""
+
+    def __init__(self, responses, latency_ms=0.0):
+        self.responses = responses
+        self.latency = latency_ms / 1000
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, attempt, variant):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        result = self.responses.get(attempt_key(attempt))
+        return container_ocr.ocr_space_text(result) if result else ""
+
+
+class TesseractEngine:
+    """로컬 tesseract로 시도 이미지를 인식한다(pytesseract와 tesseract 실행 파일 필요)."""
+
+    def __init__(self):
+        try:
+            import pytesseract
+        except ImportError:
+            sys.exit("pytesseract가 없습니다: pip install pytesseract (tesseract 실행 파일도 설치)")
+        self._ocr = pytesseract.image_to_string
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, attempt, variant):
+        with self._lock:
+            self.calls += 1
+        return self._ocr(variant, config="--psm 6")
+
+
+# --- 코퍼스 ---
+def load_corpus(folder):
+    cases = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            case = json.load(f)
+        case["name"] = os.path.splitext(os.path.basename(path))[0]
+        if case.get("image"):
+            case["image"] = os.path.join(os.path.dirname(path), case["image"])
+        cases.append(case)
+    return cases
+
+
+def _blank_photo():
+    from PIL import Image
+    buf = BytesIO()
+    Image.new("RGB", (64, 48), "white").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+def case_image_bytes(case, blank):
+    """사례의 사진 바이트. 재생은 사진이 없어도 되므로 없으면 빈 사진을 쓴다."""
+    if case.get("image") and os.path.exists(case["image"]):
+        with open(case["image"], "rb") as f:
+            return f.read()
+    return blank
+
+
+# --- 전략: (image_bytes, engine) -> 후보 목록 ---
+def single_call(image_bytes, engine):
+    attempt = OCR_STAGES[0][0]
+    variant = attempt_variant(container_ocr._load_image(image_bytes), *attempt)
+    try:
+        text = engine(attempt, variant)
+    except OcrError:
+        return []
+    return container_ocr.extract_container_numbers(text)
+
+
+def staged(image_bytes, engine):
+    try:
+        candidates, _, _ = container_ocr.recognize_container_numbers(image_bytes, "corpus", engine=engine)
+    except OcrError:
+        return []
+    return candidates
+
+
+def all_attempts(image_bytes, engine):
+    img = container_ocr._load_image(image_bytes)
+    tiers = ([], [], [])
+    seen = (set(), set(), set())
+    for stage in OCR_STAGES:
+        for attempt in stage:
+            try:
+                found = _extract_split(engine(attempt, attempt_variant(img, *attempt)))
+            except OcrError:
+                continue
+            for tier, out, done in zip(found, tiers, seen):
+                for cand in tier:
+                    if cand[0] not in done:
+                        done.add(cand[0])
+                        out.append(cand)
+    return _select_candidates(*tiers)
+
+
+STRATEGIES = {"단일 호출": single_call, "단계 스케줄러": staged, "전체 시도": all_attempts}
+
+
+def evaluate(cases, strategy, make_engine):
+    """전략 하나로 코퍼스를 돌려 정밀도/재현율/1순위/호출·ms per 사진과 사례별 결과를 낸다."""
+    blank = _blank_photo()
+    shown_total = shown_correct = found = top1 = with_answer = calls = 0
+    elapsed = 0.0
+    misses = []
+    for case in cases:
+        expected = set(case.get("expected") or [])
+        engine = make_engine(case)
+        image_bytes = case_image_bytes(case, blank)
+        started = time.perf_counter()
+        candidates = STRATEGIES[strategy](image_bytes, engine)
+        elapsed += time.perf_counter() - started
+        calls += engine.calls
+        shown = [no for no, ok in candidates if ok][:SHOWN]
+        shown_total += len(shown)
+        shown_correct += sum(no in expected for no in shown)
+        if expected:
+            with_answer += 1
+            found += bool(expected & set(shown))
+            top1 += bool(shown) and shown[0] in expected
+        if (expected and not expected & set(shown)) or set(shown) - expected:
+            misses.append({"case": case["name"], "expected": sorted(expected), "shown": shown})
+    n = len(cases) or 1
+    return {
+        "strategy": strategy,
+        "images": len(cases),
+        "precision": round(shown_correct / shown_total, 3) if shown_total else 1.0,
+        "recall": round(found / with_answer, 3) if with_answer else 1.0,
+        "top1": round(top1 / with_answer, 3) if with_answer else 1.0,
+        "calls_per_image": round(calls / n, 2),
+        "ms_per_image": round(elapsed * 1000 / n, 2),
+        "misses": misses,
+    }
+
+
+# --- 녹화 ---
+def record(photo_dir, corpus_dir, api_key):
+    """사진마다 9개 시도를 OCR.space로 보내 응답을 사례 JSON으로 저장한다."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    photos = sorted(p for p in glob.glob(os.path.join(photo_dir, "*"))
+                    if p.lower().endswith((".jpg", ".jpeg", ".png", ".heic", ".webp")))
+    for path in photos:
+        img = container_ocr._load_image(open(path, "rb").read())
+        responses = {}
+        for stage in OCR_STAGES:
+            for attempt in stage:
+                payload = container_ocr.compress_variant(attempt_variant(img, *attempt), attempt[1])
+                try:
+                    responses[attempt_key(attempt)] = container_ocr.ocr_space_request(payload, api_key)
+                except OcrError as e:
+                    responses[attempt_key(attempt)] = {"IsErroredOnProcessing": True, "ErrorMessage": [str(e)]}
+        stem = os.path.splitext(os.path.basename(path))[0]
+        match = _NO_PATTERN.match(stem.upper())
+        case = {"expected": [match.group(1)] if match else [], "note": stem,
+                "image": os.path.relpath(path, corpus_dir), "responses": responses}
+        out = os.path.join(corpus_dir, f"{stem}.json")
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(case, f, ensure_ascii=False, indent=2)
+        print(f"녹화: {out}" + ("" if match else "  (정답 미기입 — expected를 채우세요)"))
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_results(results, previous=None):
+    before = {r["strategy"]: r for r in (previous or {}).get("results", [])}
+    print(f"  {'전략':<12} {'사진':>4} {'정밀도':>7} {'재현율':>7} {'1순위':>7} {'호출/장':>8} {'ms/장':>8}"
+          + ("   이전 대비" if previous else ""))
+    for r in results:
+        line = (f"  {r['strategy']:<12} {r['images']:4} {r['precision']:7.1%} {r['recall']:7.1%}"
+                f" {r['top1']:7.1%} {r['calls_per_image']:8.2f} {r['ms_per_image']:8.1f}")
+        old = before.get(r["strategy"])
+        if old:
+            worse = []
+            for key, label in (("precision", "정밀도"), ("recall", "재현율"), ("top1", "1순위")):
+                if r[key] < old[key]:
+                    worse.append(f"{label} {r[key] - old[key]:+.1%}")
+            if r["calls_per_image"] > old["calls_per_image"]:
+                worse.append(f"호출 {r['calls_per_image'] - old['calls_per_image']:+.2f}")
+            change = r["ms_per_image"] / old["ms_per_image"] - 1 if old["ms_per_image"] else 0.0
+            line += f"   {change:+.0%}" + (f", {', '.join(worse)}" if worse else "")
+            if worse or change > REGRESSION:
+                line += "  ⚠️"
+        print(line)
+        for miss in r["misses"]:
+            print(f"      ✗ {miss['case']}: 정답 {miss['expected'] or '없음'} / 표시 {miss['shown'] or '없음'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="사례 JSON 폴더")
+    parser.add_argument("--engine", choices=["replay", "tesseract"], default="replay")
+    parser.add_argument("--ocr-latency", type=float, default=0.0, help="재생 호출당 지연(ms)")
+    parser.add_argument("--only", nargs="+", choices=list(STRATEGIES), help="이 전략만 돌린다")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--record", metavar="PHOTO_DIR", help="이 폴더의 사진을 OCR.space로 녹화해 --corpus에 저장")
+    parser.add_argument("--api-key", default=container_ocr.OCR_SPACE_DEMO_KEY, help="--record용 OCR.space 키")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.corpus, args.api_key)
+        return
+
+    cases = load_corpus(args.corpus)
+    if not cases:
+        sys.exit(f"사례가 없습니다: {args.corpus}")
+    if args.engine == "tesseract":
+        cases = [c for c in cases if c.get("image") and os.path.exists(c["image"])]
+        make_engine = lambda case: TesseractEngine()  # noqa: E731
+    else:
+        make_engine = lambda case: ReplayEngine(case.get("responses", {}), args.ocr_latency)  # noqa: E731
+
+    results = [evaluate(cases, name, make_engine) for name in (args.only or STRATEGIES)]
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print(f"OCR 코퍼스 ({len(cases)}장, 엔진 {args.engine}, 호출당 지연 {args.ocr_latency:g} ms)")
+    print_results(results, previous)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        meta = {
+            "created": datetime.now().astimezone().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": os.path.relpath(args.corpus, ROOT),
+            "engine": args.engine,
+            "ocr_latency_ms": args.ocr_latency,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
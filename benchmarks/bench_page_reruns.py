@@ -0,0 +1,138 @@
+"""등록 페이지 상호작용당 서버 시간·전송량 벤치마크 (전체 rerun vs 조각 rerun).
+
+등록 페이지는 현황 표/출력 패널, 라벨 미리보기, 등록 폼을 st.fragment로 나눴다.
+표의 체크박스·미리보기 선택·폼 입력은 해당 조각만 다시 실행되는데, 그 효과를
+Streamlit의 AppTest 러너로 직접 잰다.
+  전체      : 예전처럼 상호작용마다 페이지 전체를 다시 실행
+  표 조각   : 현황 표 체크(수정/선적완료/출력선택)
+  미리보기  : 라벨 미리보기 선택
+  폼 조각   : 등록 폼 입력/OCR
+  피드 조각 : 몇 초마다 도는 변경 피드 확인(바뀐 것이 없을 때)
+시간은 스크립트 실행 시간(서버), 전송량은 브라우저로 보내는 ForwardMsg 직렬화 크기다.
+Google Sheets 연결 없이 합성 컨테이너 목록(위치 1~9 + 복원 슬롯)을 세션에 넣고 잰다.
+세션이 피드의 최신 번호까지 본 것으로 해 두어, 피드 조각이 목록을 다시 읽어(연결이 없어
+빈 목록) 바꿔치지 않게 한다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_page_reruns.py
+    python benchmarks/bench_page_reruns.py --repeat 10
+
+AppTest는 조각 재실행을 직접 요청하는 API가 없어, 러너가 받을 rerun 요청의
+fragment_id_queue를 채워 브라우저가 조각 위젯을 건드렸을 때와 같은 요청을 만든다.
+조각 id는 등록 순서가 아니라 조각 함수 이름으로 찾는다(조각이 늘어도 이름이 어긋나지 않게).
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.app_test as app_test_module
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+import utils
+from utils import SHEET_HEADERS, ContainerList, main_values_to_records
+
+PAGE = os.path.join(ROOT, "1_등록.py")
+# 조각 함수 이름 → 표에 쓸 이름
+FRAGMENTS = {
+    "slot_table_panel": "표 조각",
+    "label_preview": "미리보기",
+    "registration_form": "폼 조각",
+    "_follow_changes": "피드 조각",
+}
+
+
+class MeasuringRunner(LocalScriptRunner):
+    """요청한 조각만 실행하고, 실행 시간과 전송 메시지 크기를 기록하는 러너."""
+    fragment_id = None
+    last = None
+
+    def run(self, widget_state=None, query_params=None, timeout=3, page_hash=""):
+        started = time.perf_counter()
+        if MeasuringRunner.fragment_id:
+            original = self.request_rerun
+
+            def request_rerun(rerun_data):
+                ok = original(rerun_data)
+                self._requests._rerun_data.fragment_id_queue[:] = [MeasuringRunner.fragment_id]
+                return ok
+            self.request_rerun = request_rerun
+        tree = super().run(widget_state, query_params, timeout, page_hash)
+        msgs = self.forward_msgs()
+        MeasuringRunner.last = (
+            (time.perf_counter() - started) * 1000,
+            sum(m.ByteSize() for m in msgs),
+            sum(1 for m in msgs if m.HasField("delta")),
+        )
+        return tree
+
+
+def sample_containers():
+    """위치 1~9와 복원 슬롯 2개를 채운 합성 현재 데이터."""
+    rows = [SHEET_HEADERS]
+    for i, pos in enumerate([str(p) for p in range(1, 10)] + ["복원", "복원"]):
+        rows.append([f"ABCU{i:06d}0", "베트남", "40", f"SEAL{i}", "선적중",
+                     f"2026-07-01 09:{i:02d}:00", "", pos])
+    return ContainerList(main_values_to_records(rows))
+
+
+def fragment_ids_by_name(at):
+    """{조각 함수 이름: 조각 id}. 저장소에는 Streamlit의 래퍼가 들어 있어 클로저에서 원래 함수를 찾는다."""
+    ids = {}
+    for fragment_id, wrapped in at._fragment_storage._fragments.items():
+        for cell in wrapped.__closure__ or ():
+            try:
+                name = getattr(cell.cell_contents, "__name__", None)
+            except ValueError:  # 아직 비어 있는 셀
+                continue
+            if name in FRAGMENTS:
+                ids[name] = fragment_id
+    return ids
+
+
+def measure(at, fragment_id, repeat):
+    MeasuringRunner.fragment_id = fragment_id
+    samples = []
+    for _ in range(repeat):
+        at.run()
+        samples.append(MeasuringRunner.last)
+    MeasuringRunner.fragment_id = None
+    return min(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    warnings.filterwarnings("ignore")
+    app_test_module.LocalScriptRunner = MeasuringRunner
+
+    at = AppTest.from_file(PAGE, default_timeout=60)
+    at.session_state["container_list"] = sample_containers()
+    at.session_state[utils._FEED_SEQ_KEY] = utils._sheet_catalog()["feed"].latest
+    at.run()  # 첫 실행(import·캐시 채우기)은 빼고 잰다
+    assert len(at.session_state["container_list"]) == len(sample_containers()), "합성 목록이 바뀌었다"
+
+    results = {"전체 rerun (이전 방식)": measure(at, None, args.repeat)}
+    fragment_ids = fragment_ids_by_name(at)
+    for func_name, name in FRAGMENTS.items():
+        results[name] = measure(at, fragment_ids[func_name], args.repeat)
+
+    full_ms, full_bytes, _ = results["전체 rerun (이전 방식)"]
+    print(f"등록 페이지 상호작용 1회 (컨테이너 {len(at.session_state['container_list'])}개, best of {args.repeat})")
+    print(f"  {'':<24} {'서버 ms':>9} {'전송 B':>9} {'델타':>5}")
+    for name, (ms, size, deltas) in results.items():
+        print(f"  {name:<24} {ms:9.1f} {size:9,} {deltas:5}"
+              + ("" if name.startswith("전체") else f"   ({ms / full_ms:.0%} 시간, {size / full_bytes:.0%} 전송)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""페이지별 import 비용 벤치마크 (python -X importtime).
+
+Streamlit Cloud가 절전에서 깨어나면 첫 화면은 새 프로세스에서 페이지 스크립트의
+import부터 시작한다. 각 페이지 파일 맨 위의 import 문만 새 인터프리터에서 실행해
+  합계 : import에 걸린 시간(ms, importtime의 최상위 누적값 합)
+  무거운 모듈 : 그중 실제로 불러온 큰 라이브러리(pandas, gspread, requests ...)
+를 보여준다. 무거운 라이브러리는 utils/container_ocr가 처음 쓸 때 불러오므로,
+여기 목록에 없는 것은 그 페이지의 첫 렌더가 기다리지 않는다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 7
+"""
+import argparse
+import ast
+import glob
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "gspread", "google.oauth2", "requests", "PIL", "qrcode"]
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def page_imports(path):
+    """페이지 파일의 모듈 최상위 import 문만 소스 그대로 모은다."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return "\n".join(ast.get_source_segment(source, node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure(code):
+    """새 인터프리터에서 code를 실행해 (import 합계 ms, 불러온 모듈 이름 집합)을 반환한다."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    total_us, loaded = 0, set()
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME_LINE.match(line)
+        if not m:
+            continue
+        loaded.add(m.group(4))
+        if len(m.group(3)) == 1:  # 들여쓰기 없는 줄 = 최상위 import (누적값에 하위 포함)
+            total_us += int(m.group(2))
+    return total_us / 1000, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = [os.path.join(ROOT, "1_등록.py")] + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+    print(f"페이지별 import 비용 (best of {args.repeat})")
+    for path in pages:
+        code = page_imports(path)
+        runs = [measure(code) for _ in range(args.repeat)]
+        best_ms = min(ms for ms, _ in runs)
+        loaded = runs[0][1]
+        heavy = [name for name in HEAVY_MODULES if name in loaded]
+        print(f"  {os.path.basename(path):<12} {best_ms:8.1f} ms   {', '.join(heavy) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""통계 계산 파이프라인 벤치마크 (합성 월별 백업).
+
+한 달치 백업이 수만 행으로 늘어도 통계 페이지가 버티는지 확인한다.
+  집계   : compute_backup_stats  (원본 행 → (완료일, 출고처) 집계표)
+  화면용 : build_stats_tables    (집계표 → 출고처/일자별 표, 콤마 포맷)
+비교용으로 이전 방식(형식 추론 to_datetime + 셀 단위 map/apply 포맷 + 열마다 Timestamp)도 잰다.
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_stats.py            # 기본 50,000행
+    python benchmarks/bench_stats.py --rows 200000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from utils import SHEET_HEADERS, DEFAULT_DESTINATIONS, compute_backup_stats, build_stats_tables
+
+
+def make_month(rows, month="2026-07", seed=0):
+    """SHEET_HEADERS 구성의 합성 월별 백업(모든 값 문자열, 시트에서 읽은 모양)."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(f"{month}-01")
+    seconds = rng.integers(0, 28 * 24 * 3600, rows)
+    done_at = (start + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%d %H:%M:%S")
+    status = np.where(rng.random(rows) < 0.95, "선적완료", "선적중")
+    return pd.DataFrame({
+        '컨테이너 번호': [f"ABCU{i:07d}" for i in range(rows)],
+        '출고처': rng.choice(DEFAULT_DESTINATIONS, rows),
+        '피트수': rng.choice(["20", "40"], rows),
+        '씰 번호': "",
+        '상태': status,
+        '등록일시': done_at,
+        '완료일시': np.where(status == "선적완료", done_at, ""),
+        '위치': "",
+    })[SHEET_HEADERS]
+
+
+def legacy_pipeline(df):
+    """이전 통계 페이지 방식 (비교 기준)."""
+    done = df[df['상태'] == '선적완료']
+    stats = pd.DataFrame({
+        '완료일': pd.to_datetime(done['완료일시'], errors='coerce').dt.strftime('%Y-%m-%d').fillna(''),
+        '출고처': done['출고처'].fillna('').astype(str),
+        '건수': 1,
+        '피트수': pd.to_numeric(done['피트수'], errors='coerce').fillna(0).astype(int),
+    }).groupby(['완료일', '출고처'], as_index=False)[['건수', '피트수']].sum()
+    dest = stats.groupby('출고처')[['건수', '피트수']].sum().astype(int)
+    dest = dest.map(lambda x: f"{x:,}")
+    cross = stats[stats['완료일'] != ''].groupby(['출고처', '완료일'])['피트수'].sum().unstack(fill_value=0)
+    cross.columns = [pd.Timestamp(str(c)).strftime('%m/%d').lstrip('0').replace('/0', '/') for c in cross.columns]
+    cross['합계'] = cross.sum(axis=1)
+    cross = pd.concat([cross, cross.sum(axis=0).rename('합계').to_frame().T])
+    return dest, cross.map(lambda x: f"{int(x):,}" if x != 0 else "-")
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_month(args.rows)
+    stats = compute_backup_stats(df)
+    results = {
+        "집계 (compute_backup_stats)": best_of(lambda: compute_backup_stats(df), args.repeat),
+        "화면용 표 (build_stats_tables)": best_of(lambda: build_stats_tables(stats), args.repeat),
+        "전체 (집계 + 표)": best_of(lambda: build_stats_tables(compute_backup_stats(df)), args.repeat),
+        "이전 방식 전체": best_of(lambda: legacy_pipeline(df), args.repeat),
+    }
+    print(f"월별 백업 {args.rows:,}행 → 집계 {len(stats):,}행 (best of {args.repeat})")
+    for name, ms in results.items():
+        print(f"  {name:<32} {ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
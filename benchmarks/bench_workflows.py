@@ -0,0 +1,354 @@
+"""야드 업무 흐름 종단 벤치마크 (가짜 Sheets 백엔드 + 로컬 OCR 스텁 서버).
+
+등록/수정/선적완료/되돌리기/복원/백업 이동/통계/이력 필터/OCR을 페이지와 같은
+순서의 utils 호출로 실행해, 시트 크기(현재 데이터·로그·일별/월별 백업 행 수)별로
+  소요 ms   : 반복 중 최솟값과 중앙값
+  읽기/쓰기 : 작업 한 번이 보낸 Sheets 요청 수 (분당 60회 쿼터와 비교)
+를 잰다. Google 계정 없이 tests/fake_gspread.py의 메모리 백엔드를 쓰며, --latency로
+요청당 왕복 지연을 넣을 수 있다. OCR은 127.0.0.1에 띄운 스텁 서버로 보낸다.
+매 반복은 새 스프레드시트·빈 캐시에서 시작하고, 세션이 페이지를 연 상태(시트 목록과
+현재 데이터를 읽은 뒤)를 만든 다음 작업만 잰다.
+
+결과를 JSON으로 저장해 두면(--json) 다음 실행에서 --compare로 작업별 변화를 본다.
+  {"meta": {...}, "results": [{"workflow", "rows", "best_ms", "median_ms", "reads", "writes", "ocr"}]}
+
+실행: 프로젝트 루트에서
+    python benchmarks/bench_workflows.py
+    python benchmarks/bench_workflows.py --sizes 100 1000 --latency 80 --json benchmarks/results/after.json
+    python benchmarks/bench_workflows.py --compare benchmarks/results/before.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+import streamlit as st
+
+import backup_archive
+import container_ocr
+import metrics
+import utils
+from fake_gspread import FakeSpreadsheet, SheetsQuota
+from iso6346 import compute_check_digit
+
+BATCH = 10  # 복원/백업 이동에서 한 번에 고르는 컨테이너 수
+REGRESSION = 0.2  # --compare에서 이만큼(20%) 느려지면 표시
+
+
+# --- 합성 데이터 ---
+def container_no(i, owner="ABCU"):
+    body = f"{owner}{i:06d}"
+    return f"{body}{compute_check_digit(body)}"
+
+
+def container_row(i, day, status="선적중", pos=""):
+    at = f"{day} {i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+    return [container_no(i), utils.DEFAULT_DESTINATIONS[i % len(utils.DEFAULT_DESTINATIONS)],
+            "40" if i % 3 else "20", f"{i:04d}", status, at,
+            at if status == "선적완료" else "", pos]
+
+
+GRID_HEADROOM = 1000  # 실제 시트처럼 데이터 아래에 빈 행을 둔다(없으면 update가 격자 범위를 넘는다)
+
+
+def build_spreadsheet(rows, today, latency_ms):
+    """현재 데이터/로그/오늘 일별 백업/이번 달 월별 백업을 각각 rows행씩 채운 가짜 스프레드시트."""
+    spreadsheet = FakeSpreadsheet(quota=SheetsQuota(latency=latency_ms / 1000,
+                                                    reads_per_minute=None, writes_per_minute=None))
+    day = today.isoformat()
+    slots = [str(p) for p in range(1, 10)]
+    spreadsheet.create(utils.MAIN_SHEET_NAME, [utils.SHEET_HEADERS] + [
+        container_row(i, day, pos=slots[i] if i < len(slots) else "") for i in range(rows)])
+    now = datetime.combine(today, datetime.min.time())
+    spreadsheet.create(utils.LOG_SHEET_NAME, [
+        utils.make_log_row(f"신규 등록: {container_no(i)}", now=now + timedelta(seconds=i)) for i in range(rows)])
+    done = [container_row(rows + i, day, status="선적완료") for i in range(rows)]
+    spreadsheet.create(f"{utils.BACKUP_PREFIX}{day}", [utils.SHEET_HEADERS] + done)
+    spreadsheet.create(f"{utils.BACKUP_PREFIX}{day[:7]}", [utils.SHEET_HEADERS] + done)
+    for title in spreadsheet.titles():
+        spreadsheet.sheet(title).row_count += GRID_HEADROOM
+    return spreadsheet
+
+
+def fresh_session(rows, today, latency_ms):
+    """새 프로세스·새 세션처럼 캐시를 비우고, 페이지를 연 상태(시트 목록·현재 데이터 읽음)를 만든다."""
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    metrics.reset()
+    spreadsheet = build_spreadsheet(rows, today, latency_ms)
+    utils.instrument_sheets_client(spreadsheet.client)
+    utils.connect_to_gsheet = lambda: spreadsheet
+    # 로그가 LOG_ROTATE_THRESHOLD를 넘으면 쓰기마다 백그라운드 이관이 시작돼 측정에 섞이므로 막아 둔다
+    utils._sheet_catalog()["rotation"]["running"] = True
+    utils.get_worksheets_map(spreadsheet)
+    containers = utils.load_data_from_gsheet()
+    return spreadsheet, containers
+
+
+# --- 업무 흐름 (페이지 함수와 같은 순서의 utils 호출) ---
+# 각 함수는 준비(재지 않음)를 하고, 잴 작업을 인자 없는 함수로 돌려준다.
+def wf_register(ctx):
+    new = dict(zip(utils.SHEET_HEADERS, container_row(10 ** 6, ctx["day"], pos=utils.RESTORE_SLOT)))
+    return lambda: utils.add_row_to_gsheet(new)
+
+
+def wf_edit(ctx):
+    target = ctx["containers"][-1].copy()
+    target['씰 번호'] = "9999"
+    return lambda: utils.update_row_in_gsheet(target)
+
+
+def wf_complete(ctx):
+    item = ctx["containers"][-1].copy()
+    item['상태'] = '선적완료'
+    item['완료일시'] = datetime.now()
+
+    def run():
+        ok, res = utils.backup_data_to_new_sheet([item])
+        if ok:
+            ok, res = utils.delete_rows_by_container_nos([item['컨테이너 번호']])
+        if ok:
+            utils.log_change(f"선적완료 자동 백업: {item['컨테이너 번호']} (위치 {item.get('위치')})")
+        return ok, res
+    return run
+
+
+def wf_undo(ctx):
+    rows = ctx["rows"]
+    restore = dict(zip(utils.SHEET_HEADERS, container_row(rows, ctx["day"])))  # 일별 백업의 첫 행
+
+    def run():
+        ok, msg = utils.add_row_to_gsheet(restore)
+        if ok:
+            utils.delete_from_backup_sheets([restore['컨테이너 번호']], ctx["daily"])
+            utils.log_change(f"선적완료 되돌리기: {restore['컨테이너 번호']} (위치 없음)")
+        return ok, msg
+    return run
+
+
+def wf_restore(ctx):
+    rows = ctx["rows"]
+    picked = [dict(zip(utils.SHEET_HEADERS, container_row(rows + i, ctx["day"])))
+              for i in range(min(BATCH, rows))]
+    for row in picked:
+        row.update({'위치': utils.RESTORE_SLOT, '상태': '선적중', '완료일시': ''})
+
+    def run():
+        ok, msg = utils.add_rows_to_gsheet_batch(picked)
+        if ok:
+            utils.log_change(f"데이터 복구: '{ctx['daily']}'에서 {len(picked)}개 선택 복구 (복원 슬롯)")
+            ok, msg = utils.delete_from_backup_sheets([r['컨테이너 번호'] for r in picked], ctx["daily"])
+        return ok, msg
+    return run
+
+
+def wf_move(ctx):
+    rows = ctx["rows"]
+    nos = [container_no(rows + i) for i in range(min(BATCH, rows))]
+    yesterday = (ctx["today"] - timedelta(days=1)).isoformat()
+    return lambda: utils.move_containers_between_backup_sheets(nos, ctx["daily"], yesterday, True)
+
+
+def wf_stats_daily(ctx):
+    def run():
+        values = utils.get_sheet_values_cached(ctx["daily"], ctx["spreadsheet"])
+        return True, utils.build_stats_tables(utils.compute_backup_stats(utils.backup_values_to_frame(values)))
+    return run
+
+
+def wf_stats_month(ctx):
+    month_str = ctx["day"][:7]
+
+    def run():
+        stats = utils.sync_month_backup(month_str, spreadsheet=ctx["spreadsheet"])
+        return stats is not None, utils.build_stats_tables(stats)
+    return run
+
+
+def wf_history(ctx):
+    keyword = container_no(ctx["rows"] // 2)
+
+    def run():
+        df_log, index = utils.load_log_frame(ctx["spreadsheet"])
+        by_no = utils.filter_log_positions(df_log, index, keyword=keyword)
+        by_text = utils.filter_log_positions(df_log, index, keyword="신규", kind="등록", start=ctx["today"])
+        utils.log_display_frame(df_log.iloc[by_text[:100]])
+        return len(by_no) == 1, len(by_text)
+    return run
+
+
+WORKFLOWS = {
+    "등록": wf_register,
+    "수정": wf_edit,
+    "선적완료": wf_complete,
+    "되돌리기": wf_undo,
+    "복원": wf_restore,
+    "백업 이동": wf_move,
+    "통계 (일별)": wf_stats_daily,
+    "통계 (월별 집계)": wf_stats_month,
+    "이력 필터": wf_history,
+}
+
+
+# --- OCR 스텁 서버 ---
+class _OcrStub(BaseHTTPRequestHandler):
+    delay = 0.0
+    text = "MSCU 123456 6"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.delay)
+        body = json.dumps({"ParsedResults": [{"ParsedText": self.text}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_ocr_stub(delay_ms):
+    _OcrStub.delay = delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OcrStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    container_ocr.OCR_SPACE_URL = f"http://127.0.0.1:{server.server_port}/parse/image"
+    return server
+
+
+def sample_photo():
+    from PIL import Image
+    buf = BytesIO()
+    Image.new("RGB", (1600, 1200), "white").save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+# --- 측정 ---
+def measure(name, rows, repeat, today, latency_ms):
+    samples, calls = [], None
+    for _ in range(repeat):
+        spreadsheet, containers = fresh_session(rows, today, latency_ms)
+        ctx = {"spreadsheet": spreadsheet, "containers": containers, "rows": rows, "today": today,
+               "day": today.isoformat(), "daily": f"{utils.BACKUP_PREFIX}{today.isoformat()}"}
+        run = WORKFLOWS[name](ctx)
+        spreadsheet.quota.reset()
+        started = time.perf_counter()
+        ok, detail = run()
+        samples.append((time.perf_counter() - started) * 1000)
+        if ok is False:
+            raise RuntimeError(f"{name} ({rows}행) 실패: {detail}")
+        calls = (spreadsheet.quota.reads, spreadsheet.quota.writes)
+    return {"workflow": name, "rows": rows, "best_ms": round(min(samples), 2),
+            "median_ms": round(statistics.median(samples), 2),
+            "reads": calls[0], "writes": calls[1], "ocr": 0}
+
+
+def measure_ocr(repeat, ocr_latency_ms):
+    image = sample_photo()
+    samples = []
+    for _ in range(repeat):
+        metrics.reset()
+        started = time.perf_counter()
+        with metrics.track_operation("OCR"):
+            container_ocr.recognize_container_numbers(image, "stub")
+        samples.append((time.perf_counter() - started) * 1000)
+    ocr_calls = metrics.recent_operations()[0]["ocr"]
+    return {"workflow": "OCR", "rows": 0, "best_ms": round(min(samples), 2),
+            "median_ms": round(statistics.median(samples), 2), "reads": 0, "writes": 0, "ocr": ocr_calls}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def print_results(results, previous=None):
+    before = {(r["workflow"], r["rows"]): r for r in (previous or {}).get("results", [])}
+    print(f"  {'작업':<16} {'행 수':>7} {'최소 ms':>9} {'중앙 ms':>9} {'읽기':>5} {'쓰기':>5} {'OCR':>4}"
+          + ("   이전 대비" if previous else ""))
+    for r in results:
+        line = (f"  {r['workflow']:<16} {r['rows'] or '-':>7} {r['best_ms']:9.1f} {r['median_ms']:9.1f}"
+                f" {r['reads']:5} {r['writes']:5} {r['ocr']:4}")
+        old = before.get((r["workflow"], r["rows"]))
+        if old:
+            change = r["median_ms"] / old["median_ms"] - 1 if old["median_ms"] else 0.0
+            calls = (r["reads"] + r["writes"] + r["ocr"]) - (old["reads"] + old["writes"] + old["ocr"])
+            line += f"   {change:+.0%}" + (f", 호출 {calls:+d}" if calls else "")
+            if change > REGRESSION or calls > 0:
+                line += "  ⚠️"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="Sheets 요청당 지연(ms)")
+    parser.add_argument("--ocr-latency", type=float, default=0.0, help="OCR 스텁 응답 지연(ms)")
+    parser.add_argument("--only", nargs="+", choices=list(WORKFLOWS) + ["OCR"], help="이 작업만 잰다")
+    parser.add_argument("--json", help="결과를 저장할 JSON 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # streamlit bare 모드 경고와 작업별 metrics 로그는 끈다
+    names = args.only or list(WORKFLOWS) + ["OCR"]
+    today = datetime.now(utils.KST).date()
+    results = []
+    with tempfile.TemporaryDirectory() as archive_dir:
+        backup_archive.DEFAULT_ARCHIVE_DIR = archive_dir  # 로컬 Parquet 아카이브는 임시 폴더에
+        for rows in args.sizes:
+            for name in names:
+                if name != "OCR":
+                    results.append(measure(name, rows, args.repeat, today, args.latency))
+    if "OCR" in names:
+        server = start_ocr_stub(args.ocr_latency)
+        try:
+            results.append(measure_ocr(args.repeat, args.ocr_latency))
+        finally:
+            server.shutdown()
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print(f"업무 흐름 벤치마크 (best/median of {args.repeat}, Sheets 지연 {args.latency:g} ms)")
+    print_results(results, previous)
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        meta = {
+            "created": datetime.now(utils.KST).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "latency_ms": args.latency,
+            "ocr_latency_ms": args.ocr_latency,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
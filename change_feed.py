@@ -0,0 +1,80 @@
+"""세션 사이 변경 알림 — 서버 프로세스 안의 발행/구독 피드.
+
+세션은 페이지를 처음 열 때 읽은 현재 데이터를 계속 들고 있어서, 다른 휴대폰이 등록·
+수정·선적완료한 내용은 '데이터 새로고침'을 누르거나 자기가 쓰기를 해야 보였다.
+이제 utils의 쓰기 함수가 바뀐 행(델타)을 이 피드에 올리고, 세션은 마지막으로 본
+번호(seq) 이후의 이벤트만 받아 자기 목록에 반영한다. 시트를 다시 읽지 않는다.
+
+이벤트: {'seq', 'at', 'sheet', 'kind', 'key', 'record'}
+  kind = 'upsert' : key(컨테이너 번호) 행이 record로 바뀌었거나 새로 생김
+         'delete' : key 행이 지워짐
+         'reload' : 무엇이 바뀌었는지 모름(앱 밖에서 고침, 범위를 모르는 무효화) → 다시 읽기
+                    sheet가 None이면 모든 시트
+피드는 최근 FEED_SIZE개만 들고 있어, 그보다 오래 못 따라온 세션은 since()가 None을
+돌려준다(다시 읽으면 된다). 이 모듈은 streamlit에 의존하지 않는다(단위 테스트 용이).
+"""
+import collections
+import threading
+import time
+
+FEED_SIZE = 500
+
+UPSERT = "upsert"
+DELETE = "delete"
+RELOAD = "reload"
+
+
+class ChangeFeed:
+    """순번이 붙은 변경 이벤트의 링 버퍼. 여러 스레드(세션)에서 같이 쓴다."""
+
+    def __init__(self, size=FEED_SIZE):
+        self._events = collections.deque(maxlen=size)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    @property
+    def latest(self):
+        """지금까지 올라온 마지막 이벤트 번호(없으면 0). 처음 읽은 세션의 시작점."""
+        return self._seq
+
+    def publish(self, sheet, kind, key=None, record=None):
+        """이벤트 하나를 올리고 그 번호를 돌려준다."""
+        with self._lock:
+            self._seq += 1
+            self._events.append({"seq": self._seq, "at": time.time(), "sheet": sheet,
+                                 "kind": kind, "key": key, "record": record})
+            return self._seq
+
+    def since(self, seq):
+        """seq 뒤에 올라온 이벤트 목록(오래된 것부터).
+
+        seq가 None이거나 버퍼에서 이미 밀려난 이벤트가 있으면 None — 다시 읽어야 한다.
+        """
+        if seq is None:
+            return None
+        with self._lock:
+            if seq >= self._seq:
+                return []
+            if not self._events or self._events[0]["seq"] > seq + 1:
+                return None
+            return [e for e in self._events if e["seq"] > seq]
+
+
+def net_changes(events, sheet):
+    """sheet의 이벤트를 키별 마지막 상태로 합친다: ({키: record}, {지운 키}).
+
+    'reload'가 하나라도 있으면 None(델타로는 맞출 수 없다).
+    """
+    upserts, deletes = {}, set()
+    for event in events:
+        if event["kind"] == RELOAD and event["sheet"] in (None, sheet):
+            return None
+        if event["sheet"] != sheet:
+            continue
+        if event["kind"] == UPSERT:
+            upserts[event["key"]] = event["record"]
+            deletes.discard(event["key"])
+        elif event["kind"] == DELETE:
+            upserts.pop(event["key"], None)
+            deletes.add(event["key"])
+    return upserts, deletes
@@ -8,27 +8,26 @@ OCR 엔진은 OCR.space 무료 API를 사용한다 (월 25,000건 무료, 카드
 
 OCR 오인식(O↔0, I↔1 등)은 위치별 보정 + ISO 6346 체크디지트 검증으로 걸러낸다.
 이 모듈은 streamlit에 의존하지 않는다(단위 테스트 용이).
+requests/PIL은 import 비용이 커서(합계 약 0.08초) 사진을 실제로 인식할 때 불러온다
+— 등록 페이지를 열 때마다 내지 않도록.
 """
+import contextvars
 import re
 from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from typing import TYPE_CHECKING
 
-import requests
-from PIL import Image, ImageEnhance, ImageOps
+# 체크디지트 규칙은 iso6346에 있다(기존 import 경로 호환을 위해 여기서도 노출).
+from iso6346 import check_digit_matches, compute_check_digit, is_valid_check_digit  # noqa: F401
+import metrics
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 OCR_SPACE_URL = "https://api.ocr.space/parse/image"
 OCR_SPACE_DEMO_KEY = "helloworld"  # 공용 데모 키 (호출 제한 큼 — 테스트 전용)
 _MAX_UPLOAD_BYTES = 1000 * 1024  # 무료 키 업로드 제한(1MB)보다 약간 작게
 
-# ISO 6346 문자 값 테이블: A=10부터 시작하되 11의 배수(11, 22, 33)는 건너뛴다.
-_LETTER_VALUES = {}
-_v = 10
-for _ch in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
-    if _v % 11 == 0:
-        _v += 1
-    _LETTER_VALUES[_ch] = _v
-    _v += 1
-
 # OCR이 헷갈리는 글자 보정: 앞 4자리(영문 자리)에 숫자가 오면 비슷한 영문으로,
 # 뒤 7자리(숫자 자리)에 영문이 오면 비슷한 숫자로 바꿔 후보를 만든다.
 _DIGIT_TO_LETTER = {"0": "O", "1": "I", "2": "Z", "5": "S", "6": "G", "8": "B"}
@@ -40,22 +39,6 @@ class OcrError(Exception):
     """OCR API 호출 실패(네트워크/키/서버 오류)."""
 
 
-def compute_check_digit(cno10: str) -> int:
-    """앞 10자리(영문 4 + 숫자 6)로 ISO 6346 체크디지트를 계산한다."""
-    total = 0
-    for i, ch in enumerate(cno10):
-        val = _LETTER_VALUES[ch] if ch.isalpha() else int(ch)
-        total += val * (2 ** i)
-    return total % 11 % 10
-
-
-def is_valid_check_digit(container_no: str) -> bool:
-    """컨테이너 번호(11자리)의 마지막 자리가 ISO 6346 체크디지트와 일치하는지 검증."""
-    if not re.fullmatch(r"[A-Z]{4}\d{7}", container_no or ""):
-        return False
-    return compute_check_digit(container_no[:10]) == int(container_no[10])
-
-
 def _coerce_window(window: str, max_owner_fixes: int = 4):
     """11자 알파넘 조각을 '영문4+숫자7' 형태로 위치별 보정. 불가능하면 None.
 
@@ -215,10 +198,11 @@ def _extract_split(text: str):
             # 체크디지트 상자 테두리가 숫자로 겹쳐 읽히면 '1'이 '11'처럼 두
             # 자리가 되기도 한다 — 각 자리를 후보로 삼고 검증에 맡긴다
             digit1.extend(dict.fromkeys(ln))
+    # 조각이 많은 사진은 조합이 수백 개가 되므로 한 번에 검증한다
     combos = ([o + d for o in owners for d in digit7]
               + [o + d + c for o in owners for d in digit6 for c in digit1])
-    for cand in combos:
-        if cand not in seen and is_valid_check_digit(cand):
+    for cand, valid in zip(combos, check_digit_matches(combos)):
+        if valid and cand not in seen:
             seen.add(cand)
             assembled.append((cand, True))
 
@@ -265,7 +249,9 @@ def extract_container_numbers(text: str) -> list:
     return _select_candidates(*_extract_split(text))
 
 
-def _load_image(image_bytes: bytes) -> Image.Image:
+def _load_image(image_bytes: bytes) -> "Image.Image":
+    from PIL import Image, ImageOps
+
     img = Image.open(BytesIO(image_bytes))
     img = ImageOps.exif_transpose(img)  # 스마트폰 세로 촬영 회전 반영
     if img.mode != "RGB":
@@ -273,7 +259,7 @@ def _load_image(image_bytes: bytes) -> Image.Image:
     return img
 
 
-def _compress_pil(img: Image.Image, sides=(2000, 1600, 1280)) -> bytes:
+def _compress_pil(img: "Image.Image", sides=(2000, 1600, 1280)) -> bytes:
     """무료 키 업로드 제한(1MB)에 맞게 축소/재압축한 JPEG 바이트를 반환.
 
     번호 글자가 작게 찍힌 사진이 많아 해상도를 최대한 지키는 쪽을 우선한다:
@@ -297,28 +283,37 @@ def compress_image_for_ocr(image_bytes: bytes) -> bytes:
     return _compress_pil(_load_image(image_bytes))
 
 
-def ocr_space_parse(image_bytes: bytes, api_key: str) -> str:
-    """OCR.space에 이미지를 보내 인식된 전체 텍스트를 돌려받는다. 실패 시 OcrError."""
+def ocr_space_request(image_bytes: bytes, api_key: str) -> dict:
+    """OCR.space에 이미지를 보내 응답 JSON을 그대로 돌려받는다. 연결/해석 실패 시 OcrError.
+
+    응답 해석은 ocr_space_text가 한다(코퍼스 러너가 녹화한 응답을 같은 경로로 재생하도록 분리).
+    """
+    import requests
+
     try:
-        resp = requests.post(
-            OCR_SPACE_URL,
-            files={"file": ("container.jpg", image_bytes, "image/jpeg")},
-            data={
-                "apikey": api_key,
-                "OCREngine": "2",  # 엔진2가 영숫자 혼합(컨테이너 번호)에 더 정확
-                "scale": "true",
-                "detectOrientation": "true",  # 기울거나 돌아간 사진 자동 보정
-                "language": "eng",
-            },
-            timeout=30,
-        )
+        with metrics.api_call("ocr"):
+            resp = requests.post(
+                OCR_SPACE_URL,
+                files={"file": ("container.jpg", image_bytes, "image/jpeg")},
+                data={
+                    "apikey": api_key,
+                    "OCREngine": "2",  # 엔진2가 영숫자 혼합(컨테이너 번호)에 더 정확
+                    "scale": "true",
+                    "detectOrientation": "true",  # 기울거나 돌아간 사진 자동 보정
+                    "language": "eng",
+                },
+                timeout=30,
+            )
         resp.raise_for_status()
-        result = resp.json()
+        return resp.json()
     except requests.RequestException as e:
         raise OcrError(f"OCR 서버 연결 실패: {e}") from e
     except ValueError as e:
         raise OcrError("OCR 서버 응답을 해석할 수 없습니다.") from e
 
+
+def ocr_space_text(result: dict) -> str:
+    """OCR.space 응답 JSON → 인식된 전체 텍스트. 처리 실패 응답이면 OcrError."""
     if result.get("IsErroredOnProcessing"):
         msg = result.get("ErrorMessage") or result.get("ErrorDetails") or "알 수 없는 오류"
         if isinstance(msg, list):
@@ -328,13 +323,52 @@ def ocr_space_parse(image_bytes: bytes, api_key: str) -> str:
     return "\n".join(p.get("ParsedText", "") for p in parsed)
 
 
-def _enhance_for_ocr(img: Image.Image) -> Image.Image:
+def ocr_space_parse(image_bytes: bytes, api_key: str) -> str:
+    """OCR.space에 이미지를 보내 인식된 전체 텍스트를 돌려받는다. 실패 시 OcrError."""
+    return ocr_space_text(ocr_space_request(image_bytes, api_key))
+
+
+def _enhance_for_ocr(img: "Image.Image") -> "Image.Image":
     """저대비 사진(밝은 색 문 + 흰 글씨) 대비 강화: 흑백 + 자동 대비 + 대비 증폭."""
+    from PIL import ImageEnhance, ImageOps
+
     gray = ImageOps.autocontrast(ImageOps.grayscale(img), cutoff=2)
     return ImageEnhance.Contrast(gray).enhance(1.6).convert("RGB")
 
 
-def recognize_container_numbers(image_bytes: bytes, api_key: str):
+# 인식 시도 순서: 상단 크롭 → 전체 → 대비강화 상단 크롭 (각 단계 = 회전 3방향 병렬).
+# 시도 하나는 (회전 각도, 영역, 대비강화 여부).
+OCR_STAGES = (
+    tuple((a, "top", False) for a in (0, 270, 90)),
+    tuple((a, "full", False) for a in (0, 270, 90)),
+    tuple((a, "top", True) for a in (0, 270, 90)),
+)
+# 영역별 업로드 해상도 후보: 크롭은 픽셀이 적어 고해상도 허용
+_UPLOAD_SIDES = {"top": (3000, 2400, 2000, 1600), "full": (2000, 1600, 1280)}
+
+
+def attempt_key(attempt) -> str:
+    """시도를 '각도/영역[/enhance]' 문자열로 (녹화 응답 JSON의 키)."""
+    angle, region, enhance = attempt
+    return f"{angle}/{region}" + ("/enhance" if enhance else "")
+
+
+def attempt_variant(img: "Image.Image", angle: int, region: str, enhance: bool) -> "Image.Image":
+    """시도 하나에 보낼 이미지(회전 → 상단 40% 크롭 → 대비 강화)."""
+    variant = img if angle == 0 else img.rotate(angle, expand=True)
+    if region == "top":
+        variant = variant.crop((0, 0, variant.width, int(variant.height * 0.4)))
+    if enhance:
+        variant = _enhance_for_ocr(variant)
+    return variant
+
+
+def compress_variant(variant: "Image.Image", region: str) -> bytes:
+    """attempt_variant 결과를 영역에 맞는 해상도로 업로드용 JPEG로 만든다."""
+    return _compress_pil(variant, _UPLOAD_SIDES[region])
+
+
+def recognize_container_numbers(image_bytes: bytes, api_key: str, engine=None):
     """사진 바이트 → 압축 → OCR → 컨테이너 번호 후보.
 
     반환: (후보 목록, 실패한 시도의 오류 메시지 목록, OCR 원문 텍스트 목록).
@@ -350,6 +384,9 @@ def recognize_container_numbers(image_bytes: bytes, api_key: str):
     호출 3번의 합이 아니라 가장 느린 1번 수준이 된다. 검증 통과 후보가 나오면
     다음 단계로 넘어가지 않고, 한 단계에서 호출이 2번 이상 실패하면(호출 제한
     등) 중단한다. (API 최대 9회, 보통 첫 단계 3회로 끝)
+
+    engine을 주면 OCR.space 대신 engine(attempt, variant)가 텍스트를 돌려준다
+    (attempt=(각도, 영역, 대비강화), variant=보낼 PIL 이미지). 코퍼스 재생·로컬 엔진용.
     """
     img = _load_image(image_bytes)
     tiers = ([], [], [])          # 직접 / 짜맞춤 / 계산 (신뢰도 순)
@@ -358,24 +395,17 @@ def recognize_container_numbers(image_bytes: bytes, api_key: str):
     texts = []
 
     def try_variant(angle, region, enhance):
-        variant = img if angle == 0 else img.rotate(angle, expand=True)
-        if region == "top":
-            variant = variant.crop((0, 0, variant.width, int(variant.height * 0.4)))
-            sides = (3000, 2400, 2000, 1600)  # 크롭은 픽셀이 적어 고해상도 허용
+        variant = attempt_variant(img, angle, region, enhance)
+        if engine is not None:
+            text = engine((angle, region, enhance), variant)
         else:
-            sides = (2000, 1600, 1280)
-        if enhance:
-            variant = _enhance_for_ocr(variant)
-        text = ocr_space_parse(_compress_pil(variant, sides), api_key)
+            text = ocr_space_parse(compress_variant(variant, region), api_key)
         return _extract_split(text), text
 
-    # 단계 순서: 상단 크롭 → 전체 → 대비강화 상단 크롭 (각 단계 = 회전 3방향 병렬)
-    stages = [[(a, "top", False) for a in (0, 270, 90)],
-              [(a, "full", False) for a in (0, 270, 90)],
-              [(a, "top", True) for a in (0, 270, 90)]]
-    for stage in stages:
+    for stage in OCR_STAGES:
         with ThreadPoolExecutor(max_workers=len(stage)) as pool:
-            futures = [pool.submit(try_variant, *attempt) for attempt in stage]
+            # 작업별 OCR 호출 수(metrics)가 호출한 세션의 작업에 합산되도록 컨텍스트를 넘긴다
+            futures = [pool.submit(contextvars.copy_context().run, try_variant, *attempt) for attempt in stage]
             for future in futures:  # 제출 순서대로 수집해 후보 순서를 결정적으로 유지
                 try:
                     found, text = future.result()
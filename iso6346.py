@@ -0,0 +1,134 @@
+"""ISO 6346 컨테이너 번호 체크디지트 계산.
+
+번호 검증(utils)과 OCR 후보 검증(container_ocr)이 같은 규칙을 쓰도록 한 곳에 둔다.
+표준 라이브러리만 쓰므로 어느 페이지에서 불러도 import 비용이 없다
+(container_ocr는 requests/PIL을 쓰므로 검증만 필요한 곳에서 불러오지 않는다).
+
+한 번에 많은 번호(일괄 등록 파일, 백업 전체 점검, OCR 조합 후보)를 볼 때는
+compute_check_digits / check_digit_matches를 쓴다. NumPy가 있고 번호가
+NUMPY_MIN_BATCH개 이상이면 번호 문자열을 uint8 배열로 보고 글자값 표 조회 +
+가중치 벡터 곱 한 번으로 계산하고, 아니면 같은 결과를 순수 파이썬으로 낸다.
+(NumPy는 일괄 함수를 처음 부를 때 불러온다)
+"""
+import re
+
+# ISO 6346 문자 값 테이블: A=10부터 시작하되 11의 배수(11, 22, 33)는 건너뛴다.
+_LETTER_VALUES = {}
+_v = 10
+for _ch in "ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+    if _v % 11 == 0:
+        _v += 1
+    _LETTER_VALUES[_ch] = _v
+    _v += 1
+_CHAR_VALUES = {**{str(d): d for d in range(10)}, **_LETTER_VALUES}
+_WEIGHTS = tuple(2 ** i for i in range(10))  # i번째 글자의 가중치
+# 자리별로 (글자값 × 가중치)를 미리 곱해 둔 표: 계산은 자리마다 dict 조회 한 번 + 합
+_POSITION_VALUES = tuple({ch: value * w for ch, value in _CHAR_VALUES.items()} for w in _WEIGHTS)
+_NUMBER = re.compile(r"[A-Z]{4}[0-9]{7}")
+_PREFIX = re.compile(r"[A-Z]{4}[0-9]{6}")
+
+NUMPY_MIN_BATCH = 32  # 이보다 적으면 배열을 만드는 비용이 계산보다 크다 (bench_check_digit.py --small)
+
+
+def compute_check_digit(cno10: str) -> int:
+    """앞 10자리(영문 4 + 숫자 6)로 ISO 6346 체크디지트를 계산한다."""
+    return sum(map(dict.__getitem__, _POSITION_VALUES, cno10)) % 11 % 10
+
+
+def is_valid_check_digit(container_no: str) -> bool:
+    """컨테이너 번호(11자리)의 마지막 자리가 ISO 6346 체크디지트와 일치하는지 검증."""
+    if not _NUMBER.fullmatch(container_no or ""):
+        return False
+    return compute_check_digit(container_no[:10]) == int(container_no[10])
+
+
+# --- 일괄 계산 ---
+_np = None
+_VALUE_TABLE = None   # ASCII 코드(0~255) → 글자값, 번호에 쓸 수 없는 글자는 0
+_WEIGHT_VECTOR = None
+
+
+def _numpy():
+    """NumPy 모듈(처음 부를 때 불러와 표를 만든다). 설치돼 있지 않으면 None."""
+    global _np, _VALUE_TABLE, _WEIGHT_VECTOR
+    if _np is None:
+        try:
+            import numpy
+        except ImportError:
+            _np = False
+        else:
+            table = numpy.zeros(256, dtype=numpy.int32)  # 합의 최댓값 38×1023도 int32에 들어간다
+            for ch, value in _CHAR_VALUES.items():
+                table[ord(ch)] = value
+            _VALUE_TABLE, _WEIGHT_VECTOR = table, numpy.array(_WEIGHTS, dtype=numpy.int32)
+            _np = numpy
+    return _np or None
+
+
+def _use_numpy(count, use_numpy):
+    if use_numpy is None:
+        use_numpy = count >= NUMPY_MIN_BATCH
+    return _numpy() if use_numpy else None
+
+
+def _code_rows(np, strings, width):
+    """길이가 width인 문자열만 골라 (n, width) uint8 배열과 그 위치 마스크를 만든다.
+
+    ASCII가 아닌 글자는 '?'(1바이트)로 바꿔 줄 맞춤을 지키고, 형식 검사에서 걸러진다.
+    """
+    if set(map(len, strings)) <= {width}:
+        sized, picked = np.ones(len(strings), dtype=bool), strings
+    else:
+        sized = np.fromiter(map(len, strings), dtype=np.intp, count=len(strings)) == width
+        picked = [s for s, ok in zip(strings, sized) if ok]
+    raw = "".join(picked).encode("ascii", errors="replace")
+    return np.frombuffer(raw, dtype=np.uint8).reshape(-1, width), sized
+
+
+def _well_formed(np, codes):
+    """영문 대문자 4자 + 나머지 숫자인 행 마스크.
+
+    uint8 뺄셈은 음수가 되면 255 쪽으로 돌아가므로 '코드 - 시작 < 개수' 한 번으로 범위를 본다.
+    """
+    width = codes.shape[1]
+    start = np.array([ord("A")] * 4 + [ord("0")] * (width - 4), dtype=np.uint8)
+    count = np.array([26] * 4 + [10] * (width - 4), dtype=np.uint8)
+    return ((codes - start) < count).all(axis=1)
+
+
+def _as_strings(values):
+    """일괄 입력을 문자열 목록으로 맞춘다. 시트·파일에서 온 None은 '', 숫자 등은 str()."""
+    return [v if type(v) is str else ("" if v is None else str(v)) for v in values]
+
+
+def compute_check_digits(prefixes, use_numpy=None):
+    """앞 10자리 목록 → 체크디지트 목록. 형식이 틀린 항목(None·숫자 포함)은 -1.
+
+    NumPy 경로면 np.ndarray, 아니면 list를 돌려준다(둘 다 인덱스·반복 가능).
+    use_numpy: None이면 개수로 정하고, True/False로 강제할 수 있다(벤치마크·테스트용).
+    """
+    prefixes = _as_strings(prefixes)
+    np = _use_numpy(len(prefixes), use_numpy)
+    if np is None:
+        return [compute_check_digit(p) if _PREFIX.fullmatch(p) else -1 for p in prefixes]
+    result = np.full(len(prefixes), -1, dtype=np.int64)
+    codes, sized = _code_rows(np, prefixes, 10)
+    digits = _VALUE_TABLE[codes] @ _WEIGHT_VECTOR % 11 % 10
+    result[sized] = np.where(_well_formed(np, codes), digits, -1)
+    return result
+
+
+def check_digit_matches(container_nos, use_numpy=None):
+    """번호(11자리) 목록 → is_valid_check_digit 결과 목록(bool). None·숫자 등은 False.
+
+    반환 형식과 use_numpy는 compute_check_digits와 같다.
+    """
+    container_nos = _as_strings(container_nos)
+    np = _use_numpy(len(container_nos), use_numpy)
+    if np is None:
+        return [is_valid_check_digit(no) for no in container_nos]
+    result = np.zeros(len(container_nos), dtype=bool)
+    codes, sized = _code_rows(np, container_nos, 11)
+    expected = _VALUE_TABLE[codes[:, :10]] @ _WEIGHT_VECTOR % 11 % 10
+    result[sized] = _well_formed(np, codes) & (expected == codes[:, 10].astype(np.int32) - ord("0"))
+    return result
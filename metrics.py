@@ -0,0 +1,231 @@
+"""Sheets/OCR API 호출 수와 작업별 지연을 재는 가벼운 계측 모듈.
+
+429(쿼터 초과)가 나도 어느 페이지·어느 작업이 호출을 쓰는지 알 수 없어서,
+논리적 작업(등록, 선적완료, 되돌리기, 이동, 복원, 페이지 로드 ...) 단위로
+  - Sheets 읽기/쓰기, OCR 호출 수와 실패 수
+  - 작업 전체 소요와 그중 API 호출을 기다린 시간
+을 모은다. 작업이 끝날 때마다
+  - 프로세스 전역 링 버퍼에 남겨 진단 페이지가 최근 요약을 보여 주고,
+  - 'barcode_app.metrics' 로거로 JSON 한 줄을 남긴다(Streamlit Cloud 로그에서 검색).
+작업 밖에서 일어난 호출은 '기타'로 센다. 분당 쿼터와 비교할 수 있게 호출 시각도
+따로 남긴다(calls_in_window).
+
+사용:
+    with track_operation("선적완료"):
+        ...
+    @tracked("등록")                  # (False, 메시지)를 돌려주면 실패로 기록
+    def register_new_container(...): ...
+    with api_call("sheets_write"):    # 호출 지점(utils의 Sheets 클라이언트, container_ocr)
+        ...
+현재 작업은 contextvars로 추적하므로 세션(스크립트 스레드)마다 따로 잡힌다. 다른
+스레드로 일을 넘길 때는 contextvars.copy_context().run으로 넘겨야 같은 작업에 합산된다.
+이 모듈은 streamlit에 의존하지 않는다(단위 테스트 용이).
+"""
+import collections
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+KST = timezone(timedelta(hours=9))
+API_KINDS = ("sheets_read", "sheets_write", "ocr")
+UNATTRIBUTED = "기타"
+SHEETS_QUOTA_PER_MINUTE = 60  # Sheets API 기본 쿼터(사용자당 분당 읽기/쓰기 각각)
+HISTORY_SIZE = 500      # 요약에 쓰는 최근 작업 수
+CALL_LOG_SIZE = 5000    # 분당 호출 수 계산에 쓰는 최근 API 호출 수
+
+logger = logging.getLogger("barcode_app.metrics")
+if not logger.handlers:  # Streamlit은 자기 로거만 설정하므로 여기서 INFO를 내보내게 한다
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_current = contextvars.ContextVar("metrics_operation", default=None)
+_lock = threading.Lock()
+_history = collections.deque(maxlen=HISTORY_SIZE)
+_call_log = collections.deque(maxlen=CALL_LOG_SIZE)  # (time.time(), kind)
+_unattributed = collections.Counter()
+
+
+class Operation:
+    """진행 중인 작업 하나의 호출 수·API 대기 시간."""
+    __slots__ = ("name", "started", "calls", "errors", "api_ms", "ok", "error")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.calls = collections.Counter()
+        self.errors = 0
+        self.api_ms = 0.0
+        self.ok = True
+        self.error = None
+
+    def fail(self, message):
+        """예외 없이 (False, 메시지)로 끝나는 작업을 실패로 표시한다."""
+        self.ok = False
+        self.error = str(message)[:200]
+
+    def record(self):
+        rec = {
+            "op": self.name,
+            "at": datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S"),
+            "ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "api_ms": round(self.api_ms, 1),
+            "api_errors": self.errors,
+            "ok": self.ok,
+        }
+        rec.update({kind: self.calls[kind] for kind in API_KINDS})
+        if self.error:
+            rec["error"] = self.error
+        return rec
+
+
+def current_operation():
+    """지금 스레드(세션)에서 진행 중인 작업. 없으면 None."""
+    return _current.get()
+
+
+@contextmanager
+def track_operation(name):
+    """name 작업으로 묶는다. 이미 작업 안이면 바깥 작업에 합산한다(중첩 기록 없음).
+
+    일반 예외는 실패로 기록하고 다시 던진다. st.rerun()/st.stop()처럼 Exception이
+    아닌 제어 예외는 정상 종료로 본다.
+    """
+    if _current.get() is not None:
+        yield _current.get()
+        return
+    op = Operation(name)
+    token = _current.set(op)
+    try:
+        yield op
+    except Exception as e:
+        op.fail(f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        _current.reset(token)
+        _finish(op)
+
+
+def tracked(name):
+    """함수를 name 작업으로 묶는 데코레이터. (False, ...) 반환도 실패로 기록한다."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track_operation(name) as op:
+                result = fn(*args, **kwargs)
+                if isinstance(result, tuple) and result and result[0] is False:
+                    op.fail(result[1] if len(result) > 1 else "")
+                return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def api_call(kind):
+    """외부 API 호출 1회(kind: sheets_read / sheets_write / ocr)를 센다. 실패도 호출로 센다."""
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        op = _current.get()
+        with _lock:
+            _call_log.append((time.time(), kind))
+            if op is None:
+                _unattributed[kind] += 1
+                _unattributed[f"{kind}_ms"] += elapsed
+                _unattributed["api_errors"] += failed
+        if op is not None:
+            op.calls[kind] += 1
+            op.api_ms += elapsed
+            op.errors += failed
+
+
+def _finish(op):
+    rec = op.record()
+    with _lock:
+        _history.append(rec)
+    logger.info(json.dumps(rec, ensure_ascii=False))
+
+
+# --- 조회 (진단 페이지) ---
+def recent_operations(limit=50):
+    """최근 끝난 작업 기록(새것부터)."""
+    with _lock:
+        return list(reversed(_history))[:limit]
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def summarize(records=None):
+    """작업별 요약: 횟수, 실패, 소요(p50/p95/최대), 회당 평균 호출 수, API 대기 비율.
+
+    API 호출을 많이 쓴 작업부터 정렬한다(429의 원인 찾기).
+    """
+    if records is None:
+        with _lock:
+            records = list(_history)
+    groups = collections.defaultdict(list)
+    for rec in records:
+        groups[rec["op"]].append(rec)
+    rows = []
+    for name, recs in groups.items():
+        durations = sorted(r["ms"] for r in recs)
+        n = len(recs)
+        total_ms = sum(durations)
+        row = {
+            "op": name,
+            "count": n,
+            "failed": sum(not r["ok"] for r in recs),
+            "p50_ms": _percentile(durations, 0.5),
+            "p95_ms": _percentile(durations, 0.95),
+            "max_ms": durations[-1],
+            "api_share": (sum(r["api_ms"] for r in recs) / total_ms) if total_ms else 0.0,
+        }
+        for kind in API_KINDS:
+            row[f"{kind}_total"] = sum(r[kind] for r in recs)
+            row[f"{kind}_avg"] = row[f"{kind}_total"] / n
+        rows.append(row)
+    rows.sort(key=lambda r: -sum(r[f"{kind}_total"] for kind in API_KINDS))
+    return rows
+
+
+def unattributed_calls():
+    """작업 밖에서 일어난 호출 수·대기 시간(ms)."""
+    with _lock:
+        return dict(_unattributed)
+
+
+def calls_in_window(seconds=60, now=None):
+    """최근 seconds초 동안의 종류별 API 호출 수 (분당 쿼터와 비교용)."""
+    now = time.time() if now is None else now
+    counts = collections.Counter()
+    with _lock:
+        for at, kind in reversed(_call_log):
+            if now - at > seconds:
+                break
+            counts[kind] += 1
+    return {kind: counts[kind] for kind in API_KINDS}
+
+
+def reset():
+    """모은 기록을 모두 지운다(진단 페이지의 초기화, 테스트)."""
+    with _lock:
+        _history.clear()
+        _call_log.clear()
+        _unattributed.clear()
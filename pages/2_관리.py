@@ -1,19 +1,35 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime, timezone, timedelta
+from metrics import track_operation, tracked
 from utils import (
     SHEET_HEADERS,
-    load_data_from_gsheet,
+    KST,
+    sync_container_list,
+    follow_change_feed,
+    mark_dialog_open,
     add_row_to_gsheet,
     add_rows_to_gsheet_batch,
+    read_import_table,
+    prepare_import,
+    import_records,
     update_row_in_gsheet,
+    RowConflict,
+    apply_row_conflict,
     update_row_in_backup_sheets,
     backup_data_to_new_sheet,
     delete_rows_by_container_nos,
     delete_row_from_gsheet,
     delete_from_backup_sheets,
     cleanup_old_daily_sheets,
+    expired_daily_sheets,
+    get_retention_status,
+    DAILY_RETENTION_MONTHS,
     archive_log_sheet,
+    get_log_row_count,
+    get_log_rotation_status,
+    LOG_ROTATE_THRESHOLD,
+    LOG_KEEP_ROWS,
     move_containers_between_backup_sheets,
     log_change,
     connect_to_gsheet,
@@ -25,31 +41,36 @@ from utils import (
     apply_sidebar_style,
     render_app_title,
     filter_backup_sheets,
-    button_marker
+    button_marker,
+    warm_up_connection
 )
 
 st.set_page_config(page_title="관리 페이지", layout="wide", initial_sidebar_state="expanded")
+warm_up_connection()
 
 apply_sidebar_style('label, p { font-size: 15px !important; } [data-testid="stForm"] *, .st-key-edit_selector *, .st-key-edit_meta * { font-size: 17px !important; }')
 
 if 'container_list' not in st.session_state:
-    st.session_state.container_list = load_data_from_gsheet()
+    with track_operation("페이지 로드: 관리"):
+        sync_container_list()
+# 다른 기기의 등록·수정·선적완료를 몇 초마다 받아 반영한다(시트 읽기 없음)
+follow_change_feed()
 
 render_app_title()
 
 
 @st.dialog("컨테이너 삭제 확인")
 def confirm_delete_dialog(container_no):
+    mark_dialog_open()
     st.warning(f"'{container_no}' 컨테이너를 영구적으로 삭제합니다. 이 작업은 되돌릴 수 없습니다.")
     c1, c2 = st.columns(2)
     with c1:
         button_marker("danger")
         if st.button("🗑️ 삭제", use_container_width=True):
-            ok, msg = delete_row_from_gsheet(container_no)
+            with track_operation("삭제"):
+                ok, msg = delete_row_from_gsheet(container_no)
             if ok:
-                st.session_state.container_list = [
-                    c for c in st.session_state.container_list if c.get('컨테이너 번호') != container_no
-                ]
+                st.session_state.container_list.remove_no(container_no)
                 st.session_state["delete_result_msg"] = ("success", f"'{container_no}' 컨테이너 정보가 삭제되었습니다.")
             else:
                 st.session_state["delete_result_msg"] = ("error", f"삭제 실패: {msg}")
@@ -63,6 +84,7 @@ def confirm_delete_dialog(container_no):
 @st.dialog("⚠️ 출고처 미정")
 def undecided_block_dialog(container_no):
     """출고처가 미정인 컨테이너의 선적완료(백업)를 막고 안내하는 팝업."""
+    mark_dialog_open()
     st.warning(
         f"**{container_no}** 의 출고처가 '미정'입니다.\n\n"
         f"출고처를 먼저 지정해야 선적완료(백업)할 수 있습니다."
@@ -72,6 +94,7 @@ def undecided_block_dialog(container_no):
         st.rerun()
 
 
+@tracked("선적완료")
 def mgmt_complete_and_backup(updated_data):
     """선적완료된 컨테이너를 일별/월별 백업으로 옮기고 메인 시트·목록에서 제거한다.
 
@@ -82,10 +105,7 @@ def mgmt_complete_and_backup(updated_data):
         dok, dres = delete_rows_by_container_nos([cno]) if bok else (False, bres)
     if not (bok and dok):
         return False, (bres if not bok else dres)
-    idx = next((i for i, c in enumerate(st.session_state.container_list)
-                if c.get('컨테이너 번호') == cno), None)
-    if idx is not None:
-        st.session_state.container_list.pop(idx)
+    st.session_state.container_list.remove_no(cno)
     today_str = datetime.now(timezone(timedelta(hours=9))).date().isoformat()
     st.session_state['mgmt_last_completed'] = {
         'item': updated_data, 'backup_sheet': f"{BACKUP_PREFIX}{today_str}"
@@ -94,6 +114,7 @@ def mgmt_complete_and_backup(updated_data):
     return True, bres
 
 
+@tracked("되돌리기")
 def mgmt_undo_last_completed():
     """관리 페이지에서 방금 선적완료(백업)한 컨테이너를 백업에서 빼내 다시 선적중으로 되돌린다."""
     snap = st.session_state.get('mgmt_last_completed')
@@ -102,14 +123,11 @@ def mgmt_undo_last_completed():
     item = snap['item']
     cno = item.get('컨테이너 번호')
     pos = str(item.get('위치') or '').strip()
-    if any(c.get('컨테이너 번호') == cno for c in st.session_state.container_list):
+    if st.session_state.container_list.find(cno) is not None:
         st.session_state.pop('mgmt_last_completed', None)
         return False, "이미 목록에 있어 되돌릴 수 없습니다."
     positions = [str(i) for i in range(1, 10)]
-    occupied = {
-        str(c.get('위치') or '').strip()
-        for c in st.session_state.container_list if c.get('상태') == '선적중'
-    }
+    occupied = st.session_state.container_list.occupied_slots()
     note = None
     restore = dict(item)
     restore['상태'] = '선적중'
@@ -131,10 +149,21 @@ def mgmt_undo_last_completed():
     return True, note
 
 
+@tracked("일괄 등록")
+def mgmt_bulk_import(records):
+    """검사를 통과한 행을 append_rows 한 번으로 등록하고 세션 목록에 반영한다."""
+    with st.spinner(f'{len(records)}개를 등록하는 중...'):
+        success, msg = add_rows_to_gsheet_batch(records, action="일괄 등록")
+    if success:
+        st.session_state.container_list.extend(records)
+    return success, msg
+
+
 @st.dialog("✏️ 복구 컨테이너 정보 수정")
 def edit_recovery_container_dialog(row_data, source_sheet_name):
     """복구 테이블의 ✏️ 칸을 체크했을 때 뜨는 수정 팝업.
     출고처/피트수/씰번호/상태를 고쳐 원본 백업 시트(일별+월별)에 바로 반영한다."""
+    mark_dialog_open()
     container_no = row_data.get('컨테이너 번호')
     st.markdown(f"**{container_no}**")
     st.caption(f"백업 시트: {source_sheet_name}")
@@ -174,7 +203,7 @@ def edit_recovery_container_dialog(row_data, source_sheet_name):
                 updated['완료일시'] = kst_now.strftime('%Y-%m-%d %H:%M:%S')
         else:
             updated['완료일시'] = ''
-        with st.spinner('백업 시트에 수정사항을 저장하는 중...'):
+        with track_operation("백업 수정"), st.spinner('백업 시트에 수정사항을 저장하는 중...'):
             ok, msg = update_row_in_backup_sheets(updated, source_sheet_name)
         if ok:
             st.session_state["recovery_edit_msg"] = ("success", f"'{container_no}' 정보가 백업 시트에 수정되었습니다.")
@@ -195,8 +224,8 @@ if _mgmt_msg:
 if st.session_state.container_list:
     container_numbers_for_edit = [c.get('컨테이너 번호', '') for c in st.session_state.container_list]
     selected_for_edit = st.selectbox("수정 또는 삭제할 컨테이너를 선택하세요:", container_numbers_for_edit, key="edit_selector")
-    selected_data = next((c for c in st.session_state.container_list if c.get('컨테이너 번호') == selected_for_edit), None)
-    selected_idx = next((i for i, c in enumerate(st.session_state.container_list) if c.get('컨테이너 번호') == selected_for_edit), -1)
+    selected_data = st.session_state.container_list.find(selected_for_edit)
+    selected_idx = st.session_state.container_list.position_of(selected_for_edit)
 
     if selected_data:
         registration_time = selected_data.get('등록일시')
@@ -254,11 +283,7 @@ if st.session_state.container_list:
         if save_clicked:
             new_pos_val = new_position
             # 선적중으로 둘 경우, 다른 선적중 컨테이너가 점유한 위치로는 옮길 수 없다.
-            occupied = {
-                str(c.get('위치') or '').strip()
-                for c in st.session_state.container_list
-                if c.get('상태') == '선적중' and c.get('컨테이너 번호') != selected_for_edit
-            }
+            occupied = st.session_state.container_list.occupied_slots(exclude=selected_for_edit)
             if new_status == '선적중' and new_pos_val and new_pos_val != RESTORE_SLOT and new_pos_val in occupied:  # 복원 슬롯은 여러 개 허용
                 st.error(f"위치 {new_pos_val}은(는) 이미 사용 중입니다. 다른 위치를 선택하세요.")
             elif new_status == '선적완료' and str(new_dest or '').strip() == '미정':
@@ -288,11 +313,17 @@ if st.session_state.container_list:
                         st.error(f"선적완료 백업 실패: {res}")
                 else:
                     updated_data['완료일시'] = None
-                    ok, msg = update_row_in_gsheet(updated_data)
+                    with track_operation("수정"):
+                        ok, msg = update_row_in_gsheet(updated_data, base=selected_data)
                     if ok:
                         st.session_state.container_list[selected_idx] = updated_data
                         st.success(f"'{selected_for_edit}'의 정보가 성공적으로 수정되었습니다.")
                         st.rerun()
+                    elif isinstance(msg, RowConflict):
+                        # 다른 기기가 먼저 고쳤다: 그 행만 지금 내용으로 바꿔 폼에 다시 채운다
+                        apply_row_conflict(st.session_state.container_list, selected_idx, msg)
+                        st.session_state["mgmt_action_msg"] = ("warning", str(msg))
+                        st.rerun()
                     else:
                         st.error(f"수정 실패: {msg}")
 
@@ -329,14 +360,48 @@ else:
             else:
                 st.error(f"되돌리기 실패: {note}")
 
+st.divider()
+st.markdown("#### 📥 일괄 등록 (CSV/엑셀)")
+st.caption("부킹 리스트를 올리면 번호·중복·출고처·위치를 한 번에 검사하고, 통과한 행만 한 번에 등록합니다. "
+           "열 이름: 컨테이너 번호(필수), 출고처, 피트수, 씰 번호, 위치 — 위치를 비우면 빈 위치를 차례로 배정합니다.")
+_import_msg = st.session_state.pop("import_msg", None)
+if _import_msg:
+    getattr(st, _import_msg[0])(_import_msg[1])
+# 등록 후에는 키를 바꿔 업로더를 비운다(같은 파일이 다시 검사·등록되지 않도록)
+import_file = st.file_uploader("CSV 또는 XLSX 파일", type=["csv", "xlsx"],
+                               key=f"import_file_{st.session_state.get('import_rev', 0)}")
+if import_file is not None:
+    try:
+        import_df = read_import_table(import_file.name, import_file.getvalue())
+    except Exception as e:
+        import_df = None
+        st.error(f"파일을 읽지 못했습니다: {e}")
+    if import_df is not None and import_df.empty:
+        st.info("파일에 등록할 행이 없습니다.")
+    elif import_df is not None:
+        kst_now = datetime.now(KST).replace(tzinfo=None)
+        prepared = prepare_import(import_df, st.session_state.container_list, kst_now.date(), get_destinations())
+        ok_count = int(prepared['오류'].isna().sum())
+        st.dataframe(prepared.fillna({'오류': '✅ 등록 가능'}), hide_index=True, use_container_width=True)
+        st.caption(f"등록 가능 {ok_count}건 · 오류 {len(prepared) - ok_count}건 (오류가 있는 행은 등록하지 않습니다)")
+        button_marker("success")
+        if st.button(f"➕ {ok_count}건 등록", disabled=ok_count == 0, use_container_width=True, key="import_submit"):
+            success, msg = mgmt_bulk_import(import_records(prepared, kst_now))
+            if success:
+                st.session_state["import_rev"] = st.session_state.get("import_rev", 0) + 1
+                st.session_state["import_msg"] = ("success", f"{ok_count}건을 등록했습니다.")
+                st.rerun()
+            else:
+                st.error(f"일괄 등록 실패: {msg}. 잠시 후 다시 시도해주세요.")
+
 st.divider()
 st.markdown("#### ⬆️ 데이터 복구")
 st.info("실수로 데이터를 초기화했거나 이전 데이터를 추가할 때 사용하세요.")
 
 spreadsheet = connect_to_gsheet()
-# 워크시트 목록은 세션에 캐시해 재사용한다. 위젯 조작으로 페이지가 재실행돼도
-# 데이터를 바꾸지 않았으면 캐시를 그대로 써서 Sheets 읽기 요청을 아낀다.
-# (쓰기 작업 시 utils가 invalidate_sheet_caches()로 캐시를 비워 최신값을 다시 읽음)
+# 워크시트 목록은 프로세스 전역 시트 카탈로그에서 가져온다. 위젯 조작으로 페이지가
+# 재실행돼도 데이터를 바꾸지 않았으면 캐시를 그대로 써서 Sheets 읽기 요청을 아낀다.
+# (쓰기 작업 시 utils가 invalidate_sheet_caches()로 해당 시트 리비전을 올려 최신값을 다시 읽음)
 ws_by_title = get_worksheets_map(spreadsheet) if spreadsheet else {}
 all_worksheet_titles = list(ws_by_title.keys())
 if spreadsheet:
@@ -476,22 +541,24 @@ if spreadsheet:
                                     rows_to_add.append(row_to_add)
 
                                 # 메인 시트에 일괄 복구
-                                success, msg = add_rows_to_gsheet_batch(rows_to_add)
-                                if success:
-                                    st.session_state.container_list.extend(rows_to_add)
-                                    log_change(f"데이터 복구: '{selected_backup_sheet}'에서 {len(rows_to_add)}개 선택 복구 (복원 슬롯)")
-
-                                    # 해당 일별/월별 시트에서만 삭제
-                                    container_nos = [r.get('컨테이너 번호') for r in rows_to_add]
-                                    with st.spinner('백업 시트에서 복구된 데이터를 정리하는 중...'):
-                                        del_success, del_result = delete_from_backup_sheets(container_nos, selected_backup_sheet)
-                                    if del_success:
-                                        st.success(f"{len(rows_to_add)}개 복구 완료 — 등록 페이지 '복원' 슬롯에 표시됩니다. (백업 시트에서 {del_result}행 정리)")
+                                with track_operation("복원") as op:
+                                    success, msg = add_rows_to_gsheet_batch(rows_to_add)
+                                    if success:
+                                        st.session_state.container_list.extend(rows_to_add)
+                                        log_change(f"데이터 복구: '{selected_backup_sheet}'에서 {len(rows_to_add)}개 선택 복구 (복원 슬롯)")
+
+                                        # 해당 일별/월별 시트에서만 삭제
+                                        container_nos = [r.get('컨테이너 번호') for r in rows_to_add]
+                                        with st.spinner('백업 시트에서 복구된 데이터를 정리하는 중...'):
+                                            del_success, del_result = delete_from_backup_sheets(container_nos, selected_backup_sheet)
+                                        if del_success:
+                                            st.success(f"{len(rows_to_add)}개 복구 완료 — 등록 페이지 '복원' 슬롯에 표시됩니다. (백업 시트에서 {del_result}행 정리)")
+                                        else:
+                                            st.warning(f"복구는 완료됐으나 백업 시트 정리 중 오류 발생: {del_result}")
+                                        st.rerun()
                                     else:
-                                        st.warning(f"복구는 완료됐으나 백업 시트 정리 중 오류 발생: {del_result}")
-                                    st.rerun()
-                                else:
-                                    st.error(f"복구 중 오류 발생: {msg}")
+                                        op.fail(msg)
+                                        st.error(f"복구 중 오류 발생: {msg}")
 
                         st.divider()
                         st.markdown("##### 시트 전체 복구")
@@ -511,26 +578,32 @@ st.markdown("#### 🗂️ 시트 관리")
 # --- 일별 백업 시트 정리 ---
 with st.container(border=True):
     st.markdown("##### 🗑️ 오래된 일별 백업 시트 삭제")
-    st.info("3개월 이상 된 일별 백업 시트(`백업_YYYY-MM-DD`)를 삭제합니다. 월별 시트는 보존됩니다.")
+    st.info(f"{DAILY_RETENTION_MONTHS}개월 이상 된 일별 백업 시트(`백업_YYYY-MM-DD`)를 하루 한 번 자동으로 삭제합니다. "
+            "삭제 전에 월별 시트에 없는 행은 월별 시트로 옮기며, 월별 시트는 보존됩니다.")
+
+    retention = get_retention_status()
+    if retention["running"]:
+        st.caption("⏳ 자동 정리가 진행 중입니다.")
+    elif retention["last"]:
+        ran_at, ok, result = retention["last"]
+        if ok:
+            st.caption(f"마지막 자동 정리: {ran_at} — " + (f"{len(result)}개 시트 삭제" if result else "삭제할 시트 없음"))
+        else:
+            st.caption(f"마지막 자동 정리: {ran_at} — 실패 ({result}), 잠시 후 다시 시도합니다")
 
     # 삭제 대상 미리보기
     spreadsheet_preview = connect_to_gsheet()
     if spreadsheet_preview:
-        cutoff = (datetime.now() - timedelta(days=90)).date()
-        all_sheet_titles = all_worksheet_titles
-        target_daily = [
-            s for s in filter_backup_sheets(all_sheet_titles, "daily")
-            if datetime.strptime(s.replace(BACKUP_PREFIX, ''), '%Y-%m-%d').date() < cutoff
-        ]
+        target_daily = expired_daily_sheets(all_worksheet_titles, datetime.now(KST).date())
         if target_daily:
             st.warning(f"삭제 대상: {len(target_daily)}개 시트 ({', '.join(target_daily)})")
         else:
             st.success("삭제할 오래된 일별 백업 시트가 없습니다.")
 
     button_marker("danger")
-    if st.button("🗑️ 3개월 이상 일별 백업 시트 삭제", use_container_width=True):
+    if st.button(f"🗑️ {DAILY_RETENTION_MONTHS}개월 이상 일별 백업 시트 지금 삭제", use_container_width=True):
         with st.spinner("오래된 일별 백업 시트를 삭제하는 중..."):
-            success, result = cleanup_old_daily_sheets(months=3)
+            success, result = cleanup_old_daily_sheets()
         if success:
             if result:
                 st.success(f"{len(result)}개 일별 백업 시트가 삭제됐습니다: {', '.join(result)}")
@@ -544,28 +617,34 @@ st.markdown("<div style='margin-top:12px;'></div>", unsafe_allow_html=True)
 # --- 로그 아카이브 ---
 with st.container(border=True):
     st.markdown("##### 📦 로그 아카이브")
-    st.info("업데이트 로그가 1000행 초과 시 오래된 로그를 분기별 시트(`로그_YYYY-QN`)로 이관합니다. 최근 200행은 유지됩니다.")
+    st.info(f"업데이트 로그가 {LOG_ROTATE_THRESHOLD}행을 넘으면 오래된 로그를 분기별 시트(`로그_YYYY-QN`)로 자동 이관합니다. "
+            f"최근 {LOG_KEEP_ROWS}행은 유지됩니다.")
 
-    # 현재 로그 행 수 표시
+    # 현재 로그 행 수 표시 (로그를 쓸 때 받은 응답으로 알고 있으면 시트를 읽지 않는다)
     spreadsheet_log = connect_to_gsheet()
     if spreadsheet_log:
         try:
-            log_values = get_sheet_values_cached("업데이트 로그")
-            log_row_count = len(log_values) if log_values else 0
-            if log_row_count > 1000:
-                st.warning(f"현재 로그: {log_row_count}행 — 아카이브를 권장합니다.")
+            log_row_count = get_log_row_count(spreadsheet_log)
+            if log_row_count > LOG_ROTATE_THRESHOLD:
+                st.warning(f"현재 로그: {log_row_count}행 — 자동 이관 대기 중입니다.")
             else:
-                st.success(f"현재 로그: {log_row_count}행 (기준: 1000행)")
+                st.success(f"현재 로그: {log_row_count}행 (기준: {LOG_ROTATE_THRESHOLD}행)")
         except Exception:
             st.warning("로그 시트 행 수를 불러올 수 없습니다.")
+        rotation = get_log_rotation_status()
+        if rotation["running"]:
+            st.caption("🔄 로그 자동 이관이 진행 중입니다.")
+        elif rotation["last"]:
+            ran_at, ok, result = rotation["last"]
+            st.caption(f"마지막 자동 이관 ({ran_at}): " + (f"{result[1]}행 → {result[0]}" if ok else str(result)))
 
     button_marker("neutral")
     if st.button("📦 로그 아카이브 실행", use_container_width=True):
         with st.spinner("로그를 아카이브하는 중..."):
-            success, result = archive_log_sheet(keep_rows=200)
+            success, result = archive_log_sheet(keep_rows=LOG_KEEP_ROWS)
         if success:
             archive_name, archived_count = result
-            st.success(f"{archived_count}행을 '{archive_name}' 시트로 이관했습니다. 최근 200행은 유지됩니다.")
+            st.success(f"{archived_count}행을 '{archive_name}' 시트로 이관했습니다. 최근 {LOG_KEEP_ROWS}행은 유지됩니다.")
         else:
             st.info(result)
 
@@ -1,13 +1,38 @@
 import streamlit as st
 import pandas as pd
-from utils import load_data_from_gsheet, connect_to_gsheet, apply_sidebar_style, render_app_title, filter_backup_sheets, button_marker
+from backup_archive import archived_months
+from metrics import track_operation
+from utils import (
+    sync_container_list,
+    connect_to_gsheet,
+    apply_sidebar_style,
+    render_app_title,
+    list_backup_sheets,
+    get_sheet_values_cached,
+    sheet_revision,
+    cached_stats_view,
+    button_marker,
+    backup_values_to_frame,
+    compute_backup_stats,
+    load_month_stats,
+    sync_month_backup,
+    load_stats_range,
+    fill_backup_archive,
+    invalidate_sheet_caches,
+    SHEET_HEADERS,
+    STATS_PREFIX,
+    BACKUP_PREFIX,
+    warm_up_connection,
+)
 
 st.set_page_config(page_title="통계 대시보드", layout="wide", initial_sidebar_state="expanded")
+warm_up_connection()
 
 apply_sidebar_style()
 
 if 'container_list' not in st.session_state:
-    st.session_state.container_list = load_data_from_gsheet()
+    with track_operation("페이지 로드: 통계"):
+        sync_container_list()
 
 render_app_title()
 
@@ -17,37 +42,51 @@ col_refresh = st.columns([0.8, 0.2])
 with col_refresh[1]:
     button_marker("neutral")
     if st.button("🔄 데이터 새로고침", use_container_width=True):
-        st.session_state.container_list = load_data_from_gsheet()
+        invalidate_sheet_caches()  # 다른 기기에서 바뀐 시트 목록/값도 다시 읽는다
+        with track_operation("새로고침: 통계"):
+            sync_container_list(refresh=True)  # 다른 기기의 세션도 다시 읽은 목록으로 맞춘다
         st.rerun()
 
 # -------------------------------------------------------
-# 데이터 범위 선택 (일별 / 월별)
+# 데이터 범위 선택 (일별 / 월별 / 기간)
 # -------------------------------------------------------
 st.markdown("##### 📅 분석 범위 선택")
-range_type = st.radio("범위 유형", options=["월별", "일별"], horizontal=True)
+range_type = st.radio("범위 유형", options=["월별", "일별", "기간"], horizontal=True)
 
 spreadsheet = connect_to_gsheet()
 
 def load_backup_sheet(sheet_name):
-    """백업 시트에서 데이터 로드"""
+    """백업 시트에서 데이터 로드 (시트 카탈로그 + 세션 캐시: 라디오/셀렉트 전환 시 재읽기 없음)"""
     try:
-        ws = spreadsheet.worksheet(sheet_name)
-        values = ws.get_all_values()
+        values = get_sheet_values_cached(sheet_name, spreadsheet) or []
         if len(values) >= 2:
-            return pd.DataFrame(values[1:], columns=values[0], dtype=str)
+            return backup_values_to_frame(values)
     except Exception as e:
         st.error(f"시트 로드 오류: {e}")
-    return pd.DataFrame()
+    return pd.DataFrame(columns=SHEET_HEADERS)
 
-df_selected = pd.DataFrame()
+# 통계는 (완료일, 출고처)별 건수·피트수 집계표 하나로 그린다.
+# 월별은 백업 시 함께 갱신되는 '통계_YYYY-MM' 집계 시트만 읽고(원본 최대 1000행 대신 수십 행),
+# 일별은 원본 시트가 하루치로 작아 그 자리에서 집계한다.
+# 집계·표 만들기는 (보기, 원본 시트 리비전) 단위로 메모이즈되어, 같은 범위를 다시 고르거나
+# 다른 위젯을 건드리는 재실행에서는 다시 계산하지 않는다 (cached_stats_view 참고).
+view = None
 
 if range_type == "월별":
     if spreadsheet:
-        all_sheets = [s.title for s in spreadsheet.worksheets()]
-        monthly_sheets = filter_backup_sheets(all_sheets, "monthly")
+        monthly_sheets = [s['title'] for s in list_backup_sheets("monthly", spreadsheet)]
         if monthly_sheets:
             selected_month = st.selectbox("월 선택", monthly_sheets)
-            df_selected = load_backup_sheet(selected_month)
+            month_str = selected_month.replace(BACKUP_PREFIX, '')
+            view = cached_stats_view(
+                ("월별", month_str), sheet_revision(f"{STATS_PREFIX}{month_str}"),
+                lambda: load_month_stats(month_str, spreadsheet),
+            )
+            button_marker("neutral")
+            if st.button("🧮 집계 다시 만들기", help="원본 월별 백업 시트로 통계 집계표를 다시 계산합니다."):
+                with st.spinner("월별 백업으로 집계를 다시 만드는 중..."):
+                    sync_month_backup(month_str, spreadsheet=spreadsheet)
+                st.rerun()
         else:
             st.info("월별 백업 시트가 없습니다.")
     else:
@@ -55,28 +94,61 @@ if range_type == "월별":
 
 elif range_type == "일별":
     if spreadsheet:
-        all_sheets = [s.title for s in spreadsheet.worksheets()]
-        daily_sheets = filter_backup_sheets(all_sheets, "daily")
+        daily_sheets = [s['title'] for s in list_backup_sheets("daily", spreadsheet)]
         if daily_sheets:
             selected_day = st.selectbox("일 선택", daily_sheets)
-            df_selected = load_backup_sheet(selected_day)
+            view = cached_stats_view(
+                ("일별", selected_day), sheet_revision(selected_day),
+                lambda: compute_backup_stats(load_backup_sheet(selected_day)),
+            )
         else:
             st.info("일별 백업 시트가 없습니다.")
     else:
         st.error("Google Sheets 연결 실패")
 
-if df_selected.empty:
-    st.info("선택한 범위에 데이터가 없습니다.")
-    st.stop()
-
-# 선적완료 데이터만 필터
-df_selected['피트수'] = pd.to_numeric(df_selected['피트수'], errors='coerce').fillna(0).astype(int)
-df_selected['완료일시'] = pd.to_datetime(df_selected.get('완료일시', pd.NaT), errors='coerce')
-df_selected['완료일'] = df_selected['완료일시'].dt.date
-
-df_done = df_selected[df_selected['상태'] == '선적완료'].copy()
+elif range_type == "기간":
+    # 여러 달(분기·반기·1년 추이)은 각 달의 집계 시트를 한 번의 batch 읽기로 가져와 합친다.
+    if spreadsheet:
+        months = sorted(s['date'] for s in list_backup_sheets("monthly", spreadsheet))
+        if months:
+            default_start = months[max(0, len(months) - 6)]  # 기본: 최근 6개월
+            start_month, end_month = (
+                st.select_slider("기간 선택", options=months, value=(default_start, months[-1]))
+                if len(months) > 1 else (months[0], months[0])
+            )
+            selected_months = [m for m in months if start_month <= m <= end_month]
+            # 첫 달·마지막 달의 일부만 볼 때: 합친 집계를 완료일로 좁힌다(읽기는 달 단위 그대로)
+            first_day = pd.Period(start_month, freq='M').start_time.date()
+            last_day = pd.Period(end_month, freq='M').end_time.date()
+            picked_days = st.date_input("날짜 범위 (선택)", value=(first_day, last_day),
+                                        min_value=first_day, max_value=last_day)
+            day_from, day_to = (tuple(picked_days) + (last_day,))[:2] if picked_days else (first_day, last_day)
+            day_range = (None, None) if (day_from, day_to) == (first_day, last_day) \
+                else (day_from.isoformat(), day_to.isoformat())
+            view = cached_stats_view(
+                ("기간", tuple(selected_months), day_range),
+                tuple(sheet_revision(f"{STATS_PREFIX}{m}") for m in selected_months),
+                lambda: load_stats_range(selected_months, spreadsheet, *day_range),
+            )
+            # 로컬 아카이브에 있는 달은 Sheets를 읽지 않는다. 재부팅 등으로 빠진 달은 한 번에 채울 수 있다.
+            _archived = set(archived_months())
+            not_archived = [m for m in selected_months if m not in _archived]
+            if not_archived:
+                button_marker("neutral")
+                if st.button(f"💾 로컬 아카이브 채우기 ({len(not_archived)}개월)",
+                             help="선택한 기간의 월별 백업을 한 번에 읽어 로컬에 저장합니다. 이후 기간 분석은 Sheets를 읽지 않습니다."):
+                    with st.spinner("월별 백업을 로컬 아카이브로 저장하는 중..."):
+                        ok, res = fill_backup_archive(not_archived, spreadsheet)
+                    if ok:
+                        st.success(f"{len(res)}개월을 아카이브에 저장했습니다.")
+                    else:
+                        st.error(f"아카이브 저장 실패: {res}")
+        else:
+            st.info("월별 백업 시트가 없습니다.")
+    else:
+        st.error("Google Sheets 연결 실패")
 
-if df_done.empty:
+if view is None:
     st.info("선택한 범위에 선적완료 데이터가 없습니다.")
     st.stop()
 
@@ -85,10 +157,8 @@ st.markdown("---")
 # -------------------------------------------------------
 # 요약 카드 (선적완료만)
 # -------------------------------------------------------
-completed = len(df_done)
-total_ft = int(df_done['피트수'].sum())
-ft40 = int(df_done[df_done['피트수'] == 40]['피트수'].sum())
-ft20 = int(df_done[df_done['피트수'] == 20]['피트수'].sum())
+completed = view['completed']
+total_ft = view['total_ft']
 
 st.markdown(
     f"""
@@ -113,49 +183,25 @@ st.markdown("---")
 # 출고처별 현황 (전체 건수 / 전체 피트수 합계, 천자리 컴마)
 # -------------------------------------------------------
 st.markdown("##### 📦 출고처별 현황")
-
-dest_group = df_done.groupby('출고처')
-
-dest_stats = pd.DataFrame({
-    '전체 건수(건)': dest_group.size(),
-    '전체 피트수(ft)': dest_group['피트수'].sum(),
-}).fillna(0).astype(int)
-
-dest_stats = dest_stats.sort_values('전체 피트수(ft)', ascending=False)
-dest_stats.index.name = '출고처'
-
-# 천자리 컴마 포맷
-dest_stats_display = dest_stats.copy()
-dest_stats_display['전체 건수(건)'] = dest_stats_display['전체 건수(건)'].apply(lambda x: f"{x:,}")
-dest_stats_display['전체 피트수(ft)'] = dest_stats_display['전체 피트수(ft)'].apply(lambda x: f"{x:,}")
-
-st.dataframe(dest_stats_display, use_container_width=True)
+st.dataframe(view['dest'], use_container_width=True)
 
 st.markdown("---")
 
 # -------------------------------------------------------
-# 일자별 현황 크로스 테이블 (출고처 × 날짜, 단위: ft)
+# 월별 추이 (기간 선택 시: 출고처 × 월, 단위: ft)
 # -------------------------------------------------------
-st.markdown("##### 📅 일자별 현황 (단위: ft)")
-
-if df_done['완료일'].notna().any():
-    cross = df_done.groupby(['출고처', '완료일'])['피트수'].sum().unstack(fill_value=0)
-    cross.index.name = '출고처'
-
-    # 날짜 컬럼을 M/D 형식으로 변환 (크로스플랫폼 호환)
-    cross.columns = [
-        pd.Timestamp(str(c)).strftime('%m/%d').lstrip('0').replace('/0', '/')
-        for c in cross.columns
-    ]
-
-    # 합계 행/열 추가
-    cross['합계'] = cross.sum(axis=1)
-    total_row = cross.sum(axis=0).rename('합계')
-    cross = pd.concat([cross, total_row.to_frame().T])
+if range_type == "기간":
+    st.markdown("##### 📈 월별 추이 (단위: ft)")
+    st.bar_chart(view['monthly_ft'], y_label="피트수(ft)", x_label="월")
+    st.dataframe(view['trend'], use_container_width=True)
+    st.stop()
 
-    # 천자리 컴마 포맷 (applymap → map, pandas 최신 버전 대응)
-    cross_display = cross.map(lambda x: f"{int(x):,}" if x != 0 else "-")
+# -------------------------------------------------------
+# 일자별 현황 크로스 테이블 (출고처 × 날짜 M/D, 단위: ft, 합계 행/열 포함)
+# -------------------------------------------------------
+st.markdown("##### 📅 일자별 현황 (단위: ft)")
 
-    st.dataframe(cross_display, use_container_width=True)
+if view['cross'] is not None:
+    st.dataframe(view['cross'], use_container_width=True)
 else:
     st.info("완료일시 데이터가 없습니다.")
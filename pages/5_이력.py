@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
-from utils import connect_to_gsheet, LOG_SHEET_NAME, apply_sidebar_style, render_app_title, button_marker
+from datetime import datetime
+from metrics import track_operation
+from utils import (
+    connect_to_gsheet, load_log_frame, load_log_history, log_archive_partitions,
+    get_worksheet_titles, invalidate_sheet_caches,
+    filter_log_positions, count_log_types, log_display_frame, export_log_csv,
+    KST, LOG_TYPES, apply_sidebar_style, render_app_title, button_marker,
+    warm_up_connection,
+)
 
 st.set_page_config(page_title="이력", layout="wide", initial_sidebar_state="expanded")
+warm_up_connection()
 
 apply_sidebar_style()
 
@@ -14,6 +23,7 @@ col_refresh = st.columns([0.8, 0.2])
 with col_refresh[1]:
     button_marker("neutral")
     if st.button("🔄 새로고침", use_container_width=True):
+        invalidate_sheet_caches()  # 다른 기기가 남긴 로그·새 아카이브 시트까지 다시 읽는다
         st.rerun()
 
 # --- 로그 데이터 로드 ---
@@ -23,22 +33,19 @@ if not spreadsheet:
     st.stop()
 
 try:
-    log_sheet = spreadsheet.worksheet(LOG_SHEET_NAME)
-    all_values = log_sheet.get_all_values()
+    # 로그를 쓰는 쪽(log_change)이 리비전을 올리므로, 필터를 바꾸는 재실행에서는 다시 읽지도
+    # 파싱하지도 않는다. 유형·컨테이너 칸과 컨테이너 역색인이 함께 만들어져 있다.
+    with track_operation("페이지 로드: 이력"):
+        df_live, _ = load_log_frame(spreadsheet)
+        log_archives = [p for p in log_archive_partitions(get_worksheet_titles(spreadsheet)) if p['start']]
 except Exception as e:
     st.error(f"이력 시트를 불러오는 중 오류가 발생했습니다: {e}")
     st.stop()
 
-if len(all_values) < 1:
+if df_live.empty and not log_archives:
     st.info("기록된 변경 이력이 없습니다.")
     st.stop()
 
-# 헤더 없이 [타임스탬프, 액션] 형태로 저장되어 있으므로 직접 컬럼 지정
-df_log = pd.DataFrame(all_values, columns=['일시', '내용'])
-df_log['일시'] = pd.to_datetime(df_log['일시'], errors='coerce')
-df_log = df_log.dropna(subset=['일시'])
-df_log = df_log.sort_values('일시', ascending=False).reset_index(drop=True)
-
 st.markdown("---")
 
 # --- 필터 ---
@@ -50,45 +57,49 @@ with st.container(border=True):
         search_keyword = st.text_input("🔎 키워드 검색", placeholder="컨테이너 번호, 작업 내용 등")
 
     with col2:
-        action_types = ['전체', '신규 등록', '데이터 수정', '데이터 삭제', '데이터 백업', '데이터 복구']
-        selected_action = st.selectbox("📌 작업 유형", action_types)
+        selected_action = st.selectbox("📌 작업 유형", ['전체'] + LOG_TYPES)
 
     with col3:
-        if df_log['일시'].notna().any():
-            min_date = df_log['일시'].min().date()
-            max_date = df_log['일시'].max().date()
-            date_range = st.date_input(
-                "📅 날짜 범위",
-                value=(min_date, max_date),
-                min_value=min_date,
-                max_value=max_date
-            )
-        else:
-            date_range = None
+        # 기본은 라이브 로그 기간. 더 이전 날짜를 고르면 겹치는 아카이브 시트만 함께 읽는다.
+        today = datetime.now(KST).date()
+        live_min = df_live['일시'].min().date() if not df_live.empty else today
+        max_date = max(df_live['일시'].max().date(), today) if not df_live.empty else today
+        oldest = min([p['start'] for p in log_archives] + [live_min])
+        date_range = st.date_input(
+            "📅 날짜 범위",
+            value=(live_min, max_date),
+            min_value=oldest,
+            max_value=max_date
+        )
+        if oldest < live_min:
+            st.caption(f"{live_min} 이전을 고르면 로그 아카이브(`로그_YYYY-QN`)까지 함께 조회합니다.")
+
+start_date, end_date = date_range if len(date_range) == 2 else (date_range[0], max_date)
+try:
+    with track_operation("이력 조회"):
+        df_log, log_index = load_log_history(start_date, end_date, spreadsheet)
+except Exception as e:
+    st.error(f"로그 아카이브를 불러오는 중 오류가 발생했습니다: {e}")
+    st.stop()
 
 # --- 필터 적용 ---
-filtered_log = df_log.copy()
-
-if search_keyword:
-    filtered_log = filtered_log[filtered_log['내용'].str.contains(search_keyword, na=False)]
-
-if selected_action != '전체':
-    filtered_log = filtered_log[filtered_log['내용'].str.contains(selected_action, na=False)]
-
-if date_range and len(date_range) == 2:
-    start_date, end_date = date_range
-    filtered_log = filtered_log[
-        (filtered_log['일시'].dt.date >= start_date) &
-        (filtered_log['일시'].dt.date <= end_date)
-    ]
+# 로그 프레임은 여러 세션이 공유하는 캐시라 복사하지 않는다. 조건에 맞는 행 위치만 구하고,
+# 화면에는 현재 페이지의 행만, CSV는 눌렀을 때만 만든다.
+positions = filter_log_positions(
+    df_log, log_index,
+    keyword=search_keyword,
+    kind=None if selected_action == '전체' else selected_action,
+    start=start_date, end=end_date,
+)
 
 st.markdown("---")
 
 # --- 요약 카드 ---
-total_logs = len(filtered_log)
-reg_count = len(filtered_log[filtered_log['내용'].str.contains('신규 등록', na=False)])
-mod_count = len(filtered_log[filtered_log['내용'].str.contains('데이터 수정', na=False)])
-del_count = len(filtered_log[filtered_log['내용'].str.contains('데이터 삭제', na=False)])
+total_logs = len(positions)
+type_counts = count_log_types(df_log, positions)
+reg_count = type_counts['등록']
+mod_count = type_counts['수정']
+del_count = type_counts['삭제']
 
 st.markdown(
     f"""
@@ -112,47 +123,44 @@ st.markdown(
 
 st.markdown("<div style='margin-top:12px;'></div>", unsafe_allow_html=True)
 
-if filtered_log.empty:
+if total_logs == 0:
     st.warning("조건에 맞는 이력이 없습니다.")
 else:
-    # 표시용 포맷
-    display_log = filtered_log.copy()
-    display_log['일시'] = display_log['일시'].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-    # 작업 유형 컬러 뱃지
-    def get_action_tag(content):
-        if '신규 등록' in str(content):
-            return '🟢 신규 등록'
-        elif '데이터 수정' in str(content):
-            return '🟡 수정'
-        elif '데이터 삭제' in str(content):
-            return '🔴 삭제'
-        elif '데이터 백업' in str(content):
-            return '🔵 백업'
-        elif '데이터 복구' in str(content):
-            return '🟣 복구'
-        return '⚪ 기타'
-
-    display_log['작업 유형'] = display_log['내용'].apply(get_action_tag)
-    display_log = display_log[['일시', '작업 유형', '내용']]
-
+    # 페이지 나누기: 로그가 수만 행이어도 화면에는 한 페이지 분량만 보낸다
+    col_size, col_page, col_info = st.columns([0.2, 0.2, 0.6])
+    with col_size:
+        page_size = st.selectbox("페이지당 행 수", [50, 100, 200, 500], index=1)
+    page_count = (total_logs - 1) // page_size + 1
+    with col_page:
+        # 필터 결과가 바뀌면 1페이지로 돌아가도록 결과 크기를 키에 넣는다
+        page = st.number_input("페이지", min_value=1, max_value=page_count, value=1, step=1,
+                               key=f"log_page_{total_logs}_{page_size}")
+    with col_info:
+        st.markdown(
+            f"<div style='padding-top:2rem; color:#555555;'>{total_logs:,}건 중 "
+            f"{(page - 1) * page_size + 1:,}–{min(page * page_size, total_logs):,}번째 (총 {page_count:,}페이지)</div>",
+            unsafe_allow_html=True,
+        )
+
+    page_positions = positions[(page - 1) * page_size: page * page_size]
     st.dataframe(
-        display_log,
+        log_display_frame(df_log.iloc[page_positions]),
         use_container_width=True,
         hide_index=True,
         column_config={
             "일시": st.column_config.TextColumn("일시", width="medium"),
             "작업 유형": st.column_config.TextColumn("작업 유형", width="small"),
             "내용": st.column_config.TextColumn("내용", width="large"),
+            "시트": st.column_config.TextColumn("시트", width="small"),
+            "세션": st.column_config.TextColumn("세션", width="small"),
         }
     )
 
-    # CSV 다운로드
-    csv = display_log.to_csv(index=False).encode('utf-8-sig')
+    # CSV 다운로드 (필터 결과 전체). 버튼을 누를 때만 덩어리 단위로 만들어 내려준다.
     button_marker("neutral")
     st.download_button(
-        label="📥 이력 CSV 다운로드",
-        data=csv,
+        label=f"📥 이력 CSV 다운로드 ({total_logs:,}건)",
+        data=lambda: export_log_csv(df_log, positions),
         file_name=f"변경이력_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.csv",
         mime="text/csv",
         use_container_width=True
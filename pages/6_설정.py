@@ -8,9 +8,11 @@ from utils import (
     get_destinations,
     save_destinations,
     button_marker,
+    warm_up_connection,
 )
 
 st.set_page_config(page_title="설정", layout="wide", initial_sidebar_state="expanded")
+warm_up_connection()
 
 apply_sidebar_style()
 
@@ -0,0 +1,159 @@
+import streamlit as st
+import pandas as pd
+import metrics
+from utils import (
+    apply_sidebar_style,
+    render_app_title,
+    button_marker,
+    warm_up_connection,
+    get_warmup_status,
+    get_change_watch_status,
+    get_log_rotation_status,
+    get_retention_status,
+    check_backup_integrity,
+    apply_backup_repair_plan,
+    BACKUP_ISSUE_TYPES,
+)
+
+st.set_page_config(page_title="진단", layout="wide", initial_sidebar_state="expanded")
+warm_up_connection()
+
+apply_sidebar_style()
+
+render_app_title()
+
+st.markdown("#### 🩺 진단")
+st.caption("이 서버 프로세스가 시작된 뒤 작업별 Google Sheets/OCR 호출 수와 소요 시간입니다. "
+           "재부팅하면 비워집니다.")
+
+col_refresh = st.columns([0.8, 0.2])
+with col_refresh[1]:
+    button_marker("neutral")
+    if st.button("🔄 새로고침", use_container_width=True):
+        st.rerun()
+
+# --- 최근 1분 호출 수 (Sheets 분당 쿼터: 읽기/쓰기 각 60회) ---
+st.markdown("##### ⏱️ 최근 1분 호출 수")
+last_minute = metrics.calls_in_window(60)
+c1, c2, c3 = st.columns(3)
+c1.metric("Sheets 읽기", f"{last_minute['sheets_read']} / {metrics.SHEETS_QUOTA_PER_MINUTE}")
+c2.metric("Sheets 쓰기", f"{last_minute['sheets_write']} / {metrics.SHEETS_QUOTA_PER_MINUTE}")
+c3.metric("OCR", last_minute['ocr'])
+if max(last_minute['sheets_read'], last_minute['sheets_write']) >= metrics.SHEETS_QUOTA_PER_MINUTE * 0.8:
+    st.warning("분당 쿼터의 80%를 넘었습니다. 아래 표에서 호출이 많은 작업을 확인하세요.")
+
+# --- 작업별 요약 ---
+st.markdown("##### 📊 작업별 요약")
+summary = metrics.summarize()
+if summary:
+    df_summary = pd.DataFrame(summary)
+    st.dataframe(
+        pd.DataFrame({
+            '작업': df_summary['op'],
+            '횟수': df_summary['count'],
+            '실패': df_summary['failed'],
+            '읽기 합계': df_summary['sheets_read_total'],
+            '쓰기 합계': df_summary['sheets_write_total'],
+            'OCR 합계': df_summary['ocr_total'],
+            '회당 읽기': df_summary['sheets_read_avg'].round(1),
+            '회당 쓰기': df_summary['sheets_write_avg'].round(1),
+            'p50 (ms)': df_summary['p50_ms'].round(),
+            'p95 (ms)': df_summary['p95_ms'].round(),
+            '최대 (ms)': df_summary['max_ms'].round(),
+            'API 대기 비율': (df_summary['api_share'] * 100).round().astype(int).astype(str) + '%',
+        }),
+        hide_index=True, use_container_width=True,
+    )
+else:
+    st.info("아직 기록된 작업이 없습니다.")
+
+other = metrics.unattributed_calls()
+if other:
+    st.caption(f"작업 밖 호출({metrics.UNATTRIBUTED}): 읽기 {other.get('sheets_read', 0)}회, "
+               f"쓰기 {other.get('sheets_write', 0)}회, OCR {other.get('ocr', 0)}회")
+
+# --- 최근 작업 ---
+st.markdown("##### 🕒 최근 작업")
+recent = metrics.recent_operations(50)
+if recent:
+    df_recent = pd.DataFrame(recent)
+    st.dataframe(
+        pd.DataFrame({
+            '일시': df_recent['at'],
+            '작업': df_recent['op'],
+            '소요 (ms)': df_recent['ms'].round(),
+            'API 대기 (ms)': df_recent['api_ms'].round(),
+            '읽기': df_recent['sheets_read'],
+            '쓰기': df_recent['sheets_write'],
+            'OCR': df_recent['ocr'],
+            '결과': ['성공' if ok else '실패' for ok in df_recent['ok']],
+            '오류': df_recent['error'] if 'error' in df_recent else '',
+        }).fillna(''),
+        hide_index=True, use_container_width=True,
+    )
+
+# --- 연결·백그라운드 작업 상태 ---
+st.markdown("##### 🔌 연결·백그라운드 작업")
+with st.container(border=True):
+    warmup = get_warmup_status()
+    if warmup["error"]:
+        st.error(warmup["error"])
+    st.caption("연결 예열: " + (f"{warmup['ready_ms']:,} ms에 완료" if warmup["ready_ms"] is not None
+                             else ("진행 중" if warmup["started"]
+                                   else ("실패 — 다음 페이지 로드에서 다시 시도" if warmup["error"] else "시작 전")))
+               + (f" · 마지막 토큰 갱신 {warmup['token_refreshed']}" if warmup["token_refreshed"] else ""))
+    watch = get_change_watch_status()
+    if watch["error"]:
+        st.error(watch["error"])
+    st.caption(f"세션 간 변경 피드: {watch['feed_seq']:,}건"
+               + (f" · 앱 밖 변경 마지막 확인 {watch['checked']}" if watch["checked"] else " · 앱 밖 변경 감시 시작 전"))
+    for label, status in (("로그 자동 이관", get_log_rotation_status()), ("일별 백업 자동 정리", get_retention_status())):
+        if status["running"]:
+            st.caption(f"{label}: 진행 중")
+        elif status["last"]:
+            ran_at, ok, result = status["last"]
+            st.caption(f"{label}: {ran_at} " + ("성공" if ok else f"실패 ({result})"))
+        else:
+            st.caption(f"{label}: 이 프로세스에서 아직 실행되지 않음")
+
+# --- 백업 무결성 점검 ---
+st.markdown("##### 🧾 백업 무결성 점검")
+st.caption("모든 일별·월별 백업 시트를 읽어, 월별 시트가 그달 일별 시트와 같은지 컨테이너별로 비교합니다. "
+           "중복 행과 체크디지트가 틀린 번호도 찾습니다.")
+with st.container(border=True):
+    button_marker("neutral")
+    if st.button("🔍 백업 시트 점검", use_container_width=True):
+        with st.spinner("백업 시트를 읽는 중..."):
+            st.session_state["backup_scan"] = check_backup_integrity()
+    scan = st.session_state.get("backup_scan")
+    if scan is not None:
+        ok, result = scan
+        if not ok:
+            st.error(f"점검 실패: {result}")
+        else:
+            issues, plan = result['issues'], result['plan']
+            st.caption(f"시트 {result['sheets']:,}장 · {result['rows']:,}행 점검")
+            counts = issues['유형'].value_counts()
+            for col, kind in zip(st.columns(len(BACKUP_ISSUE_TYPES)), BACKUP_ISSUE_TYPES):
+                col.metric(kind, int(counts.get(kind, 0)))
+            if issues.empty:
+                st.success("일별·월별 백업이 일치합니다.")
+            else:
+                st.dataframe(issues.astype({'유형': str}), hide_index=True, use_container_width=True)
+            if plan:
+                st.caption("복구 계획 (일별 시트 기준, 월별에만 있는 행과 체크디지트 오류는 그대로 둡니다): "
+                           + "; ".join(f"{item['sheet']} {item['reason']}" for item in plan))
+                button_marker("danger")
+                if st.button(f"🛠️ 복구 계획 적용 ({len(plan)}개 시트)", use_container_width=True):
+                    with st.spinner("백업 시트를 다시 쓰는 중..."):
+                        done, msg = apply_backup_repair_plan(plan)
+                    st.session_state.pop("backup_scan", None)
+                    if done:
+                        st.success(f"{len(msg)}개 시트를 다시 썼습니다: {', '.join(msg)}")
+                    else:
+                        st.error(f"복구 실패: {msg}")
+
+button_marker("danger")
+if st.button("🧹 기록 초기화", use_container_width=True):
+    metrics.reset()
+    st.rerun()
@@ -0,0 +1,41 @@
+"""공용 pytest 픽스처."""
+import os
+import sys
+
+# 프로젝트 루트를 import 경로에 추가 (어떤 실행 방식에서도 utils를 찾도록)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import streamlit as st
+
+import backup_archive
+import metrics
+import utils
+from fake_gspread import FakeSpreadsheet
+
+
+def _reset_streamlit_state():
+    st.cache_resource.clear()  # 시트 카탈로그, 고정 워크시트
+    st.cache_data.clear()
+    metrics.reset()
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+
+
+@pytest.fixture
+def fake_sheets(monkeypatch, tmp_path):
+    """utils가 실제 Google Sheets 대신 메모리 속 가짜 스프레드시트를 쓰게 한다.
+
+    현재 데이터(헤더만)와 빈 업데이트 로그 시트가 있는 상태로 시작하고, 테스트마다
+    카탈로그·캐시·세션 상태를 비운다. 지연/쿼터가 필요하면 spreadsheet.quota를 바꾼다.
+    로컬 Parquet 아카이브는 테스트마다 임시 폴더에 쓴다.
+    """
+    _reset_streamlit_state()
+    monkeypatch.setattr(backup_archive, "DEFAULT_ARCHIVE_DIR", str(tmp_path / "archive"))
+    spreadsheet = FakeSpreadsheet()
+    spreadsheet.create(utils.MAIN_SHEET_NAME, [utils.SHEET_HEADERS])
+    spreadsheet.create(utils.LOG_SHEET_NAME)
+    utils.instrument_sheets_client(spreadsheet.client)  # connect_to_gsheet과 같이 호출을 센다
+    monkeypatch.setattr(utils, "connect_to_gsheet", lambda: spreadsheet)
+    yield spreadsheet
+    _reset_streamlit_state()
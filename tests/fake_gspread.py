@@ -0,0 +1,435 @@
+"""메모리 안에서 동작하는 가짜 gspread 백엔드 (오프라인 테스트·부하 측정용).
+
+utils.py가 쓰는 Spreadsheet/Worksheet API만 실제 gspread와 같은 모양으로 흉내 낸다.
+  읽기 : worksheets, worksheet, get_all_values, row_values, col_values, values_batch_get
+  쓰기 : update, append_row(s), delete_rows, clear, format, add_rows, values_batch_update,
+         add_worksheet, del_worksheet, batch_update(deleteDimension/appendDimension/deleteSheet)
+호출마다 SheetsQuota를 거치므로
+  - latency 로 요청당 왕복 지연을 흉내 내고,
+  - 분당 읽기/쓰기 한도(실제 기본값 60회)를 넘으면 실제처럼 APIError 429를 던진다.
+요청 본문은 스프레드시트마다 하나인 잠금 안에서 돌아 동시 요청도 실제처럼 하나씩 적용된다.
+calls(메서드별 호출 수)로 어떤 함수가 Sheets를 몇 번 부르는지 확인할 수 있다.
+
+사용:
+    spreadsheet = FakeSpreadsheet(quota=SheetsQuota(latency=0.05))
+    ws = spreadsheet.add_worksheet("현재 데이터", rows=100, cols=8)
+    ws.update("A1", [SHEET_HEADERS])
+값은 시트에서 읽은 것처럼 모두 문자열로 저장한다(USER_ENTERED의 앞 작은따옴표는 뺀다).
+수식 계산, 서식, 숫자 형식 변환은 흉내 내지 않는다.
+"""
+import collections
+import itertools
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import gspread
+from gspread.utils import a1_range_to_grid_range, rowcol_to_a1
+
+
+class _ErrorResponse:
+    """APIError가 기대하는 requests.Response의 최소 모양."""
+
+    def __init__(self, code, message, status):
+        self.status_code = code
+        self.text = message
+        self._error = {"code": code, "message": message, "status": status}
+
+    def json(self):
+        return {"error": self._error}
+
+
+def api_error(code, message, status="FAILED_PRECONDITION"):
+    return gspread.exceptions.APIError(_ErrorResponse(code, message, status))
+
+
+class SheetsQuota:
+    """요청당 지연과 분당 읽기/쓰기 한도를 흉내 낸다.
+
+    latency: 요청당 지연(초) 또는 지연을 돌려주는 함수(호출마다 불린다)
+    reads_per_minute / writes_per_minute: None이면 한도 없음
+    clock: 테스트에서 시간을 직접 움직일 때 바꿔 끼운다(기본 time.monotonic)
+    """
+
+    def __init__(self, latency=0.0, reads_per_minute=60, writes_per_minute=60, clock=time.monotonic):
+        self.latency = latency
+        self.limits = {"read": reads_per_minute, "write": writes_per_minute}
+        self.clock = clock
+        self.calls = collections.Counter()
+        self.rejected = collections.Counter()
+        self._window = {"read": collections.deque(), "write": collections.deque()}
+        self._lock = threading.Lock()
+
+    def charge(self, kind, method):
+        """요청 1회를 기록한다. 한도를 넘으면 APIError(429)."""
+        with self._lock:
+            now = self.clock()
+            window = self._window[kind]
+            while window and now - window[0] >= 60:
+                window.popleft()
+            limit = self.limits[kind]
+            if limit is not None and len(window) >= limit:
+                self.rejected[method] += 1
+                raise api_error(429, f"Quota exceeded for quota metric '{kind.title()} requests' "
+                                     f"(limit {limit}/min)", "RESOURCE_EXHAUSTED")
+            window.append(now)
+            self.calls[method] += 1
+        delay = self.latency() if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+
+    @property
+    def reads(self):
+        return sum(n for m, n in self.calls.items() if m in _READ_METHODS)
+
+    @property
+    def writes(self):
+        return sum(n for m, n in self.calls.items() if m not in _READ_METHODS)
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.rejected.clear()
+            for window in self._window.values():
+                window.clear()
+
+
+_READ_METHODS = {"worksheets", "worksheet", "get_all_values", "get_values", "row_values", "col_values", "values_batch_get"}
+
+
+def _cell(value, value_input_option):
+    if value is None:
+        return ""
+    s = str(value)
+    if str(value_input_option).upper().endswith("USER_ENTERED") and s.startswith("'"):
+        return s[1:]
+    return s
+
+
+def _trimmed(row):
+    end = len(row)
+    while end and row[end - 1] == "":
+        end -= 1
+    return row[:end]
+
+
+class FakeWorksheet:
+    def __init__(self, spreadsheet, sheet_id, title, rows, cols):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self._rows = []  # 값이 있는 영역만 (뒤쪽 빈 행/열은 저장하지 않는다)
+
+    def __repr__(self):
+        return f"<FakeWorksheet {self.title!r} id:{self.id}>"
+
+    def _charge(self, kind, method):
+        return self.spreadsheet._request(kind, method)
+
+    # --- 읽기 ---
+    def _values(self):
+        """API처럼 뒤쪽 빈 행을 자르고 가장 긴 행에 맞춰 채운 직사각형."""
+        rows = [_trimmed(r) for r in self._rows]
+        while rows and not rows[-1]:
+            rows.pop()
+        width = max((len(r) for r in rows), default=0)
+        return [r + [""] * (width - len(r)) for r in rows]
+
+    def get_all_values(self, **kwargs):
+        with self._charge("read", "get_all_values"):
+            return self._values()
+
+    def get_values(self, range_name=None, **kwargs):
+        with self._charge("read", "get_values"):
+            return self._range_values(range_name)
+
+    def row_values(self, row, **kwargs):
+        with self._charge("read", "row_values"):
+            return _trimmed(list(self._rows[row - 1])) if row <= len(self._rows) else []
+
+    def col_values(self, col, **kwargs):
+        with self._charge("read", "col_values"):
+            column = [r[col - 1] if col <= len(r) else "" for r in self._rows]
+            return _trimmed(column)
+
+    def _range_values(self, range_name):
+        values = self._values()
+        if not range_name:
+            return values
+        grid = a1_range_to_grid_range(range_name)
+        top, left = grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0)
+        bottom, right = grid.get("endRowIndex"), grid.get("endColumnIndex")
+        rows = [_trimmed(r[left:right]) for r in values[top:bottom]]
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows
+
+    # --- 쓰기 ---
+    def _write_block(self, top, left, values, value_input_option):
+        """0부터 세는 (top, left)에 2차원 값을 쓴다. 격자를 넘으면 API처럼 실패한다."""
+        bottom = top + len(values)
+        right = left + max((len(r) for r in values), default=0)
+        if bottom > self.row_count or right > self.col_count:
+            raise api_error(400, f"Range ({self.title}!{rowcol_to_a1(bottom, right)}) exceeds grid limits. "
+                                 f"Max rows: {self.row_count}, max columns: {self.col_count}", "INVALID_ARGUMENT")
+        while len(self._rows) < bottom:
+            self._rows.append([])
+        for i, row in enumerate(values):
+            target = self._rows[top + i]
+            if len(target) < left + len(row):
+                target.extend([""] * (left + len(row) - len(target)))
+            target[left:left + len(row)] = [_cell(v, value_input_option) for v in row]
+
+    def update(self, values=None, range_name=None, value_input_option=None, **kwargs):
+        # 예전 gspread처럼 update('A1', rows) 순서로 불러도 받아 준다(gspread 6도 같다)
+        if isinstance(values, str) and not isinstance(range_name, str):
+            values, range_name = range_name, values
+        with self._charge("write", "update"):
+            grid = a1_range_to_grid_range(range_name or "A1")
+            top, left = grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0)
+            values = [list(r) for r in values]
+            self._write_block(top, left, values, value_input_option)
+            return {"updatedRange": f"'{self.title}'!{range_name}", "updatedRows": len(values)}
+
+    def update_cell(self, row, col, value):
+        with self._charge("write", "update_cell"):
+            self._write_block(row - 1, col - 1, [[value]], "USER_ENTERED")
+            return {"updatedRange": f"'{self.title}'!{rowcol_to_a1(row, col)}", "updatedRows": 1}
+
+    def append_row(self, values, value_input_option="RAW", **kwargs):
+        return self._append([values], value_input_option, "append_row")
+
+    def append_rows(self, values, value_input_option="RAW", **kwargs):
+        return self._append(values, value_input_option, "append_rows")
+
+    def _append(self, values, value_input_option, method):
+        """값이 있는 마지막 행 다음에 붙인다. 모자란 행은 API처럼 늘린다."""
+        with self._charge("write", method):
+            values = [list(r) for r in values]
+            top = len(self._values())
+            if top + len(values) > self.row_count:
+                self.row_count = top + len(values)
+            width = max((len(r) for r in values), default=1)
+            self.col_count = max(self.col_count, width)
+            self._write_block(top, 0, values, value_input_option)
+            updated = f"'{self.title}'!A{top + 1}:{rowcol_to_a1(top + len(values), width)}"
+            return {"spreadsheetId": self.spreadsheet.id, "tableRange": f"'{self.title}'!A1",
+                    "updates": {"updatedRange": updated, "updatedRows": len(values)}}
+
+    def delete_rows(self, start_index, end_index=None):
+        with self._charge("write", "delete_rows"):
+            self._delete_rows(start_index - 1, end_index or start_index)
+
+    def _delete_rows(self, start, end):
+        """0부터 세는 [start, end) 행을 지운다(아래 행이 올라온다)."""
+        if end > self.row_count or start < 0 or start >= end:
+            raise api_error(400, f"Invalid requests[0].deleteDimension: range {start}:{end}", "INVALID_ARGUMENT")
+        del self._rows[start:end]
+        self.row_count -= end - start
+
+    def clear(self):
+        with self._charge("write", "clear"):
+            self._rows = []
+
+    def format(self, ranges, format, **kwargs):
+        self._charge("write", "format")
+
+    def add_rows(self, rows):
+        with self._charge("write", "add_rows"):
+            self.row_count += rows
+
+    # --- 테스트 편의 ---
+    def load(self, rows):
+        """쿼터를 쓰지 않고 시트 내용을 채운다(테스트 준비용)."""
+        rows = [[_cell(v, "RAW") for v in r] for r in rows]
+        self.row_count = max(self.row_count, len(rows))
+        self.col_count = max(self.col_count, max((len(r) for r in rows), default=0))
+        self._rows = rows
+        return self
+
+    def dump(self):
+        """쿼터를 쓰지 않고 get_all_values와 같은 내용을 돌려준다(검증용)."""
+        return self._values()
+
+
+class _FakeCredentials:
+    def __init__(self):
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+
+class FakeHttpClient:
+    """spreadsheet.client (gspread 6의 HTTPClient).
+
+    실제처럼 모든 요청이 request(method, endpoint)를 지나므로(GET=읽기, 그 외=쓰기)
+    utils가 이 메서드를 감싸 호출을 세는 계측도 그대로 동작한다. 여기서 쿼터를 매긴다.
+    토큰은 만료 시각과 갱신(login)만 흉내 낸다.
+    """
+
+    def __init__(self, quota):
+        self.quota = quota
+        self.auth = _FakeCredentials()
+        self.logins = 0
+
+    def request(self, method, endpoint, **kwargs):
+        self.quota.charge("read" if method.lower() == "get" else "write", endpoint)
+
+    def login(self):
+        self.logins += 1
+        self.auth.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+
+class FakeSpreadsheet:
+    def __init__(self, title="Container_Data_DB", quota=None):
+        self.id = "fake-spreadsheet"
+        self.title = title
+        self.client = FakeHttpClient(quota or SheetsQuota(reads_per_minute=None, writes_per_minute=None))
+        self._sheets = []
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+
+    @property
+    def quota(self):
+        return self.client.quota
+
+    @quota.setter
+    def quota(self, quota):
+        self.client.quota = quota
+
+    @property
+    def calls(self):
+        return self.quota.calls
+
+    def _request(self, kind, method):
+        """쿼터와 지연을 매기고 스프레드시트 잠금을 돌려준다.
+
+        지연은 잠금 밖에서 기다리고, 읽기·고치기·쓰기 본문만 `with`로 잠금 안에서 돌린다.
+        실제 Sheets처럼 요청 하나는 원자적이고, 동시에 온 요청끼리 서로 덮어쓰지 않는다.
+        """
+        self.client.request("get" if kind == "read" else "post", method)
+        return self._lock
+
+    # --- 시트 목록 ---
+    def worksheets(self, exclude_hidden=False):
+        with self._request("read", "worksheets"):
+            return list(self._sheets)
+
+    def worksheet(self, title):
+        with self._request("read", "worksheet"):
+            for ws in self._sheets:
+                if ws.title == title:
+                    return ws
+            raise gspread.exceptions.WorksheetNotFound(title)
+
+    def add_worksheet(self, title, rows, cols, index=None):
+        with self._request("write", "add_worksheet"):
+            if any(ws.title == title for ws in self._sheets):
+                raise api_error(400, f'Invalid requests[0].addSheet: A sheet with the name "{title}" already exists.',
+                                "INVALID_ARGUMENT")
+            ws = FakeWorksheet(self, next(self._ids), title, int(rows), int(cols))
+            self._sheets.insert(len(self._sheets) if index is None else index, ws)
+            return ws
+
+    def del_worksheet(self, worksheet):
+        with self._request("write", "del_worksheet"):
+            self._delete_sheet(worksheet.id)
+
+    def _delete_sheet(self, sheet_id):
+        for i, ws in enumerate(self._sheets):
+            if ws.id == sheet_id:
+                del self._sheets[i]
+                return
+        raise api_error(400, f"Invalid requests[0].deleteSheet: No sheet with id: {sheet_id}", "INVALID_ARGUMENT")
+
+    def _by_id(self, sheet_id):
+        for ws in self._sheets:
+            if ws.id == sheet_id:
+                return ws
+        raise api_error(400, f"No grid with id: {sheet_id}", "INVALID_ARGUMENT")
+
+    # --- 일괄 요청 ---
+    def batch_update(self, body):
+        """deleteDimension·appendDimension(ROWS)과 deleteSheet만 지원한다. 하나라도 실패하면 아무것도 바꾸지 않는다."""
+        with self._request("write", "batch_update"):
+            requests = body.get("requests", [])
+            for req in requests:
+                if "deleteSheet" in req:
+                    self._by_id(req["deleteSheet"]["sheetId"])
+                elif "deleteDimension" in req or "appendDimension" in req:
+                    rng = req["deleteDimension"]["range"] if "deleteDimension" in req else req["appendDimension"]
+                    if rng.get("dimension") != "ROWS":
+                        raise NotImplementedError("deleteDimension/appendDimension은 ROWS만 지원합니다")
+                    self._by_id(rng["sheetId"])
+                else:
+                    raise NotImplementedError(f"지원하지 않는 요청: {sorted(req)}")
+            for req in requests:
+                if "deleteSheet" in req:
+                    self._delete_sheet(req["deleteSheet"]["sheetId"])
+                elif "appendDimension" in req:
+                    self._by_id(req["appendDimension"]["sheetId"]).row_count += req["appendDimension"]["length"]
+                else:
+                    rng = req["deleteDimension"]["range"]
+                    self._by_id(rng["sheetId"])._delete_rows(rng["startIndex"], rng["endIndex"])
+            return {"spreadsheetId": self.id, "replies": [{} for _ in requests]}
+
+    @staticmethod
+    def _split_range(name):
+        """범위 이름을 (시트명, 셀 범위)로 나눈다. 예: "'시트'!A1:B2" → ('시트', 'A1:B2'), 시트명만 → ('시트', '')."""
+        title, _, cells = name.rpartition("!") if "!" in name else (name, "", "")
+        if title.startswith("'") and title.endswith("'"):
+            title = title[1:-1].replace("''", "'")
+        return title, cells
+
+    def _named(self, title, name):
+        ws = next((w for w in self._sheets if w.title == title), None)
+        if ws is None:
+            raise api_error(400, f"Unable to parse range: {name}", "INVALID_ARGUMENT")
+        return ws
+
+    def values_batch_get(self, ranges, params=None):
+        with self._request("read", "values_batch_get"):
+            value_ranges = []
+            for name in ranges:
+                title, cells = self._split_range(name)
+                ws = self._named(title, name)
+                values = ws._range_values(cells)
+                entry = {"range": name, "majorDimension": "ROWS"}
+                if values:
+                    entry["values"] = [_trimmed(r) for r in values]  # API는 행 끝 빈칸을 돌려주지 않는다
+                value_ranges.append(entry)
+            return {"spreadsheetId": self.id, "valueRanges": value_ranges}
+
+    def values_batch_update(self, body=None):
+        """여러 범위에 값 쓰기. 격자를 넘는 범위가 하나라도 있으면 아무것도 바꾸지 않는다."""
+        with self._request("write", "values_batch_update"):
+            body = body or {}
+            writes = []
+            for entry in body.get("data", []):
+                title, cells = self._split_range(entry["range"])
+                ws = self._named(title, entry["range"])
+                grid = a1_range_to_grid_range(cells or "A1")
+                top, left = grid.get("startRowIndex", 0), grid.get("startColumnIndex", 0)
+                values = [list(r) for r in entry.get("values", [])]
+                bottom, right = top + len(values), left + max((len(r) for r in values), default=0)
+                if bottom > ws.row_count or right > ws.col_count:
+                    raise api_error(400, f"Range ({entry['range']}) exceeds grid limits. "
+                                         f"Max rows: {ws.row_count}, max columns: {ws.col_count}", "INVALID_ARGUMENT")
+                writes.append((ws, top, left, values))
+            for ws, top, left, values in writes:
+                ws._write_block(top, left, values, body.get("valueInputOption", "RAW"))
+            return {"spreadsheetId": self.id, "totalUpdatedRows": sum(len(w[3]) for w in writes)}
+
+    # --- 테스트 편의 ---
+    def sheet(self, title):
+        """쿼터를 쓰지 않고 시트를 찾는다(검증용). 없으면 None."""
+        return next((ws for ws in self._sheets if ws.title == title), None)
+
+    def titles(self):
+        return [ws.title for ws in self._sheets]
+
+    def create(self, title, rows=()):
+        """쿼터를 쓰지 않고 시트를 만들어 rows로 채운다(테스트 준비용)."""
+        ws = FakeWorksheet(self, next(self._ids), title, max(len(rows), 1), max((len(r) for r in rows), default=1))
+        self._sheets.append(ws)
+        return ws.load(rows)
@@ -0,0 +1,67 @@
+"""backup_archive.py(로컬 Parquet 아카이브) 단위 테스트.
+
+실행: 프로젝트 루트에서
+    python -m pytest
+"""
+import os
+import sys
+
+# 프로젝트 루트를 import 경로에 추가 (어떤 실행 방식에서도 모듈을 찾도록)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from backup_archive import archived_months, read_archive, write_month
+
+HEADERS = ['컨테이너 번호', '출고처', '피트수', '씰 번호', '상태', '등록일시', '완료일시', '위치']
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=HEADERS)
+
+
+JULY = _frame([
+    ['MSCU1234566', '베트남', '40', '0123', '선적완료', '2026-07-30 08:00:00', '2026-07-30 11:00:00', '2'],
+    ['ABCU1234560', '박닌', '20', '', '선적중', '2026-07-30 09:00:00', None, '3'],
+])
+AUGUST = _frame([
+    ['TGHU7654320', '위해', '40', '', '선적완료', '2026-08-01 09:00:00', '2026-08-01 10:00:00', '1'],
+])
+
+
+def test_write_and_list_months(tmp_path):
+    write_month("2026-08", AUGUST, root=str(tmp_path))
+    write_month("2026-07", JULY, root=str(tmp_path))
+    assert archived_months(str(tmp_path)) == ["2026-07", "2026-08"]
+
+
+def test_archived_months_empty_when_no_dir(tmp_path):
+    assert archived_months(str(tmp_path / "none")) == []
+
+
+def test_read_keeps_sheet_strings(tmp_path):
+    write_month("2026-07", JULY, root=str(tmp_path))
+    df = read_archive(root=str(tmp_path))
+    assert df.iloc[0]['씰 번호'] == '0123'  # 선행 0 유지 (문자열 저장)
+    assert df.iloc[1]['완료일시'] == ''     # 빈 값은 ''
+    assert set(df['month']) == {"2026-07"}
+
+
+def test_read_with_columns_filters_and_months(tmp_path):
+    write_month("2026-07", JULY, root=str(tmp_path))
+    write_month("2026-08", AUGUST, root=str(tmp_path))
+    df = read_archive(months=["2026-07"], columns=['컨테이너 번호', '상태'],
+                      filters=[('상태', '=', '선적완료')], root=str(tmp_path))
+    assert df['컨테이너 번호'].tolist() == ['MSCU1234566']
+    assert list(df.columns) == ['컨테이너 번호', '상태', 'month']
+
+
+def test_write_replaces_whole_month(tmp_path):
+    write_month("2026-07", JULY, root=str(tmp_path))
+    write_month("2026-07", JULY.iloc[:1], root=str(tmp_path))
+    assert len(read_archive(root=str(tmp_path))) == 1
+
+
+def test_read_missing_month_returns_empty(tmp_path):
+    df = read_archive(months=["2020-01"], columns=['상태'], root=str(tmp_path))
+    assert df.empty and list(df.columns) == ['상태', 'month']
@@ -0,0 +1,52 @@
+"""change_feed.py(세션 사이 변경 피드) 단위 테스트.
+
+실행: 프로젝트 루트에서
+    python -m pytest
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import change_feed
+from change_feed import DELETE, RELOAD, UPSERT, ChangeFeed, net_changes
+
+
+def test_since_returns_events_after_seq_in_order():
+    feed = ChangeFeed()
+    assert feed.latest == 0 and feed.since(0) == []
+    feed.publish("현재 데이터", UPSERT, "A", {"no": "A"})
+    seq = feed.publish("현재 데이터", DELETE, "B")
+    assert feed.latest == seq == 2
+    assert [(e["seq"], e["kind"], e["key"]) for e in feed.since(0)] == [(1, UPSERT, "A"), (2, DELETE, "B")]
+    assert [e["seq"] for e in feed.since(1)] == [2]
+    assert feed.since(2) == []
+
+
+def test_since_is_none_when_never_synced_or_events_were_dropped():
+    feed = ChangeFeed(size=3)
+    for i in range(5):
+        feed.publish("현재 데이터", UPSERT, str(i))
+    assert feed.since(None) is None
+    assert feed.since(1) is None  # 2번 이벤트가 이미 밀려났다 → 다시 읽어야 한다
+    assert [e["seq"] for e in feed.since(2)] == [3, 4, 5]
+
+
+def test_net_changes_keeps_last_state_per_key():
+    feed = ChangeFeed()
+    feed.publish("현재 데이터", UPSERT, "A", "a1")
+    feed.publish("현재 데이터", UPSERT, "B", "b1")
+    feed.publish("현재 데이터", DELETE, "A")
+    feed.publish("현재 데이터", UPSERT, "A", "a2")  # 지웠다가 다시 등록
+    feed.publish("현재 데이터", DELETE, "B")
+    feed.publish("백업_2026-07-01", UPSERT, "C", "c1")  # 다른 시트는 무시
+    assert net_changes(feed.since(0), "현재 데이터") == ({"A": "a2"}, {"B"})
+
+
+def test_net_changes_needs_reload_for_its_sheet_or_all_sheets():
+    events = [{"seq": 1, "at": 0, "sheet": "현재 데이터", "kind": UPSERT, "key": "A", "record": "a"},
+              {"seq": 2, "at": 0, "sheet": "설정", "kind": RELOAD, "key": None, "record": None}]
+    assert net_changes(events, "현재 데이터") == ({"A": "a"}, set())
+    assert net_changes(events + [dict(events[1], seq=3, sheet=None)], "현재 데이터") is None
+    assert net_changes([dict(events[1], sheet="현재 데이터")], "현재 데이터") is None
+    assert change_feed.FEED_SIZE > 0
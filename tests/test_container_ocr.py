@@ -3,13 +3,21 @@
 실행: 프로젝트 루트에서
     python -m pytest
 """
+import glob
+import json
 import os
 import sys
+from io import BytesIO
+
+import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from container_ocr import (
+    attempt_key,
     compute_check_digit,
+    ocr_space_text,
+    recognize_container_numbers,
     is_valid_check_digit,
     extract_container_numbers,
 )
@@ -34,6 +42,33 @@ def test_check_digit_rejects_bad_format():
     assert not is_valid_check_digit("csqu3054383")  # 소문자
 
 
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_batch_check_digits_match_single_calls(use_numpy):
+    import random
+    import iso6346
+    rng = random.Random(0)
+    letters, digits = "ABCDEFGHIJKLMNOPQRSTUVWXYZ", "0123456789"
+    prefixes = ["".join(rng.choice(letters) for _ in range(3)) + "U" + "".join(rng.choice(digits) for _ in range(6))
+                for _ in range(300)]
+    numbers = [p + str(rng.choice([compute_check_digit(p), rng.randrange(10)])) for p in prefixes]
+    odd = ["", "CSQ3054383", "csqu3054383", "CSQU30543833", "CSQU305438٣", "ÇSQU3054383", "CSQU3O54383"]
+    assert list(iso6346.check_digit_matches(numbers + odd, use_numpy=use_numpy)) == [
+        is_valid_check_digit(n) for n in numbers + odd]
+    assert list(iso6346.compute_check_digits(prefixes + ["CSQU30543", "CSQU30543X"], use_numpy=use_numpy)) == [
+        compute_check_digit(p) for p in prefixes] + [-1, -1]
+    assert list(iso6346.check_digit_matches([], use_numpy=use_numpy)) == []
+
+
+@pytest.mark.parametrize("size", [5, 40])  # NUMPY_MIN_BATCH 아래·위 (경로는 개수로 정해진다)
+def test_batch_check_digits_treat_non_strings_as_invalid(size):
+    import iso6346
+    bad = [None, 30543830, 3.5, b"CSQU3054383"]
+    numbers = (["CSQU3054383"] * size)[:size - len(bad)] + bad
+    assert list(iso6346.check_digit_matches(numbers)) == [True] * (size - len(bad)) + [False] * len(bad)
+    prefixes = (["CSQU305438"] * size)[:size - len(bad)] + bad
+    assert list(iso6346.compute_check_digits(prefixes)) == [3] * (size - len(bad)) + [-1] * len(bad)
+
+
 # --- OCR 텍스트에서 후보 추출 ---
 def test_extract_plain_number():
     result = extract_container_numbers("CSQU3054383")
@@ -173,3 +208,29 @@ def test_derived_not_used_when_real_number_found():
 def test_extract_no_match():
     assert extract_container_numbers("아무 번호도 없는 텍스트") == []
     assert extract_container_numbers("") == []
+
+
+# --- 녹화 응답 코퍼스 (tests/ocr_corpus, benchmarks/bench_ocr_corpus.py와 같은 형식) ---
+CORPUS = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_corpus", "*.json")))
+
+
+@pytest.mark.parametrize("path", CORPUS, ids=lambda p: os.path.splitext(os.path.basename(p))[0])
+def test_corpus_case_shows_expected_number_only(path):
+    from PIL import Image
+
+    with open(path, encoding="utf-8") as f:
+        case = json.load(f)
+    calls = []
+
+    def replay(attempt, variant):
+        calls.append(attempt)
+        result = case["responses"].get(attempt_key(attempt))
+        return ocr_space_text(result) if result else ""
+
+    buf = BytesIO()
+    Image.new("RGB", (64, 48), "white").save(buf, format="JPEG")
+    candidates, _, _ = recognize_container_numbers(buf.getvalue(), "corpus", engine=replay)
+    shown = [no for no, ok in candidates if ok][:3]  # 등록 페이지가 보여 주는 후보
+    assert shown[:1] == case["expected"][:1] and set(shown) <= set(case["expected"])
+    # 녹화된 단계 안에서 끝난다(녹화 안 된 다음 단계까지 가면 호출이 늘어난 것)
+    assert all(attempt_key(a) in case["responses"] for a in calls)
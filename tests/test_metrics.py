@@ -0,0 +1,160 @@
+"""metrics.py(작업별 API 호출 계측) 단위 테스트.
+
+실행: 프로젝트 루트에서
+    python -m pytest
+"""
+import os
+import sys
+import threading
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import metrics
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class _Rerun(BaseException):
+    """st.rerun()이 던지는 제어 예외(Exception이 아님) 흉내."""
+
+
+def test_operation_counts_calls_and_logs_one_record():
+    with metrics.track_operation("선적완료"):
+        with metrics.api_call("sheets_read"):
+            pass
+        with metrics.api_call("sheets_write"):
+            pass
+        with metrics.api_call("sheets_write"):
+            pass
+    [rec] = metrics.recent_operations()
+    assert rec["op"] == "선적완료" and rec["ok"]
+    assert (rec["sheets_read"], rec["sheets_write"], rec["ocr"]) == (1, 2, 0)
+    assert rec["ms"] >= rec["api_ms"] >= 0
+
+
+def test_nested_operation_is_merged_into_outer():
+    with metrics.track_operation("위치 교체"):
+        with metrics.track_operation("선적완료"):
+            with metrics.api_call("sheets_write"):
+                pass
+        with metrics.api_call("sheets_write"):
+            pass
+    assert [(r["op"], r["sheets_write"]) for r in metrics.recent_operations()] == [("위치 교체", 2)]
+
+
+def test_tracked_marks_false_result_and_exceptions_as_failed():
+    @metrics.tracked("등록")
+    def register(ok):
+        if ok is None:
+            raise ValueError("boom")
+        return (ok, "시트 오류") if not ok else (True, "성공")
+
+    register(True)
+    register(False)
+    with pytest.raises(ValueError):
+        register(None)
+    ok_flags = [(r["ok"], r.get("error")) for r in reversed(metrics.recent_operations())]
+    assert ok_flags == [(True, None), (False, "시트 오류"), (False, "ValueError: boom")]
+
+
+def test_control_flow_exception_counts_as_success():
+    with pytest.raises(_Rerun):
+        with metrics.track_operation("등록"):
+            raise _Rerun()
+    assert metrics.recent_operations()[0]["ok"]
+
+
+def test_failed_api_call_is_still_counted():
+    with metrics.track_operation("수정"):
+        with pytest.raises(RuntimeError):
+            with metrics.api_call("sheets_write"):
+                raise RuntimeError("429")
+    rec = metrics.recent_operations()[0]
+    assert rec["sheets_write"] == 1 and rec["api_errors"] == 1
+    assert rec["ok"]  # 작업 안에서 처리한 오류는 작업 실패가 아니다
+
+
+def test_calls_outside_operations_are_unattributed():
+    with metrics.api_call("sheets_read"):
+        pass
+    assert metrics.unattributed_calls()["sheets_read"] == 1
+    assert metrics.recent_operations() == []
+
+
+def test_operations_are_separate_per_thread():
+    def worker():
+        with metrics.track_operation("페이지 로드: 관리"):
+            with metrics.api_call("sheets_read"):
+                pass
+
+    with metrics.track_operation("페이지 로드: 등록"):
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+    assert sorted((r["op"], r["sheets_read"]) for r in metrics.recent_operations()) == [
+        ("페이지 로드: 관리", 1), ("페이지 로드: 등록", 0)]
+
+
+def test_summarize_orders_by_api_calls_and_computes_percentiles():
+    records = [
+        {"op": "등록", "ms": ms, "api_ms": ms / 2, "ok": True, "sheets_read": 1, "sheets_write": 2, "ocr": 0}
+        for ms in (100, 200, 300, 400)
+    ] + [{"op": "OCR", "ms": 50.0, "api_ms": 50.0, "ok": False, "sheets_read": 0, "sheets_write": 0, "ocr": 1}]
+    first, second = metrics.summarize(records)
+    assert first["op"] == "등록" and first["count"] == 4 and first["sheets_write_avg"] == 2
+    assert (first["p50_ms"], first["p95_ms"], first["max_ms"]) == (300, 400, 400)
+    assert first["api_share"] == pytest.approx(0.5)
+    assert second["op"] == "OCR" and second["failed"] == 1
+
+
+def test_calls_in_window_counts_recent_calls_only():
+    with metrics.api_call("sheets_read"):
+        pass
+    with metrics.api_call("ocr"):
+        pass
+    assert metrics.calls_in_window(60) == {"sheets_read": 1, "sheets_write": 0, "ocr": 1}
+    assert metrics.calls_in_window(60, now=time.time() + 120)["sheets_read"] == 0
+
+
+# --- 실제 호출 지점과의 연결 ---
+def test_sheet_functions_are_counted_per_operation(fake_sheets):
+    import utils
+    fake_sheets.sheet(utils.LOG_SHEET_NAME).load([[f'2026-04-{d:02d} 09:00:00', 'x'] for d in range(1, 21)])
+    ok, _ = utils.archive_log_sheet(keep_rows=5, threshold=10)
+    assert ok
+    rec = next(r for r in metrics.recent_operations() if r["op"] == "로그 이관")
+    # 가짜 백엔드가 받은 요청 수와 작업에 합산된 호출 수가 같다
+    assert rec["sheets_read"] == fake_sheets.quota.reads
+    assert rec["sheets_write"] == fake_sheets.quota.writes
+
+
+def test_ocr_calls_in_worker_threads_count_toward_the_operation(monkeypatch):
+    import requests
+    from PIL import Image
+    from container_ocr import recognize_container_numbers
+
+    class _Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"ParsedResults": [{"ParsedText": "MSCU 123456 6"}]}
+
+    monkeypatch.setattr(requests, "post", lambda *a, **kw: _Response())
+    buf = BytesIO()
+    Image.new("RGB", (64, 48), "white").save(buf, format="JPEG")
+    with metrics.track_operation("OCR"):
+        candidates, _, _ = recognize_container_numbers(buf.getvalue(), "key")
+    assert candidates
+    rec = metrics.recent_operations()[0]
+    assert rec["ocr"] == 3  # 첫 단계(회전 3방향)에서 후보를 찾아 끝난다
+    assert metrics.unattributed_calls() == {}
@@ -0,0 +1,455 @@
+"""시트를 읽고 쓰는 utils 함수의 종단 테스트 (가짜 gspread 백엔드, 네트워크 없음).
+
+fake_sheets 픽스처(conftest.py)가 utils.connect_to_gsheet를 메모리 속
+FakeSpreadsheet로 바꾼다. 결과 시트 내용과 Sheets 호출 수를 함께 확인한다.
+
+실행: 프로젝트 루트에서
+    python -m pytest
+"""
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import utils
+from fake_gspread import FakeSpreadsheet, SheetsQuota, api_error
+
+MAIN = utils.MAIN_SHEET_NAME
+LOG = utils.LOG_SHEET_NAME
+
+
+def _container(no, pos, seal="", status="선적중"):
+    return {'컨테이너 번호': no, '출고처': '베트남', '피트수': '40', '씰 번호': seal,
+            '상태': status, '등록일시': '2026-07-01 09:00:00', '완료일시': '', '위치': pos}
+
+
+def _backup_row(no, done_at):
+    return [no, '베트남', '40', '', '선적완료', done_at, done_at, '']
+
+
+def _join_thread(name):
+    """백그라운드 작업 스레드가 끝날 때까지 기다린다."""
+    for thread in threading.enumerate():
+        if thread.name == name:
+            thread.join()
+
+
+# --- 가짜 백엔드 자체 ---
+def test_fake_append_update_delete_match_sheets_semantics(fake_sheets):
+    ws = fake_sheets.sheet(MAIN)
+    resp = ws.append_rows([['A', '1'], ['B', '2']])
+    assert resp['updates']['updatedRange'] == f"'{MAIN}'!A2:B3"
+    ws.update('B3', [["'0123"]], value_input_option='USER_ENTERED')
+    ws.delete_rows(2)
+    assert ws.col_values(1) == ['컨테이너 번호', 'B']
+    assert ws.row_values(2) == ['B', '0123']
+    assert fake_sheets.quota.reads == 2 and fake_sheets.quota.writes == 3
+
+
+def test_fake_quota_raises_429_and_recovers_after_a_minute():
+    now = [0.0]
+    quota = SheetsQuota(reads_per_minute=2, clock=lambda: now[0])
+    quota.charge("read", "get_all_values")
+    quota.charge("read", "get_all_values")
+    with pytest.raises(utils.gspread.exceptions.APIError) as exc:
+        quota.charge("read", "get_all_values")
+    assert exc.value.code == 429
+    now[0] = 60.0
+    quota.charge("read", "get_all_values")
+    assert quota.calls["get_all_values"] == 3 and quota.rejected["get_all_values"] == 1
+
+
+def test_fake_concurrent_appends_do_not_overwrite_each_other():
+    spreadsheet = FakeSpreadsheet(quota=SheetsQuota(latency=0.001, reads_per_minute=None, writes_per_minute=None))
+    ws = spreadsheet.create(MAIN, [utils.SHEET_HEADERS])
+
+    def writer(i):
+        for j in range(50):
+            ws.append_row([f"{i}-{j}"])
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(8)]
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # 스레드 전환을 잦게 해 읽기·고치기·쓰기 사이에 끼어들 틈을 넓힌다
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(switch)
+    assert len(ws.dump()) == 1 + 8 * 50
+
+
+# --- 현재 데이터 CRUD ---
+def test_add_update_delete_round_trip(fake_sheets):
+    assert utils.add_row_to_gsheet(_container('MSCU1234566', '1', seal='0123'))[0]
+    assert utils.add_rows_to_gsheet_batch([_container('ABCU1234560', '2'), _container('TGHU7654320', '3')])[0]
+    assert utils.update_row_in_gsheet(_container('ABCU1234560', '2', status='선적완료'))[0]
+    assert utils.delete_rows_by_container_nos(['TGHU7654320'])[0]
+
+    containers = utils.load_data_from_gsheet()
+    assert [c['컨테이너 번호'] for c in containers] == ['MSCU1234566', 'ABCU1234560']
+    assert containers.find('MSCU1234566')['씰 번호'] == '0123'  # 선행 0 유지
+    assert containers.find('ABCU1234560')['상태'] == '선적완료'
+    assert len(fake_sheets.sheet(LOG).get_all_values()) == 4  # 작업마다 로그 1행
+
+
+def test_load_is_shared_until_a_write(fake_sheets):
+    utils.add_row_to_gsheet(_container('MSCU1234566', '1'))
+    utils.load_data_from_gsheet()
+    reads = fake_sheets.calls['get_all_values']
+    utils.load_data_from_gsheet()
+    assert fake_sheets.calls['get_all_values'] == reads  # 같은 리비전이면 다시 읽지 않는다
+    utils.add_row_to_gsheet(_container('ABCU1234560', '2'))
+    assert len(utils.load_data_from_gsheet()) == 2
+    assert fake_sheets.calls['get_all_values'] == reads + 1
+
+
+def test_quota_error_is_reported_not_raised(fake_sheets):
+    fake_sheets.quota.limits["write"] = 0
+    ok, msg = utils.add_row_to_gsheet(_container('MSCU1234566', '1'))
+    assert not ok and '429' in msg
+    assert fake_sheets.sheet(MAIN).get_all_values() == [utils.SHEET_HEADERS]
+
+
+def test_bulk_import_writes_all_rows_with_one_append(fake_sheets):
+    df = utils.pd.DataFrame({'컨테이너 번호': ['ABCU1234560', 'MSCU1234566', 'BADU0000000'], '씰 번호': ['0123', '', '']})
+    prepared = utils.prepare_import(df, utils.ContainerList(), datetime(2026, 7, 1).date(), [])
+    records = utils.import_records(prepared, datetime(2026, 7, 1, 9, 0))
+    before = dict(fake_sheets.calls)
+    assert utils.add_rows_to_gsheet_batch(records, action="일괄 등록")[0]
+    spent = {k: v - before.get(k, 0) for k, v in fake_sheets.calls.items() if v != before.get(k, 0)}
+    assert (spent['append_rows'], spent['append_row']) == (1, 1)  # 행 추가 1회 + 로그 1회
+    assert fake_sheets.sheet(MAIN).get_all_values()[1:] == [
+        ['ABCU1234560', '미정', '40', '0123', '선적중', '2026-07-01 09:00:00', '', '1'],
+        ['MSCU1234566', '미정', '40', '', '선적중', '2026-07-01 09:00:00', '', '2']]
+    assert fake_sheets.sheet(LOG).get_all_values()[-1][1].startswith("일괄 등록: 2개")
+
+# --- 낙관적 동시성 (행 내용 버전) ---
+def test_conditional_update_rejects_stale_base_and_returns_current_row(fake_sheets):
+    utils.add_rows_to_gsheet_batch([_container('MSCU1234566', '1', seal='0123'), _container('ABCU1234560', '2')])
+    base = utils.load_data_from_gsheet().find('MSCU1234566')  # 두 기기가 같은 행을 본다
+
+    first = dict(base.copy(), **{'씰 번호': '1111'})
+    assert utils.update_row_in_gsheet(first, base=base) == (True, "성공")
+    second = dict(base.copy(), **{'위치': '3'})
+    ok, conflict = utils.update_row_in_gsheet(second, base=base)
+    assert not ok and isinstance(conflict, utils.RowConflict)
+    assert conflict.current['씰 번호'] == '1111' and conflict.current['위치'] == '1'
+    assert fake_sheets.sheet(MAIN).row_values(2)[3] == '1111'  # 먼저 저장한 값이 남는다
+
+    # 받은 행을 기준으로 다시 저장하면 통과한다(세션이 고친 dict도 같은 버전이 나온다)
+    assert utils.record_version(first) == utils.record_version(conflict.current)
+    retry = dict(conflict.current.copy(), **{'위치': '3'})
+    assert utils.update_row_in_gsheet(retry, base=conflict.current)[0]
+    assert fake_sheets.sheet(MAIN).row_values(2)[3:] == ['1111', '선적중', '2026-07-01 09:00:00', '', '3']
+
+
+def test_conditional_update_reads_only_the_hinted_row(fake_sheets):
+    utils.add_rows_to_gsheet_batch([_container('MSCU1234566', '1'), _container('ABCU1234560', '2')])
+    containers = utils.load_data_from_gsheet()
+    base = containers.find('ABCU1234560')
+    utils.update_row_in_gsheet(dict(base.copy(), **{'씰 번호': '7'}), base=base)
+    before = dict(fake_sheets.calls)
+    base = utils.load_data_from_gsheet().find('ABCU1234560')
+    assert utils.update_row_in_gsheet(dict(base.copy(), **{'씰 번호': '8'}), base=base)[0]
+    spent = {k: v - before.get(k, 0) for k, v in fake_sheets.calls.items() if v != before.get(k, 0)}
+    assert spent.get('row_values') == 1 and 'col_values' not in spent  # 행 하나만 읽고 쓴다
+
+    # 다른 기기의 삭제로 행이 밀려도 A열로 다시 찾아 맞는 행에 쓴다
+    fake_sheets.sheet(MAIN).delete_rows(2)
+    base = utils.load_data_from_gsheet().find('ABCU1234560') or base
+    utils.update_row_in_gsheet(dict(base.copy(), **{'씰 번호': '9'}), base=base)
+    assert fake_sheets.sheet(MAIN).get_all_values()[1][:4] == ['ABCU1234560', '베트남', '40', '9']
+
+
+def test_conditional_update_of_deleted_row_is_a_conflict(fake_sheets):
+    utils.add_row_to_gsheet(_container('MSCU1234566', '1'))
+    containers = utils.load_data_from_gsheet()
+    base = containers.find('MSCU1234566')
+    assert utils.delete_rows_by_container_nos(['MSCU1234566'])[0]
+    ok, conflict = utils.update_row_in_gsheet(dict(base.copy(), **{'위치': '2'}), base=base)
+    assert not ok and isinstance(conflict, utils.RowConflict) and conflict.current is None
+    utils.apply_row_conflict(containers, containers.position_of('MSCU1234566'), conflict)
+    assert containers.find('MSCU1234566') is None
+
+
+# --- 세션 사이 변경 피드 ---
+def test_other_devices_writes_reach_session_as_deltas_without_reads(fake_sheets):
+    utils.add_rows_to_gsheet_batch([_container('MSCU1234566', '1', seal='0123'), _container('ABCU1234560', '2')])
+    assert utils.sync_container_list()  # 첫 로드: 시트를 읽고 피드 번호를 잡는다
+    mine = utils.st.session_state.container_list
+
+    # 다른 기기(같은 서버 프로세스의 다른 세션)의 쓰기
+    base = utils.load_data_from_gsheet().find('MSCU1234566')
+    utils.update_row_in_gsheet(dict(base.copy(), **{'위치': '5'}), base=base)
+    utils.add_row_to_gsheet(_container('TGHU7654320', '3'))
+    utils.delete_rows_by_container_nos(['ABCU1234560'])
+
+    before = dict(fake_sheets.calls)
+    assert utils.sync_container_list()
+    assert fake_sheets.calls == before  # 시트를 다시 읽지 않는다
+    assert utils.st.session_state.container_list is mine
+    assert [c['컨테이너 번호'] for c in mine] == ['MSCU1234566', 'TGHU7654320']
+    assert mine.find('MSCU1234566')['위치'] == '5' and mine.find('MSCU1234566')['씰 번호'] == '0123'
+    assert mine.slot_occupants('5') and not mine.slot_occupants('1')  # 색인도 같이 바뀐다
+    assert not utils.sync_container_list()  # 새 이벤트가 없으면 그대로
+
+
+def _click_counter_page():
+    import streamlit as st
+
+    import utils
+    if 'container_list' not in st.session_state:
+        utils.sync_container_list()
+    utils.follow_change_feed()
+    st.session_state.setdefault('clicks', 0)
+    if st.button('저장'):
+        st.session_state.clicks += 1
+
+
+def test_pending_feed_delta_does_not_drop_a_button_click(fake_sheets):
+    utils.add_row_to_gsheet(_container('MSCU1234566', '1'))
+    at = AppTest.from_function(_click_counter_page, default_timeout=30).run()
+    at.button[0].click().run()
+    assert at.session_state.clicks == 1
+
+    utils.add_row_to_gsheet(_container('ABCU1234560', '2'))  # 다른 기기의 등록 → 피드에 델타
+    at.button[0].click().run()
+    assert not at.exception
+    assert at.session_state.clicks == 2  # 같은 런에서 델타를 받아도 클릭은 처리된다
+    assert at.session_state.container_list.find('ABCU1234560') is not None
+
+
+def test_external_change_reload_is_shared_by_sessions(fake_sheets):
+    utils.add_row_to_gsheet(_container('MSCU1234566', '1'))
+    utils.sync_container_list()
+    fake_sheets.sheet(MAIN).append_row(['ABCU1234560', '베트남', '40', '', '선적중', '', '', '2'])  # 시트를 직접 고침
+    utils.invalidate_sheet_caches()
+    utils._sheet_catalog()["feed"].publish(None, utils.change_feed.RELOAD)
+    assert utils.sync_container_list()
+    assert utils.st.session_state.container_list.find('ABCU1234560') is not None
+
+
+def test_is_external_change_ignores_own_writes_and_first_sample():
+    now = utils.drive_time_to_epoch('2026-07-01T00:00:30.000Z')
+    assert now - utils.drive_time_to_epoch('2026-07-01T00:00:00Z') == 30
+    assert not utils.is_external_change(now, last_write=now - 100, last_seen=None)  # 기준만 잡는다
+    assert not utils.is_external_change(now, last_write=now - 3, last_seen=now - 60)  # 앱이 쓴 직후
+    assert utils.is_external_change(now, last_write=now - 100, last_seen=now - 60)
+    assert not utils.is_external_change(now, last_write=now - 100, last_seen=now)  # 이미 알렸다
+
+
+# --- 연결 예열 ---
+def test_failed_warm_up_can_start_again(fake_sheets, monkeypatch):
+    monkeypatch.setattr(utils, "connect_to_gsheet", lambda: None)
+    assert utils.warm_up_connection()
+    _join_thread("gsheet-warmup")
+    state = utils.get_warmup_status()
+    assert not state["started"] and state["error"] == "Google Sheets 연결 실패"
+    assert utils.warm_up_connection()  # 다음 페이지 로드가 다시 예열한다
+    _join_thread("gsheet-warmup")
+
+
+def test_token_refresh_loop_ends_when_catalog_is_replaced(fake_sheets, monkeypatch):
+    catalog = utils._sheet_catalog()
+    replaced = dict(catalog)
+    # 잠든 사이 연결이 바뀐다(캐시 비움 등): 깨어나면 옛 클라이언트를 갱신하지 않고 끝나야 한다
+    monkeypatch.setattr(utils.time, "sleep",
+                        lambda seconds: monkeypatch.setattr(utils, "_sheet_catalog", lambda: replaced))
+    utils._keep_token_fresh(fake_sheets, catalog)
+    assert fake_sheets.client.logins == 0
+    utils._keep_token_fresh(fake_sheets, catalog)  # 이미 바뀐 카탈로그면 바로 끝난다
+
+
+# --- 로그 이관 ---
+def test_archive_log_sheet_moves_old_rows_by_quarter(fake_sheets):
+    log = fake_sheets.sheet(LOG).load(
+        [[f'2026-03-{d:02d} 09:00:00', f'q1-{d}'] for d in range(1, 11)]
+        + [[f'2026-04-{d:02d} 09:00:00', f'q2-{d}'] for d in range(1, 11)])
+
+    ok, (names, moved) = utils.archive_log_sheet(keep_rows=5, threshold=10)
+    assert ok and moved == 15 and names == '로그_2026-Q1, 로그_2026-Q2'
+    live = log.get_all_values()
+    assert [r[1] for r in live[:5]] == [f'q2-{d}' for d in range(6, 11)]
+    assert len(live) == 6 and live[5][1].startswith('로그 아카이브')  # 남긴 5행 + 이관 기록 1행
+    assert len(fake_sheets.sheet('로그_2026-Q1').get_all_values()) == 10
+    assert len(fake_sheets.sheet('로그_2026-Q2').get_all_values()) == 5
+    assert fake_sheets.calls['batch_update'] == 1  # 앞쪽 행 삭제는 한 번에
+
+    # 다음 이관: 남았던 Q2 행은 기존 분기 시트에 이어 붙이고, 이번 분기 시트는 새로 만든다
+    for i in range(10):
+        utils.log_change(f'작업 {i}')
+    ok, (names, moved) = utils.archive_log_sheet(keep_rows=5, threshold=10)
+    now = datetime.now(utils.KST)
+    current = f'로그_{now.year}-Q{(now.month - 1) // 3 + 1}'
+    assert ok and moved == 16 - 5 and names == f'로그_2026-Q2, {current}'
+    assert len(fake_sheets.sheet('로그_2026-Q2').get_all_values()) == 5 + 5
+    assert len(fake_sheets.sheet(current).get_all_values()) == 1 + 5
+
+
+def test_archive_log_sheet_below_threshold_does_nothing(fake_sheets):
+    fake_sheets.sheet(LOG).load([['2026-04-01 09:00:00', 'a']])
+    ok, msg = utils.archive_log_sheet(keep_rows=5, threshold=10)
+    assert not ok and '미만' in msg
+    assert fake_sheets.quota.writes == 0
+
+
+def test_archive_log_sheet_refuses_while_rotation_runs(fake_sheets):
+    fake_sheets.sheet(LOG).load([[f'2026-03-{d:02d} 09:00:00', f'q1-{d}'] for d in range(1, 21)])
+    utils._sheet_catalog()["rotation"]["running"] = True  # 자동 이관이나 다른 세션의 버튼이 돌고 있다
+    ok, msg = utils.archive_log_sheet(keep_rows=5, threshold=10)
+    assert not ok and '진행 중' in msg
+    assert dict(fake_sheets.calls) == {} and len(fake_sheets.sheet(LOG).dump()) == 20
+
+    utils._sheet_catalog()["rotation"]["running"] = False
+    ok, (_, moved) = utils.archive_log_sheet(keep_rows=5, threshold=10)
+    assert ok and moved == 15 and not utils._sheet_catalog()["rotation"]["running"]
+
+
+# --- 월별 백업 파생 데이터 ---
+def test_sync_month_backup_reports_archive_write_failure(fake_sheets, monkeypatch, caplog):
+    def full_disk(month_str, frame, root=None):
+        raise OSError(28, 'No space left on device')
+    monkeypatch.setattr(utils.backup_archive, 'write_month', full_disk)
+    frame = utils.pd.DataFrame([_backup_row('MSCU1234566', '2026-07-01 10:00:00')], columns=utils.SHEET_HEADERS)
+    with caplog.at_level('WARNING', logger='barcode_app.utils'):
+        stats = utils.sync_month_backup('2026-07', frame)
+    assert stats is not None  # 집계 시트는 그대로 갱신된다
+    assert fake_sheets.sheet(f"{utils.STATS_PREFIX}2026-07") is not None
+    assert any('2026-07' in r.getMessage() and 'No space' in r.getMessage() for r in caplog.records)
+
+# --- 일별 백업 보존 정리 ---
+def test_cleanup_old_daily_sheets_compacts_then_deletes(fake_sheets):
+    today = datetime.now(utils.KST).date()
+    old = today - timedelta(days=utils.DAILY_RETENTION_MONTHS * 30 + 5)
+    recent = today - timedelta(days=1)
+    old_title = f"{utils.BACKUP_PREFIX}{old:%Y-%m-%d}"
+    month_title = f"{utils.BACKUP_PREFIX}{old:%Y-%m}"
+    done_at = f"{old:%Y-%m-%d} 10:00:00"
+    fake_sheets.create(old_title, [utils.SHEET_HEADERS, _backup_row('MSCU1234566', done_at),
+                                   _backup_row('ABCU1234560', done_at)])
+    fake_sheets.create(month_title, [utils.SHEET_HEADERS, _backup_row('MSCU1234566', done_at)])
+    fake_sheets.create(f"{utils.BACKUP_PREFIX}{recent:%Y-%m-%d}", [utils.SHEET_HEADERS])
+
+    ok, deleted = utils.cleanup_old_daily_sheets()
+    assert ok and deleted == [old_title]
+    assert fake_sheets.sheet(old_title) is None
+    assert f"{utils.BACKUP_PREFIX}{recent:%Y-%m-%d}" in fake_sheets.titles()
+    # 월별 시트에 없던 행만 옮겨졌다
+    assert [r[0] for r in fake_sheets.sheet(month_title).get_all_values()[1:]] == ['MSCU1234566', 'ABCU1234560']
+    assert fake_sheets.sheet(f"{utils.STATS_PREFIX}{old:%Y-%m}") is not None
+    assert fake_sheets.calls['batch_update'] == 1 and fake_sheets.calls['values_batch_get'] == 1
+
+
+def test_cleanup_without_expired_sheets_only_reads_catalog(fake_sheets):
+    ok, deleted = utils.cleanup_old_daily_sheets()
+    assert ok and deleted == []
+    assert dict(fake_sheets.calls) == {'worksheets': 1}
+
+
+def test_cleanup_refuses_while_retention_runs(fake_sheets):
+    utils._sheet_catalog()["retention"]["running"] = True  # 자동 정리가 돌고 있다
+    ok, msg = utils.cleanup_old_daily_sheets()
+    assert not ok and '진행 중' in msg and dict(fake_sheets.calls) == {}
+    utils._sheet_catalog()["retention"]["running"] = False
+    assert utils.cleanup_old_daily_sheets() == (True, [])
+    assert not utils._sheet_catalog()["retention"]["running"]
+
+
+def _run_retention_and_wait():
+    started = utils.maybe_run_retention()
+    _join_thread("backup-retention")
+    return started
+
+
+def test_failed_retention_is_retried_after_backoff(fake_sheets, monkeypatch):
+    results = [(False, "Quota exceeded (429)"), (True, [])]
+    monkeypatch.setattr(utils, "_cleanup_old_daily_sheets", lambda months, compact: results.pop(0))
+    state = utils._sheet_catalog()["retention"]
+
+    assert _run_retention_and_wait()
+    assert state["last_day"] is None and state["retry_at"] is not None and not state["last"][1]
+    assert not utils.maybe_run_retention()  # 기다리는 동안은 다시 시작하지 않는다
+
+    state["retry_at"] = 0  # 기다림이 끝났다
+    assert _run_retention_and_wait()
+    assert state["last_day"] == datetime.now(utils.KST).date() and state["retry_at"] is None
+    assert not utils.maybe_run_retention() and results == []
+
+
+# --- 백업 무결성 점검 ---
+def test_backup_integrity_check_and_repair_use_batched_calls(fake_sheets):
+    day = datetime.now(utils.KST).date() - timedelta(days=1)
+    daily, monthly = f"{utils.BACKUP_PREFIX}{day:%Y-%m-%d}", f"{utils.BACKUP_PREFIX}{day:%Y-%m}"
+    done_at = f"{day:%Y-%m-%d} 10:00:00"
+    moved = _backup_row('ABCU1234560', done_at)
+    moved[1] = '태국'
+    fake_sheets.create(daily, [utils.SHEET_HEADERS, _backup_row('MSCU1234566', done_at), moved,
+                               _backup_row('TGHU7654320', done_at)])
+    fake_sheets.create(monthly, [utils.SHEET_HEADERS, _backup_row('MSCU1234566', done_at),
+                                 _backup_row('ABCU1234560', done_at), _backup_row('ABCU1234560', done_at)])
+
+    ok, result = utils.check_backup_integrity()
+    assert ok and result['sheets'] == 2 and result['rows'] == 6
+    assert sorted(result['issues']['유형'].astype(str)) == ['불일치', '월별 누락', '중복']
+    assert fake_sheets.calls['values_batch_get'] == 1 and fake_sheets.quota.writes == 0
+
+    fake_sheets.quota.reset()
+    ok, titles = utils.apply_backup_repair_plan(result['plan'])
+    assert ok and titles == [monthly]
+    assert fake_sheets.calls['values_batch_update'] == 1 and fake_sheets.calls['clear'] == 0
+    assert [r[:2] for r in fake_sheets.sheet(monthly).get_all_values()[1:]] == [
+        ['MSCU1234566', '베트남'], ['ABCU1234560', '태국'], ['TGHU7654320', '베트남']]
+    assert fake_sheets.sheet(f"{utils.STATS_PREFIX}{day:%Y-%m}") is not None
+
+    ok, result = utils.check_backup_integrity()
+    assert ok and result['issues'].empty and result['plan'] == []
+
+
+def test_backup_repair_refuses_plan_when_sheets_changed_after_scan(fake_sheets):
+    day = datetime.now(utils.KST).date() - timedelta(days=1)
+    daily, monthly = f"{utils.BACKUP_PREFIX}{day:%Y-%m-%d}", f"{utils.BACKUP_PREFIX}{day:%Y-%m}"
+    done_at = f"{day:%Y-%m-%d} 10:00:00"
+    fake_sheets.create(daily, [utils.SHEET_HEADERS, _backup_row('MSCU1234566', done_at),
+                               _backup_row('ABCU1234560', done_at)])
+    fake_sheets.create(monthly, [utils.SHEET_HEADERS, _backup_row('MSCU1234566', done_at)])
+    ok, result = utils.check_backup_integrity()
+    assert ok and [item['sheet'] for item in result['plan']] == [monthly]
+
+    fake_sheets.sheet(monthly).append_rows([_backup_row('TGHU7654320', done_at)])  # 점검 뒤 다른 기기의 백업
+    fake_sheets.quota.reset()
+    ok, msg = utils.apply_backup_repair_plan(result['plan'])
+    assert not ok and monthly in msg and '다시 점검' in msg
+    assert fake_sheets.quota.writes == 0 and fake_sheets.calls['values_batch_get'] == 1
+    assert [r[0] for r in fake_sheets.sheet(monthly).dump()[1:]] == ['MSCU1234566', 'TGHU7654320']
+
+    utils.invalidate_sheet_caches(monthly)  # 앱 밖에서 고친 것이므로 캐시를 직접 비운다
+    ok, result = utils.check_backup_integrity()
+    assert utils.apply_backup_repair_plan(result['plan']) == (True, [monthly])
+    assert [r[0] for r in fake_sheets.sheet(monthly).dump()[1:]] == ['MSCU1234566', 'TGHU7654320', 'ABCU1234560']
+    stats = fake_sheets.sheet(f"{utils.STATS_PREFIX}{day:%Y-%m}").dump()
+    assert sum(int(r[utils.STATS_HEADERS.index('건수')]) for r in stats[1:] if r[0]) == 3  # 쓴 뒤 다시 읽은 값으로 집계
+
+
+def test_backup_repair_grows_grid_and_blanks_leftover_rows(fake_sheets):
+    fake_sheets.create("백업_2026-03-02", [utils.SHEET_HEADERS] + [
+        _backup_row(no, '2026-03-02 10:00:00') for no in ('MSCU1234566', 'ABCU1234560', 'TGHU7654320')])
+    fake_sheets.create("백업_2026-03", [utils.SHEET_HEADERS, _backup_row('MSCU1234566', '2026-03-02 10:00:00')])
+    fake_sheets.create("백업_2026-03-01", [utils.SHEET_HEADERS] + [_backup_row('MSCU1234566', '2026-03-01 10:00:00')] * 3)
+    values = utils.load_all_backup_values(batch=2)
+    assert len(values) == 3 and fake_sheets.calls['values_batch_get'] == 2
+
+    plan = utils.backup_repair_plan(values)
+    assert [item['sheet'] for item in plan] == ["백업_2026-03", "백업_2026-03-01"]
+    ok, _ = utils.apply_backup_repair_plan(plan)
+    assert ok and fake_sheets.calls['batch_update'] == 1  # 월별 시트 격자(2행)를 4행으로 늘린다
+    assert len(fake_sheets.sheet("백업_2026-03").get_all_values()) == 4
+    assert fake_sheets.sheet("백업_2026-03-01").get_all_values()[1:] == [_backup_row('MSCU1234566', '2026-03-01 10:00:00')]
+
+
+def test_api_error_helper_builds_gspread_error():
+    err = api_error(429, 'Quota exceeded', 'RESOURCE_EXHAUSTED')
+    assert isinstance(err, utils.gspread.exceptions.APIError) and err.code == 429
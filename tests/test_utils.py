@@ -5,12 +5,13 @@
 """
 import os
 import sys
-from datetime import date
+from datetime import date, datetime, timedelta
 
 # 프로젝트 루트를 import 경로에 추가 (어떤 실행 방식에서도 utils를 찾도록)
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import pandas as pd
+import pytest
 
 from container_ocr import is_valid_check_digit
 from utils import (
@@ -23,8 +24,49 @@ from utils import (
     merge_backup_frames,
     SHEET_HEADERS,
     filter_backup_sheets,
+    expired_daily_sheets,
+    rows_missing_from_month,
+    scan_backup_integrity,
+    backup_repair_plan,
+    ContainerRecord,
+    token_refresh_delay,
+    ContainerList,
+    main_values_to_records,
     make_zpl,
     find_row_by_container_no,
+    compute_backup_stats,
+    stats_values_to_frame,
+    STATS_HEADERS,
+    format_thousands,
+    build_stats_tables,
+    filter_stats_days,
+    cached_stats_view,
+    sheet_dates,
+    sheet_ints,
+    LOG_HEADERS,
+    classify_log_action,
+    extract_container_nos,
+    make_log_row,
+    log_values_to_frame,
+    build_log_index,
+    lookup_log_rows,
+    log_archive_partitions,
+    log_partitions_for_range,
+    load_log_history,
+    filter_log_positions,
+    count_log_types,
+    export_log_csv,
+    split_log_rows_by_quarter,
+    last_row_from_append,
+    get_sheets_values_cached,
+    get_sheet_values_cached,
+    invalidate_sheet_caches,
+    list_backup_sheets,
+    sheet_revision,
+    container_no_errors,
+    read_import_table,
+    prepare_import,
+    import_records,
 )
 
 
@@ -93,6 +135,55 @@ def test_container_no_error_mentions_expected_check_digit():
     assert "'0'" in msg  # 기대값 0을 알려줘야 한다
 
 
+
+# --- 일괄 등록 (열 단위 검사) ---
+def test_container_no_errors_matches_single_checks():
+    nos = ["ABCU1234560", "", "AB1234560", "ABCD1234560", "ABCU1234561", "MSCU1234566", "ABCU12345٠0"]
+    assert container_no_errors(nos).tolist() == [container_no_error(n) for n in nos[:6]] + [
+        container_no_error("AB1234560")]  # ASCII가 아닌 숫자는 형식 오류
+
+
+def test_read_import_table_maps_headers_and_reads_cp949():
+    csv = "Container No,출고처,씰,SIZE\nabcu 123456-0,베트남,0123,40\n,,,\n".encode('cp949')
+    df = read_import_table("booking.csv", csv)
+    assert list(df.columns) == ['컨테이너 번호', '출고처', '피트수', '씰 번호', '위치']
+    assert df.to_dict('records') == [{'컨테이너 번호': 'abcu 123456-0', '출고처': '베트남', '피트수': '40',
+                                      '씰 번호': '0123', '위치': ''}]  # 빈 줄은 버리고 씰 0은 지킨다
+    with pytest.raises(ValueError):
+        read_import_table("booking.csv", "출고처\n베트남\n".encode('utf-8'))
+
+
+def test_prepare_import_flags_first_error_and_assigns_free_slots():
+    existing = ContainerList([
+        {'컨테이너 번호': 'MSCU1234566', '등록일시': pd.Timestamp("2026-07-30 08:00"), '상태': '선적중', '위치': '1'},
+    ])
+    df = pd.DataFrame({
+        '컨테이너 번호': ['abcu 123456-0', 'ABCU1234560', 'MSCU1234566', 'TGHU7654320', 'ABCU1234561', 'CSQU3054383'],
+        '출고처': ['', '베트남', '베트남', '화성', '베트남', '베트남'],
+        '피트수': ['40ft', '40', '40', '20', '40', '20'],
+        '위치': ['', '', '', '', '', '3'],
+    })
+    out = prepare_import(df, existing, TODAY, ['베트남'], positions=('1', '2', '3'))
+    errors = out['오류'].tolist()
+    assert errors[0] is None and out.loc[0, '컨테이너 번호'] == 'ABCU1234560' and out.loc[0, '출고처'] == '미정'
+    assert "파일 안" in errors[1] and "오늘 이미" in errors[2] and "설정 목록" in errors[3]
+    assert "체크디지트" in errors[4] and errors[5] is None
+    # 적어 둔 위치 3은 그대로, 위치를 안 적은 행은 남은 빈 위치(2)를 받는다(1은 사용 중)
+    assert out.loc[[0, 5], '위치'].tolist() == ['2', '3'] and out.loc[0, '피트수'] == '40'
+
+    [first, second] = import_records(out, datetime(2026, 7, 30, 9, 0))
+    assert first['상태'] == '선적중' and first['등록일시'] == pd.Timestamp("2026-07-30 09:00")
+    assert second['컨테이너 번호'] == 'CSQU3054383' and second['위치'] == '3'
+
+
+def test_prepare_import_rejects_taken_or_repeated_slots_and_runs_out_quietly():
+    existing = ContainerList([{'컨테이너 번호': 'MSCU1234566', '등록일시': None, '상태': '선적중', '위치': '1'}])
+    df = pd.DataFrame({'컨테이너 번호': ['ABCU1234560', 'TGHU7654320', 'CSQU3054383', 'MSKU1234565'],
+                       '위치': ['1', '2', '2', '']})
+    out = prepare_import(df, existing, TODAY, [], positions=('1', '2'))
+    assert "이미 선적중" in out.loc[0, '오류'] and out.loc[1, '오류'] is None and "두 번" in out.loc[2, '오류']
+    assert out.loc[3, '오류'] is None and out.loc[3, '위치'] == ''  # 빈 위치가 없으면 위치 없이 등록
+
 # --- find_same_day_duplicate ---
 TODAY = date(2026, 7, 30)
 
@@ -223,6 +314,111 @@ def test_overlapping_reports_each_number_once():
     assert overlapping_container_nos(existing, new) == ['ABCU1234560']
 
 
+# --- compute_backup_stats / stats_values_to_frame (통계 집계 시트) ---
+def test_backup_stats_groups_completed_by_day_and_destination():
+    values = BACKUP_VALUES + [
+        ['TGHU7654320', '베트남', '20', '', '선적완료', '2026-07-30 08:00:00', '2026-07-30 15:00:00', '4'],
+        ['CSQU3054383', '베트남', '40', '', '선적중', '2026-07-30 08:00:00', '', '5'],  # 선적중은 제외
+    ]
+    stats = compute_backup_stats(backup_values_to_frame(values))
+    assert list(stats.columns) == STATS_HEADERS
+    row = stats[stats['출고처'] == '베트남'].iloc[0]
+    assert (row['완료일'], row['건수'], row['피트수']) == ('2026-07-30', 2, 60)
+    assert stats['건수'].sum() == 3
+
+
+def test_backup_stats_keeps_rows_without_completion_date():
+    # 완료일시가 비어도 출고처 합계에는 들어가야 한다 (완료일 '')
+    values = [SHEET_HEADERS, ['ABCU1234560', '박닌', '40', '', '선적완료', '', '', '1']]
+    stats = compute_backup_stats(backup_values_to_frame(values))
+    assert stats.iloc[0]['완료일'] == ''
+    assert stats.iloc[0]['피트수'] == 40
+
+
+def test_backup_stats_empty_when_nothing_completed():
+    assert compute_backup_stats(backup_values_to_frame([SHEET_HEADERS])).empty
+
+
+def test_stats_values_round_trip():
+    stats = compute_backup_stats(backup_values_to_frame(BACKUP_VALUES))
+    values = [STATS_HEADERS] + [[str(v) for v in r] for r in stats.values.tolist()] + [['', '', '', '']]
+    back = stats_values_to_frame(values)
+    assert len(back) == len(stats)  # 빈 꼬리 행은 버린다
+    assert back['피트수'].sum() == 60
+    assert back['건수'].dtype.kind == 'i'
+
+
+def test_sheet_dates_uses_prefix_and_falls_back_for_other_formats():
+    days = sheet_dates(pd.Series(['2026-07-30 15:00:00', '2026/07/31 08:00', '', None]))
+    assert days.iloc[0] == pd.Timestamp('2026-07-30')
+    assert days.iloc[1] == pd.Timestamp('2026-07-31')  # 형식이 달라도 추론으로 살린다
+    assert days.iloc[2:].isna().all()
+
+
+def test_sheet_ints_non_numeric_is_zero():
+    assert sheet_ints(pd.Series(['40', '20', 'x', '', None, '40'])).tolist() == [40, 20, 0, 0, 0, 40]
+
+
+# --- format_thousands / build_stats_tables (통계 화면용 표) ---
+def test_format_thousands_vectorized_with_zero_marker():
+    assert format_thousands(pd.Series([0, 999, 1000, 1234567])).tolist() == ['0', '999', '1,000', '1,234,567']
+    table = format_thousands(pd.DataFrame({'a': [0, 12000]}, index=['x', 'y']), zero='-')
+    assert table.loc['x', 'a'] == '-' and table.loc['y', 'a'] == '12,000'
+
+
+STATS_SAMPLE = pd.DataFrame({
+    '완료일': ['2026-07-01', '2026-07-12', '2026-07-12', ''],
+    '출고처': ['베트남', '박닌', '베트남', '베트남'],
+    '건수': [1, 30, 2, 1],
+    '피트수': [40, 1200, 60, 20],
+})
+
+
+def test_build_stats_tables_daily_cross():
+    view = build_stats_tables(STATS_SAMPLE)
+    assert (view['completed'], view['total_ft']) == (34, 1320)
+    assert list(view['dest'].index) == ['박닌', '베트남']  # 피트수 내림차순
+    assert view['dest'].loc['박닌', '전체 피트수(ft)'] == '1,200'
+    cross = view['cross']
+    assert list(cross.columns) == ['7/1', '7/12', '합계']  # M/D, 앞자리 0 없음
+    assert cross.loc['박닌', '7/1'] == '-'
+    assert cross.loc['합계', '합계'] == '1,300'  # 완료일 없는 20ft는 일자별 표에서 빠진다
+    assert view['trend'] is None
+
+
+def test_build_stats_tables_range_trend_and_empty():
+    view = build_stats_tables(STATS_SAMPLE.assign(월=['2026-06', '2026-07', '2026-07', '2026-07']))
+    assert view['cross'] is None
+    assert view['monthly_ft'].to_dict() == {'2026-06': 40, '2026-07': 1280}
+    assert view['trend'].loc['합계', '합계'] == '1,320'
+    assert build_stats_tables(pd.DataFrame(columns=STATS_HEADERS)) is None
+
+
+def test_filter_stats_days_keeps_inclusive_day_range():
+    assert filter_stats_days(STATS_SAMPLE) is STATS_SAMPLE  # 날짜를 고르지 않으면 그대로
+    picked = filter_stats_days(STATS_SAMPLE, '2026-07-02', '2026-07-12')
+    assert picked['완료일'].tolist() == ['2026-07-12', '2026-07-12'] and picked['피트수'].sum() == 1260
+    assert filter_stats_days(STATS_SAMPLE, end_day='2026-07-01')['피트수'].tolist() == [40]  # 완료일 없는 행은 빠진다
+
+
+def test_cached_stats_view_does_not_memoize_empty_or_failed_loads():
+    loads = []
+
+    def flaky():  # 첫 읽기는 일시 오류로 빈 집계, 다음 읽기는 정상
+        loads.append(1)
+        return pd.DataFrame(columns=STATS_HEADERS) if len(loads) == 1 else STATS_SAMPLE
+
+    key = ("월별", "cache-test")
+    assert cached_stats_view(key, (0, 1), flaky) is None
+    assert cached_stats_view(key, (0, 1), flaky)['completed'] == 34  # 같은 리비전이어도 다시 읽는다
+    assert cached_stats_view(key, (0, 1), flaky)['completed'] == 34 and len(loads) == 2
+
+    def broken():
+        raise RuntimeError("읽기 실패")
+    with pytest.raises(RuntimeError):
+        cached_stats_view(("월별", "cache-fail"), (0, 1), broken)
+    assert cached_stats_view(("월별", "cache-fail"), (0, 1), flaky)['completed'] == 34
+
 # --- filter_backup_sheets ---
 def test_filter_daily_returns_only_daily_sorted_desc():
     titles = [
@@ -251,6 +447,181 @@ def test_filter_empty_input():
     assert filter_backup_sheets([], "daily") == []
 
 
+# --- 일별 백업 보존 정책 ---
+def test_expired_daily_sheets_only_old_daily_oldest_first():
+    titles = ["백업_2026-07-10", "백업_2026-04-01", "백업_2026-03-15", "백업_2026-03", "백업_2026-02-3x", "현재 데이터"]
+    assert expired_daily_sheets(titles, date(2026, 7, 15), months=3) == ["백업_2026-03-15", "백업_2026-04-01"]
+
+
+def test_rows_missing_from_month_keeps_only_daily_only_rows():
+    daily = [SHEET_HEADERS, ['ABCU1234560', '베트남', '40', '', '선적완료', '', '', ''],
+             ['MSCU7654321', '베트남', '20', '', '선적완료', '', '', '']]
+    monthly = [SHEET_HEADERS, ['ABCU1234560', '베트남', '40', '', '선적완료', '', '', '']]
+    assert [r[0] for r in rows_missing_from_month(daily, monthly)] == ['MSCU7654321']
+    assert len(rows_missing_from_month(daily, [])) == 2  # 월별 시트가 없으면 전부
+    assert rows_missing_from_month([SHEET_HEADERS], monthly) == []
+
+
+
+# --- 백업 무결성 점검 ---
+def _done(no, done_at, dest='베트남'):
+    return [no, dest, '40', '0123', '선적완료', '2026-07-01 09:00:00', done_at, '']
+
+
+def _drifted_backups():
+    return {
+        "백업_2026-07-01": [SHEET_HEADERS, _done('MSCU1234566', '2026-07-01 10:00:00'),
+                           _done('ABCU1234560', '2026-07-01 11:00:00')],
+        # 같은 번호가 다음 날 다시 백업됐다 → 월별은 이 행을 가져야 한다
+        "백업_2026-07-02": [SHEET_HEADERS, _done('ABCU1234560', '2026-07-02 11:00:00', '태국'),
+                           _done('TGHU7654320', '2026-07-02 12:00:00'), _done('TGHU7654320', '2026-07-02 12:00:00')],
+        "백업_2026-07": [SHEET_HEADERS, _done('MSCU1234566', '2026-07-01 10:00:00'),
+                        _done('ABCU1234560', '2026-07-01 11:00:00'),   # 옛 기록 (불일치)
+                        _done('ABCU1234561', '2026-07-03 09:00:00'),   # 월별에만, 체크디지트 틀림
+                        _done('MSCU7654321', '2026-01-03 09:00:00')],  # 일별이 이미 정리된 날짜
+    }
+
+
+def test_scan_backup_integrity_reports_each_kind_of_drift():
+    issues = scan_backup_integrity(_drifted_backups(), date(2026, 7, 10), months=3)
+    found = {(r['유형'], r['시트'], r['컨테이너 번호']) for r in issues.to_dict('records')}
+    assert found == {
+        ('불일치', '백업_2026-07', 'ABCU1234560'),
+        ('월별 누락', '백업_2026-07', 'TGHU7654320'),
+        ('일별 누락', '백업_2026-07', 'ABCU1234561'),
+        ('중복', '백업_2026-07-02', 'TGHU7654320'),
+        ('체크디지트', '백업_2026-07', 'ABCU1234561'),
+        ('체크디지트', '백업_2026-07', 'MSCU7654321'),
+    }
+    mismatch = issues[issues['유형'] == '불일치'].iloc[0]['내용']
+    assert '백업_2026-07-02' in mismatch and '출고처' in mismatch and '완료일시' in mismatch
+    assert list(issues['유형'].astype(str).unique()) == ['불일치', '월별 누락', '일별 누락', '중복', '체크디지트']
+
+
+def test_scan_backup_integrity_clean_when_monthly_matches_daily():
+    backups = _drifted_backups()
+    plan = backup_repair_plan(backups)
+    for item in plan:
+        backups[item['sheet']] = [[str(v).lstrip("'") for v in row] for row in item['rows']]
+    issues = scan_backup_integrity(backups, date(2026, 7, 10), months=3)
+    # 고칠 수 없는 항목(월별에만 있는 행, 체크디지트)만 남는다
+    assert set(issues['유형'].astype(str)) == {'일별 누락', '체크디지트'}
+    assert backup_repair_plan(backups) == []
+
+
+def test_backup_repair_plan_rewrites_monthly_from_daily_and_dedupes():
+    plan = {item['sheet']: item for item in backup_repair_plan(_drifted_backups())}
+    assert sorted(plan) == ['백업_2026-07', '백업_2026-07-02']
+    monthly = plan['백업_2026-07']
+    assert monthly['rows'][0] == SHEET_HEADERS and monthly['old_size'] == (5, 8)
+    # 불일치 행은 자리를 지킨 채 최신 일별 행으로, 빠진 행은 뒤에, 월별에만 있는 행은 그대로
+    assert [(r[0], r[1]) for r in monthly['rows'][1:]] == [
+        ('MSCU1234566', '베트남'), ('ABCU1234560', '태국'), ('ABCU1234561', '베트남'),
+        ('MSCU7654321', '베트남'), ('TGHU7654320', '베트남')]
+    assert monthly['rows'][2][3] == "'0123"  # 다시 쓸 때 선행 0 유지
+    assert '불일치 1행' in monthly['reason'] and '누락 1행' in monthly['reason']
+    assert [r[0] for r in plan['백업_2026-07-02']['rows'][1:]] == ['ABCU1234560', 'TGHU7654320']
+
+
+def test_backup_repair_plan_fills_header_only_monthly_sheet():
+    backups = {"백업_2026-08-01": [SHEET_HEADERS, _done('MSCU1234566', '2026-08-01 10:00:00')],
+               "백업_2026-08": [SHEET_HEADERS]}
+    (item,) = backup_repair_plan(backups)
+    assert item['sheet'] == '백업_2026-08' and [r[0] for r in item['rows'][1:]] == ['MSCU1234566']
+    assert scan_backup_integrity({}, date(2026, 8, 2)).empty
+
+# --- 컨테이너 목록 메모리 구조 ---
+def test_main_values_to_records_parses_and_clears_inconsistent_completion():
+    values = [SHEET_HEADERS[:-1],  # '위치' 열 없는 레거시 시트
+              ['ABCU1234560', '베트남', '40', '', '선적중', '2026-07-01 09:00:00', '2026-07-01 10:00:00']]
+    (rec,) = main_values_to_records(values)
+    assert rec['등록일시'] == pd.Timestamp('2026-07-01 09:00:00')
+    assert pd.isna(rec['완료일시']) and pd.isna(rec.get('씰 번호')) and pd.isna(rec['위치'])
+    assert main_values_to_records([SHEET_HEADERS]) == ()
+
+
+def test_container_record_is_read_only_and_copies_to_dict():
+    rec = ContainerRecord(['ABCU1234560', '베트남', '40', '', '선적중', None, None, '1'])
+    assert rec.get('위치') == '1' and rec.get('없는 열', 'x') == 'x' and dict(rec)['출고처'] == '베트남'
+    updated = rec.copy()
+    updated['위치'] = '2'
+    assert isinstance(updated, dict) and rec['위치'] == '1'
+    with pytest.raises(TypeError):
+        rec['위치'] = '3'
+
+
+def test_container_list_shares_snapshot_until_changed():
+    base = main_values_to_records([SHEET_HEADERS, ['ABCU1234560'] + [''] * 7, ['MSCU7654321'] + [''] * 7])
+    a, b = ContainerList(base), ContainerList(base)
+    assert a.is_shared and a[0] is b[0]
+    a.append({'컨테이너 번호': 'TGHU0000001'})
+    a.pop(0)
+    assert not a.is_shared and b.is_shared
+    assert [c.get('컨테이너 번호') for c in a] == ['MSCU7654321', 'TGHU0000001']
+    assert len(b) == 2 and a[0] is b[1]  # 바뀌지 않은 레코드는 계속 공유
+
+
+def test_container_list_index_follows_add_edit_complete_undo():
+    base = main_values_to_records([
+        SHEET_HEADERS,
+        ['ABCU1234560', '베트남', '40', '', '선적중', '2026-07-01 09:00:00', '', '1'],
+        ['MSCU7654321', '베트남', '20', '', '선적중', '2026-07-02 09:00:00', '', '복원'],
+    ])
+    lst = ContainerList(base)
+    assert lst.slot_occupants('1')[0]['컨테이너 번호'] == 'ABCU1234560'
+    assert lst.occupied_slots() == {'1', '복원'}
+    assert lst.occupied_slots(exclude='ABCU1234560') == {'복원'}
+
+    # 수정: 1 → 2
+    moved = lst.find('abcu1234560 ').copy()
+    moved['위치'] = '2'
+    lst[lst.position_of('ABCU1234560')] = moved
+    assert lst.slot_occupants('1') == [] and lst.slot_occupants('2') == [moved]
+
+    # 등록
+    lst.append({'컨테이너 번호': 'TGHU0000001', '상태': '선적중', '위치': '1',
+                '등록일시': pd.Timestamp('2026-07-02 10:00:00')})
+    assert find_same_day_duplicate(lst, 'TGHU0000001', date(2026, 7, 2))['위치'] == '1'
+    assert find_same_day_duplicate(lst, 'TGHU0000001', date(2026, 7, 3)) is None
+
+    # 선적완료(목록에서 제거) → 되돌리기(다시 추가)
+    done = lst.remove_no('TGHU0000001')
+    assert lst.find('TGHU0000001') is None and '1' not in lst.occupied_slots()
+    lst.append(done)
+    assert lst.slot_occupants('1') == [done]
+
+
+def test_container_list_positions_stay_correct_through_edits():
+    def rec(i):
+        return {'컨테이너 번호': f'ABCU{i:07d}', '상태': '선적중', '위치': ''}
+
+    lst = ContainerList([rec(i) for i in range(6)])
+
+    def check():
+        assert all(lst.position_of(c['컨테이너 번호']) == i for i, c in enumerate(lst))
+
+    check()
+    edits = [
+        lambda: lst.append(rec(6)),      # 끝에 붙이기: 표를 그대로 고친다
+        lambda: lst.__setitem__(2, rec(20)),  # 제자리 대입
+        lambda: lst.pop(),               # 끝에서 빼기
+        lambda: lst.__delitem__(0),      # 중간 삭제: 표를 비웠다가 다시 만든다
+        lambda: lst.insert(1, rec(30)),  # 중간 삽입
+    ]
+    for edit in edits:
+        edit()
+        check()
+    assert lst.position_of('ABCU0000000') is None and lst.position_of('ABCU0000006') is None
+
+
+def test_container_list_remove_nos_in_one_pass():
+    lst = ContainerList([{'컨테이너 번호': no, '상태': '선적중', '위치': pos}
+                         for no, pos in (('ABCU1234560', '1'), ('MSCU7654321', '2'), ('TGHU0000001', '3'))])
+    removed = lst.remove_nos(['mscu7654321', 'ABCU1234560 ', 'XXXU0000000'])
+    assert {c['컨테이너 번호'] for c in removed} == {'ABCU1234560', 'MSCU7654321'}
+    assert [c['컨테이너 번호'] for c in lst] == ['TGHU0000001'] and lst.position_of('TGHU0000001') == 0
+    assert lst.occupied_slots() == {'3'} and lst.remove_nos(['ABCU1234560']) == []
+
 # --- make_zpl ---
 def test_make_zpl_embeds_container_no():
     zpl = make_zpl("ABCD1234567")
@@ -305,3 +676,226 @@ def test_find_row_empty_query_returns_none():
     ws = FakeWorksheet(["컨테이너 번호", "ABCD1111111"])
     assert find_row_by_container_no(ws, "") is None
     assert find_row_by_container_no(ws, None) is None
+
+
+# --- get_sheets_values_cached (여러 시트 batch 읽기) ---
+class FakeBatchSpreadsheet:
+    """worksheets()/values_batch_get()만 흉내내는 최소 스프레드시트 스텁."""
+    class _Ws:
+        def __init__(self, title, values, reads):
+            self.title = title
+            self.row_count = 1000
+            self._values = values
+            self._reads = reads
+
+        def get_all_values(self):
+            self._reads.append(self.title)
+            return self._values
+
+    def __init__(self, sheets):
+        self._sheets = sheets
+        self.batch_calls = []
+        self.list_calls = 0
+        self.reads = []
+
+    def worksheets(self):
+        self.list_calls += 1
+        return [self._Ws(t, v, self.reads) for t, v in self._sheets.items()]
+
+    def values_batch_get(self, ranges):
+        self.batch_calls.append(list(ranges))
+        titles = [r.strip("'") for r in ranges]
+        return {'valueRanges': [{'range': r, 'values': self._sheets[t]} for r, t in zip(ranges, titles)]}
+
+
+def test_sheets_values_fetched_in_one_batch_and_cached():
+    invalidate_sheet_caches()
+    ss = FakeBatchSpreadsheet({
+        "통계_2026-06": [STATS_HEADERS, ['2026-06-01', '베트남', '1']],  # 끝 칸이 잘린 행
+        "통계_2026-07": [STATS_HEADERS],
+    })
+    got = get_sheets_values_cached(["통계_2026-06", "통계_2026-07", "통계_2026-08"], ss)
+    assert set(got) == {"통계_2026-06", "통계_2026-07"}  # 없는 시트는 빠진다
+    assert got["통계_2026-06"][1] == ['2026-06-01', '베트남', '1', '']  # get_all_values 모양으로 채움
+    assert len(ss.batch_calls) == 1
+    get_sheets_values_cached(["통계_2026-06"], ss)
+    assert len(ss.batch_calls) == 1  # 캐시 재사용
+    invalidate_sheet_caches()
+
+
+# --- 시트 카탈로그 ---
+def test_catalog_lists_once_and_invalidates_per_sheet():
+    import streamlit as st
+    invalidate_sheet_caches()
+    ss = FakeBatchSpreadsheet({
+        "백업_2026-07": [SHEET_HEADERS],
+        "백업_2026-06": [SHEET_HEADERS, ['MSCU1234566'] + [''] * 7],
+        "백업_2026-07-01": [SHEET_HEADERS],
+        "현재 데이터": [SHEET_HEADERS],
+    })
+    assert [s['date'] for s in list_backup_sheets("monthly", ss)] == ['2026-07', '2026-06']
+    get_sheet_values_cached("백업_2026-06", ss)
+    get_sheet_values_cached("백업_2026-07", ss)
+    info = {s['title']: s for s in list_backup_sheets("monthly", ss)}
+    assert info["백업_2026-06"]['rows'] == 1 and info["백업_2026-06"]['grid_rows'] == 1000
+
+    # 다른 세션(세션 캐시가 빈 상태)도 목록은 다시 읽지 않는다
+    st.session_state.clear()
+    list_backup_sheets("daily", ss)
+    assert ss.list_calls == 1
+
+    # 한 시트만 무효화하면 그 시트만 다시 읽는다
+    rev = sheet_revision("백업_2026-06")
+    ss.reads.clear()
+    get_sheet_values_cached("백업_2026-06", ss)
+    get_sheet_values_cached("백업_2026-07", ss)
+    invalidate_sheet_caches("백업_2026-06")
+    assert sheet_revision("백업_2026-06") != rev
+    get_sheet_values_cached("백업_2026-06", ss)
+    get_sheet_values_cached("백업_2026-07", ss)
+    assert ss.reads == ["백업_2026-06", "백업_2026-07", "백업_2026-06"]
+    assert ss.list_calls == 1
+
+    # 인자 없이 무효화하면 목록까지 다시 읽는다
+    invalidate_sheet_caches()
+    list_backup_sheets("daily", ss)
+    assert ss.list_calls == 2
+    invalidate_sheet_caches()
+
+
+# --- 구조화 로그 ---
+def test_classify_log_action_uses_message_head():
+    assert classify_log_action("신규 등록: MSCU1234566") == '등록'
+    assert classify_log_action("백업 데이터 수정: MSCU1234566 (백업_2026-07)") == '수정'
+    assert classify_log_action("데이터 삭제(일괄): 2개 (A, B)") == '삭제'
+    assert classify_log_action("관리 페이지 선적완료 되돌리기: MSCU1234566") == '되돌리기'
+    # 본문에 '복구'가 있어도 앞머리가 '정리'면 정리
+    assert classify_log_action("백업 시트 정리: 2개 복구 후 ['백업_2026-07']에서 2행 삭제") == '정리'
+    assert classify_log_action("선적완료 자동 백업: MSCU1234566 (위치 3)") == '백업'
+    assert classify_log_action("알 수 없는 작업") == '기타'
+
+
+def test_extract_container_nos_dedup_in_order():
+    assert extract_container_nos("일괄 복구: 3개 (TGHU7654320, ABCU1234560, TGHU7654320)") == ['TGHU7654320', 'ABCU1234560']
+
+
+def test_make_log_row_fills_structured_columns():
+    from datetime import datetime
+    row = make_log_row("데이터 수정: MSCU1234566", sheet="현재 데이터", now=datetime(2026, 7, 1, 9, 0, 0))
+    assert len(row) == len(LOG_HEADERS)
+    assert row[:5] == ['2026-07-01 09:00:00', "데이터 수정: MSCU1234566", '수정', 'MSCU1234566', '현재 데이터']
+    assert len(row[5]) == 8 and row[6] == ''  # 세션 id, 소요시간 없음
+
+
+LOG_VALUES = [
+    ['2026-07-01 09:00:00', '신규 등록: MSCU1234566'],  # 예전 2칸 로그
+    ['2026-07-01 10:00:00', '백업 데이터 수정: MSCU1234566 (백업_2026-07)'],
+    ['', ''],
+    ['2026-07-02 10:00:00', '일괄 복구: 2개', '복구', 'ABCU1234560,MSCU1234566', '현재 데이터', 'abcd1234', '120'],
+]
+
+
+def test_log_values_to_frame_mixes_legacy_and_structured_rows():
+    df = log_values_to_frame(LOG_VALUES)
+    assert list(df.columns) == LOG_HEADERS + ['날짜']
+    assert len(df) == 3  # 일시 없는 행은 버린다
+    assert df['일시'].is_monotonic_decreasing
+    assert df['유형'].tolist() == ['복구', '수정', '등록']
+    assert df['컨테이너'].tolist() == ['ABCU1234560,MSCU1234566', 'MSCU1234566', 'MSCU1234566']
+
+
+def test_log_index_lookup_by_container():
+    df = log_values_to_frame(LOG_VALUES)
+    index = build_log_index(df)
+    assert lookup_log_rows(df, index, 'mscu1234566')['유형'].tolist() == ['복구', '수정', '등록']
+    assert lookup_log_rows(df, index, 'ABCU1234560')['유형'].tolist() == ['복구']
+    assert lookup_log_rows(df, index, 'TGHU7654320').empty
+
+
+# --- 로그 아카이브 파티션 / 통합 이력 조회 ---
+def test_log_archive_partitions_chain_date_ranges():
+    parts = log_archive_partitions(
+        ["현재 데이터", "로그_2026-Q2", "로그_2025-Q4", "로그_아카이브_20260101", "백업_2026-07"],
+        live_start=date(2026, 6, 20),
+    )
+    assert [p['title'] for p in parts] == ["로그_아카이브_20260101", "로그_2025-Q4", "로그_2026-Q2"]
+    assert (parts[1]['start'], parts[1]['end']) == (date(2025, 10, 1), date(2026, 4, 1))
+    assert (parts[2]['start'], parts[2]['end']) == (date(2026, 4, 1), date(2026, 6, 20))
+
+    picked = log_partitions_for_range(parts, date(2026, 5, 1), date(2026, 7, 1))
+    assert [p['title'] for p in picked] == ["로그_아카이브_20260101", "로그_2026-Q2"]  # 구간 모르는 시트는 항상 포함
+    assert [p['title'] for p in log_partitions_for_range(parts[1:], date(2026, 6, 25), None)] == []
+
+
+def test_load_log_history_reads_only_overlapping_archives_once():
+    invalidate_sheet_caches()
+    ss = FakeBatchSpreadsheet({
+        "업데이트 로그": [['2026-07-01 09:00:00', '신규 등록: MSCU1234566']],
+        "로그_2026-Q2": [['2026-04-03 09:00:00', '데이터 삭제: MSCU1234566']],
+        "로그_2026-Q1": [['2026-01-05 09:00:00', '신규 등록: ABCU1234560']],
+    })
+    df, index = load_log_history(date(2026, 5, 1), date(2026, 7, 1), ss)
+    assert ss.batch_calls == [["'로그_2026-Q2'"]]
+    assert df['유형'].tolist() == ['등록', '삭제']  # 최신순으로 합쳐진다
+    assert len(index['MSCU1234566']) == 2
+
+    load_log_history(date(2026, 5, 1), date(2026, 7, 1), ss)
+    invalidate_sheet_caches()  # 목록 전체 무효화에도 아카이브 파싱 결과는 유지된다
+    load_log_history(date(2026, 1, 1), date(2026, 7, 1), ss)
+    assert ss.batch_calls == [["'로그_2026-Q2'"], ["'로그_2026-Q1'"]]
+    invalidate_sheet_caches()
+
+
+# --- 이력 필터 / 내보내기 ---
+def test_filter_log_positions_combines_masks():
+    df = log_values_to_frame(LOG_VALUES)
+    index = build_log_index(df)
+    assert filter_log_positions(df, index).tolist() == [0, 1, 2]
+    assert filter_log_positions(df, index, keyword='mscu1234566', kind='수정').tolist() == [1]
+    assert filter_log_positions(df, index, keyword='일괄').tolist() == [0]
+    assert filter_log_positions(df, index, start=date(2026, 7, 1), end=date(2026, 7, 1)).tolist() == [1, 2]
+    assert filter_log_positions(df, index, keyword='TGHU7654320').tolist() == []
+    assert count_log_types(df, filter_log_positions(df, index))['수정'] == 1
+
+
+def test_export_log_csv_chunks_match_single_pass():
+    df = log_values_to_frame(LOG_VALUES * 5)
+    positions = filter_log_positions(df, build_log_index(df))
+    chunked = export_log_csv(df, positions, chunk_rows=4).read().decode('utf-8-sig')
+    whole = export_log_csv(df, positions).read().decode('utf-8-sig')
+    assert chunked == whole
+    assert whole.splitlines()[0] == '일시,작업 유형,내용,시트,세션'
+    assert len(whole.splitlines()) == 1 + 15
+    assert export_log_csv(df, positions[:0]).read().decode('utf-8-sig').strip() == '일시,작업 유형,내용,시트,세션'
+
+
+# --- 로그 자동 이관 ---
+def test_split_log_rows_by_quarter_keeps_order_and_carries_bad_dates():
+    rows = [
+        ['2026-03-30 09:00:00', 'a'],
+        ['2026-03-31 09:00:00', 'b'],
+        ['깨진 값', 'c'],  # 앞 행의 분기로
+        ['2026-04-01 09:00:00', 'd'],
+    ]
+    groups = split_log_rows_by_quarter(rows)
+    assert [(name, [r[1] for r in rs]) for name, rs in groups] == [
+        ('로그_2026-Q1', ['a', 'b', 'c']),
+        ('로그_2026-Q2', ['d']),
+    ]
+    assert split_log_rows_by_quarter([['?', 'x']])[0][0].startswith('로그_아카이브_')
+
+
+def test_last_row_from_append_response():
+    assert last_row_from_append({'updates': {'updatedRange': "'업데이트 로그'!A1201:G1201"}}) == 1201
+    assert last_row_from_append({'updates': {'updatedRange': "'업데이트 로그'!A7"}}) == 7
+    assert last_row_from_append(None) is None
+
+
+# --- 연결 예열: 토큰 갱신 시점 ---
+def test_token_refresh_delay_refreshes_before_expiry():
+    now = datetime(2026, 7, 1, 9, 0, 0)
+    assert token_refresh_delay(now + timedelta(hours=1), now) == 3600 - 300
+    assert token_refresh_delay(now + timedelta(minutes=2), now) == 0  # 이미 여유 구간 안
+    assert token_refresh_delay(now - timedelta(minutes=1), now) == 0  # 만료됨
+    assert token_refresh_delay(None, now) == 0  # 아직 토큰 없음
+    assert token_refresh_delay(now + timedelta(minutes=10), now, margin=60) == 540
@@ -1,21 +1,64 @@
 import streamlit as st
-from datetime import datetime, timezone, timedelta
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from datetime import date, datetime, timezone, timedelta
+import importlib
+import logging
 import re
+import hashlib
 import json
-import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
+import threading
+import time
+import types
+import uuid
+from collections.abc import Mapping, MutableSequence
+from io import BytesIO
 
 # 체크디지트 계산은 OCR 모듈과 같은 규칙(ISO 6346)을 써야 하므로 그대로 가져다 쓴다.
-# (container_ocr는 utils를 import하지 않으므로 순환 import가 생기지 않는다)
-from container_ocr import compute_check_digit, is_valid_check_digit
+# (iso6346은 표준 라이브러리만 쓰므로 OCR 모듈의 requests/PIL을 끌어오지 않는다)
+from iso6346 import check_digit_matches, compute_check_digit, compute_check_digits, is_valid_check_digit
+import backup_archive
+import change_feed
+import metrics
+
+logger = logging.getLogger("barcode_app.utils")
+
+
+class _LazyModule(types.ModuleType):
+    """처음 속성에 접근할 때 실제로 import하는 모듈 대리자.
+
+    모든 페이지가 utils를 불러오지만 pandas/numpy/gspread/google-auth가 다 필요한
+    페이지는 아니다(설정 페이지는 pandas를 쓰지 않는다). 모듈 전역에서는 이름만
+    잡아두고, 함수가 처음 pd.DataFrame 등을 쓸 때 불러온다 — 절전 해제 직후 첫 화면이
+    쓰지도 않는 라이브러리 import를 기다리지 않도록. 한 번 불러온 뒤에는 실제 모듈의
+    속성을 그대로 복사해 두므로 이후 접근 비용은 일반 모듈과 같다.
+    """
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+np = _LazyModule("numpy")
+pd = _LazyModule("pandas")
+gspread = _LazyModule("gspread")
+service_account = _LazyModule("google.oauth2.service_account")
 
 # --- 상수 정의 (공용) ---
 MAIN_SHEET_NAME = "현재 데이터"
 SHEET_HEADERS = ['컨테이너 번호', '출고처', '피트수', '씰 번호', '상태', '등록일시', '완료일시', '위치']
 LOG_SHEET_NAME = "업데이트 로그"
+# 로그 행 구성. 시트에는 헤더 행 없이 이 순서로 쌓는다(예전 행은 앞의 2칸만 있음).
+LOG_HEADERS = ['일시', '내용', '유형', '컨테이너', '시트', '세션', '소요(ms)']
+LOG_ARCHIVE_PREFIX = "로그_"  # 로그 아카이브 시트: 로그_YYYY-QN (분기)
+LOG_ROTATE_THRESHOLD = 1000  # 라이브 로그가 이 행 수를 넘으면 오래된 행을 아카이브로 자동 이관
+LOG_KEEP_ROWS = 200  # 이관 후 라이브 로그에 남기는 최근 행 수
 KST = timezone(timedelta(hours=9))
+SHEET_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # 등록일시/완료일시/로그 일시 저장 형식
 BACKUP_PREFIX = "백업_"
+# 월별 백업의 (완료일, 출고처)별 집계표. 통계 페이지가 원본 백업 대신 이 작은 시트만 읽는다.
+STATS_PREFIX = "통계_"
+STATS_HEADERS = ['완료일', '출고처', '건수', '피트수']
 RESTORE_SLOT = "복원"  # 관리 페이지에서 개별 복원한 컨테이너가 들어가는 등록 페이지 전용 슬롯 위치값
 DEFAULT_DESTINATIONS = ['베트남', '박닌', '하택', '위해', '중원', '영성', '베트남전장', '흥옌', '북경', '락릉', '타이닌', '기타']
 DEFAULT_PRINTER_IP = "192.168.0.99"
@@ -153,6 +196,12 @@ def button_marker(kind: str):
     """바로 다음에 오는 버튼에 색상을 입히는 마커. kind: primary|success|danger|neutral."""
     st.markdown(f'<div class="btn-{kind}-mk" style="display:none"></div>', unsafe_allow_html=True)
 
+def rerun_fragment():
+    """지금 실행 중인 조각(st.fragment)만 다시 실행한다.
+    조각 단위 rerun은 조각 재실행 중에만 허용되므로, 전체 실행 중이면 앱 전체를 다시 실행한다."""
+    ctx = get_script_run_ctx()
+    st.rerun(scope="fragment" if ctx is not None and ctx.fragment_ids_this_run else "app")
+
 def render_app_title():
     """모든 페이지 공통 상단 타이틀."""
     st.markdown("""
@@ -209,6 +258,8 @@ def find_same_day_duplicate(container_list, container_no, today):
     target = normalize_container_no(container_no)
     if not target:
         return None
+    if isinstance(container_list, ContainerList):
+        return container_list.registered_on(today, target)
     for c in container_list:
         if normalize_container_no(c.get('컨테이너 번호')) != target:
             continue
@@ -218,6 +269,124 @@ def find_same_day_duplicate(container_list, container_no, today):
     return None
 
 
+# --- 일괄 등록 (CSV/엑셀 부킹 리스트) ---
+# 한 건씩 container_no_error → find_same_day_duplicate → add_row_to_gsheet를 부르면 N건에
+# 쓰기 2N회(행 추가 + 로그)다. 파일 전체를 열 단위로 한 번에 검사하고(체크디지트는
+# iso6346의 일괄 계산), 통과한 행만 append_rows 한 번으로 쓴다.
+IMPORT_COLUMN_ALIASES = {  # 파일 헤더(공백 제거·소문자) → 시트 헤더
+    '컨테이너번호': '컨테이너 번호', '컨테이너': '컨테이너 번호', '번호': '컨테이너 번호',
+    'container': '컨테이너 번호', 'containerno': '컨테이너 번호', 'container_no': '컨테이너 번호',
+    'cntrno': '컨테이너 번호',
+    '출고처': '출고처', 'destination': '출고처',
+    '피트수': '피트수', '피트': '피트수', 'size': '피트수', 'feet': '피트수',
+    '씰번호': '씰 번호', '씰': '씰 번호', 'seal': '씰 번호', 'sealno': '씰 번호',
+    '위치': '위치', 'slot': '위치',
+}
+IMPORT_FIELDS = ['컨테이너 번호', '출고처', '피트수', '씰 번호', '위치']
+
+
+def container_no_errors(container_nos):
+    """container_no_error의 열 단위 판. 번호 Series → 같은 인덱스의 오류 메시지 Series(문제 없으면 None)."""
+    nos = pd.Series(container_nos, dtype=object).fillna('').astype(str)
+    errors = pd.Series(None, index=nos.index, dtype=object)
+    errors[nos == ''] = "컨테이너 번호를 입력해주세요."
+    well_formed = nos.str.fullmatch(CONTAINER_NO_PATTERN) & nos.map(str.isascii)
+    errors[(nos != '') & ~well_formed] = (
+        "컨테이너 번호 형식이 올바르지 않습니다. (영문 대문자 4자 + 숫자 7자, 예: ABCU1234560)")
+    wrong_category = well_formed & (nos.str[3] != 'U')
+    errors[wrong_category] = "컨테이너 번호 4번째 자리는 'U'여야 합니다. (입력한 값: '" + nos[wrong_category].str[3] + "')"
+
+    checked = nos[well_formed & ~wrong_category]
+    mismatched = checked[~np.asarray(check_digit_matches(checked), dtype=bool)]
+    if not mismatched.empty:
+        errors[mismatched.index] = [
+            f"체크디지트가 맞지 않습니다. 마지막 자리는 '{e}'여야 합니다. "
+            f"(입력한 값: '{no[10]}') 번호를 다시 확인해주세요."
+            for e, no in zip(compute_check_digits(mismatched.str[:10]), mismatched)
+        ]
+    return errors.astype(object).where(errors.notna(), None)
+
+
+def read_import_table(file_name, data):
+    """업로드한 CSV/XLSX를 IMPORT_FIELDS 열의 문자열 DataFrame으로 읽는다.
+
+    헤더는 IMPORT_COLUMN_ALIASES로 맞추고, 번호 열이 없으면 ValueError.
+    CSV는 UTF-8(BOM 포함)을 먼저, 안 되면 CP949(한글 엑셀 저장본)로 읽는다.
+    XLSX는 openpyxl이 있어야 한다(없으면 ValueError로 안내).
+    """
+    if file_name.lower().endswith(('.xlsx', '.xlsm')):
+        try:
+            df = pd.read_excel(BytesIO(data), dtype=str)
+        except ImportError:
+            raise ValueError("엑셀 파일을 읽으려면 openpyxl이 필요합니다. CSV로 저장해 올려주세요.")
+    else:
+        try:
+            df = pd.read_csv(BytesIO(data), dtype=str, encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            df = pd.read_csv(BytesIO(data), dtype=str, encoding='cp949')
+    renamed = {}
+    for col in df.columns:
+        target = IMPORT_COLUMN_ALIASES.get(re.sub(r'\s+', '', str(col)).lower())
+        if target and target not in renamed.values():
+            renamed[col] = target
+    df = df.rename(columns=renamed)
+    if '컨테이너 번호' not in df.columns:
+        raise ValueError("'컨테이너 번호' 열을 찾을 수 없습니다. (첫 줄에 열 이름이 있어야 합니다)")
+    df = df.reindex(columns=IMPORT_FIELDS).fillna('')
+    df = df.apply(lambda col: col.astype(str).str.strip())
+    return df[df.ne('').any(axis=1)].reset_index(drop=True)  # 완전히 빈 줄은 버린다
+
+
+def prepare_import(df, container_list, today, destinations, default_destination='미정',
+                   positions=tuple(str(i) for i in range(1, 10))):
+    """읽은 표를 검사하고 위치를 배정한다. 반환: IMPORT_FIELDS + '오류' 열의 DataFrame.
+
+    번호는 공백·하이픈을 빼고 대문자로 맞춘다. 오류는 행마다 첫 번째 사유 하나만 남긴다.
+      번호 검사(container_no_errors) → 파일 안 중복 → 오늘 이미 등록(목록의 (등록일, 번호) 색인)
+      → 피트수(40/20) → 출고처(설정 목록 또는 default_destination) → 위치
+    위치: 파일에 적힌 위치는 비어 있어야 쓰고, 적지 않은 행은 남은 빈 위치를 차례로 받는다.
+    빈 위치가 모자라면 위치 없이 등록한다(관리 페이지에서 지정).
+    """
+    out = df.reindex(columns=IMPORT_FIELDS).fillna('').copy()
+    out['컨테이너 번호'] = out['컨테이너 번호'].str.replace(r'[\s\-]', '', regex=True).str.upper()
+    out['출고처'] = out['출고처'].where(out['출고처'] != '', default_destination)
+    out['피트수'] = out['피트수'].str.replace(r'\D', '', regex=True).where(out['피트수'] != '', '40')
+
+    errors = container_no_errors(out['컨테이너 번호'])
+    def flag(mask, message):
+        fill = errors.isna() & mask
+        errors[fill] = message if isinstance(message, str) else message[fill]
+
+    flag(out['컨테이너 번호'].duplicated(), "파일 안에 같은 번호가 또 있습니다.")
+    registered = {no for no in out['컨테이너 번호'].unique() if container_list.registered_on(today, no)}
+    flag(out['컨테이너 번호'].isin(registered), "오늘 이미 등록된 컨테이너 번호입니다.")
+    flag(~out['피트수'].isin(['40', '20']), "피트수는 40 또는 20이어야 합니다.")
+    allowed = set(destinations) | {default_destination}
+    flag(~out['출고처'].isin(allowed), "출고처 '" + out['출고처'] + "'이(가) 설정 목록에 없습니다.")
+
+    occupied = container_list.occupied_slots()
+    wanted = out['위치'] != ''
+    flag(wanted & ~out['위치'].isin(positions), "위치는 " + ", ".join(positions) + " 중 하나여야 합니다.")
+    flag(wanted & out['위치'].isin(occupied), "위치 " + out['위치'] + "에 이미 선적중 컨테이너가 있습니다.")
+    flag(wanted & out['위치'].duplicated(), "파일 안에서 같은 위치를 두 번 썼습니다.")
+    ok = errors.isna()
+    free = [p for p in positions if p not in occupied and p not in set(out.loc[ok & wanted, '위치'])]
+    auto = out.index[ok & ~wanted]
+    out.loc[auto[:len(free)], '위치'] = free[:len(auto)]
+    out['오류'] = errors.astype(object).where(errors.notna(), None)
+    return out
+
+
+def import_records(prepared, now):
+    """prepare_import 결과에서 오류 없는 행을 등록할 컨테이너 dict 목록으로 만든다(등록일시 = now)."""
+    rows = prepared[prepared['오류'].isna()]
+    return [
+        {'컨테이너 번호': r['컨테이너 번호'], '출고처': r['출고처'], '피트수': r['피트수'],
+         '씰 번호': r['씰 번호'], '상태': '선적중', '등록일시': pd.Timestamp(now),
+         '완료일시': None, '위치': r['위치']}
+        for r in rows.to_dict('records')
+    ]
+
 def backup_values_to_frame(values):
     """백업 시트의 get_all_values() 결과를 SHEET_HEADERS에 맞춘 DataFrame으로 만든다.
 
@@ -261,6 +430,183 @@ def filter_backup_sheets(sheet_titles, kind="daily"):
         reverse=True,
     )
 
+
+def parse_sheet_datetimes(values):
+    """시트의 일시 문자열 Series를 datetime으로 바꾼다.
+
+    앱이 쓰는 형식(SHEET_DATETIME_FORMAT)으로 한 번에 파싱하고(형식 추론 없이 빠름),
+    실패한 값(시트에서 직접 고친 '2026-07-01' 같은 값)만 형식 추론으로 다시 시도한다.
+    빈 값은 NaT.
+    """
+    parsed = pd.to_datetime(values, format=SHEET_DATETIME_FORMAT, errors='coerce')
+    retry = parsed.isna() & (values.fillna('').astype(str).str.strip() != '')
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format='mixed', errors='coerce')
+    return parsed
+
+
+def sheet_dates(values):
+    """시트 일시 문자열 Series → 날짜(자정 Timestamp) Series. 빈 값은 NaT.
+
+    통계에는 날짜만 필요하므로 앞 10자('YYYY-MM-DD')의 고유값(한 달이면 30여 개)만
+    명시 형식으로 파싱해 코드로 펼친다. 형식이 다른 값만 parse_sheet_datetimes로 처리한다.
+    """
+    values = values.fillna('').astype(str)
+    codes, uniques = pd.factorize(values.str.slice(0, 10))
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y-%m-%d', errors='coerce')
+    days = pd.Series(parsed.to_numpy()[codes], index=values.index)
+    retry = days.isna() & (values.str.strip() != '')
+    if retry.any():
+        days[retry] = parse_sheet_datetimes(values[retry]).dt.normalize()
+    return days
+
+
+def sheet_ints(values):
+    """시트 숫자 문자열 Series(피트수 등) → int Series. 숫자가 아니면 0.
+    값 종류가 몇 개뿐이라(20/40) 고유값만 변환해 펼친다."""
+    codes, uniques = pd.factorize(values)
+    converted = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').fillna(0).astype(int).to_numpy()
+    ints = np.zeros(len(values), dtype=int)
+    valid = codes >= 0
+    ints[valid] = converted[codes[valid]]
+    return pd.Series(ints, index=values.index)
+
+
+def compute_backup_stats(df):
+    """백업 행(SHEET_HEADERS 열 구성)에서 선적완료분만 골라 (완료일, 출고처)별
+    건수·피트수 합계 집계표를 만든다. '통계_YYYY-MM' 시트에 그대로 저장하는 형태다.
+
+    완료일시가 비어 있는 행도 출고처 합계에는 들어가야 하므로 완료일 ''로 남긴다
+    (일자별 표에서만 빠진다). 행마다 날짜 문자열을 만들지 않고 날짜 단위로 묶은 뒤
+    묶인 결과(수십 행)만 문자열로 바꾼다.
+    """
+    done = df[df['상태'] == '선적완료']
+    if done.empty:
+        return pd.DataFrame(columns=STATS_HEADERS)
+    rows = pd.DataFrame({
+        '완료일': sheet_dates(done['완료일시']),
+        '출고처': done['출고처'].fillna('').astype(str).astype('category'),
+        '건수': 1,
+        '피트수': sheet_ints(done['피트수']),
+    })
+    stats = (rows.groupby(['완료일', '출고처'], observed=True, dropna=False)[['건수', '피트수']]
+             .sum().reset_index())
+    stats['완료일'] = stats['완료일'].dt.strftime('%Y-%m-%d').fillna('')
+    stats['출고처'] = stats['출고처'].astype(str)
+    stats[['건수', '피트수']] = stats[['건수', '피트수']].astype(int)
+    return stats[STATS_HEADERS].sort_values(['완료일', '출고처']).reset_index(drop=True)
+
+
+def stats_values_to_frame(values):
+    """'통계_' 시트의 get_all_values() 결과를 숫자형 집계 DataFrame으로 만든다."""
+    # 집계가 줄어들 때 빈 값으로 덮어둔 꼬리 행은 버린다 (sync_month_backup 참고)
+    rows = [r for r in (values or [])[1:] if any(str(c).strip() for c in r)]
+    if not rows:
+        return pd.DataFrame(columns=STATS_HEADERS)
+    df = pd.DataFrame(rows, columns=values[0], dtype=str).reindex(columns=STATS_HEADERS, fill_value="")
+    for col in ('건수', '피트수'):
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+    return df
+
+
+_THOUSANDS_RE = r'(\d)(?=(\d{3})+$)'
+
+def format_thousands(table, zero=None):
+    """정수 표(DataFrame/Series)를 천자리 콤마 문자열로 바꾼다.
+    셀마다 f-string을 부르는 map/apply 대신 표 전체를 한 줄로 펴서 정규식 치환 한 번으로 처리한다.
+    zero를 주면 0인 칸은 그 문자열(예: '-')로 표시한다."""
+    ints = table.to_numpy(dtype='int64')
+    flat = pd.Series(ints.ravel()).astype(str).str.replace(_THOUSANDS_RE, r'\1,', regex=True).to_numpy(dtype=object)
+    if zero is not None:
+        flat[ints.ravel() == 0] = zero
+    if isinstance(table, pd.Series):
+        return pd.Series(flat, index=table.index, name=table.name)
+    return pd.DataFrame(flat.reshape(ints.shape), index=table.index, columns=table.columns)
+
+
+def _with_totals(table):
+    """피벗 표에 '합계' 열과 '합계' 행을 붙인다."""
+    table = table.copy()
+    table['합계'] = table.sum(axis=1)
+    totals = table.sum(axis=0).rename('합계').to_frame().T
+    return pd.concat([table, totals])
+
+
+def build_stats_tables(df_stats):
+    """(완료일, 출고처[, 월]) 집계표로 통계 페이지의 화면용 표를 한꺼번에 만든다(순수 함수).
+
+    반환 dict (집계가 비었으면 None):
+      completed/total_ft: 요약 카드 숫자
+      dest   : 출고처별 전체 건수·피트수 (콤마 문자열, 피트수 내림차순)
+      cross  : 출고처 × 일자(M/D) 피트수 (합계 행/열 포함, 0은 '-'). 완료일이 없으면 None
+      monthly_ft / trend: '월' 열이 있을 때(기간 분석)만 — 월별 피트수 Series, 출고처 × 월 표
+    """
+    if df_stats is None or df_stats.empty:
+        return None
+    df = df_stats.assign(출고처=df_stats['출고처'].astype('category'))
+    dest = df.groupby('출고처', observed=True)[['건수', '피트수']].sum().astype(int)
+    dest.columns = ['전체 건수(건)', '전체 피트수(ft)']
+    dest = dest.sort_values('전체 피트수(ft)', ascending=False)
+    dest.index = dest.index.astype(str)
+    dest.index.name = '출고처'
+    view = {
+        'completed': int(df['건수'].sum()),
+        'total_ft': int(df['피트수'].sum()),
+        'dest': format_thousands(dest),
+        'cross': None,
+        'monthly_ft': None,
+        'trend': None,
+    }
+
+    if '월' in df.columns:
+        view['monthly_ft'] = df.groupby('월')['피트수'].sum()
+        trend = df.groupby(['출고처', '월'], observed=True)['피트수'].sum().unstack(fill_value=0)
+        trend.index = trend.index.astype(str)
+        trend = _with_totals(trend)
+        trend.index.name = '출고처'
+        view['trend'] = format_thousands(trend, zero='-')
+        return view  # 기간 분석은 일자별 표를 그리지 않는다
+
+    dated = df[df['완료일'] != '']
+    if not dated.empty:
+        cross = dated.groupby(['출고처', '완료일'], observed=True)['피트수'].sum().unstack(fill_value=0)
+        cross.index = cross.index.astype(str)
+        # 날짜 열 이름을 M/D로 (열마다 Timestamp를 만들지 않고 인덱스 단위로 변환)
+        days = pd.to_datetime(cross.columns, format='%Y-%m-%d')
+        cross.columns = days.month.astype(str) + '/' + days.day.astype(str)
+        cross = _with_totals(cross)
+        cross.index.name = '출고처'
+        view['cross'] = format_thousands(cross, zero='-')
+    return view
+
+
+class _EmptyStatsView(Exception):
+    """집계가 비었다(읽기 실패 포함). st.cache_data는 예외를 캐시하지 않으므로 결과를 남기지 않는 데 쓴다."""
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_stats_view(view_key, revision, _load):
+    view = build_stats_tables(_load())
+    if view is None:
+        raise _EmptyStatsView(view_key)
+    return view
+
+
+def cached_stats_view(view_key, revision, _load):
+    """build_stats_tables 결과를 (보기 키, 원본 시트 리비전) 단위로 프로세스 전역 메모이즈한다.
+
+    _load는 캐시 미스일 때만 불리는 집계표 로더다(밑줄 인자라 해시하지 않음).
+    같은 달·같은 날을 다시 고르거나 다른 세션이 같은 화면을 열어도, 원본 시트에
+    쓰기가 없었다면(리비전 동일) 시트 읽기와 집계·포맷을 모두 건너뛴다.
+    빈 결과는 메모이즈하지 않는다. 로더는 읽기가 일시적으로 실패해도 빈 집계를 돌려주므로,
+    그걸 캐시하면 관계없는 쓰기로 리비전이 바뀔 때까지 '데이터 없음'이 남는다.
+    로더의 예외도 캐시되지 않고 그대로 올라간다. 반환: 화면용 표 dict 또는 None.
+    """
+    try:
+        return _cached_stats_view(view_key, revision, _load)
+    except _EmptyStatsView:
+        return None
+
 def make_zpl(container_no, copies=2, dpi=203):
     """QR코드 + 컨테이너 번호 텍스트 ZPL (90mm × 60mm 기준)
 
@@ -305,63 +651,200 @@ def make_zpl(container_no, copies=2, dpi=203):
 def connect_to_gsheet():
     try:
         scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scope)
+        creds = service_account.Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scope)
         client = gspread.authorize(creds)
+        instrument_sheets_client(client.http_client)
         spreadsheet = client.open("Container_Data_DB")
         return spreadsheet
     except Exception as e:
         st.error(f"Google Sheets 연결에 실패했습니다: {e}")
         return None
 
+def instrument_sheets_client(http_client):
+    """모든 Sheets 요청이 지나는 HTTPClient.request를 감싸 작업별 호출 수·지연을 센다(metrics).
+    GET은 읽기 쿼터, 나머지(POST/PUT)는 쓰기 쿼터를 쓴다. 두 번 감싸지 않는다.
+    Drive API 요청(시트 파일 수정 시각 조회)은 Sheets 쿼터와 무관하므로 세지 않는다."""
+    if getattr(http_client, "_metrics_wrapped", False):
+        return http_client
+    request = http_client.request
+
+    def counted(method, *args, **kwargs):
+        endpoint = args[0] if args else kwargs.get("endpoint", "")
+        if "/drive/" in str(endpoint):
+            return request(method, *args, **kwargs)
+        with metrics.api_call("sheets_read" if method.lower() == "get" else "sheets_write"):
+            return request(method, *args, **kwargs)
+
+    http_client.request = counted
+    http_client._metrics_wrapped = True
+    return http_client
+
 @st.cache_resource
 def get_stable_worksheet(title):
     """삭제·이름변경되지 않는 고정 시트(현재 데이터/업데이트 로그)의 워크시트 객체를 캐시한다.
     spreadsheet.worksheet(title)은 호출마다 시트 목록을 다시 읽어 Sheets 읽기 요청을
     유발하므로, 자주 쓰는 고정 시트는 캐시해 반복 조회를 없앤다.
+    카탈로그의 시트 목록에서 꺼내므로 목록을 이미 읽었다면(예열 등) 추가 읽기가 없다.
     연결/조회 실패 시 예외를 던져 캐시되지 않게 한다(다음 호출에서 재시도)."""
-    return connect_to_gsheet().worksheet(title)
+    return get_cached_worksheet(title) or connect_to_gsheet().worksheet(title)
 
-# --- 시트 읽기 세션 캐시 (읽기 쿼터 절약) ---
+# --- 시트 카탈로그 + 읽기 캐시 (읽기 쿼터 절약) ---
 # Streamlit은 위젯을 건드릴 때마다 페이지 전체를 재실행하므로, 재실행마다
 # spreadsheet.worksheets()나 get_all_values()를 다시 부르면 Sheets 읽기 쿼터
 # (분당 60회)를 금방 초과한다(예: 관리 페이지에서 씰 번호 연속 수정 시 429).
-# 데이터를 바꾸지 않는 재실행에서는 세션에 캐시한 값을 재사용하고, 실제 쓰기가
-# 일어나면 invalidate_sheet_caches()로 캐시를 비워 다음 읽기에서 최신값을 다시
-# 가져온다. → "내가 방금 한 수정"은 항상 즉시 반영된다.
-_WS_MAP_CACHE_KEY = "_ws_map_cache"
+#
+# - 시트 목록(워크시트 객체)과 시트별 리비전은 프로세스 전역 카탈로그에 둔다.
+#   세션·페이지가 몇 개든 worksheets()는 카탈로그가 비었을 때 한 번만 부른다.
+# - 시트 값(get_all_values)은 세션에 캐시하되 (리비전) 단위로 저장한다.
+# - 쓰기 작업은 invalidate_sheet_caches(시트명...)로 해당 시트 리비전을 올린다.
+#   리비전이 바뀐 시트만 다음 읽기에서 다시 가져오므로, 다른 세션도 곧바로
+#   최신값을 본다. 시트가 새로 생기거나 지워지면 인자 없이 불러 목록까지 비운다.
 _SHEET_VALUES_CACHE_KEY = "_sheet_values_cache"
 
+@st.cache_resource
+def _sheet_catalog():
+    """프로세스 전역 시트 카탈로그.
+    ws_map  : {시트명: Worksheet} (None이면 다음 조회 때 worksheets()로 채움)
+    revisions: {시트명: 쓰기 횟수}, epoch: 목록 전체 무효화 횟수
+    data_rows: {시트명: 마지막으로 읽은 데이터 행 수(헤더 제외)}
+    log_rows : 라이브 로그의 마지막 행 번호(추가 응답에서 얻음, 모르면 None)
+    partition_rows: {로그 아카이브 시트명: 행 수}, rotation: 자동 이관 상태
+    retention: 백업 보존 정리 상태(하루 한 번 자동 실행)
+    main_snapshot: (메인 시트 리비전, ContainerRecord 튜플) — 세션들이 공유하는 현재 데이터
+    snapshot_lock: 메인 시트 스냅샷을 한 번에 한 곳에서만 읽게 하는 잠금(예열 스레드와 첫 세션)
+    row_lock: 메인 시트를 행 번호로 고치는 작업(조건부 수정·행 삭제)을 한 번에 하나씩 하게 하는 잠금
+    feed  : 세션 사이 변경 피드(change_feed.ChangeFeed) — 쓰기마다 바뀐 행을 올린다
+    changes: 앱 밖 변경 감시 상태 {'last_write'(앱이 마지막으로 쓴 시각), 'modified'(파일 수정 시각),
+             'checked', 'error'}
+    warmup: 연결 예열 상태(warm_up_connection)"""
+    return {"lock": threading.Lock(), "ws_map": None, "revisions": {}, "epoch": 0, "data_rows": {},
+            "log_rows": None, "partition_rows": {}, "rotation": {"running": False, "last": None},
+            "retention": {"running": False, "last_day": None, "retry_at": None, "last": None},
+            "main_snapshot": None, "snapshot_lock": threading.Lock(), "row_lock": threading.RLock(),
+            "feed": change_feed.ChangeFeed(),
+            "changes": {"last_write": 0.0, "modified": None, "checked": None, "error": None},
+            "warmup": {"started": False, "ready_ms": None, "token_refreshed": None, "error": None}}
+
 def get_worksheets_map(spreadsheet=None):
-    """{시트명: Worksheet} 맵을 세션에 캐시해 반환한다.
-    worksheets()는 호출당 읽기 1회이므로 재실행마다 다시 부르지 않도록 캐시한다."""
-    cache = st.session_state.get(_WS_MAP_CACHE_KEY)
-    if cache is None:
-        if spreadsheet is None:
-            spreadsheet = connect_to_gsheet()
-        if spreadsheet is None:
-            return {}
-        cache = {w.title: w for w in spreadsheet.worksheets()}
-        st.session_state[_WS_MAP_CACHE_KEY] = cache
-    return cache
+    """{시트명: Worksheet} 맵을 반환한다(프로세스 전역 캐시).
+    worksheets()는 호출당 읽기 1회이므로 목록이 무효화됐을 때만 다시 부른다.
+    잠금 안에서 읽어, 동시에 들어온 세션들이 같은 목록을 중복으로 읽지 않게 한다."""
+    catalog = _sheet_catalog()
+    with catalog["lock"]:
+        if catalog["ws_map"] is None:
+            if spreadsheet is None:
+                spreadsheet = connect_to_gsheet()
+            if spreadsheet is None:
+                return {}
+            catalog["ws_map"] = {w.title: w for w in spreadsheet.worksheets()}
+        return catalog["ws_map"]
 
 def get_worksheet_titles(spreadsheet=None):
     """캐시된 워크시트 목록(제목 리스트)을 반환한다."""
     return list(get_worksheets_map(spreadsheet).keys())
 
+def get_cached_worksheet(title, spreadsheet=None):
+    """카탈로그에서 워크시트 객체를 찾는다. 없으면 None (spreadsheet.worksheet()와 달리 읽기 0회)."""
+    return get_worksheets_map(spreadsheet).get(title)
+
+def sheet_revision(title):
+    """시트 내용의 현재 리비전. 쓰기(invalidate_sheet_caches)마다 바뀐다."""
+    catalog = _sheet_catalog()
+    return (catalog["epoch"], catalog["revisions"].get(title, 0))
+
+def sheet_write_count(title):
+    """시트를 이름으로 지정해 무효화한 횟수(목록 전체 무효화와 무관).
+    이름을 지정한 쓰기로만 바뀌는 시트(로그 아카이브)를 오래 캐시할 때 쓴다."""
+    return _sheet_catalog()["revisions"].get(title, 0)
+
+def list_backup_sheets(kind="daily", spreadsheet=None):
+    """카탈로그 기준 일별/월별 백업 시트 메타데이터를 최신순으로 반환한다(추가 읽기 없음).
+
+    각 항목: {'title', 'date'(YYYY-MM-DD 또는 YYYY-MM), 'grid_rows'(시트 격자 행 수),
+    'rows'(마지막으로 읽은 데이터 행 수, 아직 안 읽었으면 None), 'revision'}
+    """
+    ws_map = get_worksheets_map(spreadsheet)
+    data_rows = _sheet_catalog()["data_rows"]
+    return [
+        {
+            'title': title,
+            'date': title[len(BACKUP_PREFIX):],
+            'grid_rows': getattr(ws_map[title], 'row_count', None),
+            'rows': data_rows.get(title),
+            'revision': sheet_revision(title),
+        }
+        for title in filter_backup_sheets(ws_map.keys(), kind)
+    ]
+
+def _store_values(cache, title, values):
+    cache[title] = (sheet_revision(title), values)
+    _sheet_catalog()["data_rows"][title] = max(len(values) - 1, 0)
+
+def _cached_values(cache, title):
+    entry = cache.get(title)
+    if entry is not None and entry[0] == sheet_revision(title):
+        return entry[1]
+    return None
+
 def get_sheet_values_cached(title, spreadsheet=None):
     """시트의 get_all_values() 결과를 세션에 캐시해 반환한다. 시트가 없으면 None."""
     cache = st.session_state.setdefault(_SHEET_VALUES_CACHE_KEY, {})
-    if title not in cache:
+    values = _cached_values(cache, title)
+    if values is None:
         ws = get_worksheets_map(spreadsheet).get(title)
         if ws is None:
             return None
-        cache[title] = ws.get_all_values()
-    return cache[title]
+        values = ws.get_all_values()
+        _store_values(cache, title, values)
+    return values
 
-def invalidate_sheet_caches():
-    """시트를 변경하는 쓰기 작업 후 호출해 세션 읽기 캐시를 무효화한다."""
-    st.session_state.pop(_WS_MAP_CACHE_KEY, None)
-    st.session_state.pop(_SHEET_VALUES_CACHE_KEY, None)
+def get_sheets_values_cached(titles, spreadsheet=None):
+    """여러 시트의 전체 값을 한 번의 values_batch_get 호출로 읽어 세션에 캐시한다.
+
+    기간 통계처럼 시트 여러 장이 필요할 때 시트마다 get_all_values()를 부르면
+    읽기 요청이 시트 수만큼 순차로 쌓인다. 캐시에 없는 시트만 모아 한 번에 읽는다.
+    반환: {시트명: 값 목록}. 존재하지 않는 시트는 결과에서 빠진다.
+    """
+    cache = st.session_state.setdefault(_SHEET_VALUES_CACHE_KEY, {})
+    ws_map = get_worksheets_map(spreadsheet)
+    result = {}
+    missing = []
+    for t in dict.fromkeys(titles):
+        values = _cached_values(cache, t)
+        if values is not None:
+            result[t] = values
+        elif t in ws_map:
+            missing.append(t)
+    if missing:
+        if spreadsheet is None:
+            spreadsheet = connect_to_gsheet()
+        resp = spreadsheet.values_batch_get([gspread.utils.absolute_range_name(t) for t in missing])
+        for title, value_range in zip(missing, resp.get('valueRanges', [])):
+            # batch 응답은 행 끝의 빈 칸을 잘라 보내므로 get_all_values()와 같은 모양으로 채운다
+            result[title] = gspread.utils.fill_gaps(value_range.get('values', []))
+            _store_values(cache, title, result[title])
+    return {t: result[t] for t in titles if t in result}
+
+def invalidate_sheet_caches(*titles):
+    """시트를 변경하는 쓰기 작업 후 호출해 읽기 캐시를 무효화한다.
+
+    titles를 주면 그 시트들의 리비전만 올린다(내용만 바뀐 경우).
+    인자 없이 부르면 시트 목록까지 비운다(시트 생성·삭제·이름변경, 또는 범위를 모를 때).
+    """
+    catalog = _sheet_catalog()
+    with catalog["lock"]:
+        catalog["changes"]["last_write"] = time.time()  # 앱 밖 변경 감시가 자기 쓰기를 구분하는 기준
+        if titles:
+            for title in titles:
+                catalog["revisions"][title] = catalog["revisions"].get(title, 0) + 1
+                catalog["data_rows"].pop(title, None)
+        else:
+            catalog["epoch"] += 1
+            catalog["ws_map"] = None
+            catalog["data_rows"].clear()
+    # 이 세션의 값 캐시는 리비전 비교로 자연히 무효화되지만, 목록 전체 무효화 때는 메모리도 비운다
+    if not titles:
+        st.session_state.pop(_SHEET_VALUES_CACHE_KEY, None)
 
 # --- 서식 강제 함수 ---
 def ensure_text_format(worksheet, column_name):
@@ -430,59 +913,748 @@ def find_row_by_container_no(worksheet, container_no):
     return None
 
 # --- 로그 기록 함수 (공용) ---
-def log_change(action):
+# 로그는 자유 문장(내용) 외에 유형·컨테이너 번호·시트·세션·소요시간을 칸으로 나눠 남긴다.
+# 이력 페이지가 문장을 정규식으로 훑지 않고 칸 값과 컨테이너 역색인으로 바로 찾게 하기 위함이다.
+# 유형은 내용의 앞머리(':' 앞)에서 정해지므로, 칸이 없는 예전 로그도 읽을 때 같은 규칙으로 채운다.
+_LOG_TYPE_RULES = [  # (앞머리에 포함된 단어, 유형) — 위에서부터 먼저 맞는 것
+    ('되돌리기', '되돌리기'),
+    ('정리', '정리'),
+    ('아카이브', '정리'),
+    ('이동', '이동'),
+    ('복구', '복구'),
+    ('삭제', '삭제'),
+    ('수정', '수정'),
+    ('등록', '등록'),
+    ('백업', '백업'),
+]
+LOG_TYPES = ['등록', '수정', '삭제', '백업', '복구', '되돌리기', '이동', '정리', '기타']
+LOG_TYPE_TAGS = {  # 이력 화면/CSV의 작업 유형 컬러 뱃지
+    '등록': '🟢 신규 등록',
+    '수정': '🟡 수정',
+    '삭제': '🔴 삭제',
+    '백업': '🔵 백업',
+    '복구': '🟣 복구',
+    '되돌리기': '🟠 되돌리기',
+    '이동': '🟤 이동',
+    '정리': '⚫ 정리',
+    '기타': '⚪ 기타',
+}
+_CONTAINER_NO_IN_TEXT = re.compile(r'[A-Z]{4}\d{7}')
+_LOG_SESSION_KEY = "_log_session_id"
+
+
+def classify_log_action(action):
+    """로그 내용 → 유형 (LOG_TYPES 중 하나). 예: '백업 데이터 수정: ...' → '수정'"""
+    head = str(action).split(':', 1)[0]
+    for word, kind in _LOG_TYPE_RULES:
+        if word in head:
+            return kind
+    return '기타'
+
+
+def extract_container_nos(text):
+    """문장에 들어 있는 컨테이너 번호(영문 4 + 숫자 7)를 순서대로 중복 없이 뽑는다."""
+    return list(dict.fromkeys(_CONTAINER_NO_IN_TEXT.findall(str(text))))
+
+
+def _log_session_id():
+    """로그에 남길 세션 식별자(세션마다 8자리). 여러 폰이 동시에 쓸 때 누가 한 작업인지 구분한다."""
+    if _LOG_SESSION_KEY not in st.session_state:
+        st.session_state[_LOG_SESSION_KEY] = uuid.uuid4().hex[:8]
+    return st.session_state[_LOG_SESSION_KEY]
+
+
+def make_log_row(action, kind=None, containers=None, sheet="", started=None, now=None):
+    """LOG_HEADERS 순서의 로그 행을 만든다. kind/containers를 생략하면 내용에서 뽑는다.
+    started: 작업 시작 시각(time.perf_counter()) — 주면 소요(ms)를 채운다."""
+    timestamp = (now or datetime.now(KST)).strftime(SHEET_DATETIME_FORMAT)
+    if containers is None:
+        containers = extract_container_nos(action)
+    duration = '' if started is None else int((time.perf_counter() - started) * 1000)
+    return [timestamp, action, kind or classify_log_action(action), ','.join(containers),
+            sheet, _log_session_id(), duration]
+
+
+def log_change(action, kind=None, containers=None, sheet="", started=None):
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return
     try:
         log_sheet = get_stable_worksheet(LOG_SHEET_NAME)
-        timestamp = datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
-        log_sheet.append_row([timestamp, action])
+        response = log_sheet.append_row(make_log_row(action, kind, containers, sheet, started))
+        invalidate_sheet_caches(LOG_SHEET_NAME)
+        _note_log_rows(response)
     except Exception as e:
         st.warning(f"로그 기록 중 오류 발생: {e}")
+        return
+    maybe_rotate_log()
 
-# --- 데이터 관리 함수들 (공용) ---
-def load_data_from_gsheet():
-    spreadsheet = connect_to_gsheet()
-    if spreadsheet is None:
-        return []
+
+# --- 로그 자동 이관 ---
+# 로그 행 수는 append 응답의 updatedRange('업데이트 로그'!A1201:G1201)에서 바로 알 수 있어,
+# 이관 여부를 정할 때 로그를 읽지 않는다. 기준을 넘으면 백그라운드 스레드 하나가
+# 이관을 돌린다. 관리 페이지 버튼(archive_log_sheet)과 같은 rotation["running"] 표시를
+# 쓰므로 프로세스 안에서 동시에 하나만 돈다.
+_UPDATED_RANGE_LAST_ROW = re.compile(r'(\d+)$')
+
+
+def last_row_from_append(response):
+    """append_row(s) 응답에서 마지막으로 쓰인 행 번호를 꺼낸다. 알 수 없으면 None."""
     try:
-        worksheet = get_stable_worksheet(MAIN_SHEET_NAME)
-        ensure_text_format(worksheet, '씰 번호')
-        ensure_sheet_headers(worksheet)
+        updated_range = response['updates']['updatedRange']
+    except (KeyError, TypeError):
+        return None
+    m = _UPDATED_RANGE_LAST_ROW.search(updated_range)
+    return int(m.group(1)) if m else None
 
-        all_values = worksheet.get_all_values()
-        if len(all_values) < 2:
-            return []
 
-        headers = all_values[0]
-        data = all_values[1:]
+def _note_log_rows(response):
+    last_row = last_row_from_append(response)
+    if last_row is not None:
+        _sheet_catalog()["log_rows"] = last_row
 
-        df = pd.DataFrame(data, columns=headers, dtype=str)
-        df.replace('', pd.NA, inplace=True)
 
-        if '위치' not in df.columns:
-            df['위치'] = pd.NA
+def get_log_row_count(spreadsheet=None):
+    """라이브 로그 행 수. 카탈로그에 아는 값이 있으면 읽지 않고, 없을 때만 한 번 읽는다."""
+    catalog = _sheet_catalog()
+    if catalog["log_rows"] is None:
+        catalog["log_rows"] = len(get_sheet_values_cached(LOG_SHEET_NAME, spreadsheet) or [])
+    return catalog["log_rows"]
 
-        if '등록일시' in df.columns:
-            df['등록일시'] = pd.to_datetime(df['등록일시'], errors='coerce')
-        if '완료일시' in df.columns:
-            df['완료일시'] = pd.to_datetime(df['완료일시'], errors='coerce')
 
-        if '상태' in df.columns and '완료일시' in df.columns:
-            inconsistent_rows = (df['상태'] == '선적중') & (df['완료일시'].notna())
-            df.loc[inconsistent_rows, '완료일시'] = pd.NaT
+def get_log_rotation_status():
+    """자동 이관 상태 {'running': bool, 'last': (시각, 성공여부, 결과) 또는 None}."""
+    return dict(_sheet_catalog()["rotation"])
 
-        return df.to_dict('records')
-    except gspread.exceptions.WorksheetNotFound:
-        st.error(f"'{MAIN_SHEET_NAME}' 시트를 찾을 수 없습니다.")
-        return []
-    except Exception as e:
-        st.error(f"데이터 로딩 중 오류 발생: {e}")
-        return []
+
+def maybe_rotate_log(threshold=LOG_ROTATE_THRESHOLD):
+    """라이브 로그가 threshold행을 넘었으면 백그라운드 이관을 시작한다. 시작했으면 True."""
+    catalog = _sheet_catalog()
+    if (catalog["log_rows"] or 0) <= threshold:
+        return False
+    with catalog["lock"]:
+        if catalog["rotation"]["running"]:
+            return False
+        catalog["rotation"]["running"] = True
+
+    def run():
+        try:
+            catalog["rotation"]["last"] = (datetime.now(KST).strftime(SHEET_DATETIME_FORMAT),) + \
+                tuple(_archive_log_sheet(LOG_KEEP_ROWS, threshold))
+        finally:
+            catalog["rotation"]["running"] = False
+
+    thread = threading.Thread(target=run, name="log-rotation", daemon=True)
+    # 스레드 안의 log_change/캐시 무효화가 이 세션의 session_state를 쓸 수 있게 한다
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return True
+
+
+def log_values_to_frame(values):
+    """로그 시트 값(헤더 없음) → LOG_HEADERS 열 DataFrame. 최신순 정렬, 일시는 datetime.
+
+    칸이 2개뿐인 예전 로그는 유형/컨테이너를 내용에서 채운다(고유한 앞머리만 분류).
+    일시를 읽을 수 없는 행(빈 행 등)은 버린다.
+    """
+    # 길이가 제각각인 행은 DataFrame 생성자가 한 번에 빈칸(None)으로 채운다
+    df = pd.DataFrame(values or [], dtype=str)
+    df = df.iloc[:, :len(LOG_HEADERS)].set_axis(LOG_HEADERS[:df.shape[1]], axis=1)
+    df = df.reindex(columns=LOG_HEADERS).fillna('')
+    df['일시'] = parse_sheet_datetimes(df['일시'])
+    df = df.dropna(subset=['일시'])
+    legacy = df['유형'] == ''
+    if legacy.any():
+        heads = df.loc[legacy, '내용'].str.replace(r':.*$', '', regex=True)  # ':' 앞 (열 단위 정규식)
+        codes, uniques = pd.factorize(heads)
+        kinds = pd.Series([classify_log_action(h) for h in uniques], dtype=object).to_numpy()
+        df.loc[legacy, '유형'] = kinds[codes]
+        df.loc[legacy, '컨테이너'] = df.loc[legacy, '내용'].str.findall(_CONTAINER_NO_IN_TEXT).str.join(',')
+    df['유형'] = pd.Categorical(df['유형'], categories=LOG_TYPES)
+    df['날짜'] = df['일시'].dt.normalize()  # 날짜 필터용 (재실행마다 .dt.date를 만들지 않도록 미리)
+    return df.sort_values('일시', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def build_log_index(df_log):
+    """컨테이너 번호 → 로그 행 위치(np.ndarray, 최신순) 역색인.
+    '이 컨테이너에 무슨 일이 있었나'를 전체 로그 정규식 검색 대신 사전 조회로 답한다."""
+    nos = df_log['컨테이너'].str.split(',').explode()
+    nos = nos[nos.fillna('') != '']
+    return {no: np.asarray(pos) for no, pos in nos.groupby(nos, sort=False).groups.items()} if not nos.empty else {}
+
+
+def lookup_log_rows(df_log, index, container_no):
+    """역색인으로 컨테이너 번호의 로그 행만 골라 반환한다(최신순)."""
+    positions = index.get(normalize_container_no(container_no))
+    if positions is None:
+        return df_log.iloc[0:0]
+    return df_log.iloc[np.sort(positions)]
+
+
+def load_log_frame(spreadsheet=None):
+    """업데이트 로그를 (DataFrame, 컨테이너 역색인)으로 반환한다.
+    로그 리비전 단위로 프로세스 전역 캐시하므로, 필터를 바꾸는 재실행에서는 파싱·색인을 다시 하지 않는다.
+    반환된 DataFrame은 여러 세션이 공유하므로 고치지 말고 걸러서만 쓴다."""
+    values = get_sheet_values_cached(LOG_SHEET_NAME, spreadsheet) or []
+    return _parsed_log_with_index(sheet_revision(LOG_SHEET_NAME), values)
+
+
+def filter_log_positions(df_log, index, keyword="", kind=None, start=None, end=None):
+    """이력 필터 조건에 맞는 행 위치(np.ndarray, 최신순)를 반환한다.
+
+    필터마다 DataFrame을 잘라 복사하지 않고 불리언 마스크만 겹친다. 날짜는 미리 만든
+    '날짜' 열, 유형은 범주 코드로 비교하고, 컨테이너 번호 전체는 역색인으로 찾는다.
+    그 밖의 키워드만 (다른 조건을 통과한 행에 한해) 내용 부분 문자열 검색을 한다.
+    """
+    n = len(df_log)
+    mask = np.ones(n, dtype=bool)
+    if start is not None:
+        mask &= (df_log['날짜'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df_log['날짜'] <= pd.Timestamp(end)).to_numpy()
+    if kind:
+        mask &= df_log['유형'].cat.codes.to_numpy() == LOG_TYPES.index(kind)
+    keyword = (keyword or "").strip()
+    if keyword:
+        container_no = normalize_container_no(keyword)
+        if is_valid_container_no(container_no):
+            hit = np.zeros(n, dtype=bool)
+            hit[index.get(container_no, np.empty(0, dtype=np.intp))] = True
+            mask &= hit
+        else:
+            candidates = np.flatnonzero(mask)
+            found = df_log['내용'].iloc[candidates].str.contains(keyword, regex=False, na=False).to_numpy()
+            return candidates[found]
+    return np.flatnonzero(mask)
+
+
+def count_log_types(df_log, positions):
+    """고른 행들의 유형별 건수 {유형: 건수} (범주 코드 bincount, 문자열 비교 없음)."""
+    codes = df_log['유형'].cat.codes.to_numpy()[positions]
+    counts = np.bincount(codes[codes >= 0], minlength=len(LOG_TYPES))
+    return dict(zip(LOG_TYPES, counts.tolist()))
+
+
+def log_display_frame(rows):
+    """로그 행(log_values_to_frame 결과의 일부) → 화면/CSV용 표."""
+    return pd.DataFrame({
+        '일시': rows['일시'].dt.strftime(SHEET_DATETIME_FORMAT),
+        '작업 유형': rows['유형'].map(LOG_TYPE_TAGS),
+        '내용': rows['내용'],
+        '시트': rows['시트'],
+        '세션': rows['세션'],
+    })
+
+
+def export_log_csv(df_log, positions, chunk_rows=20000):
+    """고른 로그 행을 CSV(utf-8-sig)로 내보낸다. 표시용 표를 한꺼번에 만들지 않고
+    chunk_rows씩 변환해 버퍼에 이어 쓴다. 반환: 처음으로 되감은 BytesIO."""
+    buffer = BytesIO()
+    buffer.write('\ufeff'.encode('utf-8'))
+    if len(positions) == 0:
+        buffer.write((','.join(log_display_frame(df_log.iloc[0:0]).columns) + '\n').encode('utf-8'))
+    for i in range(0, len(positions), chunk_rows):
+        chunk = log_display_frame(df_log.iloc[positions[i:i + chunk_rows]])
+        buffer.write(chunk.to_csv(index=False, header=(i == 0)).encode('utf-8'))
+    buffer.seek(0)
+    return buffer
+
+
+@st.cache_resource(max_entries=4)
+def _parsed_log_with_index(revision, _values):
+    df_log = log_values_to_frame(_values)
+    return df_log, build_log_index(df_log)
+
+
+# --- 로그 아카이브까지 합친 이력 조회 ---
+# archive_log_sheet가 오래된 로그를 '로그_YYYY-QN' 시트로 옮기므로, 이력 페이지가
+# 라이브 로그만 읽으면 예전 이력이 보이지 않는다. 아카이브 시트를 날짜 구간을 가진
+# 파티션으로 보고, 고른 기간과 겹치는 파티션만 한 번의 batch 읽기로 가져온다.
+# 아카이브는 옮겨 붙일 때 말고는 바뀌지 않으므로 파싱 결과를 프로세스 전역에 계속 둔다.
+_LOG_QUARTER_TITLE = re.compile(rf'^{LOG_ARCHIVE_PREFIX}(\d{{4}})-Q([1-4])$')
+
+
+def log_archive_partitions(sheet_titles, live_start=None):
+    """시트 제목 목록에서 로그 아카이브 파티션을 골라 날짜 구간과 함께 오래된 순으로 반환한다.
+
+    각 항목: {'title', 'start': date 또는 None, 'end': date 또는 None(열린 끝)}
+    로그는 시간순으로 옮겨지므로 한 파티션은 다음 파티션이 시작하는 날까지를, 마지막
+    파티션은 라이브 로그의 가장 오래된 날(live_start)까지를 담는다
+    (분기 이름은 첫 행 기준이라 분기 밖의 행도 들어 있을 수 있다). 이름에서 날짜를 알 수 없는
+    '로그_아카이브_…' 시트는 구간을 모르므로 start/end가 None이다(항상 포함).
+    """
+    dated, undated = [], []
+    for title in sheet_titles:
+        m = _LOG_QUARTER_TITLE.match(title)
+        if m:
+            year, quarter = int(m.group(1)), int(m.group(2))
+            dated.append({'title': title, 'start': date(year, 3 * quarter - 2, 1), 'end': None})
+        elif title.startswith(f"{LOG_ARCHIVE_PREFIX}아카이브_"):
+            undated.append({'title': title, 'start': None, 'end': None})
+    dated.sort(key=lambda p: p['start'])
+    for prev, nxt in zip(dated, dated[1:]):
+        prev['end'] = nxt['start']
+    if dated:
+        dated[-1]['end'] = live_start
+    return undated + dated
+
+
+def log_partitions_for_range(partitions, start=None, end=None):
+    """[start, end] 기간과 겹치는 파티션만 고른다(None이면 그쪽 끝은 제한 없음)."""
+    return [
+        p for p in partitions
+        if p['start'] is None
+        or ((end is None or p['start'] <= end) and (start is None or p['end'] is None or p['end'] >= start))
+    ]
+
+
+@st.cache_resource
+def _log_partition_cache():
+    """{아카이브 시트명: (쓰기 횟수, 파싱된 DataFrame)} — 프로세스 전역, 만료 없음."""
+    return {}
+
+
+@st.cache_resource(max_entries=8)
+def _combined_log(key, _frames):
+    df_log = pd.concat(_frames, ignore_index=True).sort_values('일시', ascending=False, kind='stable')
+    df_log = df_log.reset_index(drop=True)
+    return df_log, build_log_index(df_log)
+
+
+def load_log_history(start=None, end=None, spreadsheet=None):
+    """라이브 로그 + [start, end]와 겹치는 로그 아카이브를 합친 (DataFrame, 컨테이너 역색인).
+
+    캐시에 없는 아카이브 파티션만 values_batch_get 한 번으로 함께 가져온다.
+    파티션 선택은 기간만 좁힐 뿐이므로, 정확한 날짜 필터는 호출한 쪽에서 건다.
+    """
+    df_live, live_index = load_log_frame(spreadsheet)
+    live_start = df_live['일시'].min().date() if not df_live.empty else None
+    partitions = log_partitions_for_range(
+        log_archive_partitions(get_worksheet_titles(spreadsheet), live_start), start, end)
+    if not partitions:
+        return df_live, live_index
+
+    cache = _log_partition_cache()
+    stale = [p['title'] for p in partitions
+             if cache.get(p['title'], (None,))[0] != sheet_write_count(p['title'])]
+    if stale:
+        if spreadsheet is None:
+            spreadsheet = connect_to_gsheet()
+        resp = spreadsheet.values_batch_get([gspread.utils.absolute_range_name(t) for t in stale])
+        for title, value_range in zip(stale, resp.get('valueRanges', [])):
+            cache[title] = (sheet_write_count(title), log_values_to_frame(value_range.get('values', [])))
+
+    frames = [df_live] + [cache[p['title']][1] for p in partitions if p['title'] in cache]
+    key = (sheet_revision(LOG_SHEET_NAME),) + tuple((p['title'], cache[p['title']][0]) for p in partitions if p['title'] in cache)
+    return _combined_log(key, frames)
+
+# --- 데이터 관리 함수들 (공용) ---
+# --- 연결 예열 (프로세스 시작 직후) ---
+# Streamlit Cloud가 절전에서 깨어난 뒤 첫 사용자는 OAuth 토큰 교환, 스프레드시트
+# 메타데이터, 시트 목록, 현재 데이터 읽기를 모두 기다렸다. 각 페이지가 맨 앞에서
+# warm_up_connection()을 부르면, 프로세스에서 처음 한 번 백그라운드 스레드가 이 일을
+# 미리 해 두고(페이지는 그동안 import·레이아웃을 진행), 이후에는 토큰을 만료 전에
+# 갱신해 요청이 토큰 갱신을 기다리지 않게 한다.
+TOKEN_REFRESH_MARGIN = 300  # 토큰 만료 몇 초 전에 미리 갱신할지 (토큰 수명은 1시간)
+
+
+def token_refresh_delay(expiry, now, margin=TOKEN_REFRESH_MARGIN):
+    """다음 토큰 갱신까지 기다릴 초. 만료 시각을 모르면(아직 토큰 없음) 0."""
+    if expiry is None:
+        return 0.0
+    return max(0.0, (expiry - now).total_seconds() - margin)
+
+
+def _keep_token_fresh(spreadsheet, catalog):
+    """만료 margin초 전에 토큰을 갱신하는 루프(예열 스레드에서 돈다. 자기 카탈로그가 교체되면 끝난다)."""
+    state = catalog["warmup"]
+    http_client = spreadsheet.client  # gspread 6: Spreadsheet.client는 HTTPClient다
+    while _sheet_catalog() is catalog:
+        # google-auth의 expiry는 tz 없는 UTC 시각이다
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        time.sleep(max(30.0, token_refresh_delay(http_client.auth.expiry, now)))
+        if _sheet_catalog() is not catalog:  # 자는 동안 연결이 바뀌었으면 옛 클라이언트는 갱신하지 않는다
+            return
+        try:
+            http_client.login()
+            state["token_refreshed"] = datetime.now(KST).strftime(SHEET_DATETIME_FORMAT)
+            state["error"] = None
+        except Exception as e:
+            state["error"] = f"토큰 갱신 실패: {e}"  # 다음 주기에 다시 시도(요청 시 자동 갱신도 있음)
+
+
+# 앱 밖 변경 감시: 시트를 직접 고친 경우는 피드에 올라오지 않으므로, 예열 스레드 옆에서
+# FEED_POLL_SECONDS마다 스프레드시트 파일의 수정 시각(Drive 메타데이터, Sheets 쿼터 아님)을
+# 보고, 앱이 마지막으로 쓴 시각보다 EXTERNAL_CHANGE_SLACK초 넘게 뒤면 캐시를 비우고
+# 'reload'를 올린다(세션들은 공유 스냅샷 한 번 읽기로 맞춘다).
+# 앱이 쓴 직후 SLACK초 안의 앱 밖 수정은 구분하지 못한다 — 그때는 '데이터 새로고침'.
+FEED_POLL_SECONDS = 60
+EXTERNAL_CHANGE_SLACK = 10
+
+
+def drive_time_to_epoch(value):
+    """Drive의 modifiedTime('2026-05-01T01:02:03.456Z') → epoch 초."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def is_external_change(modified, last_write, last_seen, slack=EXTERNAL_CHANGE_SLACK):
+    """파일 수정 시각(modified)이 앱 밖에서 생긴 새 변경인지.
+
+    처음 본 시각(last_seen is None)은 기준으로만 삼고, 같은 수정은 한 번만 알린다.
+    """
+    if last_seen is None or modified <= last_seen:
+        return False
+    return modified > last_write + slack
+
+
+def _watch_external_changes(spreadsheet, catalog):
+    """앱 밖 변경 감시 루프(자기 카탈로그가 교체되면 끝난다)."""
+    state = catalog["changes"]
+    while _sheet_catalog() is catalog:
+        try:
+            modified = drive_time_to_epoch(spreadsheet.get_lastUpdateTime())
+            if is_external_change(modified, state["last_write"], state["modified"]):
+                invalidate_sheet_caches()
+                catalog["feed"].publish(None, change_feed.RELOAD)
+            state["modified"] = modified
+            state["checked"] = datetime.now(KST).strftime(SHEET_DATETIME_FORMAT)
+            state["error"] = None
+        except Exception as e:
+            state["error"] = f"변경 감시 실패: {e}"
+        time.sleep(FEED_POLL_SECONDS)
+
+def get_warmup_status():
+    """연결 예열 상태 {'started', 'ready_ms', 'token_refreshed', 'error'}."""
+    return dict(_sheet_catalog()["warmup"])
+
+
+def get_change_watch_status():
+    """앱 밖 변경 감시 상태 {'last_write', 'modified', 'checked', 'error'}와 피드 번호('feed_seq')."""
+    catalog = _sheet_catalog()
+    return dict(catalog["changes"], feed_seq=catalog["feed"].latest)
+
+
+def warm_up_connection():
+    """프로세스에서 처음 불릴 때 백그라운드로 연결을 예열한다. 시작했으면 True.
+
+    인증·스프레드시트 열기 → 시트 목록(카탈로그) → 고정 시트 → 현재 데이터 스냅샷
+    순으로 채운 뒤, 앱 밖 변경 감시 스레드를 띄우고 같은 스레드에서 토큰을 만료 전에 갱신한다.
+    예열이 실패하면 started를 되돌려 다음 페이지 로드가 다시 예열하게 한다.
+    """
+    catalog = _sheet_catalog()
+    with catalog["lock"]:
+        state = catalog["warmup"]
+        if state["started"]:
+            return False
+        state["started"] = True
+
+    def run():
+        started = time.perf_counter()
+        try:
+            with metrics.track_operation("예열") as op:
+                spreadsheet = connect_to_gsheet()
+                if spreadsheet is None:
+                    state["error"] = "Google Sheets 연결 실패"
+                    state["started"] = False
+                    op.fail(state["error"])
+                    return
+                get_worksheets_map(spreadsheet)
+                for title in (MAIN_SHEET_NAME, LOG_SHEET_NAME):
+                    get_stable_worksheet(title)
+                load_data_from_gsheet()
+            state["ready_ms"] = round((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            state["error"] = f"예열 실패: {e}"
+            state["started"] = False
+            return
+        watcher = threading.Thread(target=_watch_external_changes, args=(spreadsheet, catalog),
+                                   name="sheet-change-watch", daemon=True)
+        add_script_run_ctx(watcher, ctx)
+        watcher.start()
+        _keep_token_fresh(spreadsheet, catalog)
+
+    ctx = get_script_run_ctx()
+    thread = threading.Thread(target=run, name="gsheet-warmup", daemon=True)
+    add_script_run_ctx(thread, ctx)
+    thread.start()
+    return True
+
+
+# --- 현재 데이터(컨테이너 목록) 메모리 구조 ---
+# 접속한 휴대폰마다 세션이 생기고, 예전에는 세션마다 메인 시트를 읽어 dict 목록을
+# 따로 들고 있었다. 이제 메인 시트를 읽은 결과는 프로세스에 하나만 두고(불변 레코드
+# 튜플, 메인 시트 리비전 단위), 세션의 container_list는 그 튜플을 가리키기만 한다.
+# 세션에서 추가/수정/삭제하면 그때 처음으로 자기 목록(레코드 참조 배열)을 만들고,
+# 바뀐 레코드만 새 dict로 들어간다 — 나머지 레코드는 계속 공유된다.
+class ContainerRecord(Mapping):
+    """메인 시트 한 행(SHEET_HEADERS 순서의 값 튜플). 세션 간에 공유되므로 바꿀 수 없다.
+
+    dict처럼 읽고(get/[]/items), 고칠 때는 copy()로 받은 dict를 고쳐 목록에 넣는다.
+    """
+    __slots__ = ("_values",)
+    _POS = {h: i for i, h in enumerate(SHEET_HEADERS)}
+
+    def __init__(self, values):
+        self._values = tuple(values)
+
+    def __getitem__(self, key):
+        return self._values[self._POS[key]]
+
+    def __iter__(self):
+        return iter(SHEET_HEADERS)
+
+    def __len__(self):
+        return len(SHEET_HEADERS)
+
+    def __repr__(self):
+        return f"ContainerRecord({self.copy()!r})"
+
+    def copy(self):
+        return dict(zip(SHEET_HEADERS, self._values))
+
+
+def _registered_day(container):
+    ts = pd.to_datetime(container.get('등록일시'), errors='coerce')
+    return ts.date() if pd.notna(ts) else None
+
+
+class ContainerList(MutableSequence):
+    """공유 스냅샷(ContainerRecord 튜플) 위에 세션의 변경만 얹는 컨테이너 목록.
+
+    읽기만 하는 동안은 스냅샷을 그대로 가리키고, 처음 바뀔 때 참조 배열만 복사한다.
+    list처럼 쓰면 된다(append/pop/extend/인덱스 대입/슬라이스).
+
+    등록 페이지가 런마다 목록 전체를 훑지 않도록 색인도 함께 들고 있다 — 처음 조회할 때
+    한 번 만들고, 이후에는 추가/수정/삭제(선적완료·되돌리기 포함)마다 바뀐 항목만 반영한다.
+      번호(정규화) → 항목, 위치 → 그 위치의 선적중 항목, (등록일, 번호) → 항목
+    position_of가 쓰는 항목 → 목록 내 인덱스 표도 따로 들고 있다. 끝에 붙이기/끝에서 빼기/
+    제자리 대입은 바로 반영하고, 뒤 항목이 밀리는 중간 삽입·삭제 때만 비웠다가 다음 조회에서
+    한 번 다시 만든다. 여러 번호를 지울 때는 remove_nos로 한 번에 지운다.
+    """
+    __slots__ = ("_base", "_items", "_index", "_positions")
+
+    def __init__(self, base=()):
+        self._base = tuple(base)
+        self._items = None
+        self._index = None
+        self._positions = None  # id(항목) → 인덱스. None이면 다음 position_of에서 다시 만든다
+
+    def _view(self):
+        return self._base if self._items is None else self._items
+
+    def _own(self):
+        if self._items is None:
+            self._items = list(self._base)
+        return self._items
+
+    @property
+    def is_shared(self):
+        """아직 세션 변경이 없어 공유 스냅샷을 그대로 쓰는 중이면 True."""
+        return self._items is None
+
+    def __getitem__(self, index):
+        item = self._view()[index]
+        return list(item) if isinstance(index, slice) else item
+
+    def __setitem__(self, index, value):
+        items = self._own()
+        if isinstance(index, slice):
+            old, new = items[index], list(value)
+            items[index] = new
+            self._positions = None
+        else:
+            old, new = [items[index]], [value]
+            items[index] = value
+            self._move_position(old[0], value, index % len(items))
+        self._reindex(old, new)
+
+    def __delitem__(self, index):
+        items = self._own()
+        old = items[index] if isinstance(index, slice) else [items[index]]
+        at_end = not isinstance(index, slice) and index % len(items) == len(items) - 1
+        del items[index]
+        if at_end:
+            self._move_position(old[0], None, None)
+        else:
+            self._positions = None
+        self._reindex(old, [])
+
+    def __len__(self):
+        return len(self._view())
+
+    def __iter__(self):
+        return iter(self._view())
+
+    def __repr__(self):
+        return f"ContainerList({list(self._view())!r})"
+
+    def insert(self, index, value):
+        items = self._own()
+        at_end = index >= len(items)
+        items.insert(index, value)
+        if at_end:  # append
+            self._move_position(None, value, len(items) - 1)
+        else:
+            self._positions = None
+        self._reindex([], [value])
+
+    def _move_position(self, old, new, index):
+        """위치 표에서 old를 빼고 new를 index에 둔다(표가 있을 때만)."""
+        positions = self._positions
+        if positions is None:
+            return
+        if old is not None:
+            positions.pop(id(old), None)
+        if new is not None:
+            if id(new) in positions:  # 같은 항목이 두 번 들어가면 표로는 못 맞춘다
+                self._positions = None
+            else:
+                positions[id(new)] = index
+
+    # --- 색인 ---
+    def _ensure_index(self):
+        if self._index is None:
+            self._index = {"no": {}, "slot": {}, "day": {}}
+            for c in self._view():
+                self._index_add(c)
+        return self._index
+
+    @staticmethod
+    def _index_keys(c):
+        no = normalize_container_no(c.get('컨테이너 번호'))
+        pos = str(c.get('위치') or '').strip() if c.get('상태') == '선적중' else ''
+        return no, pos, _registered_day(c)
+
+    def _index_add(self, c):
+        no, pos, day = self._index_keys(c)
+        self._index["no"].setdefault(no, []).append(c)
+        if pos:
+            self._index["slot"].setdefault(pos, []).append(c)
+        if day is not None:
+            self._index["day"].setdefault((day, no), []).append(c)
+
+    def _index_discard(self, c):
+        no, pos, day = self._index_keys(c)
+        for table, key in (("no", no), ("slot", pos), ("day", (day, no))):
+            bucket = self._index[table].get(key)
+            if bucket is None:
+                continue
+            bucket[:] = [x for x in bucket if x is not c]
+            if not bucket:
+                del self._index[table][key]
+
+    def _reindex(self, removed, added):
+        if self._index is None:
+            return  # 아직 조회한 적 없으면 처음 조회할 때 만든다
+        for c in removed:
+            self._index_discard(c)
+        for c in added:
+            self._index_add(c)
+
+    def find(self, container_no):
+        """번호(공백/대소문자 무시)로 항목을 찾는다. 없으면 None."""
+        bucket = self._ensure_index()["no"].get(normalize_container_no(container_no))
+        return bucket[0] if bucket else None
+
+    def position_of(self, container_no):
+        """번호에 해당하는 항목의 목록 내 위치(인덱스). 없으면 None. 대입/삭제용."""
+        target = self.find(container_no)
+        if target is None:
+            return None
+        if self._positions is None:
+            self._positions = {}
+            for i, c in enumerate(self._view()):
+                self._positions.setdefault(id(c), i)
+        return self._positions[id(target)]
+
+    def remove_no(self, container_no):
+        """번호로 항목을 빼고 반환한다(없으면 None)."""
+        idx = self.position_of(container_no)
+        return None if idx is None else self.pop(idx)
+
+    def remove_nos(self, container_nos):
+        """번호들(공백/대소문자 무시)의 항목을 목록을 한 번만 훑어 모두 뺀다. 반환: 뺀 항목 목록."""
+        targets = {normalize_container_no(no) for no in container_nos}
+        if not targets & self._ensure_index()["no"].keys():
+            return []
+        removed = [c for bucket in (self._index["no"].get(no, ()) for no in targets) for c in bucket]
+        gone = {id(c) for c in removed}
+        items = self._own()
+        items[:] = [c for c in items if id(c) not in gone]
+        self._positions = None
+        self._reindex(removed, [])
+        return removed
+
+    def slot_occupants(self, pos):
+        """해당 위치의 선적중 항목 목록(목록 순서). 복원 슬롯은 여러 개일 수 있다."""
+        return list(self._ensure_index()["slot"].get(str(pos).strip(), []))
+
+    def occupied_slots(self, exclude=None):
+        """선적중 항목이 차지한 위치 집합. exclude 번호의 항목은 빼고 센다(자기 자리 이동 검사용)."""
+        slots = self._ensure_index()["slot"]
+        skip = normalize_container_no(exclude) if exclude else None
+        return {pos for pos, bucket in slots.items()
+                if any(normalize_container_no(c.get('컨테이너 번호')) != skip for c in bucket)}
+
+    def registered_on(self, day, container_no):
+        """day에 등록된 같은 번호의 항목(없으면 None) — find_same_day_duplicate의 색인 경로."""
+        bucket = self._ensure_index()["day"].get((day, normalize_container_no(container_no)))
+        return bucket[0] if bucket else None
+
+
+def main_values_to_records(values):
+    """메인 시트 get_all_values() 결과 → ContainerRecord 튜플.
+    빈 칸은 pd.NA, 등록/완료일시는 Timestamp로 바꾸고, 선적중인데 완료일시가 있는 행은 비운다."""
+    if len(values) < 2:
+        return ()
+    df = pd.DataFrame(values[1:], columns=values[0], dtype=str)
+    df = df.reindex(columns=SHEET_HEADERS)
+    df.replace('', pd.NA, inplace=True)
+    df['등록일시'] = pd.to_datetime(df['등록일시'], errors='coerce')
+    df['완료일시'] = pd.to_datetime(df['완료일시'], errors='coerce')
+    inconsistent_rows = (df['상태'] == '선적중') & (df['완료일시'].notna())
+    df.loc[inconsistent_rows, '완료일시'] = pd.NaT
+    return tuple(ContainerRecord(row) for row in df.astype(object).itertuples(index=False, name=None))
+
+
+def load_data_from_gsheet(refresh=False):
+    """메인 시트의 컨테이너 목록(ContainerList)을 반환한다.
+
+    다른 세션이 같은 리비전의 메인 시트를 이미 읽었으면 그 스냅샷을 공유한다(읽기 없음).
+    refresh=True면 앱 밖에서 바뀌었을 수 있는 시트를 다시 읽어 스냅샷을 교체한다.
+    """
+    catalog = _sheet_catalog()
+    # 예열 스레드가 읽는 중이면 기다렸다가 그 결과를 쓴다(같은 시트를 두 번 읽지 않도록)
+    with catalog["snapshot_lock"]:
+        revision = sheet_revision(MAIN_SHEET_NAME)
+        snapshot = catalog["main_snapshot"]
+        if not refresh and snapshot is not None and snapshot[0] == revision:
+            return ContainerList(snapshot[1])
+
+        spreadsheet = connect_to_gsheet()
+        if spreadsheet is None:
+            return ContainerList()
+        try:
+            worksheet = get_stable_worksheet(MAIN_SHEET_NAME)
+            ensure_text_format(worksheet, '씰 번호')
+            ensure_sheet_headers(worksheet)
+
+            records = main_values_to_records(worksheet.get_all_values())
+            with catalog["lock"]:
+                catalog["main_snapshot"] = (revision, records)
+            if refresh:  # 앱 밖 변경을 읽어 왔을 수 있다 → 다른 세션도 이 스냅샷으로 맞춘다
+                catalog["feed"].publish(MAIN_SHEET_NAME, change_feed.RELOAD)
+            return ContainerList(records)
+        except gspread.exceptions.WorksheetNotFound:
+            st.error(f"'{MAIN_SHEET_NAME}' 시트를 찾을 수 없습니다.")
+            return ContainerList()
+        except Exception as e:
+            st.error(f"데이터 로딩 중 오류 발생: {e}")
+            return ContainerList()
 
 
 def add_row_to_gsheet(data):
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
@@ -507,15 +1679,17 @@ def add_row_to_gsheet(data):
             for header in SHEET_HEADERS
         ]
         worksheet.append_row(row_to_insert, value_input_option='USER_ENTERED')
-        log_change(f"신규 등록: {data_copy.get('컨테이너 번호')}")
-        invalidate_sheet_caches()
+        log_change(f"신규 등록: {data_copy.get('컨테이너 번호')}", sheet=MAIN_SHEET_NAME, started=started)
+        invalidate_sheet_caches(MAIN_SHEET_NAME)
+        publish_main_rows([row_to_insert])
         return True, "성공"
     except Exception as e:
         return False, str(e)
 
 
-def add_rows_to_gsheet_batch(data_list):
-    """여러 행을 한 번의 API 호출로 일괄 추가 (복구 시 사용)"""
+def add_rows_to_gsheet_batch(data_list, action="일괄 복구"):
+    """여러 행을 한 번의 API 호출로 일괄 추가 (복구·일괄 등록 시 사용). action은 로그 앞머리."""
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
@@ -545,14 +1719,99 @@ def add_rows_to_gsheet_batch(data_list):
             container_nos.append(data_copy.get('컨테이너 번호', ''))
 
         worksheet.append_rows(rows_to_insert, value_input_option='USER_ENTERED')
-        log_change(f"일괄 복구: {len(data_list)}개 ({', '.join(container_nos)})")
-        invalidate_sheet_caches()
+        log_change(f"{action}: {len(data_list)}개 ({', '.join(container_nos)})",
+                   containers=container_nos, sheet=MAIN_SHEET_NAME, started=started)
+        invalidate_sheet_caches(MAIN_SHEET_NAME)
+        publish_main_rows(rows_to_insert)
         return True, "성공"
     except Exception as e:
         return False, str(e)
 
 
-def update_row_in_gsheet(data):
+# --- 낙관적 동시성: 행 내용 버전 ---
+# 두 기기가 같은 컨테이너를 고치면 나중 저장이 먼저 저장을 말없이 덮어썼다(세션 목록은
+# 페이지를 처음 열 때 읽은 그대로라 낡아 있다). 시트에 버전 칸을 따로 두지 않고 행 내용의
+# 해시를 버전으로 써서, 저장 직전에 그 행만 다시 읽어 세션이 본 내용(base)과 비교한다.
+# 다르면 쓰지 않고 지금 행을 돌려주므로 세션은 목록 전체를 다시 읽지 않고 그 행만 바꾼다.
+# Sheets API에는 조건부 쓰기가 없어 확인과 쓰기 사이에 틈이 남는데, 같은 서버 프로세스의
+# 세션끼리는 row_lock으로 확인~쓰기를 한 번에 하나씩 하게 해 그 틈을 막는다.
+def record_version(record):
+    """컨테이너 한 행의 내용 버전(시트에 저장되는 글자 기준의 짧은 해시).
+
+    같은 행이면 시트에서 읽은 ContainerRecord든 세션이 고친 dict든 같은 값이 나온다
+    (빈 칸/NaN/None은 '', 일시는 SHEET_DATETIME_FORMAT).
+    """
+    parts = []
+    for header in SHEET_HEADERS:
+        value = record.get(header)
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            parts.append('')
+        elif isinstance(value, (datetime, pd.Timestamp)):
+            parts.append(value.strftime(SHEET_DATETIME_FORMAT))
+        else:
+            parts.append(str(value).strip())
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class RowConflict(str):
+    """조건부 수정이 거절됐을 때의 안내 문구. (False, 메시지)의 메시지 자리에 그대로 쓰인다.
+
+    current: 지금 시트의 그 행(ContainerRecord). 다른 기기에서 지웠으면 None.
+    """
+    current = None
+
+    def __new__(cls, message, current=None):
+        conflict = super().__new__(cls, message)
+        conflict.current = current
+        return conflict
+
+
+def apply_row_conflict(container_list, index, conflict):
+    """충돌 응답으로 세션 목록의 그 행만 지금 시트 내용으로 바꾼다(지워졌으면 뺀다)."""
+    if conflict.current is None:
+        del container_list[index]
+    else:
+        container_list[index] = conflict.current
+
+
+def _row_hint(container_no):
+    """공유 스냅샷에서의 순서로 짐작한 행 번호(1-based). 스냅샷에 없으면 None."""
+    snapshot = _sheet_catalog()["main_snapshot"]
+    if snapshot is None:
+        return None
+    for i, record in enumerate(snapshot[1]):
+        if record['컨테이너 번호'] == container_no:
+            return i + 2
+    return None
+
+
+def read_container_row(worksheet, container_no):
+    """컨테이너의 (행 번호, 지금 행 ContainerRecord). 시트에 없으면 (None, None).
+
+    스냅샷으로 짐작한 행 하나만 읽어(1회) 번호가 맞으면 그대로 쓰고, 다른 기기의 추가·삭제로
+    밀렸으면 A열로 다시 찾아 그 행을 읽는다(2회).
+    """
+    def to_record(row):  # row_values는 뒤쪽 빈 칸을 잘라 돌려준다
+        return main_values_to_records([SHEET_HEADERS, (row + [''] * len(SHEET_HEADERS))[:len(SHEET_HEADERS)]])[0]
+
+    hint = _row_hint(container_no)
+    if hint is not None:
+        row = worksheet.row_values(hint)
+        if row and row[0] == container_no:
+            return hint, to_record(row)
+    row_num = find_row_by_container_no(worksheet, container_no)
+    if row_num is None:
+        return None, None
+    return row_num, to_record(worksheet.row_values(row_num))
+
+
+def update_row_in_gsheet(data, base=None):
+    """메인 시트에서 data의 컨테이너 행(A~H)을 data로 덮어쓴다.
+
+    base(세션이 고치기 전에 본 행)를 주면 조건부로 쓴다: 그 사이 다른 기기가 행을 바꿨거나
+    지웠으면 쓰지 않고 (False, RowConflict)를 돌려준다(RowConflict.current = 지금 행).
+    """
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
@@ -561,47 +1820,65 @@ def update_row_in_gsheet(data):
         ensure_text_format(worksheet, '씰 번호')
         ensure_sheet_headers(worksheet)
         container_no = data.get('컨테이너 번호')
-        row_num = find_row_by_container_no(worksheet, container_no)
-        if row_num is None:
-            return False, f"'{container_no}' 컨테이너를 시트에서 찾을 수 없습니다. '데이터 새로고침' 후 다시 시도해주세요."
-
-        data_copy = data.copy()
-        # NaT는 datetime의 서브클래스라 strftime에서 죽으므로 isna를 먼저 거른다
-        if data_copy.get('등록일시') is None or pd.isna(data_copy.get('등록일시')):
-            data_copy['등록일시'] = ''
-        elif isinstance(data_copy.get('등록일시'), (datetime, pd.Timestamp)):
-            data_copy['등록일시'] = pd.to_datetime(data_copy['등록일시']).strftime('%Y-%m-%d %H:%M:%S')
-
-        if data_copy.get('완료일시') is None or pd.isna(data_copy.get('완료일시')):
-            data_copy['완료일시'] = ''
-        elif isinstance(data_copy.get('완료일시'), (datetime, pd.Timestamp)):
-            data_copy['완료일시'] = pd.to_datetime(data_copy['완료일시']).strftime('%Y-%m-%d %H:%M:%S')
-
-        row_to_update = [
-            force_text_seal(data_copy.get(header, "")) if header == '씰 번호'
-            else data_copy.get(header, "")
-            for header in SHEET_HEADERS
-        ]
-        worksheet.update(f'A{row_num}:{_last_col_letter()}{row_num}', [row_to_update], value_input_option='USER_ENTERED')
-        log_change(f"데이터 수정: {container_no}")
-        invalidate_sheet_caches()
+        with _sheet_catalog()["row_lock"]:
+            if base is None:
+                row_num = find_row_by_container_no(worksheet, container_no)
+            else:
+                row_num, current = read_container_row(worksheet, container_no)
+                if row_num is None:
+                    return False, RowConflict(f"'{container_no}'은(는) 다른 기기에서 삭제(선적완료)되었습니다.")
+                if record_version(current) != record_version(base):
+                    return False, RowConflict(f"'{container_no}'을(를) 다른 기기에서 먼저 수정했습니다. "
+                                              "바뀐 내용을 불러왔으니 확인 후 다시 저장해주세요.", current)
+            if row_num is None:
+                return False, f"'{container_no}' 컨테이너를 시트에서 찾을 수 없습니다. '데이터 새로고침' 후 다시 시도해주세요."
+            row = _write_main_row(worksheet, row_num, data)
+        log_change(f"데이터 수정: {container_no}", containers=[container_no], sheet=MAIN_SHEET_NAME, started=started)
+        invalidate_sheet_caches(MAIN_SHEET_NAME)
+        publish_main_rows([row])
         return True, "성공"
     except Exception as e:
         return False, str(e)
 
 
+def _write_main_row(worksheet, row_num, data):
+    """data를 저장 형식으로 바꿔 메인 시트 row_num행(A~H)에 쓰고, 쓴 값 목록을 돌려준다."""
+    data_copy = data.copy()
+    # NaT는 datetime의 서브클래스라 strftime에서 죽으므로 isna를 먼저 거른다
+    if data_copy.get('등록일시') is None or pd.isna(data_copy.get('등록일시')):
+        data_copy['등록일시'] = ''
+    elif isinstance(data_copy.get('등록일시'), (datetime, pd.Timestamp)):
+        data_copy['등록일시'] = pd.to_datetime(data_copy['등록일시']).strftime('%Y-%m-%d %H:%M:%S')
+
+    if data_copy.get('완료일시') is None or pd.isna(data_copy.get('완료일시')):
+        data_copy['완료일시'] = ''
+    elif isinstance(data_copy.get('완료일시'), (datetime, pd.Timestamp)):
+        data_copy['완료일시'] = pd.to_datetime(data_copy['완료일시']).strftime('%Y-%m-%d %H:%M:%S')
+
+    row_to_update = [
+        force_text_seal(data_copy.get(header, "")) if header == '씰 번호'
+        else data_copy.get(header, "")
+        for header in SHEET_HEADERS
+    ]
+    worksheet.update(f'A{row_num}:{_last_col_letter()}{row_num}', [row_to_update], value_input_option='USER_ENTERED')
+    return row_to_update
+
+
 def delete_row_from_gsheet(container_no):
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
     try:
         worksheet = get_stable_worksheet(MAIN_SHEET_NAME)
-        row_num = find_row_by_container_no(worksheet, container_no)
-        if row_num is None:
-            return False, f"'{container_no}' 컨테이너를 시트에서 찾을 수 없습니다. '데이터 새로고침' 후 다시 시도해주세요."
-        worksheet.delete_rows(row_num)
-        log_change(f"데이터 삭제: {container_no}")
-        invalidate_sheet_caches()
+        with _sheet_catalog()["row_lock"]:  # 찾은 행 번호가 삭제 전에 밀리지 않도록
+            row_num = find_row_by_container_no(worksheet, container_no)
+            if row_num is None:
+                return False, f"'{container_no}' 컨테이너를 시트에서 찾을 수 없습니다. '데이터 새로고침' 후 다시 시도해주세요."
+            worksheet.delete_rows(row_num)
+        log_change(f"데이터 삭제: {container_no}", containers=[container_no], sheet=MAIN_SHEET_NAME, started=started)
+        invalidate_sheet_caches(MAIN_SHEET_NAME)
+        publish_main_deletes([container_no])
         return True, "성공"
     except Exception as e:
         return False, str(e)
@@ -613,46 +1890,149 @@ def delete_rows_by_container_nos(container_nos):
     행마다 삭제 API를 호출하던 방식(N개 → 2N회 호출)을 2회 호출로 줄여
     백업 정리 시 gspread 분당 쿼터 초과 위험을 없앤다.
     """
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
     try:
         worksheet = get_stable_worksheet(MAIN_SHEET_NAME)
         target = set(container_nos)
-        col_values = worksheet.col_values(1)  # A열 한 번만 읽기
-        # 0-based 행 인덱스(헤더=0). 삭제 시 인덱스가 밀리므로 내림차순으로 처리해야 안전.
-        row_indices = sorted(
-            [i for i, val in enumerate(col_values) if val in target],
-            reverse=True
-        )
-        if not row_indices:
-            return True, 0
-
-        requests = [
-            {
-                "deleteDimension": {
-                    "range": {
-                        "sheetId": worksheet.id,
-                        "dimension": "ROWS",
-                        "startIndex": idx,      # 0-based, 포함
-                        "endIndex": idx + 1,    # 미포함
+        with _sheet_catalog()["row_lock"]:  # 읽은 행 번호가 삭제 전에 밀리지 않도록
+            col_values = worksheet.col_values(1)  # A열 한 번만 읽기
+            # 0-based 행 인덱스(헤더=0). 삭제 시 인덱스가 밀리므로 내림차순으로 처리해야 안전.
+            row_indices = sorted(
+                [i for i, val in enumerate(col_values) if val in target],
+                reverse=True
+            )
+            if not row_indices:
+                return True, 0
+
+            requests = [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": worksheet.id,
+                            "dimension": "ROWS",
+                            "startIndex": idx,      # 0-based, 포함
+                            "endIndex": idx + 1,    # 미포함
+                        }
                     }
                 }
-            }
-            for idx in row_indices
-        ]
-        spreadsheet.batch_update({"requests": requests})
-        log_change(f"데이터 삭제(일괄): {len(row_indices)}개 ({', '.join(container_nos)})")
-        invalidate_sheet_caches()
+                for idx in row_indices
+            ]
+            spreadsheet.batch_update({"requests": requests})
+        log_change(f"데이터 삭제(일괄): {len(row_indices)}개 ({', '.join(container_nos)})",
+                   containers=container_nos, sheet=MAIN_SHEET_NAME, started=started)
+        invalidate_sheet_caches(MAIN_SHEET_NAME)
+        publish_main_deletes({col_values[i] for i in row_indices})
         return True, len(row_indices)
     except Exception as e:
         return False, str(e)
 
 
+# --- 세션 사이 변경 전파 (change_feed) ---
+# 세션의 container_list는 처음 읽은 스냅샷 위에 자기 변경만 얹은 것이라, 다른 기기가 등록·
+# 수정·선적완료한 내용은 '데이터 새로고침' 전까지 보이지 않았다. 메인 시트 쓰기 함수는 쓴
+# 행을 프로세스 피드에 올리고(무효화 뒤에 올려야 그 사이 읽은 세션도 델타를 놓치지 않는다),
+# 페이지의 보이지 않는 조각이 FEED_SYNC_SECONDS마다 그 델타만 자기 목록에 반영한다(시트 읽기 0회).
+# 델타로 맞출 수 없을 때(피드를 놓침, 앱 밖 변경)만 공유 스냅샷으로 다시 읽는다.
+FEED_SYNC_SECONDS = 5
+_FEED_SEQ_KEY = "_feed_seq"
+_DIALOG_OPEN_KEY = "_dialog_open"
+
+
+def stored_main_record(row):
+    """메인 시트에 쓴 값 목록 → 다시 읽었을 때와 같은 ContainerRecord(씰 번호의 작은따옴표 제거)."""
+    values = [str(v)[1:] if str(v).startswith("'") else v for v in row]
+    return main_values_to_records([SHEET_HEADERS, values])[0]
+
+
+def publish_main_rows(rows):
+    """메인 시트에 추가하거나 덮어쓴 행들을 피드에 올린다."""
+    feed = _sheet_catalog()["feed"]
+    for row in rows:
+        record = stored_main_record(row)
+        feed.publish(MAIN_SHEET_NAME, change_feed.UPSERT, record['컨테이너 번호'], record)
+
+
+def publish_main_deletes(container_nos):
+    """메인 시트에서 지운 컨테이너 번호들을 피드에 올린다."""
+    feed = _sheet_catalog()["feed"]
+    for container_no in container_nos:
+        feed.publish(MAIN_SHEET_NAME, change_feed.DELETE, container_no)
+
+
+def apply_main_changes(container_list, upserts, deletes):
+    """피드 델타를 세션 목록에 반영한다. 실제로 바뀐 항목이 있으면 True.
+
+    이미 같은 내용이면 건드리지 않으므로 자기 세션이 올린 이벤트를 다시 받아도 그대로다.
+    """
+    changed = bool(container_list.remove_nos(deletes))
+    for container_no, record in upserts.items():
+        idx = container_list.position_of(container_no)
+        if idx is None:
+            container_list.append(record)
+            changed = True
+        elif record_version(container_list[idx]) != record_version(record):
+            container_list[idx] = record
+            changed = True
+    return changed
+
+
+def sync_container_list(refresh=False):
+    """세션의 container_list를 피드에 맞춘다. 목록이 바뀌었으면 True.
+
+    처음이거나, 피드를 놓쳤거나, 다시 읽으라는 이벤트가 있으면 load_data_from_gsheet()로
+    읽고(같은 리비전이면 다른 세션의 스냅샷 공유), 아니면 마지막으로 본 번호 뒤의 델타만 반영한다.
+    refresh=True는 '데이터 새로고침' 버튼용(시트를 다시 읽는다).
+    """
+    feed = _sheet_catalog()["feed"]
+    latest = feed.latest  # 읽기 전에 잡아 둔다: 읽는 동안 올라온 이벤트는 다음에 다시 받는다
+    events = None
+    if not refresh and 'container_list' in st.session_state:
+        events = feed.since(st.session_state.get(_FEED_SEQ_KEY))
+    changes = None if events is None else change_feed.net_changes(events, MAIN_SHEET_NAME)
+    if changes is None:
+        st.session_state.container_list = load_data_from_gsheet(refresh=refresh)
+        st.session_state[_FEED_SEQ_KEY] = latest
+        return True
+    if not events:
+        return False
+    st.session_state[_FEED_SEQ_KEY] = events[-1]["seq"]
+    return apply_main_changes(st.session_state.container_list, *changes)
+
+
+def mark_dialog_open():
+    """팝업(st.dialog) 본문 첫 줄에서 부른다. 열려 있는 동안 피드 반영이 전체 rerun으로 팝업을 닫지 않게 한다."""
+    st.session_state[_DIALOG_OPEN_KEY] = True
+
+
+def follow_change_feed():
+    """다른 기기의 변경을 주기적으로 받아 오는 보이지 않는 조각을 페이지에 둔다(팝업 호출보다 먼저).
+
+    전체 런마다 팝업 표시를 지운다 — 이번 런에서도 열려 있는 팝업은 본문에서 다시 표시한다.
+    """
+    st.session_state.pop(_DIALOG_OPEN_KEY, None)
+    _follow_changes()
+
+
+@st.fragment(run_every=FEED_SYNC_SECONDS)
+def _follow_changes():
+    # 바뀐 게 없으면 이 조각만 돌고 끝난다(표·폼은 다시 그리지 않음). 팝업이 열려 있으면
+    # 목록만 고쳐 두고, 팝업이 닫히며 일어나는 다음 전체 런에서 보이게 한다.
+    # 전체 런 안에서(페이지가 이 조각을 바로 부를 때)는 다시 실행하지 않는다: 그 런을 일으킨
+    # 버튼·폼 제출이 버려지고, 페이지의 나머지가 어차피 맞춘 목록으로 그려진다.
+    if sync_container_list() and not st.session_state.get(_DIALOG_OPEN_KEY):
+        ctx = get_script_run_ctx()
+        if ctx is not None and ctx.fragment_ids_this_run:
+            st.rerun()
+
+
 def delete_from_backup_sheets(container_nos, source_sheet_name):
     """복구된 컨테이너를 해당 일별/월별 백업 시트에서만 삭제
     source_sheet_name: 복구한 시트명 (예: 백업_2025-04-25 또는 백업_2025-04)
     """
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
@@ -704,11 +2084,18 @@ def delete_from_backup_sheets(container_nos, source_sheet_name):
                     ws.delete_rows(row_num)
                     total_deleted += 1
 
+                if rows_to_delete and len(sheet_name) == len(BACKUP_PREFIX) + 7:
+                    # 월별 시트가 바뀌었으면 이미 읽어둔 값에서 지운 행만 빼고 집계를 갱신한다
+                    deleted = set(rows_to_delete)
+                    remaining = [headers] + [row for i, row in enumerate(all_values[1:]) if i + 2 not in deleted]
+                    sync_month_backup(sheet_name[len(BACKUP_PREFIX):], backup_values_to_frame(remaining), spreadsheet)
+
             except Exception:
                 continue
 
-        log_change(f"백업 시트 정리: {len(container_nos)}개 복구 후 {target_sheets}에서 {total_deleted}행 삭제")
-        invalidate_sheet_caches()
+        log_change(f"백업 시트 정리: {len(container_nos)}개 복구 후 {target_sheets}에서 {total_deleted}행 삭제",
+                   containers=list(container_nos), sheet=source_sheet_name, started=started)
+        invalidate_sheet_caches(*target_sheets)
         return True, total_deleted
 
     except Exception as e:
@@ -722,6 +2109,7 @@ def update_row_in_backup_sheets(data, source_sheet_name):
     source_sheet_name: 복구 중인 시트명 (예: 백업_2025-04-25 또는 백업_2025-04)
     대상 시트 결정 규칙은 delete_from_backup_sheets와 동일하다.
     """
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
@@ -777,14 +2165,168 @@ def update_row_in_backup_sheets(data, source_sheet_name):
 
         if updated_count == 0:
             return False, f"'{container_no}'를 백업 시트에서 찾을 수 없습니다."
+        sync_month_backup(date_part[:7], spreadsheet=spreadsheet)
 
-        log_change(f"백업 데이터 수정: {container_no} ({', '.join(target_sheets)})")
-        invalidate_sheet_caches()
+        log_change(f"백업 데이터 수정: {container_no} ({', '.join(target_sheets)})",
+                   containers=[container_no], sheet=source_sheet_name, started=started)
+        invalidate_sheet_caches(*target_sheets)
         return True, updated_count
     except Exception as e:
         return False, str(e)
 
 
+# --- 월별 백업 파생 데이터: 통계 집계 시트 + 로컬 아카이브 (공용) ---
+# 통계 페이지가 매번 월별 백업(최대 1000행)을 통째로 읽어 groupby/pivot 하지 않도록,
+# 월별 백업을 쓰는 함수들이 같은 달의 '통계_YYYY-MM' 집계표와 로컬 Parquet
+# 아카이브(backup_archive)를 함께 갱신한다. 둘 다 쓰기 직후 메모리에 있는 월별
+# 데이터로 다시 만들므로 추가 읽기가 없다 (메모리에 없는 경우에만 월별 시트를 1회 읽는다).
+def sync_month_backup(month_str, frame=None, spreadsheet=None):
+    """월별 백업 내용으로 '통계_YYYY-MM' 집계 시트와 로컬 아카이브를 다시 쓰고 집계 DataFrame을 반환한다.
+
+    frame: 쓰기 직후의 월별 백업 전체(SHEET_HEADERS 열). None이면 월별 시트를 읽어 만든다.
+    갱신 실패는 백업 자체를 실패시키지 않도록 경고만 띄우고 None을 반환한다
+    (통계 페이지의 '집계 다시 만들기'로 복구할 수 있다).
+    """
+    if spreadsheet is None:
+        spreadsheet = connect_to_gsheet()
+    if spreadsheet is None:
+        return None
+    stats_name = f"{STATS_PREFIX}{month_str}"
+    try:
+        if frame is None:
+            month_ws = get_cached_worksheet(f"{BACKUP_PREFIX}{month_str}", spreadsheet)
+            values = month_ws.get_all_values() if month_ws is not None else []
+            frame = backup_values_to_frame(values) if len(values) > 1 else pd.DataFrame(columns=SHEET_HEADERS)
+        try:
+            backup_archive.write_month(month_str, frame)
+        except Exception as e:
+            # 아카이브는 시트에서 다시 만들 수 있는 로컬 캐시라 집계 갱신은 계속하되,
+            # 디스크 부족·pyarrow 오류로 갱신이 멈춘 걸 알 수 있게 남긴다
+            logger.warning("로컬 아카이브 %s 쓰기 실패: %s", month_str, e)
+            st.warning(f"로컬 아카이브({month_str}) 갱신 중 오류 발생: {e} "
+                       f"(통계 페이지의 '로컬 아카이브 채우기'로 다시 만들 수 있습니다)")
+        stats = compute_backup_stats(frame)
+        rows = [STATS_HEADERS] + stats.values.tolist()
+        stats_sheet = get_cached_worksheet(stats_name, spreadsheet)
+        created = stats_sheet is None
+        if created:
+            # 카탈로그에 없을 때만 실제 목록을 확인한다(다른 기기가 방금 만들었을 수 있음)
+            try:
+                stats_sheet = spreadsheet.worksheet(stats_name)
+            except gspread.exceptions.WorksheetNotFound:
+                stats_sheet = spreadsheet.add_worksheet(title=stats_name, rows=len(rows) + 50, cols=len(STATS_HEADERS))
+        if len(rows) > stats_sheet.row_count:
+            stats_sheet.add_rows(len(rows) - stats_sheet.row_count)
+        # clear() 없이 한 번의 쓰기로 끝내려고, 이전 집계가 더 길었을 때 남는 행은 빈 값으로 덮는다
+        # (row_count는 시트 메타데이터라 읽기 요청 없이 알 수 있다)
+        blank = [''] * len(STATS_HEADERS)
+        rows += [blank] * (stats_sheet.row_count - len(rows))
+        stats_sheet.update('A1', rows, value_input_option='RAW')
+        if created:
+            invalidate_sheet_caches()  # 시트 목록이 바뀌었다
+        else:
+            invalidate_sheet_caches(stats_name)
+        return stats
+    except Exception as e:
+        st.warning(f"'{stats_name}' 통계 집계 갱신 중 오류 발생: {e}")
+        return None
+
+
+def load_month_stats(month_str, spreadsheet=None):
+    """'통계_YYYY-MM' 집계표를 읽는다. 아직 없으면(집계 도입 전의 달) 월별 백업으로 한 번 만든다."""
+    values = get_sheet_values_cached(f"{STATS_PREFIX}{month_str}", spreadsheet)
+    if values is not None:
+        return stats_values_to_frame(values)
+    stats = sync_month_backup(month_str, spreadsheet=spreadsheet)
+    return stats if stats is not None else pd.DataFrame(columns=STATS_HEADERS)
+
+
+def filter_stats_days(df_stats, start_day=None, end_day=None):
+    """집계표를 완료일 start_day ~ end_day('YYYY-MM-DD', 양끝 포함)로 좁힌다.
+
+    둘 다 None이면 그대로 돌려준다. 날짜로 좁히면 완료일이 빈 행(완료일시 없이 선적완료된
+    행)은 어느 날에도 속하지 않으므로 빠진다.
+    """
+    if start_day is None and end_day is None:
+        return df_stats
+    days = df_stats['완료일']
+    keep = days != ''
+    if start_day is not None:
+        keep &= days >= start_day
+    if end_day is not None:
+        keep &= days <= end_day
+    return df_stats[keep].reset_index(drop=True)
+
+
+def load_stats_range(month_strs, spreadsheet=None, start_day=None, end_day=None):
+    """여러 달의 (완료일, 출고처) 집계를 '월' 열을 붙여 하나로 합친다.
+
+    로컬 아카이브에 있는 달은 Sheets를 전혀 읽지 않고 아카이브에서 선적완료 행의
+    필요한 열만 골라 집계한다. 나머지 달은 '통계_' 집계표를 한 번의 batch 읽기로
+    가져오고, 집계 시트가 아직 없는 달만 월별 백업으로 만들어 채운다(그 달에 한해 1회).
+    start_day/end_day를 주면 첫 달·마지막 달의 일부만 보도록 완료일로 좁힌다(filter_stats_days).
+    """
+    archived = set(backup_archive.archived_months())
+    local = [m for m in month_strs if m in archived]
+    remote = [m for m in month_strs if m not in archived]
+    frames = []
+    if local:
+        rows = backup_archive.read_archive(
+            months=local, columns=['출고처', '피트수', '상태', '완료일시'],
+            filters=[('상태', '=', '선적완료')],
+        )
+        for month_str, group in rows.groupby(backup_archive.PARTITION_KEY):
+            frames.append(compute_backup_stats(group).assign(월=month_str))
+    values_by_title = get_sheets_values_cached([f"{STATS_PREFIX}{m}" for m in remote], spreadsheet) if remote else {}
+    for month_str in remote:
+        values = values_by_title.get(f"{STATS_PREFIX}{month_str}")
+        if values is not None:
+            stats = stats_values_to_frame(values)
+        else:
+            stats = sync_month_backup(month_str, spreadsheet=spreadsheet)
+        if stats is not None and not stats.empty:
+            frames.append(stats.assign(월=month_str))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=STATS_HEADERS + ['월'])
+    merged = pd.concat(frames, ignore_index=True).sort_values(['월', '완료일', '출고처'], ignore_index=True)
+    return filter_stats_days(merged, start_day, end_day)
+
+
+def fill_backup_archive(month_strs, spreadsheet=None):
+    """로컬 아카이브에 없는 달의 월별 백업 원본을 한 번의 batch 읽기로 가져와 채운다.
+
+    재부팅으로 아카이브가 비었을 때 기간 분석을 다시 Sheets 없이 돌리기 위한 용도.
+    반환: (성공여부, 채운 월 목록 / 오류 메시지)
+    """
+    try:
+        archived = set(backup_archive.archived_months())
+        missing = [m for m in month_strs if m not in archived]
+        if not missing:
+            return True, []
+        if spreadsheet is None:
+            spreadsheet = connect_to_gsheet()
+        if spreadsheet is None:
+            return False, "Google Sheets에 연결되지 않았습니다."
+        titles = [f"{BACKUP_PREFIX}{m}" for m in missing]
+        ws_map = get_worksheets_map(spreadsheet)
+        titles = [t for t in titles if t in ws_map]
+        if not titles:
+            return True, []
+        resp = spreadsheet.values_batch_get([gspread.utils.absolute_range_name(t) for t in titles])
+        filled = []
+        for title, value_range in zip(titles, resp.get('valueRanges', [])):
+            values = gspread.utils.fill_gaps(value_range.get('values', []))
+            if len(values) < 2:
+                continue
+            month_str = title[len(BACKUP_PREFIX):]
+            backup_archive.write_month(month_str, backup_values_to_frame(values))
+            filled.append(month_str)
+        return True, filled
+    except Exception as e:
+        return False, str(e)
+
+
 def backup_data_to_new_sheet(container_data):
     """컨테이너를 일별/월별 백업 시트에 기록한다.
 
@@ -827,7 +2369,8 @@ def backup_data_to_new_sheet(container_data):
                 backup_sheet.update('A1', [SHEET_HEADERS] + df_final.values.tolist(), value_input_option='USER_ENTERED')
                 if dup_nos:
                     overwritten.extend(dup_nos)
-                    log_change(f"백업 덮어쓰기: {', '.join(dup_nos)} ({daily_backup_name})")
+                    log_change(f"백업 덮어쓰기: {', '.join(dup_nos)} ({daily_backup_name})",
+                               containers=dup_nos, sheet=daily_backup_name)
             else:
                 # 헤더만 있거나 빈 시트인 경우 A1부터 명시적으로 덮어쓰기
                 backup_sheet.update('A1', [SHEET_HEADERS] + df_new.values.tolist(), value_input_option='USER_ENTERED')
@@ -841,6 +2384,7 @@ def backup_data_to_new_sheet(container_data):
         # --- 2. 월별 통합 백업 (Monthly Aggregation) ---
         month_str = kst_now.date().strftime('%Y-%m')
         monthly_backup_name = f"{BACKUP_PREFIX}{month_str}"
+        month_df = df_new  # 쓰기 후 월별 시트 전체 내용 (통계 집계 갱신용)
         try:
             backup_sheet = spreadsheet.worksheet(monthly_backup_name)
             ensure_text_format(backup_sheet, '씰 번호')
@@ -848,14 +2392,15 @@ def backup_data_to_new_sheet(container_data):
             if len(existing_values) > 1:
                 existing_df = backup_values_to_frame(existing_values)
                 dup_nos = overlapping_container_nos(existing_df, df_new)
+                month_df = merge_backup_frames(existing_df, df_new)
                 if dup_nos:
                     # 같은 번호가 이미 있으면 일별 백업과 똑같이 새 기록으로 덮어쓴다.
                     # (예전에는 새 기록을 버려서 일별엔 최신, 월별엔 옛 기록이 남아 두 시트가 어긋났다)
-                    df_final = merge_backup_frames(existing_df, df_new)
                     backup_sheet.clear()
-                    backup_sheet.update('A1', [SHEET_HEADERS] + df_final.values.tolist(), value_input_option='USER_ENTERED')
+                    backup_sheet.update('A1', [SHEET_HEADERS] + month_df.values.tolist(), value_input_option='USER_ENTERED')
                     overwritten.extend(dup_nos)
-                    log_change(f"백업 덮어쓰기: {', '.join(dup_nos)} ({monthly_backup_name})")
+                    log_change(f"백업 덮어쓰기: {', '.join(dup_nos)} ({monthly_backup_name})",
+                               containers=dup_nos, sheet=monthly_backup_name)
                 elif not df_new.empty:
                     # 중복이 없으면 전체 재작성 없이 덧붙인다 (월별 시트는 크므로 쓰기 비용 절약)
                     backup_sheet.append_rows(df_new.values.tolist(), value_input_option='USER_ENTERED')
@@ -869,12 +2414,14 @@ def backup_data_to_new_sheet(container_data):
             if not df_new.empty:
                 new_sheet.update('A2', df_new.values.tolist(), value_input_option='USER_ENTERED')
 
+        sync_month_backup(month_str, month_df, spreadsheet)
         invalidate_sheet_caches()
         return True, sorted(set(overwritten))
     except Exception as e:
         return False, str(e)
 
 
+@metrics.tracked("백업 이동")
 def move_containers_between_backup_sheets(container_nos, source_sheet_name, target_date_str, update_completion_date):
     """백업 시트 간 컨테이너 데이터 이동
     
@@ -883,6 +2430,7 @@ def move_containers_between_backup_sheets(container_nos, source_sheet_name, targ
     target_date_str: 대상 날짜 문자열 (예: 2025-04-27)
     update_completion_date: True면 완료일시를 target_date로 수정
     """
+    started = time.perf_counter()
     spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
@@ -992,8 +2540,15 @@ def move_containers_between_backup_sheets(container_nos, source_sheet_name, targ
                             if len(row) > m_col_idx and row[m_col_idx] in container_nos_set:
                                 monthly_ws.update_cell(i + 2, m_done_idx + 1, f"{target_date_str} 00:00:00")
 
+        # 이동은 원본·대상 월 두 달의 완료일/건수를 바꿀 수 있으므로 둘 다 집계를 갱신한다
+        # (같은 달 안에서 완료일시도 그대로면 월별 내용이 바뀌지 않아 건너뛴다)
+        if source_monthly_name != target_monthly_name or update_completion_date:
+            for month_str in dict.fromkeys([source_month_str, target_month_str]):
+                sync_month_backup(month_str, spreadsheet=spreadsheet)
+
         log_change(f"백업 이동: {container_nos} → '{source_sheet_name}'에서 '{target_daily_name}'으로 이동" +
-                   (" (완료일시 수정)" if update_completion_date else ""))
+                   (" (완료일시 수정)" if update_completion_date else ""),
+                   containers=list(container_nos), sheet=source_sheet_name, started=started)
         invalidate_sheet_caches()
         return True, len(rows_to_move)
 
@@ -1001,83 +2556,496 @@ def move_containers_between_backup_sheets(container_nos, source_sheet_name, targ
         return False, str(e)
 
 
-def cleanup_old_daily_sheets(months=3):
-    """3개월 이상 된 일별 백업 시트 삭제 (월별 시트는 보존)"""
-    spreadsheet = connect_to_gsheet()
+# --- 백업 보존 정책 (일별 백업 정리) ---
+# 일별 백업은 월별 백업의 부분 집합이라 일정 기간이 지나면 지운다(월별 시트는 보존).
+# 어떤 시트를 지울지는 카탈로그의 시트 목록만으로 정하고(읽기 없음), 지우기 전에
+# 일별에만 있고 월별에 없는 행을 월별 시트와 로컬 아카이브로 옮긴 뒤(압축),
+# 만료 시트 전부를 deleteSheet 요청 하나의 batch_update로 지운다.
+DAILY_RETENTION_MONTHS = 3
+RETENTION_RETRY_SECONDS = 600  # 자동 정리가 실패하면 이만큼 기다린 뒤 다시 시도한다
+
+
+def expired_daily_sheets(sheet_titles, today, months=DAILY_RETENTION_MONTHS):
+    """보존 기간(months×30일)이 지난 일별 백업 시트 목록(오래된 순)."""
+    cutoff = today - timedelta(days=months * 30)
+    expired = []
+    for title in filter_backup_sheets(sheet_titles, "daily"):
+        try:
+            if datetime.strptime(title[len(BACKUP_PREFIX):], '%Y-%m-%d').date() < cutoff:
+                expired.append(title)
+        except ValueError:
+            continue
+    return sorted(expired)
+
+
+def rows_missing_from_month(daily_values, monthly_values):
+    """일별 백업 값 중 월별 백업에 없는 컨테이너 행만 SHEET_HEADERS 순서로 반환한다."""
+    if len(daily_values or []) < 2:
+        return []
+    df_daily = backup_values_to_frame(daily_values)
+    monthly_nos = set(backup_values_to_frame(monthly_values)['컨테이너 번호']) if len(monthly_values or []) >= 2 else set()
+    return df_daily[~df_daily['컨테이너 번호'].isin(monthly_nos)].values.tolist()
+
+
+def _compact_daily_into_monthly(expired, spreadsheet):
+    """만료된 일별 시트를 지우기 전에 월별 시트/로컬 아카이브에 빠진 행을 채운다.
+    일별·월별 시트를 한 번의 batch 읽기로 가져온다. 반환: 옮긴 행 수."""
+    months = sorted({title[len(BACKUP_PREFIX):len(BACKUP_PREFIX) + 7] for title in expired})
+    monthly_titles = [f"{BACKUP_PREFIX}{m}" for m in months]
+    values_by_title = get_sheets_values_cached(list(expired) + monthly_titles, spreadsheet)
+    archived = set(backup_archive.archived_months())
+    moved = 0
+    for month_str, monthly_title in zip(months, monthly_titles):
+        monthly_values = values_by_title.get(monthly_title) or []
+        daily_rows = []
+        for title in expired:  # 오래된 순이라 같은 컨테이너는 나중 날짜가 남는다
+            if title[len(BACKUP_PREFIX):].startswith(month_str):
+                daily_rows += rows_missing_from_month(values_by_title.get(title), monthly_values)
+        missing = (pd.DataFrame(daily_rows, columns=SHEET_HEADERS)
+                   .drop_duplicates(subset=['컨테이너 번호'], keep='last').values.tolist())
+        if missing:
+            monthly_ws = get_cached_worksheet(monthly_title, spreadsheet)
+            if monthly_ws is None:
+                monthly_ws = spreadsheet.add_worksheet(title=monthly_title, rows=len(missing) + 100, cols=len(SHEET_HEADERS))
+                monthly_ws.update('A1', [SHEET_HEADERS] + missing, value_input_option='USER_ENTERED')
+                monthly_values = [SHEET_HEADERS]
+            else:
+                monthly_ws.append_rows(missing, value_input_option='USER_ENTERED')
+            moved += len(missing)
+        if missing or month_str not in archived:
+            merged = (backup_values_to_frame(monthly_values) if len(monthly_values) >= 2
+                      else pd.DataFrame(columns=SHEET_HEADERS))
+            if missing:
+                merged = merge_backup_frames(merged, pd.DataFrame(missing, columns=SHEET_HEADERS))
+            sync_month_backup(month_str, merged, spreadsheet)
+    return moved
+
+
+def cleanup_old_daily_sheets(months=DAILY_RETENTION_MONTHS, compact=True, spreadsheet=None):
+    """보존 기간이 지난 일별 백업 시트를 삭제한다 (월별 시트는 보존). 관리 페이지 버튼이 쓴다.
+
+    compact=True면 지우기 전에 일별에만 있는 행을 월별 백업·로컬 아카이브로 옮긴다.
+    자동 정리(maybe_run_retention)와 같은 카탈로그 retention["running"] 표시를 잡고 실행한다.
+    두 정리가 겹치면 압축 행이 두 번 붙고, 한쪽의 deleteSheet가 이미 지운 시트에서 실패한다.
+    반환: (성공여부, 삭제한 시트명 목록 또는 오류/안내 메시지)
+    """
+    catalog = _sheet_catalog()
+    with catalog["lock"]:
+        if catalog["retention"]["running"]:
+            return False, "일별 백업 정리가 이미 진행 중입니다. 잠시 후 다시 시도하세요."
+        catalog["retention"]["running"] = True
+    try:
+        return _cleanup_old_daily_sheets(months, compact, spreadsheet)
+    finally:
+        catalog["retention"]["running"] = False
+
+
+@metrics.tracked("백업 정리")
+def _cleanup_old_daily_sheets(months, compact, spreadsheet=None):
+    """cleanup_old_daily_sheets의 본체. 호출한 쪽이 retention["running"]을 잡고 있어야 한다."""
+    started = time.perf_counter()
+    if spreadsheet is None:
+        spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
     try:
-        cutoff_date = datetime.now(KST).date() - timedelta(days=months * 30)
+        ws_map = get_worksheets_map(spreadsheet)
+        expired = expired_daily_sheets(ws_map.keys(), datetime.now(KST).date(), months)
+        if not expired:
+            return True, []
+
+        moved = _compact_daily_into_monthly(expired, spreadsheet) if compact else 0
+        spreadsheet.batch_update({'requests': [
+            {'deleteSheet': {'sheetId': ws_map[title].id}} for title in expired
+        ]})
+        invalidate_sheet_caches()
+        log_change(f"일별 백업 정리: {len(expired)}개 시트 삭제 ({', '.join(expired)})"
+                   + (f", 월별 백업에 없던 {moved}행 이관" if moved else ""), kind='정리', started=started)
+        return True, expired
 
-        all_sheets = [s.title for s in spreadsheet.worksheets()]
-        # 일별 시트만 대상: 백업_YYYY-MM-DD
-        daily_sheets = filter_backup_sheets(all_sheets, "daily")
+    except Exception as e:
+        return False, str(e)
 
-        deleted_sheets = []
-        for sheet_name in daily_sheets:
-            date_part = sheet_name.replace(BACKUP_PREFIX, '')
-            try:
-                sheet_date = datetime.strptime(date_part, '%Y-%m-%d').date()
-                if sheet_date < cutoff_date:
-                    spreadsheet.del_worksheet(spreadsheet.worksheet(sheet_name))
-                    deleted_sheets.append(sheet_name)
-            except ValueError:
-                continue
 
-        if deleted_sheets:
-            log_change(f"일별 백업 정리: {len(deleted_sheets)}개 시트 삭제 ({', '.join(deleted_sheets)})")
-            invalidate_sheet_caches()
+def get_retention_status():
+    """자동 보존 정리 상태 {'running', 'last_day', 'retry_at', 'last': (시각, 성공여부, 결과) 또는 None}."""
+    return dict(_sheet_catalog()["retention"])
+
+
+def maybe_run_retention(months=DAILY_RETENTION_MONTHS):
+    """오늘 아직 보존 정리를 마치지 않았으면 백그라운드로 한 번 실행한다. 시작했으면 True.
+    만료 시트가 없으면 카탈로그 목록만 보고 끝나므로(읽기·쓰기 없음) 페이지마다 불러도 된다.
+    last_day는 정리가 성공했을 때만 오늘로 바꾼다. 실패하면(429 등) RETENTION_RETRY_SECONDS 뒤
+    다음 페이지 로드에서 다시 시도한다."""
+    catalog = _sheet_catalog()
+    today = datetime.now(KST).date()
+    with catalog["lock"]:
+        state = catalog["retention"]
+        if state["running"] or state["last_day"] == today:
+            return False
+        if state["retry_at"] is not None and time.monotonic() < state["retry_at"]:
+            return False
+        state["running"] = True
+
+    def run():
+        ok = False
+        try:
+            result = _cleanup_old_daily_sheets(months, True)
+            state["last"] = (datetime.now(KST).strftime(SHEET_DATETIME_FORMAT),) + tuple(result)
+            ok = result[0]
+        finally:
+            with catalog["lock"]:
+                if ok:
+                    state["last_day"], state["retry_at"] = today, None
+                else:
+                    state["retry_at"] = time.monotonic() + RETENTION_RETRY_SECONDS
+                state["running"] = False
+
+    thread = threading.Thread(target=run, name="backup-retention", daemon=True)
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return True
+
+
+# --- 백업 무결성 점검 (일별 ↔ 월별) ---
+# backup_data_to_new_sheet는 일별·월별 시트를 같은 규칙으로 함께 쓰지만, 백업 이동처럼
+# 두 시트를 따로 고치는 경로가 있어 어긋나도 알 수 없었다. 모든 백업 시트를 몇 번의
+# values_batch_get으로 읽고, 달마다 '그달 일별 시트를 날짜순으로 합친 결과'(= 월별 시트가
+# 가져야 할 내용)와 월별 시트를 컨테이너 번호별 행 해시로 비교한다. 일별 시트가 기준이다.
+BACKUP_SCAN_BATCH = 50  # values_batch_get 한 번에 읽을 시트 수 (범위가 URL에 실리므로 너무 키우지 않는다)
+BACKUP_ISSUE_TYPES = ['불일치', '월별 누락', '일별 누락', '중복', '체크디지트']
+BACKUP_ISSUE_COLUMNS = ['유형', '시트', '컨테이너 번호', '내용']
+
+
+def _backup_rows_frame(values_by_title):
+    """{백업 시트명: 값} → 모든 행을 담은 DataFrame (SHEET_HEADERS + '시트', '월', '일별', '해시').
+
+    열 맞춤·씰 번호 규칙은 backup_values_to_frame과 같지만, 시트 수백 장을 시트마다
+    DataFrame으로 만들면 그 비용이 점검 전체보다 커서 행을 모아 한 번에 만든다.
+    """
+    titles, body = [], []
+    for title in sorted(values_by_title):  # 제목순 = 날짜순 (같은 달의 일별 시트끼리)
+        values = values_by_title[title]
+        if len(values or []) < 2:
+            continue
+        header = list(values[0])
+        if header[:len(SHEET_HEADERS)] == SHEET_HEADERS:
+            picked = [list(r[:len(SHEET_HEADERS)]) + [""] * (len(SHEET_HEADERS) - len(r)) for r in values[1:]]
+        else:
+            where = [header.index(c) if c in header else None for c in SHEET_HEADERS]
+            picked = [[r[i] if i is not None and i < len(r) else "" for i in where] for r in values[1:]]
+        body += picked
+        titles += [title] * len(picked)
+    if not body:
+        return pd.DataFrame(columns=SHEET_HEADERS + ['시트', '월', '일별', '해시']).astype({'일별': bool, '해시': 'uint64'})
+    rows = pd.DataFrame(body, columns=SHEET_HEADERS, dtype=object)
+    rows['씰 번호'] = [force_text_seal(v) for v in rows['씰 번호']]
+    rows['시트'] = titles
+    rows['컨테이너 번호'] = rows['컨테이너 번호'].str.strip()
+    suffix = rows['시트'].str[len(BACKUP_PREFIX):]
+    rows['월'] = suffix.str[:7]
+    rows['일별'] = suffix.str.len() == 10
+    rows['해시'] = pd.util.hash_pandas_object(rows[SHEET_HEADERS], index=False).to_numpy()
+    return rows
+
+
+def _expected_monthly_rows(rows):
+    """일별 행을 달마다 합쳐 월별 시트가 가져야 할 행(번호당 가장 늦은 날짜의 행)을 만든다."""
+    daily = rows[rows['일별']]
+    return daily.drop_duplicates(subset=['월', '컨테이너 번호'], keep='last')
+
+
+def scan_backup_integrity(values_by_title, today, months=DAILY_RETENTION_MONTHS):
+    """백업 시트 값들을 점검해 문제 목록(BACKUP_ISSUE_COLUMNS DataFrame)을 반환한다.
+
+    유형
+      불일치     : 일별·월별에 모두 있는데 내용이 다름 (내용 = 기준 일별 시트와 다른 열)
+      월별 누락  : 그달 일별 시트에는 있는데 월별 시트에 없음
+      일별 누락  : 월별 시트에만 있음. 완료일이 보존 기간(months×30일) 안이라 일별 시트가
+                   아직 남아 있어야 하는 행만 센다(정리된 일별 시트의 행은 정상)
+      중복       : 한 시트 안에 같은 번호가 여러 행
+      체크디지트 : ISO 6346 체크디지트가 맞지 않는 번호
+    """
+    rows = _backup_rows_frame(values_by_title)
+    issues = []
+
+    same_sheet = rows[rows.duplicated(subset=['시트', '컨테이너 번호'], keep=False)]
+    for (sheet, no), count in same_sheet.groupby(['시트', '컨테이너 번호'], sort=False).size().items():
+        issues.append(('중복', sheet, no, f"{count}행"))
+
+    numbers = rows['컨테이너 번호'].unique()
+    bad = {no for no, ok in zip(numbers, check_digit_matches(numbers)) if not ok}
+    flagged = rows.loc[rows['컨테이너 번호'].isin(bad), ['시트', '컨테이너 번호']].drop_duplicates()
+    for sheet, no in flagged.itertuples(index=False):
+        issues.append(('체크디지트', sheet, no, "체크디지트 불일치" if re.fullmatch(r"[A-Z]{4}\d{7}", no) else "번호 형식 오류"))
+
+    monthly = rows[~rows['일별']].drop_duplicates(subset=['월', '컨테이너 번호'], keep='last')
+    paired = _expected_monthly_rows(rows).merge(monthly, on=['월', '컨테이너 번호'], how='outer',
+                                                suffixes=('_일별', '_월별'), indicator=True)
+    changed = paired[(paired['_merge'] == 'both') & (paired['해시_일별'] != paired['해시_월별'])]
+    for rec in changed.to_dict('records'):
+        columns = [c for c in SHEET_HEADERS[1:] if rec[f"{c}_일별"] != rec[f"{c}_월별"]]
+        issues.append(('불일치', rec['시트_월별'], rec['컨테이너 번호'],
+                       f"{rec['시트_일별']}와 다름: {', '.join(columns)}"))
+    for rec in paired[paired['_merge'] == 'left_only'].to_dict('records'):
+        issues.append(('월별 누락', f"{BACKUP_PREFIX}{rec['월']}", rec['컨테이너 번호'], f"{rec['시트_일별']}에만 있음"))
+    cutoff = (today - timedelta(days=months * 30)).isoformat()
+    monthly_only = paired[(paired['_merge'] == 'right_only') & (paired['완료일시_월별'].str[:10] >= cutoff)]
+    for rec in monthly_only.to_dict('records'):
+        issues.append(('일별 누락', rec['시트_월별'], rec['컨테이너 번호'],
+                       f"{BACKUP_PREFIX}{rec['완료일시_월별'][:10]}에 없음"))
+
+    issues = pd.DataFrame(issues, columns=BACKUP_ISSUE_COLUMNS)
+    issues['유형'] = pd.Categorical(issues['유형'], categories=BACKUP_ISSUE_TYPES, ordered=True)
+    return issues.sort_values(['유형', '시트', '컨테이너 번호'], kind='stable').reset_index(drop=True)
+
+
+def _values_checksum(values):
+    """시트 값 목록의 해시. 점검 뒤 시트가 바뀌었는지 적용 직전에 비교한다."""
+    return hashlib.sha256(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def backup_repair_plan(values_by_title):
+    """일별 시트를 기준으로 다시 써야 할 백업 시트와 그 내용을 만든다.
+
+    - 한 시트 안의 중복 번호는 마지막 행만 남긴다 (merge_backup_frames와 같은 규칙)
+    - 월별 시트는 불일치 행을 그달 일별 행으로 바꾸고(자리는 유지), 빠진 행을 뒤에 붙인다
+    월별에만 있는 행과 체크디지트 오류는 어느 쪽이 맞는지 알 수 없어 손대지 않는다(보고만).
+    반환: [{'sheet', 'rows'(헤더 포함 전체 값), 'old_size'(지금 값의 (행, 열) 수),
+            'checksum'(점검한 값의 해시, 적용 직전 다시 읽어 비교), 'reason'}] (시트명순)
+    """
+    rows = _backup_rows_frame(values_by_title)
+    expected = _expected_monthly_rows(rows).set_index(['월', '컨테이너 번호'])
+    plan = []
+    repeated = set(rows.loc[rows.duplicated(subset=['시트', '컨테이너 번호']), '시트'])
+    for sheet, group in rows[~rows['일별'] | rows['시트'].isin(repeated)].groupby('시트', sort=True):
+        current = group.drop_duplicates(subset=['컨테이너 번호'], keep='last')
+        reasons = [f"중복 {len(group) - len(current)}행 제거"] if len(current) < len(group) else []
+        fixed = current.set_index(['월', '컨테이너 번호'])
+        if not group['일별'].iat[0]:
+            month = group['월'].iat[0]
+            wanted = expected.loc[expected.index.get_level_values('월') == month]
+            common = fixed.index.intersection(wanted.index)
+            stale = common[fixed.loc[common, '해시'].to_numpy() != wanted.loc[common, '해시'].to_numpy()]
+            if len(stale):
+                fixed.loc[stale, SHEET_HEADERS[1:]] = wanted.loc[stale, SHEET_HEADERS[1:]].to_numpy()
+                reasons.append(f"불일치 {len(stale)}행 교체")
+            missing = wanted.index.difference(fixed.index, sort=False)
+            if len(missing):
+                fixed = pd.concat([fixed, wanted.loc[missing]])
+                reasons.append(f"누락 {len(missing)}행 추가")
+        if reasons:
+            body = fixed.reset_index()[SHEET_HEADERS].values.tolist()
+            values = values_by_title[sheet]
+            plan.append({'sheet': sheet, 'rows': [SHEET_HEADERS] + body,
+                         'old_size': (len(values), max(map(len, values), default=0)),
+                         'checksum': _values_checksum(values), 'reason': ", ".join(reasons)})
+    # 일별 시트가 아직 없는 달의 월별 시트는 위 groupby에 없으므로 따로 만든다
+    missing_months = sorted(set(expected.index.get_level_values('월')) - set(rows.loc[~rows['일별'], '월']))
+    for month in missing_months:
+        sheet = f"{BACKUP_PREFIX}{month}"
+        if sheet in values_by_title:  # 시트는 있지만 헤더뿐인 경우만 다시 쓴다
+            body = expected.loc[month].reset_index()[SHEET_HEADERS].values.tolist()
+            values = values_by_title[sheet]
+            plan.append({'sheet': sheet, 'rows': [SHEET_HEADERS] + body,
+                         'old_size': (len(values), max(map(len, values), default=0)),
+                         'checksum': _values_checksum(values), 'reason': f"누락 {len(body)}행 추가"})
+    return sorted(plan, key=lambda item: item['sheet'])
+
+
+def load_all_backup_values(spreadsheet=None, batch=BACKUP_SCAN_BATCH):
+    """모든 일별·월별 백업 시트 값을 batch장씩 values_batch_get으로 읽는다(세션 캐시 사용).
+    반환: {시트명: 값 목록}"""
+    ws_map = get_worksheets_map(spreadsheet)
+    titles = sorted(filter_backup_sheets(ws_map.keys(), "daily") + filter_backup_sheets(ws_map.keys(), "monthly"))
+    values_by_title = {}
+    for i in range(0, len(titles), batch):
+        values_by_title.update(get_sheets_values_cached(titles[i:i + batch], spreadsheet))
+    return values_by_title
+
+
+@metrics.tracked("백업 점검")
+def check_backup_integrity(months=DAILY_RETENTION_MONTHS, spreadsheet=None):
+    """백업 시트 전체를 읽어 점검한다.
+    반환: (성공여부, {'sheets', 'rows', 'issues', 'plan'} 또는 오류 메시지)"""
+    if spreadsheet is None:
+        spreadsheet = connect_to_gsheet()
+    if spreadsheet is None:
+        return False, "Google Sheets에 연결되지 않았습니다."
+    try:
+        values_by_title = load_all_backup_values(spreadsheet)
+        return True, {
+            'sheets': len(values_by_title),
+            'rows': sum(max(len(v) - 1, 0) for v in values_by_title.values()),
+            'issues': scan_backup_integrity(values_by_title, datetime.now(KST).date(), months),
+            'plan': backup_repair_plan(values_by_title),
+        }
+    except Exception as e:
+        return False, str(e)
 
-        return True, deleted_sheets
 
+@metrics.tracked("백업 복구")
+def apply_backup_repair_plan(plan, spreadsheet=None):
+    """backup_repair_plan 결과를 시트에 쓴다.
+
+    계획은 점검 때의 값으로 만들어졌으므로, 먼저 계획한 시트들을 values_batch_get 한 번으로
+    다시 읽어 점검 때와 같은지(행 수·해시) 확인한다. 그사이 백업이 붙는 등 하나라도 바뀌었으면
+    아무것도 쓰지 않고 다시 점검하라고 돌려준다(옛 내용으로 새 행을 덮지 않도록).
+    쓰기는 시트마다 clear + update를 부르지 않고, 모자란 격자 행 늘리기(appendDimension)
+    batch_update 1회 + 모든 시트의 값 쓰기 values_batch_update 1회로 끝낸다. 예전 내용이 더
+    길면 남는 칸은 빈 값으로 덮는다. 바뀐 월별 시트는 쓴 뒤 다시 읽은 값으로 통계 집계·로컬
+    아카이브를 다시 만든다.
+    반환: (성공여부, 다시 쓴 시트명 목록 또는 오류 메시지)
+    """
+    started = time.perf_counter()
+    if not plan:
+        return True, []
+    if spreadsheet is None:
+        spreadsheet = connect_to_gsheet()
+    if spreadsheet is None:
+        return False, "Google Sheets에 연결되지 않았습니다."
+    try:
+        ws_map = get_worksheets_map(spreadsheet)
+        titles = [item['sheet'] for item in plan]
+        missing = [t for t in titles if t not in ws_map]
+        if missing:
+            return False, f"'{', '.join(missing)}' 시트를 찾을 수 없습니다. 다시 점검해 주세요."
+        resp = spreadsheet.values_batch_get([gspread.utils.absolute_range_name(t) for t in titles])
+        current = [gspread.utils.fill_gaps(r.get('values', [])) for r in resp.get('valueRanges', [])]
+        changed = [item['sheet'] for item, values in zip(plan, current)
+                   if len(values) != item['old_size'][0] or _values_checksum(values) != item['checksum']]
+        if changed:
+            return False, f"점검 뒤 바뀐 시트가 있어 적용하지 않았습니다 ({', '.join(changed)}). 다시 점검해 주세요."
+
+        grow, data = [], []
+        for item in plan:
+            ws = ws_map[item['sheet']]
+            old_rows, old_cols = item['old_size']
+            height, width = max(len(item['rows']), old_rows), max(len(SHEET_HEADERS), old_cols)
+            if height > ws.row_count:
+                grow.append({'appendDimension': {'sheetId': ws.id, 'dimension': 'ROWS',
+                                                 'length': height - ws.row_count}})
+            values = [list(r) + [''] * (width - len(r)) for r in item['rows']]
+            values += [[''] * width] * (height - len(values))
+            data.append({'range': gspread.utils.absolute_range_name(
+                             item['sheet'], f"A1:{gspread.utils.rowcol_to_a1(height, width)}"),
+                         'values': values})
+        if grow:
+            spreadsheet.batch_update({'requests': grow})
+        spreadsheet.values_batch_update({'valueInputOption': 'USER_ENTERED', 'data': data})
+
+        invalidate_sheet_caches(*titles)
+        monthly = [t for t in titles if len(t) == len(BACKUP_PREFIX) + 7]
+        for title, values in get_sheets_values_cached(monthly, spreadsheet).items():
+            frame = backup_values_to_frame(values) if len(values) >= 2 else pd.DataFrame(columns=SHEET_HEADERS)
+            sync_month_backup(title[len(BACKUP_PREFIX):], frame, spreadsheet)
+        log_change(f"백업 점검 정리: {len(titles)}개 시트 다시 쓰기 ("
+                   + "; ".join(f"{item['sheet']} {item['reason']}" for item in plan) + ")",
+                   kind='정리', started=started)
+        return True, titles
     except Exception as e:
         return False, str(e)
 
 
-def archive_log_sheet(keep_rows=200):
-    """로그 시트가 1000행 초과 시 오래된 로그를 분기별 아카이브 시트로 이관"""
-    spreadsheet = connect_to_gsheet()
+def split_log_rows_by_quarter(rows):
+    """이관할 로그 행을 분기별 아카이브 시트 이름으로 나눈다(시간순 유지).
+    반환: [(시트명, 행 목록), ...]. 일시를 읽을 수 없는 행은 바로 앞 행의 분기로 보내고,
+    맨 앞부터 읽을 수 없으면 '로그_아카이브_오늘날짜'로 보낸다."""
+    groups = []
+    current = f"{LOG_ARCHIVE_PREFIX}아카이브_{datetime.now(KST).strftime('%Y%m%d')}"
+    for row in rows:
+        try:
+            day = datetime.strptime(str(row[0])[:10], '%Y-%m-%d')
+            current = f"{LOG_ARCHIVE_PREFIX}{day.year}-Q{(day.month - 1) // 3 + 1}"
+        except (ValueError, IndexError):
+            pass
+        if groups and groups[-1][0] == current:
+            groups[-1][1].append(row)
+        else:
+            groups.append((current, [row]))
+    return groups
+
+
+def archive_log_sheet(keep_rows=LOG_KEEP_ROWS, threshold=LOG_ROTATE_THRESHOLD, spreadsheet=None):
+    """로그 시트가 threshold행을 넘으면 최근 keep_rows행만 남기고 오래된 로그를 분기별
+    아카이브 시트(로그_YYYY-QN)로 옮긴다. 관리 페이지 버튼이 쓴다.
+
+    자동 이관(maybe_rotate_log)과 같은 카탈로그 rotation["running"] 표시를 잡고 실행한다.
+    두 이관이 겹치면 같은 로그를 두 번 아카이브에 붙이고, 두 번째 deleteDimension이
+    남겨야 할 행까지 지우기 때문이다. 이미 진행 중이면 아무것도 하지 않는다.
+    반환: (성공여부, (시트명 목록 문자열, 옮긴 행 수) 또는 안내 메시지)
+    """
+    catalog = _sheet_catalog()
+    with catalog["lock"]:
+        if catalog["rotation"]["running"]:
+            return False, "로그 이관이 이미 진행 중입니다. 잠시 후 다시 시도하세요."
+        catalog["rotation"]["running"] = True
+    try:
+        return _archive_log_sheet(keep_rows, threshold, spreadsheet)
+    finally:
+        catalog["rotation"]["running"] = False
+
+
+@metrics.tracked("로그 이관")
+def _archive_log_sheet(keep_rows, threshold, spreadsheet=None):
+    """archive_log_sheet의 본체. 호출한 쪽이 rotation["running"]을 잡고 있어야 한다.
+
+    - 로그는 표시를 잡은 뒤에 읽으므로, 지울 범위(앞쪽 N행)는 이 읽기의 행 수로 정한다.
+      다른 쓰기는 로그 끝에 붙기만 하므로 읽은 뒤 붙은 행은 범위 밖에 남는다.
+    - 옮길 행은 분기별로 나눠 기존 시트에는 append_rows로 붙이고, 없으면 새로 만든다.
+    - 라이브 로그는 clear 후 다시 쓰지 않고 옮긴 앞쪽 행만 deleteDimension 한 번으로 지운다.
+      로그가 잠깐이라도 비지 않고, 이관 중에 뒤에 붙은 새 로그도 그대로 남는다.
+    - 파티션별 행 수는 카탈로그에 남겨 다음 판단 때 다시 읽지 않는다.
+    """
+    started = time.perf_counter()
+    if spreadsheet is None:
+        spreadsheet = connect_to_gsheet()
     if spreadsheet is None:
         return False, "Google Sheets에 연결되지 않았습니다."
+    catalog = _sheet_catalog()
     try:
-        log_sheet = get_stable_worksheet(LOG_SHEET_NAME)
+        log_sheet = get_cached_worksheet(LOG_SHEET_NAME, spreadsheet)
         all_values = log_sheet.get_all_values()
         total_rows = len(all_values)
+        catalog["log_rows"] = total_rows
 
-        if total_rows <= 1000:
-            return False, f"현재 {total_rows}행으로 아카이브 기준(1000행) 미만입니다."
+        if total_rows <= threshold:
+            return False, f"현재 {total_rows}행으로 아카이브 기준({threshold}행) 미만입니다."
 
         # 이관할 행: 최근 keep_rows행을 제외한 나머지
         rows_to_archive = all_values[:total_rows - keep_rows]
-        rows_to_keep = all_values[total_rows - keep_rows:]
-
         if not rows_to_archive:
             return False, "이관할 데이터가 없습니다."
 
-        # 분기 계산 (첫 번째 이관 행의 날짜 기준)
-        try:
-            first_date = datetime.strptime(rows_to_archive[0][0][:10], '%Y-%m-%d')
-            quarter = (first_date.month - 1) // 3 + 1
-            archive_name = f"로그_{first_date.year}-Q{quarter}"
-        except Exception:
-            archive_name = f"로그_아카이브_{datetime.now(KST).strftime('%Y%m%d')}"
-
-        # 아카이브 시트에 저장 (기존 시트가 있으면 이어붙이기)
-        all_sheet_titles = [s.title for s in spreadsheet.worksheets()]
-        if archive_name in all_sheet_titles:
-            archive_sheet = spreadsheet.worksheet(archive_name)
-            archive_sheet.append_rows(rows_to_archive, value_input_option='USER_ENTERED')
-        else:
-            archive_sheet = spreadsheet.add_worksheet(title=archive_name, rows=len(rows_to_archive) + 50, cols=2)
-            archive_sheet.update('A1', rows_to_archive, value_input_option='USER_ENTERED')
-
-        # 메인 로그 시트는 최근 keep_rows행만 남기기
-        log_sheet.clear()
-        log_sheet.update('A1', rows_to_keep, value_input_option='USER_ENTERED')
-
-        log_change(f"로그 아카이브: {len(rows_to_archive)}행 → '{archive_name}'으로 이관, {len(rows_to_keep)}행 유지")
-        invalidate_sheet_caches()
-        return True, (archive_name, len(rows_to_archive))
+        created = False
+        archive_names = []
+        for archive_name, rows in split_log_rows_by_quarter(rows_to_archive):
+            archive_sheet = get_cached_worksheet(archive_name, spreadsheet)
+            if archive_sheet is not None:
+                response = archive_sheet.append_rows(rows, value_input_option='RAW')
+                known = catalog["partition_rows"].get(archive_name)
+                last_row = last_row_from_append(response)
+                catalog["partition_rows"][archive_name] = last_row or ((known or 0) + len(rows))
+            else:
+                archive_sheet = spreadsheet.add_worksheet(title=archive_name, rows=len(rows) + 50, cols=len(LOG_HEADERS))
+                archive_sheet.update('A1', rows, value_input_option='RAW')
+                catalog["partition_rows"][archive_name] = len(rows)
+                created = True
+            archive_names.append(archive_name)
+
+        # 옮긴 앞쪽 행만 지운다 (한 번의 batch_update)
+        spreadsheet.batch_update({'requests': [{'deleteDimension': {'range': {
+            'sheetId': log_sheet.id, 'dimension': 'ROWS', 'startIndex': 0, 'endIndex': len(rows_to_archive),
+        }}}]})
+        catalog["log_rows"] = (catalog["log_rows"] or total_rows) - len(rows_to_archive)
+
+        if created:
+            invalidate_sheet_caches()  # 시트 목록이 바뀌었다
+        invalidate_sheet_caches(LOG_SHEET_NAME, *archive_names)  # 옮긴 파티션의 이력 캐시만 다시 읽게 한다
+        names = ", ".join(archive_names)
+        log_change(f"로그 아카이브: {len(rows_to_archive)}행 → '{names}'으로 이관, {total_rows - len(rows_to_archive)}행 유지",
+                   sheet=names, started=started)
+        return True, (names, len(rows_to_archive))
 
     except Exception as e:
         return False, str(e)